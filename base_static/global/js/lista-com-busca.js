@@ -0,0 +1,94 @@
+/**
+ * Listas de escolha com busca (widget ListaComBuscaWidget)
+ *
+ * Sem data-busca-url: a lista veio inteira e o campo só filtra os itens.
+ * Com data-busca-url: a lista traz apenas os selecionados e a busca consulta
+ * o servidor; os resultados entram na lista e os itens marcados ficam.
+ */
+
+function configurarListaComBusca(lista) {
+    const filtro = lista.querySelector('.lista-com-busca-filtro');
+    const opcoes = lista.querySelector('.lista-com-busca-opcoes');
+    const url = lista.dataset.buscaUrl;
+    if (!filtro || !opcoes) {
+        return;
+    }
+
+    if (!url) {
+        filtro.addEventListener('input', function() {
+            const texto = filtro.value.toLowerCase();
+            opcoes.querySelectorAll('.lista-com-busca-item').forEach(function(item) {
+                item.style.display = item.textContent.toLowerCase().includes(texto) ? 'block' : 'none';
+            });
+        });
+        return;
+    }
+
+    function criarItem(resultado) {
+        const item = document.createElement('label');
+        item.className = 'lista-com-busca-item';
+        item.style.display = 'block';
+        item.style.margin = '5px 0';
+        item.dataset.resultadoBusca = '1';
+
+        const entrada = document.createElement('input');
+        entrada.type = lista.dataset.tipoInput;
+        entrada.name = lista.dataset.nome;
+        entrada.value = resultado.id;
+        item.appendChild(entrada);
+        item.appendChild(document.createTextNode(' ' + resultado.rotulo + ' '));
+        if (resultado.detalhe) {
+            const detalhe = document.createElement('small');
+            detalhe.style.color = '#666';
+            detalhe.textContent = '(' + resultado.detalhe + ')';
+            item.appendChild(detalhe);
+        }
+        return item;
+    }
+
+    let espera = null;
+    let ultimaBusca = '';
+    filtro.addEventListener('input', function() {
+        clearTimeout(espera);
+        espera = setTimeout(function() {
+            const texto = filtro.value.trim();
+            if (texto === ultimaBusca) {
+                return;
+            }
+            ultimaBusca = texto;
+
+            // Resultados anteriores não marcados saem da lista
+            opcoes.querySelectorAll('.lista-com-busca-item[data-resultado-busca]').forEach(function(item) {
+                if (!item.querySelector('input').checked) {
+                    item.remove();
+                }
+            });
+            if (texto.length < 2) {
+                return;
+            }
+
+            fetch(url + '?q=' + encodeURIComponent(texto), {headers: {'Accept': 'application/json'}})
+                .then(function(resposta) { return resposta.json(); })
+                .then(function(dados) {
+                    if (texto !== ultimaBusca) {
+                        return;  // chegou depois de uma busca mais nova
+                    }
+                    const presentes = new Set(
+                        Array.from(opcoes.querySelectorAll('input')).map(function(entrada) { return entrada.value; })
+                    );
+                    dados.resultados.forEach(function(resultado) {
+                        if (!presentes.has(String(resultado.id))) {
+                            opcoes.appendChild(criarItem(resultado));
+                        }
+                    });
+                })
+                .catch(function(erro) {
+                    console.log('❌ Erro na busca:', erro);
+                });
+        }, 250);
+    });
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('.lista-com-busca').forEach(configurarListaComBusca);
+});
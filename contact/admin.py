@@ -27,9 +27,20 @@ class FamiliaAdmin(admin.ModelAdmin):
     )
     search_fields = ("nome", "endereco")
     list_filter = ("rua", "reuniao_devocional")
+    readonly_fields = ("data_ultima_reuniao",)  # muda só com o registro de visitas
     inlines = [ContactInline]
 
 
+@admin.register(models.VisitaFamilia)
+class VisitaFamiliaAdmin(admin.ModelAdmin):
+    list_display = ("familia", "data", "owner", "registrada_em")
+    list_select_related = ("familia", "owner")
+    date_hierarchy = "data"
+
+    def has_change_permission(self, request, obj=None):
+        return False  # o registro só recebe inserções
+
+
 # Register your models here.
 @admin.register(models.Contact)
 class ContactAdmin(admin.ModelAdmin):
@@ -126,3 +137,13 @@ class ReuniaoDevocionalAdmin(admin.ModelAdmin):
     search_fields = ("nome", "descricao", "local_detalhes")
     list_filter = ("ativa", "frequencia", "dia_semana", "created_at")
     readonly_fields = ("created_at", "updated_at")
+
+
+@admin.register(models.EstatisticasSnapshot)
+class EstatisticasSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("owner", "data_referencia", "desatualizado", "versao", "versao_calculada", "atualizado_em")
+    readonly_fields = ("versao", "versao_calculada", "atualizado_em")
+
+    @admin.display(boolean=True, description="Desatualizado")
+    def desatualizado(self, obj):
+        return obj.desatualizado
@@ -0,0 +1,155 @@
+"""
+Motor de agregação das estatísticas do sistema.
+
+Calcula o mesmo dicionário retornado por ``calcular_estatisticas_bd`` com um
+número fixo de consultas agrupadas (as atividades de todos os tipos saem de
+uma única consulta, ver ``contact.atividades``), independente da quantidade
+de atividades, famílias ou livros cadastrados.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .atividades import contar_atividades, somar_campos_sistema
+from .models import FAIXAS_ETARIAS, Contact, EstudoAtual, Familia, filtro_nascimento_por_idade
+from .progresso_livros import calcular_estatisticas_livros, progresso_por_categoria
+
+
+def calcular_demografia(user, data_referencia=None):
+    """Conta contatos por faixa etária na data de referência (uma consulta)"""
+    faixas = Contact.objects.filter(owner=user).contagem_por_faixa_etaria(data_referencia)
+    return {
+        'criancas_sistema': faixas['criancas'],
+        'prejovens_sistema': faixas['prejovens'],
+        'jovens_sistema': faixas['jovens'],
+        'adultos_sistema': faixas['adultos'],
+        'total_pessoas_sistema': sum(faixas.values()),
+    }
+
+
+def calcular_demografia_por_datas(user, datas):
+    """
+    Contagem por faixa etária em várias datas de referência com uma única
+    consulta. Retorna ``{data: {chave_da_faixa: quantidade}}``.
+    """
+    datas = sorted(set(datas))
+    if not datas:
+        return {}
+
+    expressoes = {}
+    for indice, data in enumerate(datas):
+        for chave, _, minima, maxima in FAIXAS_ETARIAS:
+            expressoes[f'{chave}_{indice}'] = Count(
+                'id', filter=filtro_nascimento_por_idade(data, minima, maxima)
+            )
+    totais = Contact.objects.filter(owner=user).aggregate(**expressoes)
+
+    return {
+        data: {chave: totais[f'{chave}_{indice}'] for chave, _, _, _ in FAIXAS_ETARIAS}
+        for indice, data in enumerate(datas)
+    }
+
+
+def calcular_atividades_sistema(user):
+    """
+    Contadores ``sistema_*`` de atividades e participantes do ``HistoricoCiclo``.
+
+    Não dependem da data do ciclo, então podem ser calculados uma vez e
+    reaproveitados por todos os históricos do usuário.
+    """
+    return somar_campos_sistema(contar_atividades(user))
+
+
+def calcular_estatisticas_agregadas(user):
+    """
+    Calcula as estatísticas do dashboard com um número constante de consultas.
+
+    Retorna exatamente as mesmas chaves de ``calcular_estatisticas_bd``.
+    """
+    atividades = contar_atividades(user, tipos=(
+        'grupos_prejovens', 'aulas_criancas', 'circulos_estudo', 'reunioes_devocionais', 'familias_rd',
+    ))
+    total_familias = Familia.objects.filter(owner=user).count()
+
+    # Reuniões devocionais: famílias com RD e os membros delas
+    familias_rd = atividades['familias_rd']
+
+    participantes_prejovens = atividades['grupos_prejovens']['participantes']
+    participantes_criancas = atividades['aulas_criancas']['participantes']
+    participantes_circulos = atividades['circulos_estudo']['participantes']
+    participantes_devocionais = familias_rd['participantes']
+
+    participantes_prejovens_bahais = atividades['grupos_prejovens']['bahais']
+    participantes_criancas_bahais = atividades['aulas_criancas']['bahais']
+    participantes_circulos_bahais = atividades['circulos_estudo']['bahais']
+    # Usar o maior valor entre os dados das reuniões devocionais e os das famílias
+    participantes_devocionais_bahais = max(atividades['reunioes_devocionais']['bahais'], familias_rd['bahais'])
+
+    estudos = EstudoAtual.objects.filter(owner=user).aggregate(
+        andamento=Count('id', filter=Q(status='em_andamento')),
+        pausados=Count('id', filter=Q(status='pausado')),
+    )
+
+    return {
+        'grupos_prejovens': atividades['grupos_prejovens']['atividades'],
+        'aulas_criancas': atividades['aulas_criancas']['atividades'],
+        'circulos_estudo': atividades['circulos_estudo']['atividades'],
+        'reunioes_devocionais': familias_rd['atividades'],
+        'participantes_prejovens': participantes_prejovens,
+        'participantes_criancas': participantes_criancas,
+        'participantes_circulos': participantes_circulos,
+        'participantes_devocionais': participantes_devocionais,
+        'participantes_prejovens_bahais': participantes_prejovens_bahais,
+        'participantes_criancas_bahais': participantes_criancas_bahais,
+        'participantes_circulos_bahais': participantes_circulos_bahais,
+        'participantes_devocionais_bahais': participantes_devocionais_bahais,
+        'participantes_total': participantes_prejovens + participantes_criancas + participantes_circulos + participantes_devocionais,
+        'participantes_total_bahais': participantes_prejovens_bahais + participantes_criancas_bahais + participantes_circulos_bahais + participantes_devocionais_bahais,
+        'total_familias': total_familias,
+        'estudos_andamento': estudos['andamento'],
+        'estudos_pausados': estudos['pausados'],
+        'total_estudos': estudos['andamento'] + estudos['pausados'],
+        **calcular_demografia(user),
+        **calcular_estatisticas_livros(user),
+    }
+
+
+def criado_entre(data_inicio, data_fim, campo='created_at'):
+    """
+    ``Q`` de ``campo`` (DateTimeField) entre as datas, inclusive, no fuso
+    atual. Equivale a ``campo__date__range``, mas compara o próprio campo e
+    por isso pode usar o índice dele.
+    """
+    inicio = timezone.make_aware(datetime.combine(data_inicio, time.min))
+    fim = timezone.make_aware(datetime.combine(data_fim + timedelta(days=1), time.min))
+    return Q(**{f'{campo}__gte': inicio, f'{campo}__lt': fim})
+
+
+def contar_atividades_novas(user, numero_ciclo):
+    """Atividades criadas no ciclo ``numero_ciclo`` (uma consulta)"""
+    novas = contar_atividades(user, numero_ciclo=numero_ciclo, tipos=(
+        'grupos_prejovens', 'aulas_criancas', 'circulos_estudo', 'reunioes_devocionais',
+    ))
+    return {
+        'grupos_prejovens_novos': novas['grupos_prejovens']['atividades'],
+        'aulas_criancas_novas': novas['aulas_criancas']['atividades'],
+        'circulos_estudo_novos': novas['circulos_estudo']['atividades'],
+        'reunioes_devocionais_novas': novas['reunioes_devocionais']['atividades'],
+    }
+
+
+def calcular_novidades_do_ciclo(user, numero_ciclo, data_inicio, data_fim):
+    """
+    Atividades criadas no ciclo e estudos iniciados/concluídos entre as datas
+    do ciclo. Os estudos iniciados vêm agrupados pelo nome da categoria do
+    livro (``None`` quando o livro não tem categoria).
+    """
+    blocos = progresso_por_categoria(user, criado_entre(data_inicio, data_fim), catalogo_completo=False)
+    iniciados_por_categoria = {bloco['nome']: bloco['iniciados'] for bloco in blocos if bloco['iniciados']}
+    return {
+        **contar_atividades_novas(user, numero_ciclo),
+        'livros_novos': sum(iniciados_por_categoria.values()),
+        'livros_concluidos_ciclo': sum(bloco['concluidos'] for bloco in blocos),
+        'livros_iniciados_por_categoria': iniciados_por_categoria,
+    }
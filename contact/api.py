@@ -0,0 +1,194 @@
+"""
+API de leitura (v1): contatos, famílias, ruas, atividades e histórico de ciclos.
+
+Cada recurso é descrito em ``RECURSOS``; as views de ``api_views`` só
+traduzem a requisição. Tudo é restrito ao ``owner`` da requisição e, quando o
+modelo tem ``show``, aos registros visíveis.
+
+Parâmetros das listagens e exportações:
+
+* ``campos``: lista separada por vírgulas (padrão: todos os campos do
+  recurso). Chaves estrangeiras vêm como o id do registro relacionado.
+* filtros: ``campo=valor``, ``campo__gte``, ``campo__lte``, ``campo__in``
+  (valores separados por vírgula) e ``campo__isnull`` (``true``/``false``),
+  além dos filtros especiais do recurso (ex.: ``faixa_etaria`` em contatos).
+* listagem: ``limite`` (padrão 50, máximo 500) e ``cursor`` (paginação por
+  chave, ver ``contact.paginacao``).
+
+As exportações (NDJSON ou CSV) percorrem ``values_list().iterator()`` em
+lotes de ``TAMANHO_LOTE_EXPORTACAO`` linhas, sem instanciar modelos nem
+carregar o resultado inteiro na memória.
+"""
+import csv
+import datetime
+from decimal import Decimal
+
+from django.apps import apps as apps_padrao
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+VERSAO_API = 'v1'
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 500
+TAMANHO_LOTE_EXPORTACAO = 2000
+
+PARAMETROS_RESERVADOS = {'campos', 'cursor', 'limite', 'formato'}
+SUFIXOS_FILTRO = ('gte', 'lte', 'in', 'isnull')
+
+# Campos nunca expostos (o dono é sempre o usuário da requisição)
+CAMPOS_OCULTOS = {'owner', 'show'}
+
+# nome: modelo, campo de visibilidade, ordenação da listagem e filtros
+# especiais (parâmetro -> método do queryset)
+RECURSOS = {
+    'contatos': {
+        'modelo': 'Contact',
+        'visibilidade': 'show',
+        'ordenacao': ('-id',),
+        'filtros_especiais': {'faixa_etaria': 'da_faixa_etaria'},
+    },
+    'familias': {'modelo': 'Familia', 'visibilidade': 'show', 'ordenacao': ('-id',)},
+    'ruas': {'modelo': 'Rua', 'visibilidade': None, 'ordenacao': ('-id',)},
+    'grupos_prejovens': {'modelo': 'GrupoPreJovens', 'visibilidade': 'show', 'ordenacao': ('-id',)},
+    'aulas_criancas': {'modelo': 'AulaCrianca', 'visibilidade': 'show', 'ordenacao': ('-id',)},
+    'circulos_estudo': {'modelo': 'CirculoEstudo', 'visibilidade': 'show', 'ordenacao': ('-id',)},
+    'grupos_familias': {'modelo': 'GrupoFamilias', 'visibilidade': 'show', 'ordenacao': ('-id',)},
+    'reunioes_devocionais': {'modelo': 'ReuniaoDevocional', 'visibilidade': None, 'ordenacao': ('-id',)},
+    'historico_ciclos': {'modelo': 'HistoricoCiclo', 'visibilidade': None, 'ordenacao': ('-numero_ciclo', '-id')},
+}
+
+
+class ErroParametro(ValueError):
+    """Parâmetro inválido na requisição (vira resposta 400)"""
+
+
+def modelo_do_recurso(nome, modelos=apps_padrao):
+    return modelos.get_model('contact', RECURSOS[nome]['modelo'])
+
+
+def campos_do_recurso(modelo):
+    """Campos concretos expostos, na ordem do modelo"""
+    return [campo.name for campo in modelo._meta.concrete_fields if campo.name not in CAMPOS_OCULTOS]
+
+
+def campos_pedidos(modelo, parametros):
+    disponiveis = campos_do_recurso(modelo)
+    texto = parametros.get('campos', '').strip()
+    if not texto:
+        return disponiveis
+    pedidos = list(dict.fromkeys(c.strip() for c in texto.split(',') if c.strip()))
+    desconhecidos = [c for c in pedidos if c not in disponiveis]
+    if desconhecidos:
+        raise ErroParametro(f'Campos desconhecidos: {", ".join(desconhecidos)}')
+    return pedidos
+
+
+def limite_pedido(parametros):
+    try:
+        limite = int(parametros.get('limite', LIMITE_PADRAO))
+    except ValueError:
+        raise ErroParametro('limite deve ser um número inteiro')
+    return min(max(limite, 1), LIMITE_MAXIMO)
+
+
+def _booleano(parametro, valor):
+    if valor.lower() not in ('true', 'false', '1', '0'):
+        raise ErroParametro(f'{parametro} deve ser true ou false')
+    return valor.lower() in ('true', '1')
+
+
+def _converter(campo, valor):
+    if campo.get_internal_type() == 'BooleanField':
+        return _booleano(campo.name, valor)
+    try:
+        return campo.to_python(valor)
+    except ValidationError:
+        raise ErroParametro(f'Valor inválido para {campo.name}: {valor!r}')
+
+
+def _filtro(modelo, parametro, valor):
+    nome, _, sufixo = parametro.partition('__')
+    if nome in CAMPOS_OCULTOS or (sufixo and sufixo not in SUFIXOS_FILTRO):
+        raise ErroParametro(f'Filtro desconhecido: {parametro}')
+    try:
+        campo = modelo._meta.get_field(nome)
+    except FieldDoesNotExist:
+        raise ErroParametro(f'Filtro desconhecido: {parametro}')
+    if not campo.concrete:
+        raise ErroParametro(f'Filtro desconhecido: {parametro}')
+
+    if sufixo == 'isnull':
+        return {parametro: _booleano(parametro, valor)}
+    if sufixo == 'in':
+        return {parametro: [_converter(campo, v.strip()) for v in valor.split(',') if v.strip()]}
+    return {parametro: _converter(campo, valor)}
+
+
+def consulta_do_recurso(nome, owner, parametros, modelos=apps_padrao):
+    """Queryset do recurso para o ``owner``, com os filtros da requisição"""
+    recurso = RECURSOS[nome]
+    modelo = modelo_do_recurso(nome, modelos)
+    consulta = modelo.objects.filter(owner=owner)
+    if recurso['visibilidade']:
+        consulta = consulta.filter(**{recurso['visibilidade']: True})
+
+    especiais = recurso.get('filtros_especiais', {})
+    for parametro, valor in parametros.items():
+        if parametro in PARAMETROS_RESERVADOS:
+            continue
+        if parametro in especiais:
+            consulta = getattr(consulta, especiais[parametro])(valor)
+        else:
+            consulta = consulta.filter(**_filtro(modelo, parametro, valor))
+    return consulta
+
+
+# ---------------------------------------------------------------------------
+# Exportação em streaming
+# ---------------------------------------------------------------------------
+
+def linhas_exportadas(consulta, campos, tamanho_lote=TAMANHO_LOTE_EXPORTACAO):
+    """Tuplas dos ``campos`` em ordem de id, lidas do banco em lotes"""
+    return consulta.order_by('id').values_list(*campos).iterator(chunk_size=tamanho_lote)
+
+
+def gerar_ndjson(consulta, campos, tamanho_lote=TAMANHO_LOTE_EXPORTACAO):
+    codificador = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for linha in linhas_exportadas(consulta, campos, tamanho_lote):
+        yield codificador.encode(dict(zip(campos, linha))) + '\n'
+
+
+class _Eco:
+    """Arquivo falso para o ``csv.writer``: devolve a linha em vez de guardá-la"""
+
+    def write(self, valor):
+        return valor
+
+
+def _valor_csv(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, (datetime.date, datetime.time)):  # inclui datetime
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return valor
+
+
+def gerar_csv(consulta, campos, tamanho_lote=TAMANHO_LOTE_EXPORTACAO):
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow(campos)
+    for linha in linhas_exportadas(consulta, campos, tamanho_lote):
+        yield escritor.writerow([_valor_csv(valor) for valor in linha])
+
+
+FORMATOS_EXPORTACAO = {
+    'ndjson': ('application/x-ndjson; charset=utf-8', gerar_ndjson),
+    'csv': ('text/csv; charset=utf-8', gerar_csv),
+}
+
+
+def serializar(linhas, campos):
+    """Linhas de ``values()`` só com os ``campos`` pedidos"""
+    return [{campo: linha[campo] for campo in campos} for linha in linhas]
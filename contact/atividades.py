@@ -0,0 +1,185 @@
+"""
+Registro dos tipos de atividade e contagem de todos eles numa só consulta.
+
+Cada entrada de ``ATIVIDADES`` descreve um modelo de atividade: o filtro
+que define o que conta como atividade, como contar participantes (relação
+com ``Contact`` ou campos numéricos somados), o filtro dos participantes
+Bahá'ís, o campo do ciclo de criação, os campos ``sistema_*`` e os
+contadores do ``HistoricoCiclo`` que a atividade alimenta.
+
+``contar_atividades`` monta, a partir do registro, um ``UNION ALL`` com uma
+linha agregada por tipo: incluir um tipo novo no registro não acrescenta
+consultas ao dashboard, ao encerramento do ciclo nem ao recálculo dos
+históricos.
+"""
+from django.apps import apps
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+ATIVIDADES = {
+    'circulos_estudo': {
+        'modelo': 'CirculoEstudo',
+        'filtro': {},
+        'participantes': 'participantes',
+        'bahais': 'participantes__is_bahai',
+        'campo_ciclo': 'numero_ciclo_criacao',
+        'campos_sistema': (
+            'sistema_circulos_estudo',
+            'sistema_participantes_circulos',
+            'sistema_participantes_circulos_bahais',
+        ),
+        'contadores_historico': ('total_circulos_estudo', 'novas_circulos_estudo'),
+    },
+    'grupos_prejovens': {
+        'modelo': 'GrupoPreJovens',
+        'filtro': {},
+        'participantes': 'pre_jovens',
+        'bahais': 'pre_jovens__is_bahai',
+        'campo_ciclo': 'numero_ciclo_criacao',
+        'campos_sistema': (
+            'sistema_grupos_prejovens',
+            'sistema_participantes_prejovens',
+            'sistema_participantes_prejovens_bahais',
+        ),
+        'contadores_historico': ('total_grupos_prejovens', 'novas_grupos_prejovens'),
+    },
+    'aulas_criancas': {
+        'modelo': 'AulaCrianca',
+        'filtro': {},
+        'participantes': 'participantes',
+        'bahais': 'participantes__is_bahai',
+        'campo_ciclo': 'numero_ciclo_criacao',
+        'campos_sistema': (
+            'sistema_aulas_criancas',
+            'sistema_participantes_criancas',
+            'sistema_participantes_criancas_bahais',
+        ),
+        'contadores_historico': ('total_aulas_criancas', 'novas_aulas_criancas'),
+    },
+    'reunioes_devocionais': {
+        'modelo': 'ReuniaoDevocional',
+        'filtro': {},
+        # Participantes informados na própria reunião
+        'soma_participantes': 'numero_participantes',
+        'soma_bahais': 'participantes_bahais',
+        'campo_ciclo': 'numero_ciclo_criacao',
+        'campos_sistema': (
+            'sistema_reunioes_devocionais',
+            'sistema_participantes_devocionais',
+            'sistema_participantes_devocionais_bahais',
+        ),
+        'contadores_historico': ('total_reunioes_devocionais', 'novas_reunioes_devocionais'),
+    },
+    'familias_rd': {
+        # Família com reunião devocional conta como reunião; os membros, como participantes
+        'modelo': 'Familia',
+        'filtro': {'reuniao_devocional': True},
+        'participantes': 'membros',
+        'bahais': 'membros__is_bahai',
+        'campo_ciclo': 'numero_ciclo_criacao',
+        'campos_sistema': (
+            'sistema_reunioes_devocionais',
+            'sistema_participantes_devocionais',
+            'sistema_participantes_devocionais_bahais',
+        ),
+        'contadores_historico': ('total_reunioes_devocionais', 'novas_familias_rds'),
+    },
+    'grupos_familias': {
+        'modelo': 'GrupoFamilias',
+        'filtro': {},
+        'participantes': 'participantes',
+        'bahais': 'participantes__is_bahai',
+        # Sem ciclo de criação: por período, usa a data da última reunião
+        'campo_ciclo': None,
+        'campo_data': 'data_ultima_reuniao_reflexao',
+        'campos_sistema': (
+            'sistema_grupos_familias',
+            'sistema_participantes_familias',
+            'sistema_participantes_familias_bahais',
+        ),
+        'contadores_historico': ('total_grupos_familias',),
+    },
+}
+
+# Registros que não são atividades mas também alimentam o HistoricoCiclo
+OUTROS_CONTADORES_HISTORICO = {
+    'estudoatual': ('livros_iniciados', 'novos_livros_iniciados'),
+}
+
+CONTAGEM_VAZIA = {'atividades': 0, 'participantes': 0, 'bahais': 0}
+
+
+def _agregados(descricao):
+    # Apelidos prefixados: ``participantes`` também é nome de relação e o
+    # filtro dos Bahá'ís passaria a apontar para a anotação
+    if descricao.get('participantes'):
+        return {
+            'qtd_atividades': Count('id', distinct=True),
+            'qtd_participantes': Count(descricao['participantes']),
+            'qtd_bahais': Count(descricao['participantes'], filter=Q(**{descricao['bahais']: True})),
+        }
+    return {
+        'qtd_atividades': Count('id', distinct=True),
+        'qtd_participantes': Coalesce(Sum(descricao['soma_participantes']), 0),
+        'qtd_bahais': Coalesce(Sum(descricao['soma_bahais']), 0),
+    }
+
+
+def contar_atividades(owner, numero_ciclo=None, intervalo=None, tipos=None):
+    """
+    ``{tipo: {'atividades', 'participantes', 'bahais'}}`` das atividades do
+    usuário, com uma única consulta para todos os ``tipos`` (padrão: todos
+    do registro).
+
+    Com ``numero_ciclo``, conta só as atividades criadas naquele ciclo; os
+    tipos sem campo de ciclo usam ``intervalo`` (``(início, fim)``) no
+    ``campo_data`` ou ficam zerados.
+    """
+    tipos = list(tipos or ATIVIDADES)
+    consultas = []
+    for tipo in tipos:
+        descricao = ATIVIDADES[tipo]
+        consulta = apps.get_model('contact', descricao['modelo']).objects.filter(
+            owner=owner, **descricao['filtro']
+        )
+        if numero_ciclo is not None:
+            if descricao['campo_ciclo']:
+                consulta = consulta.filter(**{descricao['campo_ciclo']: numero_ciclo})
+            elif intervalo and descricao.get('campo_data'):
+                consulta = consulta.filter(**{f"{descricao['campo_data']}__range": intervalo})
+            else:
+                continue
+        consultas.append(
+            consulta.order_by().annotate(tipo=Value(tipo)).values('tipo').annotate(**_agregados(descricao))
+        )
+
+    resultado = {tipo: dict(CONTAGEM_VAZIA) for tipo in tipos}
+    if consultas:
+        primeira, *demais = consultas
+        for linha in (primeira.union(*demais, all=True) if demais else primeira):
+            resultado[linha['tipo']] = {chave: linha[f'qtd_{chave}'] for chave in CONTAGEM_VAZIA}
+    return resultado
+
+
+def somar_campos_sistema(contagens):
+    """Campos ``sistema_*`` do ``HistoricoCiclo`` somando os tipos que os compartilham"""
+    campos = {}
+    for tipo, contagem in contagens.items():
+        for campo, chave in zip(ATIVIDADES[tipo]['campos_sistema'], ('atividades', 'participantes', 'bahais')):
+            campos[campo] = campos.get(campo, 0) + contagem[chave]
+    return campos
+
+
+def contadores_historico(instance):
+    """
+    Contadores do ``HistoricoCiclo`` que o registro ``instance`` incrementa
+    ao ser lançado num ciclo (vazio se ele não conta, ex.: família sem RD).
+    """
+    nome_modelo = instance._meta.model_name
+    for descricao in ATIVIDADES.values():
+        if descricao['modelo'].lower() != nome_modelo:
+            continue
+        if all(getattr(instance, campo) == valor for campo, valor in descricao['filtro'].items()):
+            return descricao['contadores_historico']
+    return OUTROS_CONTADORES_HISTORICO.get(nome_modelo, ())
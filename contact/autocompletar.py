@@ -0,0 +1,112 @@
+"""
+Autocompletar por prefixo de contatos, famílias, ruas e livros.
+
+O nome de cada registro fica normalizado (minúsculas, sem acentos) numa
+coluna indexada: ``IndiceBusca.nome_normalizado`` para os registros do
+usuário e ``Livro.titulo_normalizado`` para o catálogo, que é global. O
+prefixo digitado vira um intervalo (``>= prefixo`` e ``< sucessor``) que o
+banco resolve percorrendo o índice já na ordem do nome, e a consulta para
+em ``LIMITE_AUTOCOMPLETAR`` resultados.
+
+Prefixos curtos (até ``AUTOCOMPLETAR_PREFIXO_QUENTE`` caracteres) são os
+mais digitados e os que casam com mais linhas; o resultado deles fica no
+cache por ``AUTOCOMPLETAR_TTL`` segundos. A chave leva uma geração por
+dono, incrementada pelos sinais quando um nome muda
+(``invalidar_autocompletar``), então uma alteração aparece na próxima
+busca. Com um cache local por processo (LocMemCache) os outros processos
+só a veem quando a entrada expira.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .busca import normalizar_texto
+
+
+LIMITE_AUTOCOMPLETAR = 20
+AUTOCOMPLETAR_TTL = 30
+AUTOCOMPLETAR_PREFIXO_QUENTE = 4
+
+# tipo da URL: tipo no índice de busca (None: catálogo de livros)
+FONTES_AUTOCOMPLETAR = {
+    'contatos': 'contato',
+    'familias': 'familia',
+    'ruas': 'rua',
+    'livros': None,
+}
+
+
+def _chave_geracao(owner_id):
+    return f'autocompletar:geracao:{owner_id if owner_id is not None else "catalogo"}'
+
+
+def invalidar_autocompletar(owner_id=None):
+    """Descarta os prefixos guardados do dono (``None``: catálogo de livros)"""
+    chave = _chave_geracao(owner_id)
+    cache.add(chave, 0, None)
+    try:
+        cache.incr(chave)
+    except ValueError:  # expulsa do cache entre o add e o incr
+        cache.set(chave, 1, None)
+
+
+def _sucessor(prefixo):
+    """Menor texto maior que todos os que começam com ``prefixo``"""
+    return prefixo[:-1] + chr(ord(prefixo[-1]) + 1)
+
+
+def _consulta(owner, tipo, prefixo, limite):
+    from .models import IndiceBusca, Livro
+
+    tipo_indice = FONTES_AUTOCOMPLETAR[tipo]
+    if tipo_indice is not None:
+        return IndiceBusca.objects.filter(
+            owner_id=owner.pk,
+            tipo=tipo_indice,
+            nome_normalizado__gte=prefixo,
+            nome_normalizado__lt=_sucessor(prefixo),
+        ).order_by('nome_normalizado').values_list('objeto_id', 'titulo')[:limite]
+
+    livros = Livro.objects.filter(ativo=True, titulo_normalizado__gte=prefixo,
+                                  titulo_normalizado__lt=_sucessor(prefixo))
+    if prefixo.isdigit():
+        livros = livros | Livro.objects.filter(ativo=True, numero=int(prefixo))
+    return livros.order_by('numero', 'titulo_normalizado').values_list(
+        'pk', 'numero', 'titulo', 'categoria__nome'
+    )[:limite]
+
+
+def _resultado(tipo, linha):
+    from .models import Livro
+
+    if FONTES_AUTOCOMPLETAR[tipo] is not None:
+        pk, rotulo = linha
+    else:
+        pk, numero, titulo, nome_categoria = linha
+        rotulo = Livro.rotulo(numero, titulo, nome_categoria)
+    return {'id': pk, 'rotulo': rotulo}
+
+
+async def autocompletar(owner, tipo, texto, limite=LIMITE_AUTOCOMPLETAR):
+    """
+    Até ``limite`` (no máximo ``LIMITE_AUTOCOMPLETAR``) registros do
+    ``tipo`` cujo nome começa com ``texto``, como dicionários
+    ``{'id', 'rotulo'}`` em ordem alfabética (livros: por número).
+    """
+    prefixo = normalizar_texto(texto)[:255]
+    if not prefixo:
+        return []
+    limite = min(max(limite, 1), LIMITE_AUTOCOMPLETAR)
+
+    chave = None
+    if len(prefixo) <= getattr(settings, 'AUTOCOMPLETAR_PREFIXO_QUENTE', AUTOCOMPLETAR_PREFIXO_QUENTE):
+        dono = None if FONTES_AUTOCOMPLETAR[tipo] is None else owner.pk
+        geracao = await cache.aget(_chave_geracao(dono), 0)
+        chave = f'autocompletar:{tipo}:{dono}:{geracao}:{limite}:{prefixo.replace(" ", ".")}'
+        resultados = await cache.aget(chave)
+        if resultados is not None:
+            return resultados
+
+    resultados = [_resultado(tipo, linha) async for linha in _consulta(owner, tipo, prefixo, limite)]
+    if chave is not None:
+        await cache.aset(chave, resultados, getattr(settings, 'AUTOCOMPLETAR_TTL', AUTOCOMPLETAR_TTL))
+    return resultados
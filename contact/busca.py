@@ -0,0 +1,235 @@
+"""
+Busca textual de contatos, famílias e ruas.
+
+O texto pesquisável de cada registro é normalizado (minúsculas, sem acentos)
+e gravado em ``IndiceBusca``. A consulta usa o mecanismo do banco:
+
+* SQLite: tabela virtual FTS5 ``contact_indicebusca_fts`` (ranking bm25);
+* PostgreSQL: ``to_tsvector('simple', conteudo)`` com índice GIN (ts_rank);
+* outros bancos, ou SQLite sem FTS5: ``LIKE`` na tabela normalizada.
+
+Todos os termos precisam aparecer (como prefixo de alguma palavra).
+"""
+import re
+import unicodedata
+
+from django.apps import apps as apps_padrao
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+
+from .insercao import inserir_em_massa
+
+
+TABELA_FTS = 'contact_indicebusca_fts'
+
+# tipo: (modelo, campos pesquisáveis, campos do título, campo de visibilidade)
+FONTES = {
+    'contato': (
+        'Contact',
+        ['first_name', 'last_name', 'description', 'familia__nome', 'rua__nome', 'rua__bairro'],
+        ['first_name', 'last_name'],
+        'show',
+    ),
+    'familia': (
+        'Familia',
+        ['nome', 'endereco', 'description', 'rua__nome'],
+        ['nome'],
+        'show',
+    ),
+    'rua': (
+        'Rua',
+        ['nome', 'bairro'],
+        ['nome'],
+        None,
+    ),
+}
+
+_backend_cache = {}
+
+
+PALAVRA = re.compile(r'[a-z0-9]+')
+
+
+def normalizar_texto(texto):
+    """Minúsculas, sem acentos e apenas letras/dígitos separados por espaço"""
+    if not texto:
+        return ''
+    sem_acentos = str(texto)
+    if not sem_acentos.isascii():  # texto ASCII não tem acentos a remover
+        sem_acentos = ''.join(
+            c for c in unicodedata.normalize('NFKD', sem_acentos)
+            if not unicodedata.combining(c)
+        )
+    return ' '.join(PALAVRA.findall(sem_acentos.lower()))
+
+
+def termos_da_busca(texto):
+    return normalizar_texto(texto).split()
+
+
+def backend_de_busca():
+    """'fts5', 'postgresql' ou 'like', conforme o banco em uso"""
+    chave = connection.alias
+    if chave not in _backend_cache:
+        if connection.vendor == 'postgresql':
+            _backend_cache[chave] = 'postgresql'
+        elif connection.vendor == 'sqlite' and TABELA_FTS in connection.introspection.table_names():
+            _backend_cache[chave] = 'fts5'
+        else:
+            _backend_cache[chave] = 'like'
+    return _backend_cache[chave]
+
+
+# ---------------------------------------------------------------------------
+# Indexação
+# ---------------------------------------------------------------------------
+
+CAMPOS_INDICE = ('tipo', 'objeto_id', 'owner_id', 'titulo', 'conteudo', 'nome_normalizado')
+
+
+def _entradas(tipo, registros):
+    """Tuplas de ``CAMPOS_INDICE`` para os registros visíveis e com dono"""
+    _, campos, campos_titulo, campo_visivel = FONTES[tipo]
+    for registro in registros:
+        if registro['owner_id'] is None:
+            continue
+        if campo_visivel and not registro[campo_visivel]:
+            continue
+        titulo = ' '.join(registro[c] for c in campos_titulo if registro[c]).strip()[:255]
+        yield (
+            tipo,
+            registro['id'],
+            registro['owner_id'],
+            titulo,
+            normalizar_texto(' '.join(str(registro[c]) for c in campos if registro[c])),
+            normalizar_texto(titulo)[:255],
+        )
+
+
+def reindexar(tipo, ids=None, owner=None, modelos=apps_padrao, tamanho_lote=1000):
+    """
+    Regrava as entradas do índice de um tipo: dos ``ids`` informados, de um
+    ``owner`` ou de todos os registros. ``modelos`` permite usar o registro
+    de modelos históricos de uma migração. Retorna o número de entradas.
+    """
+    nome_modelo, campos, campos_titulo, campo_visivel = FONTES[tipo]
+    Modelo = modelos.get_model('contact', nome_modelo)
+    IndiceBusca = modelos.get_model('contact', 'IndiceBusca')
+
+    origem = Modelo.objects.all()
+    antigas = IndiceBusca.objects.filter(tipo=tipo)
+    if ids is not None:
+        ids = list(ids)
+        origem = origem.filter(pk__in=ids)
+        antigas = antigas.filter(objeto_id__in=ids)
+    if owner is not None:
+        origem = origem.filter(owner=owner)
+        antigas = antigas.filter(owner=owner)
+
+    colunas = {'id', 'owner_id', *campos, *campos_titulo}
+    if campo_visivel:
+        colunas.add(campo_visivel)
+    registros = origem.order_by().values(*colunas).iterator(chunk_size=tamanho_lote)
+
+    with transaction.atomic():
+        antigas.delete()
+        return inserir_em_massa(IndiceBusca, CAMPOS_INDICE, _entradas(tipo, registros), tamanho_lote)
+
+
+def reindexar_tudo(owner=None, modelos=apps_padrao):
+    """Reconstrói o índice de todos os tipos; retorna ``{tipo: quantidade}``"""
+    return {tipo: reindexar(tipo, owner=owner, modelos=modelos) for tipo in FONTES}
+
+
+def remover_do_indice(tipo, objeto_id):
+    from .models import IndiceBusca
+    IndiceBusca.objects.filter(tipo=tipo, objeto_id=objeto_id).delete()
+
+
+# ---------------------------------------------------------------------------
+# Consulta
+# ---------------------------------------------------------------------------
+
+def _condicao_textual(termos):
+    """Trecho SQL (sobre o alias ``i``) e parâmetros que casam todos os termos"""
+    backend = backend_de_busca()
+    if backend == 'fts5':
+        consulta = ' '.join(f'"{termo}"*' for termo in termos)
+        return f'i.id IN (SELECT rowid FROM {TABELA_FTS} WHERE {TABELA_FTS} MATCH %s)', [consulta]
+    if backend == 'postgresql':
+        consulta = ' & '.join(f'{termo}:*' for termo in termos)
+        return "to_tsvector('simple', i.conteudo) @@ to_tsquery('simple', %s)", [consulta]
+    condicoes = ' AND '.join(["(' ' || i.conteudo) LIKE %s"] * len(termos))
+    return condicoes, [f'% {termo}%' for termo in termos]
+
+
+def filtro_de_busca(tipo, owner, texto):
+    """
+    Expressão para ``filter(pk__in=...)`` com os ids do ``tipo`` que casam
+    com ``texto``. Permite manter a ordenação e a paginação das listagens.
+    """
+    from .models import IndiceBusca
+
+    termos = termos_da_busca(texto)
+    if not termos:
+        return RawSQL('SELECT NULL WHERE 1 = 0', [])
+    condicao, parametros = _condicao_textual(termos)
+    return RawSQL(
+        f'SELECT i.objeto_id FROM {IndiceBusca._meta.db_table} i '
+        f'WHERE i.tipo = %s AND i.owner_id = %s AND {condicao}',
+        [tipo, owner.pk, *parametros],
+    )
+
+
+def buscar(owner, texto, tipos=None, limite=50):
+    """
+    Busca ranqueada em contatos, famílias e ruas do usuário. Retorna uma
+    lista de dicionários ``{'tipo', 'id', 'titulo', 'relevancia'}``, do mais
+    relevante para o menos relevante.
+    """
+    from .models import IndiceBusca
+
+    termos = termos_da_busca(texto)
+    if not termos:
+        return []
+
+    tabela = IndiceBusca._meta.db_table
+    tipos = [t for t in (tipos or FONTES) if t in FONTES]
+    marcadores = ', '.join(['%s'] * len(tipos))
+    backend = backend_de_busca()
+
+    if backend == 'fts5':
+        consulta = ' '.join(f'"{termo}"*' for termo in termos)
+        sql = (
+            f'SELECT i.tipo, i.objeto_id, i.titulo, -bm25({TABELA_FTS}) AS relevancia '
+            f'FROM {TABELA_FTS} JOIN {tabela} i ON i.id = {TABELA_FTS}.rowid '
+            f'WHERE {TABELA_FTS} MATCH %s AND i.owner_id = %s AND i.tipo IN ({marcadores}) '
+            f'ORDER BY relevancia DESC, i.titulo LIMIT %s'
+        )
+        parametros = [consulta, owner.pk, *tipos, limite]
+    elif backend == 'postgresql':
+        consulta = ' & '.join(f'{termo}:*' for termo in termos)
+        sql = (
+            f"SELECT i.tipo, i.objeto_id, i.titulo, "
+            f"ts_rank(to_tsvector('simple', i.conteudo), to_tsquery('simple', %s)) AS relevancia "
+            f"FROM {tabela} i "
+            f"WHERE to_tsvector('simple', i.conteudo) @@ to_tsquery('simple', %s) "
+            f"AND i.owner_id = %s AND i.tipo IN ({marcadores}) "
+            f"ORDER BY relevancia DESC, i.titulo LIMIT %s"
+        )
+        parametros = [consulta, consulta, owner.pk, *tipos, limite]
+    else:
+        condicao, parametros_condicao = _condicao_textual(termos)
+        sql = (
+            f'SELECT i.tipo, i.objeto_id, i.titulo, 0 AS relevancia FROM {tabela} i '
+            f'WHERE {condicao} AND i.owner_id = %s AND i.tipo IN ({marcadores}) '
+            f'ORDER BY i.titulo LIMIT %s'
+        )
+        parametros = [*parametros_condicao, owner.pk, *tipos, limite]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, parametros)
+        return [
+            {'tipo': tipo, 'id': objeto_id, 'titulo': titulo, 'relevancia': float(relevancia)}
+            for tipo, objeto_id, titulo, relevancia in cursor.fetchall()
+        ]
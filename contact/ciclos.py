@@ -0,0 +1,82 @@
+"""
+Calendário de ciclos pré-calculado por plano (ConfiguracaoEstatisticas).
+
+As datas de início e fim de todos os ciclos do plano são calculadas uma vez
+e guardadas em memória, identificadas pelos parâmetros do plano; o
+``save`` do plano descarta a entrada. A busca do ciclo de uma data é feita
+por ``bisect`` sobre as datas de início (O(log n)).
+"""
+from bisect import bisect_right
+from datetime import timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.utils.dateparse import parse_date
+
+
+class CalendarioCiclos:
+    """Datas de início e fim de cada ciclo de um plano"""
+
+    __slots__ = ('inicios', 'fins')
+
+    def __init__(self, data_inicio_plano, duracao_ciclo_meses, total_ciclos_plano):
+        self.inicios = []
+        self.fins = []
+        for numero in range(1, total_ciclos_plano + 1):
+            inicio = data_inicio_plano + relativedelta(months=(numero - 1) * duracao_ciclo_meses)
+            self.inicios.append(inicio)
+            self.fins.append(inicio + relativedelta(months=duracao_ciclo_meses) - timedelta(days=1))
+
+    def __len__(self):
+        return len(self.inicios)
+
+    def periodo(self, numero_ciclo):
+        """``(inicio, fim)`` do ciclo ou ``None`` se estiver fora do plano"""
+        if 1 <= numero_ciclo <= len(self.inicios):
+            return self.inicios[numero_ciclo - 1], self.fins[numero_ciclo - 1]
+        return None
+
+    def numero_do_ciclo(self, data):
+        """
+        Número do ciclo que contém a data: 0 antes do início do plano e
+        ``None`` depois do fim do último ciclo.
+        """
+        if not self.inicios:
+            return None
+        indice = bisect_right(self.inicios, data)
+        if indice == 0:
+            return 0
+        if indice == len(self.inicios) and data > self.fins[-1]:
+            return None
+        return indice
+
+
+_calendarios = {}
+
+
+def data_inicio_do_plano(plano):
+    data_inicio = plano.data_inicio_plano
+    if isinstance(data_inicio, str):
+        # Valor padrão do campo em instâncias ainda não recarregadas do banco
+        data_inicio = parse_date(data_inicio)
+    return data_inicio
+
+
+def _assinatura(plano):
+    return (data_inicio_do_plano(plano), plano.duracao_ciclo_meses, plano.total_ciclos_plano)
+
+
+def calendario_do_plano(plano):
+    """Calendário do plano, calculado apenas quando os parâmetros mudam"""
+    assinatura = _assinatura(plano)
+    em_cache = _calendarios.get(plano.pk) if plano.pk else None
+    if em_cache is not None and em_cache[0] == assinatura:
+        return em_cache[1]
+
+    calendario = CalendarioCiclos(*assinatura)
+    if plano.pk:
+        _calendarios[plano.pk] = (assinatura, calendario)
+    return calendario
+
+
+def invalidar_calendario(plano_pk):
+    _calendarios.pop(plano_pk, None)
@@ -0,0 +1,188 @@
+"""
+Série de crescimento dos ciclos de um plano.
+
+Os totais de cada ciclo (atividades, participantes e livros), a diferença
+para o ciclo anterior e o crescimento percentual saem de uma única consulta
+sobre ``HistoricoCiclo``: o ciclo anterior é lido com ``Lag`` numa janela
+por plano, ordenada pelo número do ciclo. Como a janela é calculada antes
+do ``LIMIT``, fatiar os últimos ciclos não muda a comparação do primeiro
+deles.
+
+O percentual segue a regra de sempre: 0 no primeiro ciclo do plano, 100
+quando o anterior era zero e o atual não, e a variação relativa nos demais
+casos.
+
+Os campos ``crescimento_*`` gravados no histórico dependem do ciclo
+anterior; ``recalcular_crescimento`` os refaz a partir de um ciclo editado,
+excluído ou encerrado até o fim do plano, com uma leitura e um
+``bulk_update``.
+"""
+from functools import reduce
+from operator import add
+
+from django.db.models import Case, F, FloatField, Subquery, Value, When, Window
+from django.db.models.functions import Cast, Coalesce, Lag
+from django.db.models.lookups import GreaterThan, IsNull
+
+from .models import HistoricoCiclo
+
+
+# série: campos do HistoricoCiclo somados no total do ciclo
+SERIES_CRESCIMENTO = {
+    'atividades': (
+        'total_circulos_estudo',
+        'total_grupos_prejovens',
+        'total_aulas_criancas',
+        'total_reunioes_devocionais',
+        'total_grupos_familias',
+    ),
+    'participantes': (
+        'participantes_circulos',
+        'participantes_prejovens',
+        'participantes_criancas',
+        'participantes_devocionais',
+        'participantes_grupos_familias',
+    ),
+    'livros': ('total_livros',),
+}
+
+# Ciclos considerados na média de crescimento do dashboard
+CICLOS_RESUMO = 5
+
+
+def _total(campos):
+    return reduce(add, (F(campo) for campo in campos))
+
+
+def _crescimento(total, anterior):
+    return Case(
+        When(IsNull(anterior, True), then=Value(0.0)),
+        When(GreaterThan(anterior, 0), then=(total - anterior) * Value(100.0) / Cast(anterior, FloatField())),
+        When(GreaterThan(total, 0), then=Value(100.0)),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def variacao_percentual(atual, anterior):
+    """A mesma regra de ``_crescimento`` para valores já carregados (``anterior`` ``None``: primeiro ciclo)"""
+    if anterior is None:
+        return 0.0
+    if anterior > 0:
+        return (atual - anterior) * 100.0 / anterior
+    return 100.0 if atual > 0 else 0.0
+
+
+def anotar_crescimento(historicos):
+    """
+    Anota em cada histórico, para cada série de ``SERIES_CRESCIMENTO``,
+    ``soma_<serie>`` (total do ciclo), ``delta_<serie>`` (diferença para o
+    ciclo anterior do plano, ``None`` no primeiro) e ``variacao_<serie>``
+    (crescimento percentual).
+    """
+    anotacoes = {}
+    for serie, campos in SERIES_CRESCIMENTO.items():
+        total = _total(campos)
+        anterior = Window(
+            Lag(total),
+            partition_by=[F('configuracao_id')],
+            order_by=F('numero_ciclo').asc(),
+        )
+        anotacoes[f'soma_{serie}'] = total
+        anotacoes[f'delta_{serie}'] = total - anterior
+        anotacoes[f'variacao_{serie}'] = _crescimento(total, anterior)
+    return historicos.annotate(**anotacoes)
+
+
+def reduzir_serie(pontos, max_pontos):
+    """
+    No máximo ``max_pontos`` pontos igualmente espaçados, mantendo o
+    primeiro e o último. Cada ponto guarda a diferença para o seu ciclo
+    anterior, não para o ponto anterior mantido.
+    """
+    if not max_pontos or len(pontos) <= max_pontos:
+        return pontos
+    if max_pontos == 1:
+        return pontos[-1:]
+    ultimo = len(pontos) - 1
+    indices = sorted({round(i * ultimo / (max_pontos - 1)) for i in range(max_pontos)})
+    return [pontos[i] for i in indices]
+
+
+def serie_de_crescimento(configuracao, max_pontos=None):
+    """
+    Pontos de todos os ciclos do plano com histórico, em ordem de ciclo:
+    ``{'numero_ciclo', 'data_inicio', 'data_fim'}`` mais ``<serie>``,
+    ``delta_<serie>`` e ``crescimento_<serie>`` de cada série. Uma consulta;
+    ``max_pontos`` reduz planos longos (``reduzir_serie``).
+    """
+    series = list(SERIES_CRESCIMENTO)
+    linhas = (
+        anotar_crescimento(HistoricoCiclo.objects.filter(configuracao=configuracao))
+        .order_by('numero_ciclo')
+        .values(
+            'numero_ciclo', 'data_inicio', 'data_fim',
+            *(f'{prefixo}_{serie}' for serie in series for prefixo in ('soma', 'delta', 'variacao')),
+        )
+    )
+    pontos = []
+    for linha in linhas:
+        ponto = {chave: linha[chave] for chave in ('numero_ciclo', 'data_inicio', 'data_fim')}
+        for serie in series:
+            ponto[serie] = linha[f'soma_{serie}']
+            ponto[f'delta_{serie}'] = linha[f'delta_{serie}']
+            ponto[f'crescimento_{serie}'] = linha[f'variacao_{serie}']
+        pontos.append(ponto)
+    return reduzir_serie(pontos, max_pontos)
+
+
+def crescimento_medio(historicos):
+    """Média de ``variacao_<serie>`` dos históricos anotados por ``anotar_crescimento``"""
+    return {
+        serie: (
+            sum(getattr(historico, f'variacao_{serie}') for historico in historicos) / len(historicos)
+            if historicos else 0
+        )
+        for serie in SERIES_CRESCIMENTO
+    }
+
+
+def recalcular_crescimento(configuracao, a_partir_do_ciclo=1):
+    """
+    Refaz os ``crescimento_*`` gravados dos históricos do plano a partir do
+    ciclo ``a_partir_do_ciclo``: uma leitura ordenada (com o ciclo anterior a
+    ele, base da comparação), cálculo em memória e um ``bulk_update`` só
+    das linhas que mudaram. Retorna quantos históricos foram alterados.
+    """
+    campos_crescimento = [f'crescimento_{serie}' for serie in SERIES_CRESCIMENTO]
+    do_plano = HistoricoCiclo.objects.filter(configuracao=configuracao)
+    anterior = do_plano.filter(numero_ciclo__lt=a_partir_do_ciclo).order_by('-numero_ciclo').values('numero_ciclo')[:1]
+    historicos = list(
+        do_plano.filter(numero_ciclo__gte=Coalesce(Subquery(anterior), Value(a_partir_do_ciclo)))
+        .order_by('numero_ciclo')
+        .only('numero_ciclo', *campos_crescimento, *(campo for campos in SERIES_CRESCIMENTO.values() for campo in campos))
+    )
+
+    alterados = []
+    totais_anteriores = None
+    for historico in historicos:
+        totais = {
+            serie: sum(getattr(historico, campo) for campo in campos)
+            for serie, campos in SERIES_CRESCIMENTO.items()
+        }
+        if historico.numero_ciclo >= a_partir_do_ciclo:
+            novos = {
+                f'crescimento_{serie}': variacao_percentual(
+                    total, totais_anteriores[serie] if totais_anteriores else None
+                )
+                for serie, total in totais.items()
+            }
+            if any(getattr(historico, campo) != valor for campo, valor in novos.items()):
+                for campo, valor in novos.items():
+                    setattr(historico, campo, valor)
+                alterados.append(historico)
+        totais_anteriores = totais
+
+    if alterados:
+        HistoricoCiclo.objects.bulk_update(alterados, campos_crescimento)
+    return len(alterados)
@@ -0,0 +1,244 @@
+"""
+Encerramento do ciclo atual de um plano.
+
+O encerramento grava o ``HistoricoCiclo`` do ciclo, os detalhes por livro
+(``DetalheLivroHistorico``, com um único ``bulk_create``) e a cópia das
+estatísticas editáveis (``EstatisticasEditaveisHistorico``) numa única
+transação: ou tudo é gravado, ou nada. Os dados do sistema saem de uma
+única passada de agregação (o snapshot de estatísticas).
+
+É idempotente: se o ciclo já tem histórico, seja de um encerramento
+anterior, seja digitado pelo usuário (``criar_historico``) ou gravado pelos
+formulários, nada é alterado. Um histórico existente nunca é apagado aqui.
+"""
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .aggregates import calcular_novidades_do_ciclo
+from .crescimento import SERIES_CRESCIMENTO, recalcular_crescimento
+from .models import (
+    ConfiguracaoEstatisticas,
+    DetalheLivroHistorico,
+    EstatisticasEditaveis,
+    EstatisticasEditaveisHistorico,
+    HistoricoCiclo,
+)
+from .snapshots import obter_estatisticas
+
+
+ENCERRADO = 'encerrado'
+JA_ENCERRADO = 'ja_encerrado'
+SEM_PLANO = 'sem_plano'
+SEM_CICLO = 'sem_ciclo'
+SEM_ESTATISTICAS = 'sem_estatisticas'
+
+# Nome da CategoriaLivro -> categoria do DetalheLivroHistorico (o resto é 'outros')
+CATEGORIAS_HISTORICO = {
+    'Sequência': 'sequencia',
+    'ABC': 'abc',
+    'Pré-jovens': 'prejovens',
+}
+
+CAMPOS_COPIA_EDITAVEIS = [
+    'total_grupos_prejovens', 'participantes_prejovens', 'participantes_prejovens_bahais',
+    'total_aulas_criancas', 'participantes_criancas', 'participantes_criancas_bahais',
+    'total_circulos_estudo', 'participantes_circulos', 'participantes_circulos_bahais',
+    'total_reunioes_devocionais', 'participantes_devocionais', 'participantes_devocionais_bahais',
+    'animadores_prejovens', 'locais_prejovens',
+    'professores_criancas', 'series_criancas',
+    'tutores_circulos', 'livros_circulos', 'circulos_concluidos',
+    'facilitadores_devocionais',
+    'total_criancas', 'total_prejovens', 'total_jovens', 'total_adultos',
+]
+
+
+def _resultado(status, configuracao=None, numero_ciclo=None, historico=None, detalhes_livros=0):
+    return {
+        'status': status,
+        'configuracao': configuracao,
+        'numero_ciclo': numero_ciclo,
+        'historico': historico,
+        'detalhes_livros': detalhes_livros,
+    }
+
+
+def _por_categoria(valores, nome_categoria, chave):
+    return valores.get(nome_categoria, {}).get(chave, 0)
+
+
+def _outras_categorias(valores, chave):
+    return sum(
+        dados.get(chave, 0) for nome, dados in valores.items() if nome not in CATEGORIAS_HISTORICO
+    )
+
+
+def _montar_historico(owner, configuracao, numero_ciclo, inicio, fim, editaveis, estatisticas_bd, novidades):
+    """``HistoricoCiclo`` (ainda não gravado) com os dados editáveis e do sistema"""
+    por_categoria = estatisticas_bd['livros_por_categoria']
+    novos_por_categoria = novidades['livros_iniciados_por_categoria']
+    novos_outros = sum(
+        total for nome, total in novos_por_categoria.items() if nome not in CATEGORIAS_HISTORICO
+    )
+
+    return HistoricoCiclo(
+        configuracao=configuracao,
+        owner=owner,
+        numero_ciclo=numero_ciclo,
+        data_inicio=inicio,
+        data_fim=fim,
+
+        # Dados editáveis (seção "Completo" do dashboard)
+        total_circulos_estudo=editaveis.total_circulos_estudo,
+        total_grupos_prejovens=editaveis.total_grupos_prejovens,
+        total_aulas_criancas=editaveis.total_aulas_criancas,
+        total_reunioes_devocionais=editaveis.total_reunioes_devocionais,
+        participantes_circulos=editaveis.participantes_circulos,
+        participantes_prejovens=editaveis.participantes_prejovens,
+        participantes_criancas=editaveis.participantes_criancas,
+        participantes_devocionais=editaveis.participantes_devocionais,
+        participantes_circulos_bahais=editaveis.participantes_circulos_bahais,
+        participantes_prejovens_bahais=editaveis.participantes_prejovens_bahais,
+        participantes_criancas_bahais=editaveis.participantes_criancas_bahais,
+        participantes_devocionais_bahais=editaveis.participantes_devocionais_bahais,
+
+        # Dados do sistema (seção "Sistema" do dashboard)
+        sistema_circulos_estudo=estatisticas_bd['circulos_estudo'],
+        sistema_grupos_prejovens=estatisticas_bd['grupos_prejovens'],
+        sistema_aulas_criancas=estatisticas_bd['aulas_criancas'],
+        sistema_reunioes_devocionais=estatisticas_bd['reunioes_devocionais'],
+        sistema_grupos_familias=estatisticas_bd['total_familias'],
+        sistema_participantes_circulos=estatisticas_bd['participantes_circulos'],
+        sistema_participantes_prejovens=estatisticas_bd['participantes_prejovens'],
+        sistema_participantes_criancas=estatisticas_bd['participantes_criancas'],
+        sistema_participantes_devocionais=estatisticas_bd['participantes_devocionais'],
+        sistema_participantes_circulos_bahais=estatisticas_bd['participantes_circulos_bahais'],
+        sistema_participantes_prejovens_bahais=estatisticas_bd['participantes_prejovens_bahais'],
+        sistema_participantes_criancas_bahais=estatisticas_bd['participantes_criancas_bahais'],
+        sistema_participantes_devocionais_bahais=estatisticas_bd['participantes_devocionais_bahais'],
+        sistema_total_criancas=estatisticas_bd['criancas_sistema'],
+        sistema_total_prejovens=estatisticas_bd['prejovens_sistema'],
+        sistema_total_jovens=estatisticas_bd['jovens_sistema'],
+        sistema_total_adultos=estatisticas_bd['adultos_sistema'],
+
+        # Livros
+        total_livros=estatisticas_bd['total_livros_geral'],
+        livros_iniciados=estatisticas_bd['total_livros_iniciados'],
+        livros_concluidos=estatisticas_bd['total_livros_concluidos'],
+        livros_sequencia_iniciados=_por_categoria(por_categoria, 'Sequência', 'iniciados'),
+        livros_sequencia_concluidos=_por_categoria(por_categoria, 'Sequência', 'concluidos'),
+        livros_abc_iniciados=_por_categoria(por_categoria, 'ABC', 'iniciados'),
+        livros_abc_concluidos=_por_categoria(por_categoria, 'ABC', 'concluidos'),
+        livros_prejovens_iniciados=_por_categoria(por_categoria, 'Pré-jovens', 'iniciados'),
+        livros_prejovens_concluidos=_por_categoria(por_categoria, 'Pré-jovens', 'concluidos'),
+        livros_outros_iniciados=_outras_categorias(por_categoria, 'iniciados'),
+        livros_outros_concluidos=_outras_categorias(por_categoria, 'concluidos'),
+
+        # Atividades e livros novos neste ciclo
+        novas_circulos_estudo=novidades['circulos_estudo_novos'],
+        novas_grupos_prejovens=novidades['grupos_prejovens_novos'],
+        novas_aulas_criancas=novidades['aulas_criancas_novas'],
+        novas_reunioes_devocionais=novidades['reunioes_devocionais_novas'],
+        novos_livros_iniciados=novidades['livros_novos'],
+        novos_livros_concluidos=novidades['livros_concluidos_ciclo'],
+        novos_livros_sequencia=novos_por_categoria.get('Sequência', 0),
+        novos_livros_abc=novos_por_categoria.get('ABC', 0),
+        novos_livros_prejovens=novos_por_categoria.get('Pré-jovens', 0),
+        novos_livros_outros=novos_outros,
+    )
+
+
+def _detalhes_livros(historico, livros_detalhados):
+    """Um ``DetalheLivroHistorico`` por (categoria, nome do livro), somando repetidos"""
+    detalhes = {}
+    for livro in livros_detalhados:
+        chave = (CATEGORIAS_HISTORICO.get(livro['categoria'], 'outros'), livro['nome'][:100])
+        detalhe = detalhes.get(chave)
+        if detalhe is None:
+            detalhes[chave] = DetalheLivroHistorico(
+                historico_ciclo=historico,
+                categoria=chave[0],
+                nome_livro=chave[1],
+                quantidade_iniciados=livro['iniciados'],
+                quantidade_concluidos=livro['concluidos'],
+            )
+        else:
+            detalhe.quantidade_iniciados += livro['iniciados']
+            detalhe.quantidade_concluidos += livro['concluidos']
+    return list(detalhes.values())
+
+
+def ciclo_a_encerrar(configuracao, data_referencia):
+    """
+    ``(numero, inicio, fim)`` do ciclo que contém a data, ou ``None`` antes do
+    início do plano. Depois do fim do plano, o último ciclo.
+    """
+    calendario = configuracao.calendario
+    numero_ciclo = calendario.numero_do_ciclo(data_referencia)
+    if numero_ciclo is None:
+        numero_ciclo = len(calendario)
+    if not numero_ciclo:
+        return None
+    return (numero_ciclo, *calendario.periodo(numero_ciclo))
+
+
+def encerrar_ciclo(owner, data_referencia=None):
+    """
+    Encerra o ciclo do plano ativo do usuário que contém ``data_referencia``
+    (padrão: hoje). Retorna um dicionário com ``status`` (``ENCERRADO``,
+    ``JA_ENCERRADO``, ``SEM_PLANO``, ``SEM_CICLO`` ou ``SEM_ESTATISTICAS``),
+    ``configuracao``, ``numero_ciclo``, ``historico`` e ``detalhes_livros``
+    (linhas gravadas).
+    """
+    data_referencia = data_referencia or timezone.now().date()
+
+    with transaction.atomic():
+        # O bloqueio do plano serializa encerramentos simultâneos do mesmo usuário
+        configuracao = (
+            ConfiguracaoEstatisticas.objects.select_for_update()
+            .filter(owner=owner, ativo=True)
+            .order_by('pk')
+            .first()
+        )
+        if configuracao is None:
+            return _resultado(SEM_PLANO)
+
+        ciclo = ciclo_a_encerrar(configuracao, data_referencia)
+        if ciclo is None:
+            return _resultado(SEM_CICLO, configuracao)
+        numero_ciclo, inicio, fim = ciclo
+
+        # Históricos digitados pelo usuário não têm a cópia das estatísticas
+        # editáveis, mas são dados dele: o ciclo conta como encerrado
+        existente = HistoricoCiclo.objects.filter(configuracao=configuracao, numero_ciclo=numero_ciclo).first()
+        if existente is not None:
+            return _resultado(JA_ENCERRADO, configuracao, numero_ciclo, existente)
+
+        editaveis = EstatisticasEditaveis.objects.filter(owner=owner).order_by('pk').first()
+        if editaveis is None:
+            return _resultado(SEM_ESTATISTICAS, configuracao, numero_ciclo)
+
+        estatisticas_bd = obter_estatisticas(owner)
+        novidades = calcular_novidades_do_ciclo(owner, numero_ciclo, inicio, fim)
+
+        historico = _montar_historico(
+            owner, configuracao, numero_ciclo, inicio, fim, editaveis, estatisticas_bd, novidades
+        )
+        try:
+            with transaction.atomic():
+                historico.save(force_insert=True)
+        except IntegrityError:
+            # Outro processo encerrou o mesmo ciclo entre a verificação e a gravação
+            existente = HistoricoCiclo.objects.get(configuracao=configuracao, numero_ciclo=numero_ciclo)
+            return _resultado(JA_ENCERRADO, configuracao, numero_ciclo, existente)
+
+        detalhes = DetalheLivroHistorico.objects.bulk_create(
+            _detalhes_livros(historico, estatisticas_bd['livros_detalhados'])
+        )
+        EstatisticasEditaveisHistorico.objects.create(
+            historico_ciclo=historico,
+            **{campo: getattr(editaveis, campo) for campo in CAMPOS_COPIA_EDITAVEIS},
+        )
+        recalcular_crescimento(configuracao, numero_ciclo)
+        historico.refresh_from_db(fields=[f'crescimento_{serie}' for serie in SERIES_CRESCIMENTO])
+
+    return _resultado(ENCERRADO, configuracao, numero_ciclo, historico, len(detalhes))
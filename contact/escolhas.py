@@ -0,0 +1,99 @@
+"""
+Listas de escolha dos formulários (contatos, ruas e famílias do usuário).
+
+Cada formulário de atividade tem dois ou três campos que listam os contatos
+ou as ruas do usuário. ``EscolhasDoUsuario`` carrega cada lista uma única
+vez por requisição, como tuplas ``(pk, rótulo, detalhe)`` de
+``values_list`` (sem instanciar modelos), e é compartilhada por todos os
+campos e formulários da requisição via ``escolhas_do_usuario(user)``.
+
+Acima de ``LIMITE_LISTA_ESCOLHAS`` opções (setting de mesmo nome, padrão
+300) a lista não é carregada: o widget mostra só os itens selecionados e
+busca os demais no servidor (``escolhas_busca``).
+"""
+from django.apps import apps as apps_padrao
+from django.conf import settings
+
+from .busca import filtro_de_busca
+
+
+LIMITE_LISTA_ESCOLHAS = 300
+LIMITE_RESULTADOS_BUSCA = 20
+
+# tipo: (modelo, campos do rótulo, campo do detalhe, tipo no índice de busca)
+FONTES_ESCOLHAS = {
+    'contatos': ('Contact', ('first_name', 'last_name'), 'familia__nome', 'contato'),
+    'ruas': ('Rua', ('nome',), 'bairro', 'rua'),
+    'familias': ('Familia', ('nome',), 'rua__nome', 'familia'),
+}
+
+
+def limite_lista_escolhas():
+    return getattr(settings, 'LIMITE_LISTA_ESCOLHAS', LIMITE_LISTA_ESCOLHAS)
+
+
+class EscolhasDoUsuario:
+    """Listas de escolha de um usuário, carregadas sob demanda e guardadas"""
+
+    def __init__(self, user, limite=None, modelos=apps_padrao):
+        self.user = user
+        self.limite = limite_lista_escolhas() if limite is None else limite
+        self.modelos = modelos
+        self._listas = {}
+
+    def consulta(self, tipo):
+        """Queryset do ``tipo`` restrito ao usuário (usado na validação)"""
+        nome_modelo = FONTES_ESCOLHAS[tipo][0]
+        return self.modelos.get_model('contact', nome_modelo).objects.filter(owner=self.user)
+
+    def _tuplas(self, consulta, tipo):
+        _, campos_rotulo, campo_detalhe, _ = FONTES_ESCOLHAS[tipo]
+        return [
+            (pk, ' '.join(filter(None, rotulo)), detalhe or '')
+            for pk, *rotulo, detalhe in consulta.values_list('pk', *campos_rotulo, campo_detalhe)
+        ]
+
+    def _ordenada(self, tipo):
+        campos_rotulo = FONTES_ESCOLHAS[tipo][1]
+        return self.consulta(tipo).order_by(*campos_rotulo, 'pk')
+
+    def _carregar(self, tipo):
+        # Um item a mais que o limite basta para saber se a lista é grande
+        if tipo not in self._listas:
+            self._listas[tipo] = self._tuplas(self._ordenada(tipo)[:self.limite + 1], tipo)
+        return self._listas[tipo]
+
+    def grande(self, tipo):
+        """Se a lista passa do limite e deve ser buscada no servidor"""
+        return len(self._carregar(tipo)) > self.limite
+
+    def opcoes(self, tipo):
+        """Todas as tuplas ``(pk, rótulo, detalhe)``; vazia se a lista é grande"""
+        return [] if self.grande(tipo) else self._carregar(tipo)
+
+    def selecionadas(self, tipo, pks):
+        """Tuplas dos ``pks`` informados, na ordem dos rótulos"""
+        pks = {int(pk) for pk in pks if str(pk).isdigit()}
+        if not pks:
+            return []
+        if not self.grande(tipo):
+            return [opcao for opcao in self._carregar(tipo) if opcao[0] in pks]
+        return self._tuplas(self._ordenada(tipo).filter(pk__in=pks), tipo)
+
+    def buscar(self, tipo, texto, limite=LIMITE_RESULTADOS_BUSCA):
+        """Tuplas que casam com ``texto`` (índice de busca textual)"""
+        tipo_indice = FONTES_ESCOLHAS[tipo][3]
+        consulta = self._ordenada(tipo).filter(pk__in=filtro_de_busca(tipo_indice, self.user, texto))
+        return self._tuplas(consulta[:limite], tipo)
+
+
+def escolhas_do_usuario(user):
+    """
+    ``EscolhasDoUsuario`` compartilhada: fica guardada no próprio objeto do
+    usuário, que é o mesmo ``request.user`` durante toda a requisição.
+    """
+    escolhas = getattr(user, '_escolhas_do_usuario', None)
+    if escolhas is None:
+        escolhas = EscolhasDoUsuario(user)
+        user._escolhas_do_usuario = escolhas
+    return escolhas
@@ -5,10 +5,12 @@ from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 from django.contrib.auth import password_validation
 from .models import Familia, Rua, GrupoFamilias, GrupoPreJovens, AulaCrianca, CirculoEstudo, Livro, CategoriaLivro, ReuniaoDevocional
-from .widgets import ParticipanteWidget
-from dal import autocomplete
 from .utils import contatos_do_usuario
-from .mixins import CycleSelectorMixin, HistoricoAutomaticoMixin
+from .busca import reindexar
+from .snapshots import marcar_desatualizado
+from .mixins import (
+    CycleSelectorMixin, EscolhasDoUsuarioMixin, HistoricoAutomaticoMixin, VinculosPorDiferencaMixin, pks_de,
+)
 
 
 
@@ -162,28 +164,28 @@ class RegisterUpdateForm(forms.ModelForm):
         return password1
 
 
-class FamiliaForm(CycleSelectorMixin, HistoricoAutomaticoMixin, forms.ModelForm):
+class FamiliaForm(CycleSelectorMixin, HistoricoAutomaticoMixin, EscolhasDoUsuarioMixin, forms.ModelForm):
     membros = forms.ModelMultipleChoiceField(
         queryset=Contact.objects.none(),
         widget=forms.CheckboxSelectMultiple,
         required=False,
         help_text='Selecione os membros da família'
     )
+    campos_de_escolha = {'rua': 'ruas', 'membros': 'contatos'}
     
     class Meta:
         model = Familia
+        # data_ultima_reuniao acompanha o registro de visitas (contact.visitas)
+        # e só muda por registrar_visitas
         fields = ('nome', 'rua', 'endereco', 'reuniao_devocional', 
-                 'data_ultima_reuniao', 'nivel_envolvimento', 'description', 
+                 'nivel_envolvimento', 'description', 
                  'membros', 'plano_ciclo', 'numero_ciclo_criacao')
 
     def __init__(self, *args, **kwargs):
         # user já será extraído pelo CycleSelectorMixin
         super().__init__(*args, **kwargs)
         
-        if hasattr(self, 'user') and self.user:
-            self.fields['rua'].queryset = Rua.objects.filter(owner=self.user)
-            self.fields['membros'].queryset = Contact.objects.filter(
-                owner=self.user)
+        self.configurar_escolhas(getattr(self, 'user', None))
             
         # Se estamos editando uma família existente, carregue os membros atuais
         if self.instance and self.instance.pk:
@@ -192,14 +194,7 @@ class FamiliaForm(CycleSelectorMixin, HistoricoAutomaticoMixin, forms.ModelForm)
     def save(self, commit=True):
         familia = super().save(commit)
         if commit:
-            # Primeiro, remove todos os contatos desta família
-            Contact.objects.filter(familia=familia).update(familia=None)
-            # Depois, adiciona os novos membros selecionados
-            membros_selecionados = self.cleaned_data.get('membros')
-            if membros_selecionados:
-                for membro in membros_selecionados:
-                    membro.familia = familia
-                    membro.save()
+            self.atualizar_membros(familia)
             
             # Se reuniao_devocional=True e tem ciclo configurado, 
             # criar histórico automático
@@ -209,6 +204,25 @@ class FamiliaForm(CycleSelectorMixin, HistoricoAutomaticoMixin, forms.ModelForm)
                 
         return familia
 
+    def atualizar_membros(self, familia):
+        """
+        Grava a seleção de membros pela diferença com os membros atuais: um
+        UPDATE para os que saíram e outro para os que entraram.
+        """
+        atuais = set(familia.membros.values_list('pk', flat=True))
+        selecionados = pks_de(self.cleaned_data.get('membros'))
+        sairam, entraram = atuais - selecionados, selecionados - atuais
+        if sairam:
+            Contact.objects.filter(familia=familia, pk__in=sairam).update(familia=None)
+        if entraram:
+            Contact.objects.filter(pk__in=entraram).update(familia=familia)
+        if sairam or entraram:
+            # UPDATE não dispara sinais: o nome da família faz parte do
+            # texto pesquisável dos membros, e os membros entram nas
+            # estatísticas (participantes das reuniões devocionais)
+            reindexar('contato', ids=sairam | entraram)
+            marcar_desatualizado(familia.owner_id)
+
 
 class RuaForm(forms.ModelForm):
     class Meta:
@@ -217,7 +231,24 @@ class RuaForm(forms.ModelForm):
 
 
 
-class GrupoPreJovensForm(CycleSelectorMixin, forms.ModelForm):
+class ImportacaoContatosForm(forms.Form):
+    arquivo = forms.FileField(
+        label='Arquivo CSV ou XLSX',
+        help_text='Uma pessoa por linha. Colunas: nome, sobrenome, nascimento, bahai, descricao, '
+                  'familia, endereco, rua, bairro.',
+        widget=forms.ClearableFileInput(attrs={'accept': '.csv,.xlsx', 'class': 'form-control'}),
+    )
+
+    def clean_arquivo(self):
+        arquivo = self.cleaned_data['arquivo']
+        if not arquivo.name.lower().endswith(('.csv', '.xlsx')):
+            raise ValidationError('Envie um arquivo .csv ou .xlsx.', code='formato')
+        return arquivo
+
+
+class GrupoPreJovensForm(CycleSelectorMixin, VinculosPorDiferencaMixin, EscolhasDoUsuarioMixin, forms.ModelForm):
+    campos_de_escolha = {'rua': 'ruas', 'pre_jovens': 'contatos', 'animador': 'contatos'}
+
     class Meta:
         model = GrupoPreJovens
         fields = ('nome', 'rua', 'livro', 'licoes', 'description', 'pre_jovens', 'animador', 'data_ultimo_encontro', 'dia_semana', 'plano_ciclo', 'numero_ciclo_criacao')
@@ -231,12 +262,11 @@ class GrupoPreJovensForm(CycleSelectorMixin, forms.ModelForm):
     def __init__(self, *args, **kwargs):
         user = kwargs.get('user', None)
         super().__init__(*args, **kwargs)
-        if user is not None:
-            self.fields['pre_jovens'].queryset = Contact.objects.filter(owner=user)
-            self.fields['animador'].queryset = Contact.objects.filter(owner=user)
-            self.fields['rua'].queryset = Rua.objects.filter(owner=user)
+        self.configurar_escolhas(user)
+
+class AulaCriancaForm(CycleSelectorMixin, VinculosPorDiferencaMixin, EscolhasDoUsuarioMixin, forms.ModelForm):
+    campos_de_escolha = {'rua': 'ruas', 'participantes': 'contatos', 'professor': 'contatos'}
 
-class AulaCriancaForm(CycleSelectorMixin, forms.ModelForm):
     class Meta:
         model = AulaCrianca
         fields = ('nome', 'rua', 'participantes', 'serie', 'licao', 'dia_semana', 'data_ultima_aula', 'description', 'professor', 'plano_ciclo', 'numero_ciclo_criacao')
@@ -246,13 +276,12 @@ class AulaCriancaForm(CycleSelectorMixin, forms.ModelForm):
     def __init__(self, *args, **kwargs):
         user = kwargs.get('user', None)
         super().__init__(*args, **kwargs)
-        if user is not None:
-            self.fields['rua'].queryset = Rua.objects.filter(owner=user)
-            self.fields['participantes'].queryset = Contact.objects.filter(owner=user)
-            self.fields['professor'].queryset = Contact.objects.filter(owner=user)
+        self.configurar_escolhas(user)
+
 
+class GrupoFamiliasForm(VinculosPorDiferencaMixin, EscolhasDoUsuarioMixin, forms.ModelForm):
+    campos_de_escolha = {'participantes': 'contatos', 'familias': 'familias', 'ruas': 'ruas'}
 
-class GrupoFamiliasForm(forms.ModelForm):
     class Meta:
         model = GrupoFamilias
         fields = ('nome', 'participantes', 'familias', 'ruas', 'description', 'data_ultima_reuniao_reflexao')
@@ -266,12 +295,11 @@ class GrupoFamiliasForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
-        if user is not None:
-            self.fields['participantes'].queryset = Contact.objects.filter(owner=user)
-            self.fields['familias'].queryset = Familia.objects.filter(owner=user)
-            self.fields['ruas'].queryset = Rua.objects.filter(owner=user)
+        self.configurar_escolhas(user)
+
+class CirculoEstudoForm(CycleSelectorMixin, VinculosPorDiferencaMixin, EscolhasDoUsuarioMixin, forms.ModelForm):
+    campos_de_escolha = {'tutor': 'contatos', 'participantes': 'contatos', 'rua': 'ruas'}
 
-class CirculoEstudoForm(CycleSelectorMixin, forms.ModelForm):
     class Meta:
         model = CirculoEstudo
         fields = (
@@ -286,10 +314,7 @@ class CirculoEstudoForm(CycleSelectorMixin, forms.ModelForm):
     def __init__(self, *args, **kwargs):
         user = kwargs.get('user', None)
         super().__init__(*args, **kwargs)
-        if user is not None:
-            self.fields['tutor'].queryset = Contact.objects.filter(owner=user)
-            self.fields['participantes'].queryset = Contact.objects.filter(owner=user)
-            self.fields['rua'].queryset = Rua.objects.filter(owner=user)
+        self.configurar_escolhas(user)
         
         # Configurar o campo livro_ruhi
         self.fields['livro_ruhi'].queryset = Livro.objects.filter(ativo=True).order_by('numero')
@@ -307,7 +332,7 @@ class CirculoEstudoForm(CycleSelectorMixin, forms.ModelForm):
         return cleaned
 
     def clean_rua(self):
-        data = self.data.getlist('rua')
+        data = [valor for valor in self.data.getlist('rua') if valor]  # "Nenhum" vem vazio
         if not data:
             return None
         if len(data) > 1:
@@ -363,7 +388,9 @@ class CategoriaLivroForm(forms.ModelForm):
         }
 
 
-class ReuniaoDevocionalForm(CycleSelectorMixin, forms.ModelForm):
+class ReuniaoDevocionalForm(CycleSelectorMixin, EscolhasDoUsuarioMixin, forms.ModelForm):
+    campos_de_escolha = {'rua': 'ruas'}
+
     class Meta:
         model = ReuniaoDevocional
         fields = [
@@ -373,7 +400,6 @@ class ReuniaoDevocionalForm(CycleSelectorMixin, forms.ModelForm):
         ]
         widgets = {
             'nome': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Nome da Reunião Devocional'}),
-            'rua': forms.Select(attrs={'class': 'form-control'}),
             'numero_participantes': forms.NumberInput(attrs={'class': 'form-control', 'min': '0'}),
             'participantes_bahais': forms.NumberInput(attrs={'class': 'form-control', 'min': '0'}),
             'dia_semana': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Ex: Domingo'}),
@@ -394,9 +420,8 @@ class ReuniaoDevocionalForm(CycleSelectorMixin, forms.ModelForm):
         user = kwargs.get('user', None)
         super().__init__(*args, **kwargs)
         
-        if user:
-            # Filtrar ruas do usuário
-            self.fields['rua'].queryset = Rua.objects.filter(owner=user)
+        # Ruas do usuário
+        self.configurar_escolhas(user)
 
 
 class CyclePlanForm(forms.ModelForm):
@@ -0,0 +1,52 @@
+"""
+Recálculo em lote dos dados do sistema (campos ``sistema_*``) dos históricos
+de ciclo.
+
+Os contadores de atividades e participantes são os mesmos para todos os
+históricos do usuário, então são calculados uma única vez; a demografia de
+todas as datas de fim de ciclo sai de uma única consulta. As linhas são
+gravadas com ``bulk_update`` dentro de uma transação.
+"""
+from django.db import transaction
+
+from .aggregates import calcular_atividades_sistema, calcular_demografia_por_datas
+from .models import HistoricoCiclo
+
+
+CAMPOS_DEMOGRAFIA_SISTEMA = [
+    'sistema_total_criancas',
+    'sistema_total_prejovens',
+    'sistema_total_jovens',
+    'sistema_total_adultos',
+]
+
+
+def recalcular_dados_sistema(owner, historicos=None, tamanho_lote=100, progresso=None):
+    """
+    Recalcula os dados do sistema de todos os históricos do usuário (ou dos
+    ``historicos`` informados). ``progresso(processados, total)`` é chamado
+    após cada lote gravado. Retorna a quantidade de históricos atualizados.
+    """
+    if historicos is None:
+        historicos = HistoricoCiclo.objects.filter(owner=owner)
+    historicos = list(historicos)
+    if not historicos:
+        return 0
+
+    atividades = calcular_atividades_sistema(owner)
+    demografia = calcular_demografia_por_datas(owner, [h.data_fim for h in historicos])
+
+    for historico in historicos:
+        for campo, valor in atividades.items():
+            setattr(historico, campo, valor)
+        historico.aplicar_demografia_sistema(demografia[historico.data_fim])
+
+    campos = list(atividades) + CAMPOS_DEMOGRAFIA_SISTEMA
+    total = len(historicos)
+    with transaction.atomic():
+        for inicio in range(0, total, tamanho_lote):
+            HistoricoCiclo.objects.bulk_update(historicos[inicio:inicio + tamanho_lote], campos)
+            if progresso:
+                progresso(min(inicio + tamanho_lote, total), total)
+
+    return total
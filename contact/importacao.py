@@ -0,0 +1,408 @@
+"""
+Importação em lote de contatos, famílias e ruas a partir de CSV ou XLSX.
+
+Cada linha do arquivo é uma pessoa; as colunas ``familia`` e ``rua`` trazem
+os nomes da família e da rua, que são reaproveitadas se o usuário já as
+tiver (comparação sem acentos nem maiúsculas) e criadas caso contrário.
+As linhas são lidas em streaming e processadas em lotes de ``tamanho_lote``:
+validação, criação das ruas e famílias novas do lote e inserção dos contatos
+com ``inserir_em_massa`` (sem instanciar modelos), tudo numa única
+transação. Os nomes já resolvidos ficam num cache em memória, então cada
+rua/família custa no máximo um INSERT.
+
+Linhas inválidas não interrompem a importação: vão para o relatório de
+erros (CSV com o número da linha, o motivo e os valores originais).
+
+Como a inserção em massa não dispara sinais, os registros criados são
+indexados para a busca e o snapshot de estatísticas marcado como
+desatualizado no fim.
+
+Colunas reconhecidas (cabeçalho sem diferenciar acentos e maiúsculas; ver
+``COLUNAS``): nome (obrigatória), sobrenome, nascimento (AAAA-MM-DD ou
+DD/MM/AAAA), bahai (sim/não), descricao, familia, endereco, rua e bairro.
+
+Arquivos .xlsx exigem o pacote opcional ``openpyxl``.
+"""
+import csv
+import io
+import threading
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from .autocompletar import invalidar_autocompletar
+from .busca import normalizar_texto, reindexar
+from .insercao import inserir_em_massa
+from .models import Contact, Familia, ImportacaoContatos, Rua
+from .snapshots import marcar_desatualizado
+
+
+TAMANHO_LOTE = 5000
+
+# Minutos em PROCESSANDO a partir dos quais a importação é tida como abandonada,
+# e quantas vezes ela é reiniciada antes de ser marcada como FALHOU
+IMPORTACAO_TEMPO_LIMITE = 60
+IMPORTACAO_MAX_TENTATIVAS = 2
+
+# Tipos do índice de busca e os modelos que a importação cria
+MODELOS_INDEXADOS = (('rua', Rua), ('familia', Familia), ('contato', Contact))
+
+# Colunas gravadas em cada contato, na ordem das tuplas passadas a inserir_em_massa
+CAMPOS_CONTATO = (
+    'owner_id', 'first_name', 'last_name', 'birth_date', 'is_bahai', 'description', 'familia_id', 'rua_id',
+)
+
+# campo -> cabeçalhos aceitos (já normalizados com normalizar_texto)
+COLUNAS = {
+    'first_name': ('nome', 'primeiro nome', 'first name'),
+    'last_name': ('sobrenome', 'last name'),
+    'birth_date': ('nascimento', 'data de nascimento', 'birth date'),
+    'is_bahai': ('bahai', 'baha i', 'is bahai'),
+    'description': ('descricao', 'observacoes', 'description'),
+    'familia': ('familia',),
+    'endereco': ('endereco',),
+    'rua': ('rua',),
+    'bairro': ('bairro',),
+}
+
+TAMANHOS_MAXIMOS = {
+    'first_name': 50, 'last_name': 50, 'familia': 100, 'endereco': 255, 'rua': 100, 'bairro': 100,
+}
+
+VERDADEIROS = {'sim', 's', 'x', 'true', '1', 'yes', 'y'}
+FALSOS = {'não', 'nao', 'n', 'false', '0', 'no', ''}
+
+
+class ErroImportacao(Exception):
+    """O arquivo inteiro não pode ser importado (formato, cabeçalho)"""
+
+
+class ErroLinha(ValueError):
+    """Uma linha inválida; vai para o relatório de erros"""
+
+
+# ---------------------------------------------------------------------------
+# Leitura
+# ---------------------------------------------------------------------------
+
+def _decodificar(linha):
+    # Planilhas exportadas no Windows costumam vir em cp1252
+    try:
+        return linha.decode('utf-8')
+    except UnicodeDecodeError:
+        return linha.decode('cp1252', errors='replace')
+
+
+def ler_csv(arquivo):
+    """Linhas (listas de textos) de um CSV binário; detecta ``,``, ``;`` ou tab"""
+    linhas = (_decodificar(linha) for linha in arquivo)
+    primeira = next(linhas, '').lstrip('\ufeff')
+    delimitador = max(',;\t', key=primeira.count)
+
+    def todas():
+        yield primeira
+        yield from linhas
+
+    return csv.reader(todas(), delimiter=delimitador)
+
+
+def ler_xlsx(arquivo):
+    """Linhas da primeira planilha de um arquivo .xlsx"""
+    try:
+        import openpyxl
+    except ImportError:
+        raise ErroImportacao('Arquivos .xlsx exigem o pacote openpyxl; instale-o ou envie um CSV.')
+    planilha = openpyxl.load_workbook(arquivo, read_only=True, data_only=True).active
+    for linha in planilha.iter_rows(values_only=True):
+        yield ['' if valor is None else valor for valor in linha]
+
+
+def ler_planilha(arquivo, nome_arquivo):
+    if nome_arquivo.lower().endswith('.xlsx'):
+        return ler_xlsx(arquivo)
+    if nome_arquivo.lower().endswith(('.csv', '.txt')):
+        return ler_csv(arquivo)
+    raise ErroImportacao('Formato não suportado: envie um arquivo .csv ou .xlsx.')
+
+
+# ---------------------------------------------------------------------------
+# Validação
+# ---------------------------------------------------------------------------
+
+def mapear_cabecalho(cabecalho):
+    """``{campo: índice da coluna}``; exige a coluna do nome"""
+    aceitos = {alias: campo for campo, aliases in COLUNAS.items() for alias in aliases}
+    mapa = {}
+    for indice, titulo in enumerate(cabecalho):
+        campo = aceitos.get(normalizar_texto(titulo))
+        if campo and campo not in mapa:
+            mapa[campo] = indice
+    if 'first_name' not in mapa:
+        raise ErroImportacao('O arquivo precisa de uma coluna "nome".')
+    return mapa
+
+
+def _texto(valor):
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip()
+
+
+def _data(valor):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    texto = _texto(valor)
+    if not texto:
+        return None
+    try:
+        if '/' in texto:  # DD/MM/AAAA
+            dia, mes, ano = texto.split('/')
+            return date(int(ano), int(mes), int(dia))
+        return date.fromisoformat(texto)
+    except ValueError:
+        raise ErroLinha(f'Data de nascimento inválida: {texto!r}')
+
+
+def _booleano(valor):
+    texto = _texto(valor).lower()
+    if texto in VERDADEIROS:
+        return True
+    if texto in FALSOS:
+        return False
+    raise ErroLinha(f'Valor inválido para bahá\'í: {valor!r} (use sim ou não)')
+
+
+def validar_linha(linha, mapa):
+    """Dicionário com os valores da linha já convertidos; ``ErroLinha`` se inválida"""
+    dados = {}
+    for campo, indice in mapa.items():
+        valor = linha[indice] if indice < len(linha) else ''
+        if campo == 'birth_date':
+            dados[campo] = _data(valor)
+        elif campo == 'is_bahai':
+            dados[campo] = _booleano(valor)
+        else:
+            dados[campo] = _texto(valor)
+            maximo = TAMANHOS_MAXIMOS.get(campo)
+            if maximo and len(dados[campo]) > maximo:
+                raise ErroLinha(f'{campo} tem mais de {maximo} caracteres')
+    if not dados['first_name']:
+        raise ErroLinha('Nome em branco')
+    dados['chave_rua'] = normalizar_texto(dados.get('rua'))
+    dados['chave_familia'] = normalizar_texto(dados.get('familia'))
+    return dados
+
+
+# ---------------------------------------------------------------------------
+# Importação
+# ---------------------------------------------------------------------------
+
+def _em_lotes(iteravel, tamanho):
+    lote = []
+    for item in iteravel:
+        lote.append(item)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _cache_por_nome(modelo, owner):
+    cache = {}
+    for pk, nome in modelo.objects.filter(owner=owner).order_by('pk').values_list('pk', 'nome'):
+        cache.setdefault(normalizar_texto(nome), pk)
+    return cache
+
+
+def importar_linhas(owner, linhas, tamanho_lote=TAMANHO_LOTE, progresso=None):
+    """
+    Importa as ``linhas`` (a primeira é o cabeçalho) para o ``owner``.
+
+    Retorna ``{'total_linhas', 'contatos_criados', 'familias_criadas',
+    'ruas_criadas', 'cabecalho', 'erros'}``, com ``erros`` como lista de
+    ``(número da linha no arquivo, motivo, valores originais)``.
+    ``progresso(linhas_processadas)`` é chamado a cada lote.
+    """
+    linhas = iter(linhas)
+    cabecalho = [_texto(titulo) for titulo in next(linhas, [])]
+    mapa = mapear_cabecalho(cabecalho)
+    resultado = {
+        'total_linhas': 0, 'contatos_criados': 0, 'familias_criadas': 0, 'ruas_criadas': 0,
+        'cabecalho': cabecalho, 'erros': [],
+    }
+
+    with transaction.atomic():
+        ruas = _cache_por_nome(Rua, owner)
+        familias = _cache_por_nome(Familia, owner)
+        # inserir_em_massa não devolve as chaves: os registros novos são os
+        # do usuário com pk acima da maior existente antes da importação
+        ultimos_pks = {
+            tipo: modelo.objects.aggregate(maior=Max('pk'))['maior'] or 0
+            for tipo, modelo in MODELOS_INDEXADOS
+        }
+
+        for lote in _em_lotes(enumerate(linhas, start=2), tamanho_lote):
+            validas = []
+            for numero, linha in lote:
+                if not any(_texto(valor) for valor in linha):
+                    continue  # linha em branco
+                resultado['total_linhas'] += 1
+                try:
+                    validas.append(validar_linha(linha, mapa))
+                except ErroLinha as erro:
+                    resultado['erros'].append((numero, str(erro), linha))
+
+            novas_ruas = {}
+            for dados in validas:
+                chave = dados['chave_rua']
+                if chave and chave not in ruas and chave not in novas_ruas:
+                    novas_ruas[chave] = Rua(owner=owner, nome=dados['rua'], bairro=dados.get('bairro', ''))
+            for chave, rua in zip(novas_ruas, Rua.objects.bulk_create(novas_ruas.values())):
+                ruas[chave] = rua.pk
+
+            novas_familias = {}
+            for dados in validas:
+                chave = dados['chave_familia']
+                if chave and chave not in familias and chave not in novas_familias:
+                    novas_familias[chave] = Familia(
+                        owner=owner,
+                        nome=dados['familia'],
+                        endereco=dados.get('endereco', ''),
+                        rua_id=ruas.get(dados['chave_rua']),
+                    )
+            for chave, familia in zip(novas_familias, Familia.objects.bulk_create(novas_familias.values())):
+                familias[chave] = familia.pk
+
+            inserir_em_massa(
+                Contact,
+                CAMPOS_CONTATO,
+                [
+                    (
+                        owner.pk,
+                        dados['first_name'],
+                        dados.get('last_name', ''),
+                        dados.get('birth_date'),
+                        dados.get('is_bahai', False),
+                        dados.get('description', ''),
+                        familias.get(dados['chave_familia']),
+                        ruas.get(dados['chave_rua']),
+                    )
+                    for dados in validas
+                ],
+                tamanho_lote,
+            )
+            resultado['ruas_criadas'] += len(novas_ruas)
+            resultado['familias_criadas'] += len(novas_familias)
+            resultado['contatos_criados'] += len(validas)
+            if progresso:
+                progresso(resultado['total_linhas'])
+
+        if resultado['contatos_criados']:
+            for tipo, modelo in MODELOS_INDEXADOS:
+                novos = modelo.objects.filter(owner=owner, pk__gt=ultimos_pks[tipo]).values_list('pk', flat=True)
+                reindexar(tipo, ids=novos)
+            invalidar_autocompletar(owner.pk)
+            marcar_desatualizado(owner.pk)
+
+    return resultado
+
+
+def relatorio_de_erros(resultado):
+    """Relatório das linhas rejeitadas em CSV (vazio se não houve erros)"""
+    if not resultado['erros']:
+        return ''
+    saida = io.StringIO()
+    escritor = csv.writer(saida)
+    escritor.writerow(['linha', 'erro', *resultado['cabecalho']])
+    for numero, motivo, linha in resultado['erros']:
+        escritor.writerow([numero, motivo, *linha])
+    return saida.getvalue()
+
+
+# ---------------------------------------------------------------------------
+# Importações enviadas pela interface (ImportacaoContatos)
+# ---------------------------------------------------------------------------
+
+def processar_importacao(importacao_id):
+    """
+    Processa uma ``ImportacaoContatos`` pendente. A troca de status para
+    ``PROCESSANDO`` é condicional, então dois processos nunca importam o
+    mesmo arquivo. Retorna a importação, ou ``None`` se não estava pendente.
+    """
+    reivindicada = ImportacaoContatos.objects.filter(
+        pk=importacao_id, status=ImportacaoContatos.PENDENTE
+    ).update(
+        status=ImportacaoContatos.PROCESSANDO, iniciada_em=timezone.now(), tentativas=F('tentativas') + 1
+    )
+    if not reivindicada:
+        return None
+
+    importacao = ImportacaoContatos.objects.select_related('owner').get(pk=importacao_id)
+    try:
+        with importacao.arquivo.open('rb') as arquivo:
+            resultado = importar_linhas(importacao.owner, ler_planilha(arquivo, importacao.nome_arquivo))
+    except Exception as erro:
+        importacao.status = ImportacaoContatos.FALHOU
+        importacao.mensagem = str(erro) if isinstance(erro, ErroImportacao) else f'Erro inesperado: {erro}'
+    else:
+        importacao.status = ImportacaoContatos.CONCLUIDA
+        importacao.total_linhas = resultado['total_linhas']
+        importacao.contatos_criados = resultado['contatos_criados']
+        importacao.familias_criadas = resultado['familias_criadas']
+        importacao.ruas_criadas = resultado['ruas_criadas']
+        importacao.linhas_com_erro = len(resultado['erros'])
+        importacao.relatorio_erros = relatorio_de_erros(resultado)
+    importacao.concluida_em = timezone.now()
+    importacao.save()
+    return importacao
+
+
+def recuperar_importacoes_abandonadas(tempo_limite=None):
+    """
+    Devolve a ``PENDENTE`` as importações em ``PROCESSANDO`` há mais de
+    ``tempo_limite`` (minutos; padrão ``IMPORTACAO_TEMPO_LIMITE`` dos
+    settings): o processo ou a thread que as pegou morreu sem concluir, e a
+    transação de ``importar_linhas`` não deixou nada gravado. As que já
+    foram iniciadas ``IMPORTACAO_MAX_TENTATIVAS`` vezes passam a ``FALHOU``.
+    Retorna ``(devolvidas, falhas)``.
+    """
+    if tempo_limite is None:
+        tempo_limite = getattr(settings, 'IMPORTACAO_TEMPO_LIMITE', IMPORTACAO_TEMPO_LIMITE)
+    max_tentativas = getattr(settings, 'IMPORTACAO_MAX_TENTATIVAS', IMPORTACAO_MAX_TENTATIVAS)
+    abandonadas = ImportacaoContatos.objects.filter(
+        status=ImportacaoContatos.PROCESSANDO,
+        iniciada_em__lt=timezone.now() - timedelta(minutes=tempo_limite),
+    )
+    falhas = abandonadas.filter(tentativas__gte=max_tentativas).update(
+        status=ImportacaoContatos.FALHOU,
+        mensagem=f'Processamento interrompido {max_tentativas} vez(es) sem concluir',
+        concluida_em=timezone.now(),
+    )
+    devolvidas = abandonadas.update(status=ImportacaoContatos.PENDENTE)
+    return devolvidas, falhas
+
+
+def _processar_em_thread(importacao_id):
+    try:
+        processar_importacao(importacao_id)
+    finally:
+        connection.close()
+
+
+def agendar_importacao(importacao):
+    """
+    Processa a importação numa thread depois do commit. Com
+    ``IMPORTACAO_EM_SEGUNDO_PLANO = False`` nos settings ela fica pendente
+    para o comando ``processar_importacoes`` (cron ou worker).
+    """
+    if not getattr(settings, 'IMPORTACAO_EM_SEGUNDO_PLANO', True):
+        return
+    transaction.on_commit(
+        lambda: threading.Thread(target=_processar_em_thread, args=(importacao.pk,), daemon=True).start()
+    )
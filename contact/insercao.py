@@ -0,0 +1,86 @@
+"""
+Inserção em massa sem o custo do ORM.
+
+``bulk_create`` instancia um modelo por linha e compila o SQL de cada lote
+valor a valor; para dezenas de milhares de linhas isso domina o tempo. Aqui
+as linhas já chegam como tuplas e vão para INSERTs de várias linhas cada
+(tantas quanto o limite de parâmetros do banco permite). Um INSERT por linha
+via ``executemany`` seria várias vezes mais lento no SQLite, onde o gatilho
+do índice FTS5 é disparado por comando. Não há sinais nem pks de volta: use
+só quando quem chama não precisa das instâncias criadas.
+"""
+from django.db import connection
+from django.utils import timezone
+
+
+# Tipos cujos valores Python o driver aceita sem conversão
+TIPOS_SEM_CONVERSAO = {
+    'AutoField', 'BigAutoField', 'BigIntegerField', 'BooleanField', 'CharField', 'ForeignKey',
+    'IntegerField', 'PositiveIntegerField', 'PositiveSmallIntegerField', 'SmallIntegerField', 'TextField',
+}
+
+
+def _conversor(campo):
+    tipo = campo.get_internal_type()
+    if tipo in TIPOS_SEM_CONVERSAO:
+        return None
+    if tipo == 'DateField':
+        return connection.ops.adapt_datefield_value
+    return lambda valor: campo.get_db_prep_save(valor, connection)
+
+
+def _valor_padrao(campo):
+    if getattr(campo, 'auto_now', False) or getattr(campo, 'auto_now_add', False):
+        agora = timezone.now()
+        valor = agora if campo.get_internal_type() == 'DateTimeField' else timezone.localdate(agora)
+    else:
+        valor = campo.get_default()
+    return campo.get_db_prep_save(valor, connection)
+
+
+def inserir_em_massa(modelo, campos, linhas, tamanho_lote=5000):
+    """
+    Insere ``linhas`` (tuplas na ordem de ``campos``, nomes de atributo como
+    ``rua_id``) em ``modelo``. Os demais campos concretos recebem o valor
+    padrão. Cada INSERT leva no máximo ``tamanho_lote`` linhas (menos, se o
+    limite de parâmetros do banco exigir). Retorna o número de linhas
+    inseridas.
+    """
+    por_atributo = {campo.attname: campo for campo in modelo._meta.concrete_fields}
+    informados = [por_atributo[nome] for nome in campos]
+    padroes = [
+        campo for campo in modelo._meta.concrete_fields
+        if campo.attname not in campos and not campo.primary_key
+    ]
+    valores_padrao = tuple(_valor_padrao(campo) for campo in padroes)
+    conversores = [(indice, conversor) for indice, conversor in enumerate(map(_conversor, informados)) if conversor]
+
+    colunas = ', '.join(connection.ops.quote_name(campo.column) for campo in informados + padroes)
+    marcador = ['%s'] * (len(informados) + len(padroes))
+    por_comando = max(connection.ops.bulk_batch_size(informados + padroes, [None] * tamanho_lote), 1)
+    tabela = connection.ops.quote_name(modelo._meta.db_table)
+
+    def preparar(linha):
+        if conversores:
+            linha = list(linha)
+            for indice, conversor in conversores:
+                linha[indice] = conversor(linha[indice])
+        return (*linha, *valores_padrao)
+
+    def gravar(cursor, lote):
+        valores = connection.ops.bulk_insert_sql(informados + padroes, [marcador] * len(lote))
+        cursor.execute(f'INSERT INTO {tabela} ({colunas}) {valores}', [v for linha in lote for v in linha])
+
+    total = 0
+    lote = []
+    with connection.cursor() as cursor:
+        for linha in linhas:
+            lote.append(preparar(linha))
+            if len(lote) >= por_comando:
+                gravar(cursor, lote)
+                total += len(lote)
+                lote = []
+        if lote:
+            gravar(cursor, lote)
+            total += len(lote)
+    return total
@@ -0,0 +1,115 @@
+import random
+import time
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import AsyncClient, override_settings
+from django.urls import reverse
+
+from contact.busca import reindexar_tudo
+from contact.models import Contact, Familia, Rua
+
+
+NOMES = ['Ana', 'João', 'José', 'Maria', 'Conceição', 'Antônio', 'Luíza', 'Tânia', 'Sérgio', 'Mônica']
+SOBRENOMES = ['Silva', 'Araújo', 'Gonçalves', 'Pereira', 'Simões', 'Brandão', 'Lima', 'Magalhães']
+BAIRROS = ['Centro', 'São José', 'Boa Esperança', 'Jardim América', 'Vila Nova']
+PREFIXOS = {
+    'contatos': ['m', 'ma', 'mar', 'maria', 'maria si', 'jo', 'jos', 'conc', 'tania ma', 'xyz'],
+    'familias': ['f', 'fa', 'fam', 'familia 4', 'familia 42'],
+    'ruas': ['r', 'ru', 'rua 1', 'rua 17', 'rua 999'],
+    'livros': ['l', 'li', '1', 'refl'],
+}
+
+
+def _percentil(tempos, p):
+    ordenados = sorted(tempos)
+    return ordenados[min(int(len(ordenados) * p / 100), len(ordenados) - 1)] * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede o p50/p95 do autocompletar pela pilha ASGI completa (handler e '
+        'middlewares) com o cache frio e quente em uma base sintética (criada e '
+        'descartada dentro de uma transação)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--contatos', type=int, default=100_000, help='Quantidade de contatos (padrão: 100000)')
+        parser.add_argument('--repeticoes', type=int, default=20, help='Chamadas de cada prefixo (padrão: 20)')
+        parser.add_argument('--semente', type=int, default=42, help='Semente aleatória (padrão: 42)')
+
+    def handle(self, *args, **options):
+        if options['contatos'] < 1 or options['repeticoes'] < 1:
+            raise CommandError('Informe contatos e repetições maiores que zero')
+        with transaction.atomic():
+            usuario = self._popular(options['contatos'], options['semente'])
+            self._medir(usuario, options['repeticoes'])
+            transaction.set_rollback(True)
+        cache.clear()
+        self.stdout.write('Base sintética descartada.')
+
+    def _popular(self, total_contatos, semente):
+        aleatorio = random.Random(semente)
+        usuario = User.objects.create(username=f'benchmark-autocompletar-{semente}')
+
+        inicio = time.perf_counter()
+        ruas = Rua.objects.bulk_create([
+            Rua(nome=f'Rua {n}', bairro=aleatorio.choice(BAIRROS), owner=usuario)
+            for n in range(max(total_contatos // 100, 1))
+        ], batch_size=1000)
+        familias = Familia.objects.bulk_create([
+            Familia(nome=f'Família {n} {aleatorio.choice(SOBRENOMES)}', rua=aleatorio.choice(ruas), owner=usuario)
+            for n in range(max(total_contatos // 4, 1))
+        ], batch_size=1000)
+        for inicio_lote in range(0, total_contatos, 5000):
+            Contact.objects.bulk_create([
+                Contact(
+                    first_name=aleatorio.choice(NOMES),
+                    last_name=aleatorio.choice(SOBRENOMES),
+                    familia=aleatorio.choice(familias),
+                    rua=aleatorio.choice(ruas),
+                    owner=usuario,
+                )
+                for _ in range(inicio_lote, min(inicio_lote + 5000, total_contatos))
+            ])
+        reindexar_tudo(owner=usuario)
+        self.stdout.write(f'Base criada e indexada: {total_contatos} contatos em {time.perf_counter() - inicio:.1f}s')
+        return usuario
+
+    def _chamar(self, cliente, tipo, prefixo):
+        inicio = time.perf_counter()
+        resposta = async_to_sync(cliente.get)(reverse('contact:autocompletar', args=[tipo]), {'q': prefixo})
+        return time.perf_counter() - inicio, resposta
+
+    def _medir(self, usuario, repeticoes):
+        cliente = AsyncClient()
+        cliente.force_login(usuario)
+        with override_settings(ALLOWED_HOSTS=['testserver'], DEBUG=False):
+            self._medir_prefixos(cliente, repeticoes)
+
+    def _medir_prefixos(self, cliente, repeticoes):
+        self.stdout.write(f'{"tipo":<10}{"frio p50":>10}{"frio p95":>10}{"quente p50":>12}{"quente p95":>12}')
+        geral_frio, geral_quente = [], []
+        for tipo, prefixos in PREFIXOS.items():
+            frio, quente = [], []
+            for _ in range(repeticoes):
+                for prefixo in prefixos:
+                    cache.clear()
+                    tempo, resposta = self._chamar(cliente, tipo, prefixo)
+                    if resposta.status_code != 200:
+                        raise CommandError(f'{tipo} {prefixo!r}: status {resposta.status_code}')
+                    frio.append(tempo)
+                    quente.append(self._chamar(cliente, tipo, prefixo)[0])
+            geral_frio += frio
+            geral_quente += quente
+            self.stdout.write(
+                f'{tipo:<10}{_percentil(frio, 50):>10.2f}{_percentil(frio, 95):>10.2f}'
+                f'{_percentil(quente, 50):>12.2f}{_percentil(quente, 95):>12.2f}'
+            )
+        self.stdout.write(
+            f'{"todos":<10}{_percentil(geral_frio, 50):>10.2f}{_percentil(geral_frio, 95):>10.2f}'
+            f'{_percentil(geral_quente, 50):>12.2f}{_percentil(geral_quente, 95):>12.2f}   (ms)'
+        )
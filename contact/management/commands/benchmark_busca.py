@@ -0,0 +1,96 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from contact.busca import backend_de_busca, filtro_de_busca, reindexar_tudo
+from contact.models import Contact, Familia, Rua
+
+
+NOMES = ['Ana', 'João', 'José', 'Maria', 'Conceição', 'Antônio', 'Luíza', 'Tânia', 'Sérgio', 'Mônica']
+SOBRENOMES = ['Silva', 'Araújo', 'Gonçalves', 'Pereira', 'Simões', 'Brandão', 'Lima', 'Magalhães']
+BAIRROS = ['Centro', 'São José', 'Boa Esperança', 'Jardim América', 'Vila Nova']
+BUSCAS = ['maria', 'conceicao silva', 'araujo', 'sao jose', 'rua 17', 'familia 42', 'mon', 'xyz']
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara a busca por icontains com a busca pelo índice textual em uma '
+        'base sintética (criada e descartada dentro de uma transação)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--contatos', type=int, default=100_000, help='Quantidade de contatos (padrão: 100000)')
+        parser.add_argument('--repeticoes', type=int, default=5, help='Execuções de cada busca (padrão: 5)')
+        parser.add_argument('--semente', type=int, default=42, help='Semente aleatória (padrão: 42)')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            usuario = self._popular(options['contatos'], options['semente'])
+            self._comparar(usuario, options['repeticoes'])
+            transaction.set_rollback(True)
+        self.stdout.write('Base sintética descartada.')
+
+    def _popular(self, total_contatos, semente):
+        aleatorio = random.Random(semente)
+        usuario = User.objects.create(username=f'benchmark-busca-{semente}')
+
+        inicio = time.perf_counter()
+        ruas = Rua.objects.bulk_create([
+            Rua(nome=f'Rua {n}', bairro=aleatorio.choice(BAIRROS), owner=usuario)
+            for n in range(max(total_contatos // 100, 1))
+        ], batch_size=1000)
+        familias = Familia.objects.bulk_create([
+            Familia(nome=f'Família {n} {aleatorio.choice(SOBRENOMES)}', rua=aleatorio.choice(ruas), owner=usuario)
+            for n in range(max(total_contatos // 4, 1))
+        ], batch_size=1000)
+        for inicio_lote in range(0, total_contatos, 5000):
+            Contact.objects.bulk_create([
+                Contact(
+                    first_name=aleatorio.choice(NOMES),
+                    last_name=aleatorio.choice(SOBRENOMES),
+                    description=f'Contato {n}',
+                    familia=aleatorio.choice(familias),
+                    rua=aleatorio.choice(ruas),
+                    owner=usuario,
+                )
+                for n in range(inicio_lote, min(inicio_lote + 5000, total_contatos))
+            ])
+        self.stdout.write(f'Base criada: {total_contatos} contatos em {time.perf_counter() - inicio:.1f}s')
+
+        inicio = time.perf_counter()
+        reindexar_tudo(owner=usuario)
+        self.stdout.write(f'Índice construído em {time.perf_counter() - inicio:.1f}s (mecanismo: {backend_de_busca()})')
+        return usuario
+
+    def _medir(self, consulta, repeticoes):
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            total = consulta.count()
+            list(consulta.order_by('-id')[:10])
+            tempos.append(time.perf_counter() - inicio)
+        return total, sorted(tempos)[len(tempos) // 2] * 1000
+
+    def _comparar(self, usuario, repeticoes):
+        base = Contact.objects.filter(show=True, owner=usuario)
+        self.stdout.write(f'{"busca":<18}{"icontains (ms)":>16}{"índice (ms)":>14}{"resultados":>22}')
+        for texto in BUSCAS:
+            # icontains casa a frase inteira; o índice exige cada termo como prefixo
+            icontains = base.filter(
+                Q(first_name__icontains=texto) |
+                Q(last_name__icontains=texto) |
+                Q(description__icontains=texto) |
+                Q(familia__nome__icontains=texto) |
+                Q(rua__nome__icontains=texto) |
+                Q(rua__bairro__icontains=texto)
+            )
+            indice = base.filter(pk__in=filtro_de_busca('contato', usuario, texto))
+            total_antigo, tempo_antigo = self._medir(icontains, repeticoes)
+            total_novo, tempo_novo = self._medir(indice, repeticoes)
+            self.stdout.write(
+                f'{texto:<18}{tempo_antigo:>16.1f}{tempo_novo:>14.1f}{f"{total_antigo} / {total_novo}":>22}'
+            )
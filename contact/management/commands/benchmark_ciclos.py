@@ -0,0 +1,65 @@
+import random
+import time
+from datetime import date, timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.core.management.base import BaseCommand, CommandError
+
+from contact.ciclos import CalendarioCiclos
+
+
+def numero_por_relativedelta(data, data_inicio_plano, duracao_ciclo_meses, total_ciclos_plano):
+    """
+    Busca anterior ao calendário: percorre os ciclos recalculando as datas de
+    cada um com relativedelta
+    """
+    if data < data_inicio_plano:
+        return 0
+    numero_encontrado = None
+    for numero in range(1, total_ciclos_plano + 1):
+        inicio = data_inicio_plano + relativedelta(months=(numero - 1) * duracao_ciclo_meses)
+        if inicio > data:
+            break
+        numero_encontrado = numero
+    fim = (
+        data_inicio_plano + relativedelta(months=total_ciclos_plano * duracao_ciclo_meses) - timedelta(days=1)
+    )
+    return None if data > fim else numero_encontrado
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara, no mesmo processo, a busca do ciclo de cada data pelo calendário '
+        'pré-calculado (bisect) com o recálculo por relativedelta'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--datas', type=int, default=100_000, help='Quantidade de datas (padrão: 100000)')
+        parser.add_argument('--ciclos', type=int, default=36, help='Ciclos do plano (padrão: 36)')
+        parser.add_argument('--semente', type=int, default=42, help='Semente aleatória (padrão: 42)')
+
+    def handle(self, *args, **options):
+        if options['datas'] < 1 or options['ciclos'] < 1:
+            raise CommandError('Informe datas e ciclos maiores que zero')
+
+        plano = (date(2022, 1, 31), 3, options['ciclos'])
+        aleatorio = random.Random(options['semente'])
+        alcance = (plano[2] * plano[1] + 12) * 31
+        datas = [date(2021, 6, 1) + timedelta(days=aleatorio.randrange(alcance)) for _ in range(options['datas'])]
+
+        inicio = time.perf_counter()
+        antigos = [numero_por_relativedelta(data, *plano) for data in datas]
+        tempo_antigo = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        calendario = CalendarioCiclos(*plano)
+        novos = [calendario.numero_do_ciclo(data) for data in datas]
+        tempo_novo = time.perf_counter() - inicio
+
+        if antigos != novos:
+            divergentes = sum(1 for antigo, novo in zip(antigos, novos) if antigo != novo)
+            raise CommandError(f'{divergentes} data(s) com ciclo diferente entre as duas buscas')
+
+        self.stdout.write(f'{len(datas)} datas, {plano[2]} ciclos')
+        self.stdout.write(f'relativedelta: {tempo_antigo * 1000:>10.1f} ms')
+        self.stdout.write(f'calendário:    {tempo_novo * 1000:>10.1f} ms ({tempo_antigo / tempo_novo:.0f}x)')
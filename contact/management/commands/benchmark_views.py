@@ -0,0 +1,137 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+
+import django
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from contact.models import Familia, Rua
+from contact.sintetico import TOTAL_CICLOS_HISTORICO, gerar_comunidade
+
+
+def _views_medidas(owner):
+    """(nome, url) das views principais, com ids reais da comunidade gerada"""
+    rua = Rua.objects.filter(owner=owner).order_by('pk').first()
+    familia = Familia.objects.filter(owner=owner).order_by('pk').first()
+    return [
+        ('index', reverse('contact:index')),
+        ('search', reverse('contact:search') + '?q=maria'),
+        ('search_faixa_etaria', reverse('contact:search') + '?age_group=jovens'),
+        ('busca_unificada', reverse('contact:busca_unificada') + '?q=silva'),
+        ('ruas_list', reverse('contact:ruas_list')),
+        ('rua_detail', reverse('contact:rua_detail', args=[rua.pk])),
+        ('search_ruas', reverse('contact:search_ruas') + '?q=rua'),
+        ('family', reverse('contact:family')),
+        ('familia_detail', reverse('contact:familia_detail', args=[familia.pk])),
+        ('search_familias', reverse('contact:search_familias') + '?q=familia'),
+        ('livro_list', reverse('contact:livro_list')),
+        ('dashboard_estatisticas', reverse('contact:dashboard_estatisticas')),
+        ('gerenciar_historico', reverse('contact:gerenciar_historico')),
+        ('historico_ciclos', reverse('contact:historico_ciclos')),
+        ('historico_ciclo_detalhado',
+         reverse('contact:historico_ciclo_detalhado', args=[TOTAL_CICLOS_HISTORICO])),
+    ]
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True, timeout=10,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede o tempo e o número de consultas das views principais em comunidades '
+        'sintéticas de vários tamanhos e emite um relatório JSON. As comunidades '
+        'são criadas e descartadas dentro de uma transação.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamanhos', type=str, default='1000,10000',
+            help='Quantidades de contatos separadas por vírgula (padrão: 1000,10000)',
+        )
+        parser.add_argument('--repeticoes', type=int, default=3, help='Medições por view, após o aquecimento (padrão: 3)')
+        parser.add_argument('--semente', type=int, default=42, help='Semente aleatória (padrão: 42)')
+        parser.add_argument('--saida', type=str, help='Arquivo do relatório JSON (padrão: saída padrão)')
+
+    def handle(self, *args, **options):
+        try:
+            tamanhos = [int(t) for t in options['tamanhos'].split(',') if t.strip()]
+        except ValueError:
+            raise CommandError('--tamanhos deve ser uma lista de inteiros, ex.: 1000,10000')
+        if not tamanhos or min(tamanhos) < 1 or options['repeticoes'] < 1:
+            raise CommandError('Informe tamanhos e repetições maiores que zero')
+
+        relatorio = {
+            'gerado_em': datetime.now().isoformat(timespec='seconds'),
+            'commit': _commit_atual(),
+            'banco': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'semente': options['semente'],
+            'repeticoes': options['repeticoes'],
+            'tamanhos': {},
+        }
+        for tamanho in tamanhos:
+            self.stderr.write(f'Comunidade com {tamanho} contatos...')
+            relatorio['tamanhos'][str(tamanho)] = self._medir(tamanho, options['semente'], options['repeticoes'])
+
+        conteudo = json.dumps(relatorio, ensure_ascii=False, indent=2)
+        if options['saida']:
+            with open(options['saida'], 'w', encoding='utf-8') as arquivo:
+                arquivo.write(conteudo + '\n')
+            self.stderr.write(self.style.SUCCESS(f'✅ Relatório gravado em {options["saida"]}'))
+        else:
+            self.stdout.write(conteudo)
+
+    def _medir(self, tamanho, semente, repeticoes):
+        resultado = {}
+        with transaction.atomic():
+            owner = User.objects.create_user(username=f'benchmark-views-{tamanho}-{semente}')
+            inicio = time.perf_counter()
+            resultado['totais'] = gerar_comunidade(owner, tamanho, semente=semente)
+            resultado['geracao_s'] = round(time.perf_counter() - inicio, 2)
+
+            cliente = Client()
+            cliente.force_login(owner)
+            views = {}
+            with override_settings(ALLOWED_HOSTS=['testserver'], DEBUG=False):
+                for nome, url in _views_medidas(owner):
+                    views[nome] = self._medir_view(cliente, url, repeticoes)
+                    self.stderr.write(
+                        f'  {nome}: {views[nome]["mediana_ms"]} ms, {views[nome]["consultas"]} consultas'
+                    )
+            resultado['views'] = views
+            transaction.set_rollback(True)
+        return resultado
+
+    @staticmethod
+    def _medir_view(cliente, url, repeticoes):
+        cliente.get(url)  # aquecimento (templates, caches de plano e calendário)
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            resposta = cliente.get(url)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        medicao = getattr(resposta.wsgi_request, 'medicao_consultas', None)
+        return {
+            'url': url,
+            'status': resposta.status_code,
+            'mediana_ms': round(statistics.median(tempos), 1),
+            'min_ms': round(min(tempos), 1),
+            'max_ms': round(max(tempos), 1),
+            'consultas': medicao.consultas if medicao else None,
+            'consultas_duplicadas': medicao.duplicadas if medicao else None,
+            'tempo_bd_ms': round(medicao.tempo_bd * 1000, 1) if medicao else None,
+        }
@@ -0,0 +1,57 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from contact import encerramento
+from contact.encerramento import encerrar_ciclo
+
+
+class Command(BaseCommand):
+    help = (
+        'Encerra o ciclo atual do plano ativo de cada usuário. Cada usuário é '
+        'encerrado em sua própria transação; rodar de novo não duplica nada.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--username',
+            type=str,
+            help='Encerrar apenas o ciclo deste usuário (padrão: todos com plano ativo)',
+        )
+        parser.add_argument(
+            '--data',
+            type=date.fromisoformat,
+            help='Encerrar o ciclo que contém esta data, AAAA-MM-DD (padrão: hoje)',
+        )
+
+    def handle(self, *args, **options):
+        usuarios = User.objects.filter(configuracaoestatisticas__ativo=True).distinct().order_by('id')
+        if options['username']:
+            usuarios = User.objects.filter(username=options['username'])
+            if not usuarios.exists():
+                raise CommandError(f'Usuário "{options["username"]}" não encontrado')
+
+        contagem = {}
+        falhas = []
+        for usuario in usuarios:
+            try:
+                resultado = encerrar_ciclo(usuario, data_referencia=options['data'])
+            except Exception as erro:
+                falhas.append(usuario.username)
+                self.stderr.write(self.style.ERROR(f'{usuario.username}: falhou ({erro}); nada foi gravado'))
+                continue
+
+            status = resultado['status']
+            contagem[status] = contagem.get(status, 0) + 1
+            linha = f'{usuario.username}: {status}'
+            if resultado['numero_ciclo']:
+                linha += f' (ciclo {resultado["numero_ciclo"]})'
+            if status == encerramento.ENCERRADO:
+                linha += f', {resultado["detalhes_livros"]} livro(s)'
+            self.stdout.write(linha)
+
+        resumo = ', '.join(f'{status}: {total}' for status, total in sorted(contagem.items())) or 'nenhum usuário'
+        if falhas:
+            raise CommandError(f'{len(falhas)} usuário(s) com falha ({", ".join(falhas)}); {resumo}')
+        self.stdout.write(self.style.SUCCESS(f'✅ Encerramento concluído — {resumo}'))
@@ -0,0 +1,59 @@
+import time
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from contact.sintetico import gerar_comunidade
+
+
+class Command(BaseCommand):
+    help = 'Gera uma comunidade sintética (contatos, famílias, ruas, atividades, estudos e 36 ciclos de histórico)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--contatos', type=int, default=1000, help='Quantidade de contatos (padrão: 1000)')
+        parser.add_argument('--semente', type=int, default=42, help='Semente aleatória (padrão: 42)')
+        parser.add_argument(
+            '--username',
+            type=str,
+            help='Usuário dono dos dados (padrão: sintetico-<contatos>-<semente>)',
+        )
+        parser.add_argument(
+            '--senha',
+            type=str,
+            help='Senha do usuário dono (padrão: nenhuma; o usuário não consegue entrar)',
+        )
+        parser.add_argument(
+            '--data-referencia',
+            type=date.fromisoformat,
+            help='Data "de hoje" usada na geração, AAAA-MM-DD (padrão: hoje)',
+        )
+        parser.add_argument('--tamanho-lote', type=int, default=5000, help='Linhas por bulk_create (padrão: 5000)')
+
+    def handle(self, *args, **options):
+        if options['contatos'] < 1:
+            raise CommandError('--contatos deve ser maior que zero')
+
+        username = options['username'] or f'sintetico-{options["contatos"]}-{options["semente"]}'
+        if User.objects.filter(username=username).exists():
+            raise CommandError(f'Usuário "{username}" já existe; escolha outro --username')
+        # Sem --senha o usuário fica com senha inutilizável (create_user com password=None)
+        owner = User.objects.create_user(username=username, password=options['senha'])
+
+        inicio = time.perf_counter()
+
+        def progresso(etapa, quantidade):
+            self.stdout.write(f'[{time.perf_counter() - inicio:7.1f}s] {etapa}: {quantidade}')
+
+        gerar_comunidade(
+            owner,
+            options['contatos'],
+            semente=options['semente'],
+            data_referencia=options['data_referencia'],
+            tamanho_lote=options['tamanho_lote'],
+            progresso=progresso,
+        )
+        acesso = 'com a senha informada' if options['senha'] else 'sem senha; use --senha para entrar com ele'
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Comunidade gerada para "{username}" ({acesso}) em {time.perf_counter() - inicio:.1f}s'
+        ))
@@ -0,0 +1,66 @@
+import time
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from contact.importacao import (
+    TAMANHO_LOTE,
+    ErroImportacao,
+    importar_linhas,
+    ler_planilha,
+    relatorio_de_erros,
+)
+
+
+class Command(BaseCommand):
+    help = 'Importa contatos, famílias e ruas de um arquivo CSV ou XLSX (uma pessoa por linha)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', type=Path, help='Arquivo .csv ou .xlsx')
+        parser.add_argument('--username', required=True, help='Usuário dono dos registros importados')
+        parser.add_argument(
+            '--tamanho-lote', type=int, default=TAMANHO_LOTE,
+            help=f'Linhas por lote de validação e bulk_create (padrão: {TAMANHO_LOTE})',
+        )
+        parser.add_argument(
+            '--erros', type=Path,
+            help='Grava as linhas rejeitadas neste CSV (padrão: <arquivo>.erros.csv, se houver erros)',
+        )
+
+    def handle(self, *args, **options):
+        arquivo = options['arquivo']
+        if not arquivo.is_file():
+            raise CommandError(f'Arquivo "{arquivo}" não encontrado')
+        try:
+            owner = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'Usuário "{options["username"]}" não encontrado')
+
+        inicio = time.perf_counter()
+
+        def progresso(linhas):
+            self.stdout.write(f'[{time.perf_counter() - inicio:7.1f}s] {linhas} linhas')
+
+        try:
+            with arquivo.open('rb') as entrada:
+                resultado = importar_linhas(
+                    owner, ler_planilha(entrada, arquivo.name),
+                    tamanho_lote=options['tamanho_lote'], progresso=progresso,
+                )
+        except ErroImportacao as erro:
+            raise CommandError(str(erro))
+        decorrido = time.perf_counter() - inicio
+
+        if resultado['erros']:
+            destino = options['erros'] or arquivo.with_name(f'{arquivo.name}.erros.csv')
+            destino.write_text(relatorio_de_erros(resultado), encoding='utf-8')
+            self.stdout.write(self.style.WARNING(
+                f'{len(resultado["erros"])} linha(s) rejeitada(s); relatório em {destino}'
+            ))
+
+        por_segundo = resultado['total_linhas'] / decorrido if decorrido else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {resultado["contatos_criados"]} contato(s), {resultado["familias_criadas"]} família(s) e '
+            f'{resultado["ruas_criadas"]} rua(s) criados em {decorrido:.1f}s ({por_segundo:.0f} linhas/s)'
+        ))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from contact.importacao import processar_importacao, recuperar_importacoes_abandonadas
+from contact.models import ImportacaoContatos
+
+
+class Command(BaseCommand):
+    help = (
+        'Processa as importações de contatos pendentes, da mais antiga para a mais nova. '
+        'Use com IMPORTACAO_EM_SEGUNDO_PLANO = False (cron ou worker). Antes, devolve à fila '
+        'as importações abandonadas em processamento.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tempo-limite', type=int, default=None,
+            help='Minutos em processamento até a importação ser tida como abandonada '
+                 '(padrão: IMPORTACAO_TEMPO_LIMITE dos settings, ou 60)',
+        )
+
+    def handle(self, *args, **options):
+        devolvidas, falhas = recuperar_importacoes_abandonadas(options['tempo_limite'])
+        if devolvidas or falhas:
+            self.stdout.write(
+                f'{devolvidas} importação(ões) abandonada(s) devolvida(s) à fila, {falhas} marcada(s) como falha'
+            )
+
+        pendentes = ImportacaoContatos.objects.filter(
+            status=ImportacaoContatos.PENDENTE
+        ).order_by('created_at').values_list('pk', flat=True)
+
+        for importacao_id in list(pendentes):
+            importacao = processar_importacao(importacao_id)
+            if importacao is None:
+                continue  # outro processo pegou esta importação
+            if importacao.status == ImportacaoContatos.CONCLUIDA:
+                self.stdout.write(
+                    f'{importacao.nome_arquivo}: {importacao.contatos_criados} contato(s), '
+                    f'{importacao.linhas_com_erro} linha(s) com erro'
+                )
+            else:
+                self.stdout.write(self.style.ERROR(f'{importacao.nome_arquivo}: {importacao.mensagem}'))
@@ -0,0 +1,39 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from contact.historicos import recalcular_dados_sistema
+
+
+class Command(BaseCommand):
+    help = 'Recalcula em lote os dados do sistema de todos os históricos de ciclo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--username',
+            type=str,
+            help='Processar apenas este usuário (padrão: todos com histórico)',
+        )
+        parser.add_argument(
+            '--tamanho-lote',
+            type=int,
+            default=100,
+            help='Quantidade de históricos gravados por bulk_update (padrão: 100)',
+        )
+
+    def handle(self, *args, **options):
+        usuarios = User.objects.filter(historicociclo__isnull=False).distinct().order_by('id')
+        if options['username']:
+            usuarios = User.objects.filter(username=options['username'])
+            if not usuarios.exists():
+                raise CommandError(f'Usuário "{options["username"]}" não encontrado')
+
+        total_geral = 0
+        for usuario in usuarios:
+            def progresso(processados, total, usuario=usuario):
+                self.stdout.write(f'{usuario.username}: {processados}/{total} histórico(s)')
+
+            total_geral += recalcular_dados_sistema(
+                usuario, tamanho_lote=options['tamanho_lote'], progresso=progresso
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Dados do sistema recalculados para {total_geral} histórico(s)'))
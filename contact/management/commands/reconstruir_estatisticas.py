@@ -0,0 +1,63 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from contact.aggregates import calcular_estatisticas_agregadas
+from contact.models import EstatisticasSnapshot
+from contact.snapshots import atualizar_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói os snapshots de estatísticas e/ou verifica se batem com o cálculo ao vivo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--username',
+            type=str,
+            help='Processar apenas este usuário (padrão: todos)',
+        )
+        parser.add_argument(
+            '--verificar',
+            action='store_true',
+            help='Apenas compara os snapshots com o cálculo ao vivo, sem gravar',
+        )
+
+    def handle(self, *args, **options):
+        usuarios = User.objects.order_by('id')
+        if options['username']:
+            usuarios = usuarios.filter(username=options['username'])
+            if not usuarios.exists():
+                raise CommandError(f'Usuário "{options["username"]}" não encontrado')
+
+        divergentes = 0
+        for usuario in usuarios:
+            if options['verificar']:
+                divergentes += self._verificar(usuario)
+            else:
+                atualizar_snapshot(usuario)
+                self.stdout.write(f'Snapshot reconstruído: {usuario.username}')
+
+        if options['verificar']:
+            if divergentes:
+                raise CommandError(f'{divergentes} snapshot(s) divergente(s) do cálculo ao vivo')
+            self.stdout.write(self.style.SUCCESS('✅ Todos os snapshots conferem com o cálculo ao vivo'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✅ {usuarios.count()} snapshot(s) reconstruído(s)'))
+
+    def _verificar(self, usuario):
+        snapshot = EstatisticasSnapshot.objects.filter(owner=usuario).first()
+        if snapshot is None:
+            self.stdout.write(self.style.WARNING(f'{usuario.username}: sem snapshot'))
+            return 1
+
+        salvo = snapshot.como_dicionario()
+        ao_vivo = calcular_estatisticas_agregadas(usuario)
+        diferencas = [chave for chave, valor in ao_vivo.items() if salvo.get(chave) != valor]
+
+        if diferencas:
+            self.stdout.write(self.style.ERROR(
+                f'{usuario.username}: divergência em {", ".join(diferencas)}'
+            ))
+            return 1
+
+        self.stdout.write(f'{usuario.username}: OK')
+        return 0
@@ -0,0 +1,29 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from contact.busca import backend_de_busca, reindexar_tudo
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o índice de busca textual de contatos, famílias e ruas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--username',
+            type=str,
+            help='Reindexar apenas os registros deste usuário (padrão: todos)',
+        )
+
+    def handle(self, *args, **options):
+        owner = None
+        if options['username']:
+            owner = User.objects.filter(username=options['username']).first()
+            if owner is None:
+                raise CommandError(f'Usuário "{options["username"]}" não encontrado')
+
+        totais = reindexar_tudo(owner=owner)
+        for tipo, total in totais.items():
+            self.stdout.write(f'{tipo}: {total} entrada(s)')
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Índice reconstruído (mecanismo: {backend_de_busca()})'
+        ))
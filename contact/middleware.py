@@ -0,0 +1,166 @@
+"""
+Instrumentação de requisições: consultas SQL e latência por view.
+
+``MedicaoConsultasMiddleware`` conta as consultas (e as repetidas), soma o
+tempo gasto no banco e o tempo total de cada requisição, e guarda as últimas
+amostras de cada nome de URL em memória (``registro_metricas``). Em DEBUG os
+números também vão nos cabeçalhos da resposta.
+
+O middleware atende requisições síncronas e assíncronas: sob ASGI as views
+assíncronas (o autocompletar) continuam rodando no laço de eventos. Como as
+conexões do Django são por thread, o wrapper é instalado (e removido) na
+thread em que o ORM executa as consultas da requisição.
+
+Requisições sem rota (404 de caminhos desconhecidos) vão todas para a
+mesma chave, ``SEM_ROTA``, para que caminhos arbitrários não criem uma
+janela cada. As consultas feitas ao gerar o corpo de uma
+``StreamingHttpResponse`` (as exportações em NDJSON/CSV) rodam depois que o
+middleware devolve a resposta e não entram na contagem.
+
+Configuração opcional em settings:
+
+* ``METRICAS_AMOSTRAS_POR_VIEW`` (padrão 200): tamanho da janela por view.
+"""
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+
+class MedicaoRequisicao:
+    """Wrapper de execução de SQL que acumula as medições de uma requisição"""
+
+    def __init__(self):
+        self.consultas = 0
+        self.tempo_bd = 0.0
+        self._sqls = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tempo_bd += time.perf_counter() - inicio
+            self.consultas += 1
+            self._sqls[(sql, repr(params))] += 1
+
+    @property
+    def duplicadas(self):
+        return sum(vezes - 1 for vezes in self._sqls.values() if vezes > 1)
+
+
+class RegistroMetricas:
+    """Janela deslizante de amostras por nome de URL (em memória do processo)"""
+
+    def __init__(self, amostras_por_view=200):
+        self.amostras_por_view = amostras_por_view
+        self._amostras = defaultdict(lambda: deque(maxlen=self.amostras_por_view))
+        self._lock = threading.Lock()
+
+    def registrar(self, nome_url, consultas, duplicadas, tempo_bd_ms, tempo_total_ms):
+        with self._lock:
+            self._amostras[nome_url].append((consultas, duplicadas, tempo_bd_ms, tempo_total_ms))
+
+    def limpar(self):
+        with self._lock:
+            self._amostras.clear()
+
+    @staticmethod
+    def _resumo(valores):
+        ordenados = sorted(valores)
+        p95 = ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.95))]
+        return {
+            'media': round(sum(ordenados) / len(ordenados), 2),
+            'p95': round(p95, 2),
+            'max': round(ordenados[-1], 2),
+        }
+
+    def resumo(self):
+        """``{nome_url: {'requisicoes', 'consultas', 'duplicadas', 'tempo_bd_ms', 'tempo_total_ms'}}``"""
+        with self._lock:
+            copia = {nome: list(amostras) for nome, amostras in self._amostras.items()}
+
+        resultado = {}
+        for nome, amostras in sorted(copia.items()):
+            colunas = list(zip(*amostras))
+            resultado[nome] = {
+                'requisicoes': len(amostras),
+                'consultas': self._resumo(colunas[0]),
+                'duplicadas': self._resumo(colunas[1]),
+                'tempo_bd_ms': self._resumo(colunas[2]),
+                'tempo_total_ms': self._resumo(colunas[3]),
+            }
+        return resultado
+
+
+registro_metricas = RegistroMetricas(getattr(settings, 'METRICAS_AMOSTRAS_POR_VIEW', 200))
+
+
+SEM_ROTA = '<sem rota>'
+
+
+def nome_da_url(request):
+    """``namespace:nome`` da URL resolvida, ou ``SEM_ROTA``"""
+    resolver_match = getattr(request, 'resolver_match', None)
+    if resolver_match and resolver_match.view_name:
+        return resolver_match.view_name
+    return SEM_ROTA
+
+
+class MedicaoConsultasMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _instalar(medicao):
+        pilha = ExitStack()
+        for conexao in connections.all():
+            pilha.enter_context(conexao.execute_wrapper(medicao))
+        return pilha
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        medicao = MedicaoRequisicao()
+        inicio = time.perf_counter()
+        with self._instalar(medicao):
+            response = self.get_response(request)
+        return self._registrar(request, response, medicao, inicio)
+
+    async def __acall__(self, request):
+        medicao = MedicaoRequisicao()
+        inicio = time.perf_counter()
+        # Na thread das chamadas síncronas da requisição (sync_to_async com
+        # thread_sensitive), onde o ORM usa a conexão
+        pilha = await sync_to_async(self._instalar)(medicao)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(pilha.close)()
+        return self._registrar(request, response, medicao, inicio)
+
+    def _registrar(self, request, response, medicao, inicio):
+        tempo_total_ms = (time.perf_counter() - inicio) * 1000
+        tempo_bd_ms = medicao.tempo_bd * 1000
+
+        request.medicao_consultas = medicao
+        registro_metricas.registrar(
+            nome_da_url(request), medicao.consultas, medicao.duplicadas, tempo_bd_ms, tempo_total_ms
+        )
+
+        if settings.DEBUG:
+            response['X-Consultas-SQL'] = str(medicao.consultas)
+            response['X-Consultas-Duplicadas'] = str(medicao.duplicadas)
+            response['X-Tempo-BD-ms'] = f'{tempo_bd_ms:.1f}'
+            response['X-Tempo-Total-ms'] = f'{tempo_total_ms:.1f}'
+        return response
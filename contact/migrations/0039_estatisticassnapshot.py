@@ -0,0 +1,53 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact', '0038_add_novas_familias_rds_to_historico'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstatisticasSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grupos_prejovens', models.IntegerField(default=0)),
+                ('aulas_criancas', models.IntegerField(default=0)),
+                ('circulos_estudo', models.IntegerField(default=0)),
+                ('reunioes_devocionais', models.IntegerField(default=0)),
+                ('total_familias', models.IntegerField(default=0)),
+                ('participantes_prejovens', models.IntegerField(default=0)),
+                ('participantes_criancas', models.IntegerField(default=0)),
+                ('participantes_circulos', models.IntegerField(default=0)),
+                ('participantes_devocionais', models.IntegerField(default=0)),
+                ('participantes_prejovens_bahais', models.IntegerField(default=0)),
+                ('participantes_criancas_bahais', models.IntegerField(default=0)),
+                ('participantes_circulos_bahais', models.IntegerField(default=0)),
+                ('participantes_devocionais_bahais', models.IntegerField(default=0)),
+                ('criancas_sistema', models.IntegerField(default=0)),
+                ('prejovens_sistema', models.IntegerField(default=0)),
+                ('jovens_sistema', models.IntegerField(default=0)),
+                ('adultos_sistema', models.IntegerField(default=0)),
+                ('estudos_andamento', models.IntegerField(default=0)),
+                ('estudos_pausados', models.IntegerField(default=0)),
+                ('total_livros_iniciados', models.IntegerField(default=0)),
+                ('total_livros_concluidos', models.IntegerField(default=0)),
+                ('livros_por_categoria', models.JSONField(default=list)),
+                ('livros_detalhados', models.JSONField(default=list)),
+                ('data_referencia', models.DateField(help_text='Data usada no cálculo da demografia')),
+                ('desatualizado', models.BooleanField(default=False, help_text='Marcado pelos sinais até o recálculo')),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('owner', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='estatisticas_snapshot', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Snapshot de Estatísticas',
+                'verbose_name_plural': 'Snapshots de Estatísticas',
+            },
+        ),
+    ]
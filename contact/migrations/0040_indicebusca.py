@@ -0,0 +1,137 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:07
+
+import django.db.models.deletion
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import migrations, models, transaction
+from django.db.utils import OperationalError
+
+
+TABELA_FTS = 'contact_indicebusca_fts'
+
+SQL_FTS5 = [
+    f"""CREATE VIRTUAL TABLE {TABELA_FTS} USING fts5(
+        conteudo, content='contact_indicebusca', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER contact_indicebusca_ai AFTER INSERT ON contact_indicebusca BEGIN
+        INSERT INTO {TABELA_FTS}(rowid, conteudo) VALUES (new.id, new.conteudo);
+    END""",
+    f"""CREATE TRIGGER contact_indicebusca_ad AFTER DELETE ON contact_indicebusca BEGIN
+        INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, conteudo) VALUES ('delete', old.id, old.conteudo);
+    END""",
+    f"""CREATE TRIGGER contact_indicebusca_au AFTER UPDATE ON contact_indicebusca BEGIN
+        INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, conteudo) VALUES ('delete', old.id, old.conteudo);
+        INSERT INTO {TABELA_FTS}(rowid, conteudo) VALUES (new.id, new.conteudo);
+    END""",
+]
+
+SQL_POSTGRESQL = [
+    "CREATE INDEX contact_indicebusca_tsv ON contact_indicebusca USING GIN (to_tsvector('simple', conteudo))",
+]
+
+
+def criar_indice_textual(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for sql in SQL_POSTGRESQL:
+            schema_editor.execute(sql)
+    elif vendor == 'sqlite':
+        # SQLite compilado sem FTS5: a busca usa LIKE na tabela normalizada
+        try:
+            with transaction.atomic(using=schema_editor.connection.alias):
+                for sql in SQL_FTS5:
+                    schema_editor.execute(sql)
+        except OperationalError:
+            pass
+
+
+def remover_indice_textual(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS contact_indicebusca_tsv')
+    elif vendor == 'sqlite':
+        for gatilho in ('ai', 'ad', 'au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS contact_indicebusca_{gatilho}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {TABELA_FTS}')
+
+
+# Cópia congelada da indexação de contact.busca no estado desta migração:
+# mudanças posteriores do módulo não podem alterar o que ela grava.
+# tipo: (modelo, campos pesquisáveis, campos do título, campo de visibilidade)
+FONTES = {
+    'contato': (
+        'Contact',
+        ['first_name', 'last_name', 'description', 'familia__nome', 'rua__nome', 'rua__bairro'],
+        ['first_name', 'last_name'],
+        'show',
+    ),
+    'familia': ('Familia', ['nome', 'endereco', 'description', 'rua__nome'], ['nome'], 'show'),
+    'rua': ('Rua', ['nome', 'bairro'], ['nome'], None),
+}
+
+PALAVRA = re.compile(r'[a-z0-9]+')
+
+
+def normalizar_texto(texto):
+    if not texto:
+        return ''
+    sem_acentos = ''.join(
+        c for c in unicodedata.normalize('NFKD', str(texto)) if not unicodedata.combining(c)
+    )
+    return ' '.join(PALAVRA.findall(sem_acentos.lower()))
+
+
+def popular_indice(apps, schema_editor):
+    IndiceBusca = apps.get_model('contact', 'IndiceBusca')
+    for tipo, (nome_modelo, campos, campos_titulo, campo_visivel) in FONTES.items():
+        Modelo = apps.get_model('contact', nome_modelo)
+        colunas = {'id', 'owner_id', *campos, *campos_titulo}
+        if campo_visivel:
+            colunas.add(campo_visivel)
+        entradas = []
+        for registro in Modelo.objects.order_by().values(*colunas).iterator(chunk_size=1000):
+            if registro['owner_id'] is None:
+                continue
+            if campo_visivel and not registro[campo_visivel]:
+                continue
+            entradas.append(IndiceBusca(
+                tipo=tipo,
+                objeto_id=registro['id'],
+                owner_id=registro['owner_id'],
+                titulo=' '.join(registro[c] for c in campos_titulo if registro[c]).strip()[:255],
+                conteudo=normalizar_texto(' '.join(str(registro[c]) for c in campos if registro[c])),
+            ))
+        IndiceBusca.objects.bulk_create(entradas, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact', '0039_estatisticassnapshot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndiceBusca',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('contato', 'Contato'), ('familia', 'Família'), ('rua', 'Rua')], max_length=10)),
+                ('objeto_id', models.PositiveIntegerField()),
+                ('titulo', models.CharField(max_length=255)),
+                ('conteudo', models.TextField()),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='indice_busca', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Entrada do Índice de Busca',
+                'verbose_name_plural': 'Índice de Busca',
+                'indexes': [models.Index(fields=['owner', 'tipo'], name='contact_ind_owner_i_d1ef41_idx')],
+                'unique_together': {('tipo', 'objeto_id')},
+            },
+        ),
+        migrations.RunPython(criar_indice_textual, remover_indice_textual),
+        migrations.RunPython(popular_indice, migrations.RunPython.noop),
+    ]
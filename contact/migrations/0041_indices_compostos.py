@@ -0,0 +1,95 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact', '0040_indicebusca'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='aulacrianca',
+            index=models.Index(condition=models.Q(('show', True)), fields=['owner', '-id'], name='aula_owner_visivel_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aulacrianca',
+            index=models.Index(fields=['owner', 'numero_ciclo_criacao'], name='aula_owner_ciclo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='circuloestudo',
+            index=models.Index(condition=models.Q(('show', True)), fields=['owner', '-id'], name='circulo_owner_visivel_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='circuloestudo',
+            index=models.Index(fields=['owner', 'numero_ciclo_criacao'], name='circulo_owner_ciclo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(condition=models.Q(('show', True)), fields=['owner', '-id'], name='contact_owner_visivel_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='estudoatual',
+            index=models.Index(fields=['contato', 'status'], name='estudo_contato_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='estudoatual',
+            index=models.Index(fields=['livro', 'status'], name='estudo_livro_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='estudoatual',
+            index=models.Index(fields=['created_at'], name='estudo_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='familia',
+            index=models.Index(condition=models.Q(('show', True)), fields=['owner', '-id'], name='familia_owner_visivel_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='familia',
+            index=models.Index(condition=models.Q(('reuniao_devocional', True)), fields=['owner'], name='familia_owner_rd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='familia',
+            index=models.Index(fields=['owner', 'data_ultima_reuniao'], name='familia_owner_ultima_rd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='familia',
+            index=models.Index(fields=['owner', 'numero_ciclo_criacao'], name='familia_owner_ciclo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grupofamilias',
+            index=models.Index(condition=models.Q(('show', True)), fields=['owner', '-id'], name='grupofam_owner_visivel_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grupoprejovens',
+            index=models.Index(condition=models.Q(('show', True)), fields=['owner', '-id'], name='prejovens_owner_visivel_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grupoprejovens',
+            index=models.Index(fields=['owner', 'numero_ciclo_criacao'], name='prejovens_owner_ciclo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicociclo',
+            index=models.Index(fields=['owner', '-numero_ciclo'], name='historico_owner_ciclo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicoestudo',
+            index=models.Index(fields=['contato', 'status'], name='histestudo_contato_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicoestudo',
+            index=models.Index(fields=['livro', 'status'], name='histestudo_livro_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicoestudo',
+            index=models.Index(fields=['status', 'created_at'], name='histestudo_status_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reuniaodevocional',
+            index=models.Index(fields=['owner', 'numero_ciclo_criacao'], name='reuniao_owner_ciclo_idx'),
+        ),
+    ]
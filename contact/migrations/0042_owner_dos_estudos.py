@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def preencher_owner(apps, schema_editor):
+    """Copia o dono do contato para os estudos existentes (um UPDATE por tabela)"""
+    Contact = apps.get_model('contact', 'Contact')
+    dono_do_contato = Subquery(Contact.objects.filter(pk=OuterRef('contato_id')).values('owner_id')[:1])
+    for nome in ('EstudoAtual', 'HistoricoEstudo'):
+        apps.get_model('contact', nome).objects.update(owner_id=dono_do_contato)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact', '0041_indices_compostos'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='estudoatual',
+            name='estudo_criado_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='historicoestudo',
+            name='histestudo_status_criado_idx',
+        ),
+        migrations.AddField(
+            model_name='estudoatual',
+            name='owner',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='historicoestudo',
+            name='owner',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(preencher_owner, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='estudoatual',
+            index=models.Index(fields=['owner', 'status', 'created_at'], name='estudo_owner_status_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicoestudo',
+            index=models.Index(fields=['owner', 'status', 'created_at'], name='histestudo_owner_st_criado_idx'),
+        ),
+    ]
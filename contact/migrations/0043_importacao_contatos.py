@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact', '0042_owner_dos_estudos'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportacaoContatos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('arquivo', models.FileField(upload_to='importacoes/%Y/%m/')),
+                ('nome_arquivo', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('processando', 'Processando'), ('concluida', 'Concluída'), ('falhou', 'Falhou')], default='pendente', max_length=12)),
+                ('total_linhas', models.IntegerField(default=0)),
+                ('contatos_criados', models.IntegerField(default=0)),
+                ('familias_criadas', models.IntegerField(default=0)),
+                ('ruas_criadas', models.IntegerField(default=0)),
+                ('linhas_com_erro', models.IntegerField(default=0)),
+                ('relatorio_erros', models.TextField(blank=True, help_text='Linhas rejeitadas, em CSV')),
+                ('mensagem', models.TextField(blank=True, help_text='Motivo da falha, se houver')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('concluida_em', models.DateTimeField(blank=True, null=True)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='importacoes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Importação de Contatos',
+                'verbose_name_plural': 'Importações de Contatos',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='importacao_status_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:05
+
+from importlib import import_module
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# No SQLite, adicionar uma coluna NOT NULL recria a tabela, e a tabela
+# recriada perde os gatilhos que mantêm o FTS5 sincronizado. O índice textual
+# é removido antes e reconstruído (comando 'rebuild' do FTS5) depois.
+indice_textual = import_module('contact.migrations.0040_indicebusca')
+
+
+def remover_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        indice_textual.remover_indice_textual(apps, schema_editor)
+
+
+def recriar_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    indice_textual.criar_indice_textual(apps, schema_editor)
+    if indice_textual.TABELA_FTS in schema_editor.connection.introspection.table_names():
+        schema_editor.execute(
+            f"INSERT INTO {indice_textual.TABELA_FTS}({indice_textual.TABELA_FTS}) VALUES ('rebuild')"
+        )
+
+
+def popular_nomes(apps, schema_editor):
+    normalizar_texto = indice_textual.normalizar_texto
+    IndiceBusca = apps.get_model('contact', 'IndiceBusca')
+    entradas = [
+        IndiceBusca(pk=pk, nome_normalizado=normalizar_texto(titulo))
+        for pk, titulo in IndiceBusca.objects.values_list('pk', 'titulo').iterator(chunk_size=2000)
+    ]
+    IndiceBusca.objects.bulk_update(entradas, ['nome_normalizado'], batch_size=1000)
+
+    Livro = apps.get_model('contact', 'Livro')
+    livros = [
+        Livro(pk=pk, titulo_normalizado=normalizar_texto(titulo))
+        for pk, titulo in Livro.objects.values_list('pk', 'titulo')
+    ]
+    Livro.objects.bulk_update(livros, ['titulo_normalizado'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact', '0043_importacao_contatos'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remover_fts, recriar_fts),
+        migrations.AddField(
+            model_name='indicebusca',
+            name='nome_normalizado',
+            field=models.CharField(default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='livro',
+            name='titulo_normalizado',
+            field=models.CharField(db_index=True, default='', editable=False, help_text='Título sem acentos e em minúsculas (autocompletar)', max_length=200),
+        ),
+        migrations.AddIndex(
+            model_name='indicebusca',
+            index=models.Index(fields=['owner', 'tipo', 'nome_normalizado'], name='indicebusca_prefixo_idx'),
+        ),
+        migrations.RunPython(popular_nomes, migrations.RunPython.noop),
+        migrations.RunPython(recriar_fts, remover_fts),
+    ]
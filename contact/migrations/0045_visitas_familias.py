@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def registrar_ultimas_visitas(apps, schema_editor):
+    # A única visita conhecida de cada família é a que ficou na própria família
+    Familia = apps.get_model('contact', 'Familia')
+    VisitaFamilia = apps.get_model('contact', 'VisitaFamilia')
+    VisitaFamilia.objects.bulk_create(
+        (
+            VisitaFamilia(familia_id=pk, owner_id=owner_id, data=data)
+            for pk, owner_id, data in Familia.objects.filter(data_ultima_reuniao__isnull=False)
+            .values_list('pk', 'owner_id', 'data_ultima_reuniao').iterator(chunk_size=2000)
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact', '0044_autocompletar'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VisitaFamilia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField()),
+                ('registrada_em', models.DateTimeField(auto_now_add=True)),
+                ('familia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visitas', to='contact.familia')),
+                ('owner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Visita à Família',
+                'verbose_name_plural': 'Visitas às Famílias',
+                'indexes': [models.Index(fields=['familia', '-data'], name='visita_familia_data_idx'), models.Index(fields=['owner', '-data'], name='visita_owner_data_idx')],
+            },
+        ),
+        migrations.RunPython(registrar_ultimas_visitas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+def manter_desatualizados(apps, schema_editor):
+    # Os snapshots marcados ficam com versão à frente da calculada
+    EstatisticasSnapshot = apps.get_model('contact', 'EstatisticasSnapshot')
+    EstatisticasSnapshot.objects.filter(desatualizado=True).update(versao=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact', '0045_visitas_familias'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='estatisticassnapshot',
+            name='versao',
+            field=models.IntegerField(default=0, help_text='Incrementada pelos sinais a cada alteração dos dados'),
+        ),
+        migrations.AddField(
+            model_name='estatisticassnapshot',
+            name='versao_calculada',
+            field=models.IntegerField(default=0, help_text='Versão dos dados usada no último recálculo'),
+        ),
+        migrations.RunPython(manter_desatualizados, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='estatisticassnapshot',
+            name='desatualizado',
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact', '0046_versao_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importacaocontatos',
+            name='iniciada_em',
+            field=models.DateTimeField(blank=True, help_text='Início do último processamento', null=True),
+        ),
+        migrations.AddField(
+            model_name='importacaocontatos',
+            name='tentativas',
+            field=models.IntegerField(default=0, help_text='Vezes que o processamento foi iniciado'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 """
 Mixins for forms and views to provide common functionality
 """
+from itertools import chain
+
 from django import forms
 from django.utils import timezone
 
@@ -44,9 +46,10 @@ class CycleSelectorMixin:
                 
                 # Se há uma instância com plano, calcular ciclo atual
                 if self.instance.pk and hasattr(self.instance, 'plano_ciclo') and self.instance.plano_ciclo:
-                    ciclo_atual = self.instance.plano_ciclo.calcular_ciclo_atual()
                     if not self.instance.numero_ciclo_criacao:
-                        self.fields['numero_ciclo_criacao'].initial = ciclo_atual
+                        self.fields['numero_ciclo_criacao'].initial = (
+                            self.instance.plano_ciclo.numero_ciclo_da_data(timezone.now().date())
+                        )
 
     def clean(self):
         cleaned_data = super().clean()
@@ -85,10 +88,9 @@ class HistoricoAutomaticoMixin:
         if not plano_ciclo or not numero_ciclo:
             return None
         
-        # Calcular ciclo atual do plano
+        # Calcular ciclo atual do plano (busca no calendário pré-calculado)
         try:
-            ciclo_info = plano_ciclo.calcular_ciclo_atual()
-            ciclo_atual = ciclo_info['numero'] if ciclo_info else None
+            ciclo_atual = plano_ciclo.numero_ciclo_da_data(timezone.now().date()) if plano_ciclo.ativo else None
         except:
             return None
         
@@ -102,6 +104,7 @@ class HistoricoAutomaticoMixin:
         """
         Cria ou atualiza registro no histórico para o ciclo especificado
         """
+        from .atividades import contadores_historico
         from .models import HistoricoCiclo
         
         plano_ciclo = instance.plano_ciclo
@@ -118,33 +121,9 @@ class HistoricoAutomaticoMixin:
             }
         )
         
-        # Incrementar contador correspondente ao tipo de atividade no HistoricoCiclo
-        if hasattr(instance, '_meta'):
-            model_name = instance._meta.model_name
-            
-            if model_name == 'grupoprejovens':
-                historico_ciclo.total_grupos_prejovens += 1
-                historico_ciclo.novas_grupos_prejovens += 1
-            elif model_name == 'aulacrianca':
-                historico_ciclo.total_aulas_criancas += 1
-                historico_ciclo.novas_aulas_criancas += 1
-            elif model_name == 'circuloestudo':
-                historico_ciclo.total_circulos_estudo += 1
-                historico_ciclo.novas_circulos_estudo += 1
-            elif model_name == 'grupofamilias':
-                historico_ciclo.total_grupos_familias += 1
-            elif model_name == 'reuniaodevocional':
-                historico_ciclo.total_reunioes_devocionais += 1
-                historico_ciclo.novas_reunioes_devocionais += 1
-            elif model_name == 'familia':
-                # Para famílias com RD ativadas, contar como RD
-                if hasattr(instance, 'reuniao_devocional') and instance.reuniao_devocional:
-                    historico_ciclo.total_reunioes_devocionais += 1
-                    historico_ciclo.novas_familias_rds += 1
-            elif model_name == 'estudoatual':
-                # Para estudos, incrementamos o total de livros iniciados
-                historico_ciclo.livros_iniciados += 1
-                historico_ciclo.novos_livros_iniciados += 1
+        # Incrementar os contadores do tipo de atividade (registro em contact.atividades)
+        for campo in contadores_historico(instance):
+            setattr(historico_ciclo, campo, getattr(historico_ciclo, campo) + 1)
         
         historico_ciclo.save()
         
@@ -153,4 +132,65 @@ class HistoricoAutomaticoMixin:
         else:
             print(f"✅ HistoricoCiclo atualizado para ciclo {numero_ciclo}")
         
-        return historico_ciclo
\ No newline at end of file
+        return historico_ciclo
+
+
+def pks_de(valores):
+    """Conjunto de pks de instâncias (ou pks) de uma seleção de formulário"""
+    return {getattr(valor, 'pk', valor) for valor in valores or ()}
+
+
+class VinculosPorDiferencaMixin:
+    """
+    Mixin para ModelForms com campos ManyToMany: grava cada campo pela
+    diferença entre os valores iniciais do formulário e os selecionados.
+    Só os vínculos que entraram ou saíram viram INSERT/DELETE (e
+    ``m2m_changed``); um campo sem mudança não gera nenhuma consulta.
+    """
+
+    def _save_m2m(self):
+        opts = self.instance._meta
+        for campo in chain(opts.many_to_many, opts.private_fields):
+            if not hasattr(campo, 'save_form_data'):
+                continue
+            if campo.name not in self.fields or campo.name not in self.cleaned_data:
+                continue
+            if campo not in opts.many_to_many:
+                campo.save_form_data(self.instance, self.cleaned_data[campo.name])
+                continue
+
+            antes = pks_de(self.initial.get(campo.name))
+            depois = pks_de(self.cleaned_data[campo.name])
+            gerenciador = getattr(self.instance, campo.attname)
+            if antes - depois:
+                gerenciador.remove(*(antes - depois))
+            if depois - antes:
+                gerenciador.add(*(depois - antes))
+
+
+class EscolhasDoUsuarioMixin:
+    """
+    Mixin para formulários com campos que listam contatos, ruas ou famílias
+    do usuário. ``campos_de_escolha`` mapeia o nome do campo para o tipo de
+    lista (ver ``contact.escolhas``); ``configurar_escolhas(user)`` restringe
+    os querysets ao usuário e troca os widgets por ``ListaComBuscaWidget``,
+    que usa as listas compartilhadas da requisição.
+    """
+    campos_de_escolha = {}
+
+    def configurar_escolhas(self, user):
+        from .escolhas import escolhas_do_usuario
+        from .widgets import ListaComBuscaWidget
+
+        if user is None:
+            return
+        escolhas = escolhas_do_usuario(user)
+        for nome, tipo in self.campos_de_escolha.items():
+            campo = self.fields.get(nome)
+            if campo is None:
+                continue
+            campo.queryset = escolhas.consulta(tipo)
+            campo.widget = ListaComBuscaWidget(
+                tipo, escolhas, multipla=isinstance(campo, forms.ModelMultipleChoiceField)
+            )
+            campo.widget.is_required = campo.required
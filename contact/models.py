@@ -52,6 +52,14 @@ class Familia(models.Model):
     numero_ciclo_criacao = models.IntegerField(null=True, blank=True, 
                                               help_text="Número do ciclo em que a RD foi criada")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', '-id'], condition=models.Q(show=True), name='familia_owner_visivel_idx'),
+            models.Index(fields=['owner'], condition=models.Q(reuniao_devocional=True), name='familia_owner_rd_idx'),
+            models.Index(fields=['owner', 'data_ultima_reuniao'], name='familia_owner_ultima_rd_idx'),
+            models.Index(fields=['owner', 'numero_ciclo_criacao'], name='familia_owner_ciclo_idx'),
+        ]
+
     def __str__(self):
         return self.nome
 
@@ -62,6 +70,161 @@ class Familia(models.Model):
     def grupos_familias_conectados(self):
         return self.grupos_familias.all()
 
+
+class VisitaFamilia(models.Model):
+    """
+    Registro de uma visita a uma família. O registro só recebe inserções:
+    ``Familia.data_ultima_reuniao`` guarda a visita mais recente e o
+    histórico fica aqui.
+    """
+    familia = models.ForeignKey(Familia, on_delete=models.CASCADE, related_name='visitas')
+    owner = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    data = models.DateField()
+    registrada_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['familia', '-data'], name='visita_familia_data_idx'),
+            models.Index(fields=['owner', '-data'], name='visita_owner_data_idx'),
+        ]
+        verbose_name = "Visita à Família"
+        verbose_name_plural = "Visitas às Famílias"
+
+    def __str__(self):
+        return f"{self.familia} em {self.data:%d/%m/%Y}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Visitas registradas não podem ser alteradas")
+        super().save(*args, **kwargs)
+
+
+# Faixas etárias: (chave, rótulo, idade mínima, idade máxima)
+FAIXAS_ETARIAS = (
+    ('criancas', 'Criança', None, 11),
+    ('prejovens', 'Pré jovem', 12, 14),
+    ('jovens', 'Jovem', 15, 30),
+    ('adultos', 'Adulto', 31, None),
+)
+FAIXA_ETARIA_DESCONHECIDA = 'Idade desconhecida'
+
+
+def filtro_nascimento_por_idade(data_referencia, idade_minima=None, idade_maxima=None):
+    """
+    Converte uma faixa de idade na data de referência em um intervalo de
+    datas de nascimento, comparável por índice em qualquer banco
+    """
+    from dateutil.relativedelta import relativedelta
+
+    filtro = models.Q(birth_date__isnull=False)
+    if idade_minima is not None:
+        filtro &= models.Q(birth_date__lte=data_referencia - relativedelta(years=idade_minima))
+    if idade_maxima is not None:
+        filtro &= models.Q(birth_date__gt=data_referencia - relativedelta(years=idade_maxima + 1))
+    return filtro
+
+
+class ContactQuerySet(models.QuerySet):
+    """Consultas de idade e faixa etária executadas no banco (SQLite e PostgreSQL)"""
+
+    def com_idade(self, data_referencia=None):
+        """Anota ``idade`` (anos completos na data de referência)"""
+        from datetime import date
+        from django.db.models.functions import ExtractYear
+
+        hoje = data_referencia or date.today()
+        aniversario_pendente = models.Case(
+            models.When(
+                models.Q(birth_date__month__gt=hoje.month) |
+                models.Q(birth_date__month=hoje.month, birth_date__day__gt=hoje.day),
+                then=models.Value(1)
+            ),
+            default=models.Value(0),
+            output_field=models.IntegerField(),
+        )
+        return self.annotate(
+            idade=models.ExpressionWrapper(
+                models.Value(hoje.year) - ExtractYear('birth_date') - aniversario_pendente,
+                output_field=models.IntegerField(),
+            )
+        )
+
+    def com_faixa_etaria(self, data_referencia=None):
+        """Anota ``faixa_etaria`` com o mesmo rótulo de ``Contact.age_group``"""
+        from datetime import date
+
+        hoje = data_referencia or date.today()
+        return self.annotate(
+            faixa_etaria=models.Case(
+                *[
+                    models.When(filtro_nascimento_por_idade(hoje, minima, maxima), then=models.Value(rotulo))
+                    for _, rotulo, minima, maxima in FAIXAS_ETARIAS
+                ],
+                default=models.Value(FAIXA_ETARIA_DESCONHECIDA),
+                output_field=models.CharField(),
+            )
+        )
+
+    def da_faixa_etaria(self, faixa, data_referencia=None):
+        """Filtra pela faixa etária (chave ou rótulo, sem diferenciar maiúsculas)"""
+        from datetime import date
+
+        hoje = data_referencia or date.today()
+        faixa = faixa.strip().lower()
+        if faixa == FAIXA_ETARIA_DESCONHECIDA.lower():
+            return self.filter(birth_date__isnull=True)
+        for chave, rotulo, minima, maxima in FAIXAS_ETARIAS:
+            if faixa in (chave, rotulo.lower()):
+                return self.filter(filtro_nascimento_por_idade(hoje, minima, maxima))
+        return self.none()
+
+    def update(self, **kwargs):
+        """
+        Ao transferir contatos (``update(owner=...)``) os estudos e as
+        entradas do índice de busca vão junto, e as estatísticas e o
+        autocompletar dos donos antigos e do novo são invalidados.
+        """
+        if 'owner' not in kwargs and 'owner_id' not in kwargs:
+            return super().update(**kwargs)
+
+        from django.db import transaction
+
+        from .autocompletar import invalidar_autocompletar
+        from .snapshots import marcar_desatualizado
+
+        novo_owner = kwargs.get('owner_id', kwargs.get('owner'))
+        novo_owner_id = getattr(novo_owner, 'pk', novo_owner)
+        with transaction.atomic(using=self.db):
+            # Os contatos por último: o filtro pode depender do dono antigo
+            contatos = self.values('pk')
+            donos = set(self.order_by().values_list('owner_id', flat=True).distinct())
+            for modelo in (EstudoAtual, HistoricoEstudo):
+                modelo.objects.filter(contato__in=contatos).update(owner_id=novo_owner_id)
+            entradas = IndiceBusca.objects.filter(tipo='contato', objeto_id__in=contatos)
+            if novo_owner_id is None:
+                # Contatos sem dono não são pesquisáveis
+                entradas.delete()
+            else:
+                entradas.update(owner_id=novo_owner_id)
+            atualizados = super().update(**kwargs)
+
+            for owner_id in donos | {novo_owner_id}:
+                marcar_desatualizado(owner_id)
+                if owner_id is not None:
+                    invalidar_autocompletar(owner_id)
+            return atualizados
+
+    def contagem_por_faixa_etaria(self, data_referencia=None):
+        """Retorna ``{chave_da_faixa: quantidade}`` em uma única consulta"""
+        from datetime import date
+
+        hoje = data_referencia or date.today()
+        return self.aggregate(**{
+            chave: models.Count('id', filter=filtro_nascimento_por_idade(hoje, minima, maxima))
+            for chave, _, minima, maxima in FAIXAS_ETARIAS
+        })
+
+
 class Contact(models.Model):
     STATUS_ESTUDO_CHOICES = [
         ('nao_iniciado', 'Não Iniciado'),
@@ -93,6 +256,13 @@ class Contact(models.Model):
                                          help_text='Data que terminou o livro atual')
     observacoes_estudo = models.TextField(blank=True, 
                                         help_text='Observações sobre o estudo atual')
+
+    objects = ContactQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', '-id'], condition=models.Q(show=True), name='contact_owner_visivel_idx'),
+        ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
@@ -289,6 +459,12 @@ class GrupoPreJovens(models.Model):
     owner = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     show = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', '-id'], condition=models.Q(show=True), name='prejovens_owner_visivel_idx'),
+            models.Index(fields=['owner', 'numero_ciclo_criacao'], name='prejovens_owner_ciclo_idx'),
+        ]
+
     def __str__(self):
         return self.nome
 
@@ -318,6 +494,12 @@ class AulaCrianca(models.Model):
     owner = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     show = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', '-id'], condition=models.Q(show=True), name='aula_owner_visivel_idx'),
+            models.Index(fields=['owner', 'numero_ciclo_criacao'], name='aula_owner_ciclo_idx'),
+        ]
+
     def __str__(self):
         return self.nome
 
@@ -338,6 +520,11 @@ class GrupoFamilias(models.Model):
     owner = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     show = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', '-id'], condition=models.Q(show=True), name='grupofam_owner_visivel_idx'),
+        ]
+
     def __str__(self):
         return self.nome
 
@@ -363,6 +550,12 @@ class CirculoEstudo(models.Model):
     data_criacao_definida = models.DateField(null=True, blank=True,
                                            help_text='Data específica de criação')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', '-id'], condition=models.Q(show=True), name='circulo_owner_visivel_idx'),
+            models.Index(fields=['owner', 'numero_ciclo_criacao'], name='circulo_owner_ciclo_idx'),
+        ]
+
     def __str__(self):
         return self.nome
 
@@ -391,14 +584,21 @@ class CategoriaLivro(models.Model):
     def __str__(self):
         return self.nome
     
+    def _livros_prefetched(self):
+        return 'livros' in getattr(self, '_prefetched_objects_cache', {})
+
     @property
     def total_livros(self):
         """Total de livros nesta categoria"""
+        if self._livros_prefetched():
+            return sum(1 for livro in self.livros.all() if livro.ativo)
         return self.livros.filter(ativo=True).count()
     
     @property
     def livros_ordenados(self):
         """Livros desta categoria ordenados por número"""
+        if self._livros_prefetched():
+            return sorted((l for l in self.livros.all() if l.ativo), key=lambda l: l.numero)
         return self.livros.filter(ativo=True).order_by('numero')
 
 
@@ -408,6 +608,8 @@ class Livro(models.Model):
                                  null=True, blank=True, help_text='Categoria do livro')
     numero = models.PositiveIntegerField(help_text='Número do livro/série (1, 2, 3, etc.)')
     titulo = models.CharField(max_length=200, help_text='Título completo do livro')
+    titulo_normalizado = models.CharField(max_length=200, default='', editable=False, db_index=True,
+                                          help_text='Título sem acentos e em minúsculas (autocompletar)')
     descricao = models.TextField(blank=True, help_text='Descrição do conteúdo do livro')
     ativo = models.BooleanField(default=True, help_text='Se o livro está disponível para estudo')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -420,12 +622,22 @@ class Livro(models.Model):
         # Removido unique_together temporariamente para migração
     
     def __str__(self):
-        if self.categoria and self.categoria.nome == 'Instituto Ruhi':
-            return f"Livro {self.numero} - {self.titulo}"
-        elif self.categoria:
-            return f"{self.categoria.nome} {self.numero} - {self.titulo}"
-        else:
-            return f"Livro {self.numero} - {self.titulo}"
+        return self.rotulo(self.numero, self.titulo, self.categoria.nome if self.categoria else None)
+
+    @staticmethod
+    def rotulo(numero, titulo, nome_categoria=None):
+        """Nome de exibição a partir dos valores (sem instanciar o livro)"""
+        if nome_categoria and nome_categoria != 'Instituto Ruhi':
+            return f"{nome_categoria} {numero} - {titulo}"
+        return f"Livro {numero} - {titulo}"
+
+    def save(self, *args, **kwargs):
+        from .busca import normalizar_texto
+        self.titulo_normalizado = normalizar_texto(self.titulo)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'titulo' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'titulo_normalizado'}
+        super().save(*args, **kwargs)
     
     @property
     def estudantes_atuais(self):
@@ -475,6 +687,9 @@ class HistoricoEstudo(models.Model):
     ]
     
     contato = models.ForeignKey('Contact', on_delete=models.CASCADE, related_name='historico_estudos')
+    # Cópia de contato.owner, para as estatísticas não precisarem do JOIN com Contact
+    owner = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+                              editable=False, db_index=False, related_name='+')
     livro = models.ForeignKey('Livro', on_delete=models.CASCADE, related_name='historico_estudos')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='concluido')
     data_inicio = models.DateField(null=True, blank=True, help_text='Data de início do estudo')
@@ -495,9 +710,18 @@ class HistoricoEstudo(models.Model):
         verbose_name = 'Histórico de Estudo'
         verbose_name_plural = 'Histórico de Estudos'
         unique_together = ['contato', 'livro']  # Um contato pode concluir o mesmo livro apenas uma vez
+        indexes = [
+            models.Index(fields=['contato', 'status'], name='histestudo_contato_status_idx'),
+            models.Index(fields=['livro', 'status'], name='histestudo_livro_status_idx'),
+            models.Index(fields=['owner', 'status', 'created_at'], name='histestudo_owner_st_criado_idx'),
+        ]
     
     def __str__(self):
         return f"{self.contato.first_name} - {self.livro} ({self.get_status_display()})"
+
+    def save(self, *args, **kwargs):
+        self.owner_id = self.contato.owner_id
+        super().save(*args, **kwargs)
     
     @property
     def duracao_estudo(self):
@@ -515,6 +739,9 @@ class EstudoAtual(models.Model):
     ]
     
     contato = models.ForeignKey('Contact', on_delete=models.CASCADE, related_name='estudos_atuais')
+    # Cópia de contato.owner, para as estatísticas não precisarem do JOIN com Contact
+    owner = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+                              editable=False, db_index=False, related_name='+')
     livro = models.ForeignKey('Livro', on_delete=models.CASCADE, related_name='estudos_atuais')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='em_andamento')
     data_inicio = models.DateField(null=True, blank=True, help_text='Data de início do estudo')
@@ -535,9 +762,18 @@ class EstudoAtual(models.Model):
         verbose_name = 'Estudo Atual'
         verbose_name_plural = 'Estudos Atuais'
         unique_together = ['contato', 'livro']  # Um contato não pode estudar o mesmo livro múltiplas vezes simultaneamente
+        indexes = [
+            models.Index(fields=['contato', 'status'], name='estudo_contato_status_idx'),
+            models.Index(fields=['livro', 'status'], name='estudo_livro_status_idx'),
+            models.Index(fields=['owner', 'status', 'created_at'], name='estudo_owner_status_criado_idx'),
+        ]
     
     def __str__(self):
         return f"{self.contato.first_name} - {self.livro} ({self.get_status_display()})"
+
+    def save(self, *args, **kwargs):
+        self.owner_id = self.contato.owner_id
+        super().save(*args, **kwargs)
     
     @property
     def dias_estudando(self):
@@ -615,6 +851,9 @@ class ReuniaoDevocional(models.Model):
         verbose_name = "Reunião Devocional"
         verbose_name_plural = "Reuniões Devocionais"
         ordering = ['-ativa', 'dia_semana', 'horario']
+        indexes = [
+            models.Index(fields=['owner', 'numero_ciclo_criacao'], name='reuniao_owner_ciclo_idx'),
+        ]
     
     def __str__(self):
         nome_exibicao = self.nome if self.nome else f"Reunião {self.id}"
@@ -664,48 +903,57 @@ class ConfiguracaoEstatisticas(models.Model):
                 owner=self.owner, principal=True
             ).exclude(pk=self.pk).update(principal=False)
         super().save(*args, **kwargs)
+        from .ciclos import invalidar_calendario
+        invalidar_calendario(self.pk)
+
+    def delete(self, *args, **kwargs):
+        from .ciclos import invalidar_calendario
+        pk = self.pk
+        resultado = super().delete(*args, **kwargs)
+        invalidar_calendario(pk)
+        return resultado
+
+    @property
+    def calendario(self):
+        """Calendário pré-calculado de todos os ciclos do plano"""
+        from .ciclos import calendario_do_plano
+        return calendario_do_plano(self)
     
     def obter_ciclos_disponiveis(self):
         """Retorna lista de ciclos disponíveis para seleção"""
-        ciclos = []
-        for i in range(1, self.total_ciclos_plano + 1):
-            ciclo_info = self.calcular_ciclo_especifico(i)
-            ciclos.append({
-                'numero': i,
-                'nome': f"Ciclo {i}",
-                'inicio': ciclo_info['inicio'],
-                'fim': ciclo_info['fim'],
+        calendario = self.calendario
+        return [
+            {
+                'numero': numero,
+                'nome': f"Ciclo {numero}",
+                'inicio': inicio,
+                'fim': fim,
                 'plano': self
-            })
-        return ciclos
+            }
+            for numero, (inicio, fim) in enumerate(zip(calendario.inicios, calendario.fins), start=1)
+        ]
     
     def calcular_ciclo_especifico(self, numero_ciclo):
         """Calcula datas de um ciclo específico"""
-        from dateutil.relativedelta import relativedelta
-        
-        if numero_ciclo < 1 or numero_ciclo > self.total_ciclos_plano:
+        periodo = self.calendario.periodo(numero_ciclo)
+        if periodo is None:
             return None
         
-        # Calcular datas do ciclo específico
-        ciclo_inicio = self.data_inicio_plano + relativedelta(
-            months=(numero_ciclo - 1) * self.duracao_ciclo_meses
-        )
-        ciclo_fim = ciclo_inicio + relativedelta(
-            months=self.duracao_ciclo_meses
-        ) - relativedelta(days=1)
-        
         return {
             'numero': numero_ciclo,
-            'inicio': ciclo_inicio,
-            'fim': ciclo_fim,
+            'inicio': periodo[0],
+            'fim': periodo[1],
             'nome': f"Ciclo {numero_ciclo}",
             'plano': self
         }
+
+    def numero_ciclo_da_data(self, data):
+        """Número do ciclo que contém a data (0 antes do plano, None depois)"""
+        return self.calendario.numero_do_ciclo(data)
     
     def calcular_ciclo_atual(self):
         """Calcula o ciclo atual baseado na data de início e duração"""
         from django.utils import timezone
-        from dateutil.relativedelta import relativedelta
         
         if not self.ativo:
             return {
@@ -717,24 +965,19 @@ class ConfiguracaoEstatisticas(models.Model):
             }
         
         hoje = timezone.now().date()
+        ciclo_numero = self.numero_ciclo_da_data(hoje)
         
-        if hoje < self.data_inicio_plano:
+        if ciclo_numero == 0:
             return {
                 'numero': 0,
                 'inicio': None,
-                'fim': self.data_inicio_plano,
+                'fim': self.calendario.inicios[0],
                 'nome': "Antes do início do plano",
                 'progresso': 0
             }
         
-        # Calcular quantos meses se passaram desde o início
-        meses_passados = (hoje.year - self.data_inicio_plano.year) * 12 + (hoje.month - self.data_inicio_plano.month)
-        
-        # Calcular o ciclo atual
-        ciclo_numero = (meses_passados // self.duracao_ciclo_meses) + 1
-        
         # Verificar se ainda estamos dentro do plano
-        if ciclo_numero > self.total_ciclos_plano:
+        if ciclo_numero is None:
             return {
                 'numero': self.total_ciclos_plano,
                 'inicio': None,
@@ -743,9 +986,7 @@ class ConfiguracaoEstatisticas(models.Model):
                 'progresso': 100
             }
         
-        # Calcular datas do ciclo atual
-        ciclo_inicio = self.data_inicio_plano + relativedelta(months=(ciclo_numero - 1) * self.duracao_ciclo_meses)
-        ciclo_fim = ciclo_inicio + relativedelta(months=self.duracao_ciclo_meses) - relativedelta(days=1)
+        ciclo_inicio, ciclo_fim = self.calendario.periodo(ciclo_numero)
         
         # Calcular progresso dentro do ciclo atual
         dias_ciclo = (ciclo_fim - ciclo_inicio).days + 1
@@ -778,11 +1019,19 @@ class ConfiguracaoEstatisticas(models.Model):
     
     def calcular_data_inicio_ciclo(self, numero_ciclo):
         """Calcula a data de início de um ciclo específico"""
+        periodo = self.calendario.periodo(numero_ciclo)
+        if periodo:
+            return periodo[0]
+        # Ciclo fora do plano: mesma regra do calendário
         from dateutil.relativedelta import relativedelta
-        return self.data_inicio_plano + relativedelta(months=(numero_ciclo - 1) * self.duracao_ciclo_meses)
+        from .ciclos import data_inicio_do_plano
+        return data_inicio_do_plano(self) + relativedelta(months=(numero_ciclo - 1) * self.duracao_ciclo_meses)
     
     def calcular_data_fim_ciclo(self, numero_ciclo):
         """Calcula a data de fim de um ciclo específico"""
+        periodo = self.calendario.periodo(numero_ciclo)
+        if periodo:
+            return periodo[1]
         from dateutil.relativedelta import relativedelta
         data_inicio = self.calcular_data_inicio_ciclo(numero_ciclo)
         return data_inicio + relativedelta(months=self.duracao_ciclo_meses) - relativedelta(days=1)
@@ -1071,6 +1320,9 @@ class HistoricoCiclo(models.Model):
     class Meta:
         unique_together = ['configuracao', 'numero_ciclo']
         ordering = ['-numero_ciclo']
+        indexes = [
+            models.Index(fields=['owner', '-numero_ciclo'], name='historico_owner_ciclo_idx'),
+        ]
         verbose_name = "Histórico de Ciclo"
         verbose_name_plural = "Históricos de Ciclos"
     
@@ -1097,88 +1349,26 @@ class HistoricoCiclo(models.Model):
 
     def calcular_dados_sistema(self):
         """Calcula e atualiza os dados do sistema baseado nas atividades reais"""
-        from datetime import datetime
-        
-        owner = self.owner
+        from .aggregates import calcular_atividades_sistema
         
         # Para modelos que existiam no período do histórico, vamos contar todos
         # que pertencem ao usuário (simplificação)
+        for campo, valor in calcular_atividades_sistema(self.owner).items():
+            setattr(self, campo, valor)
         
-        # Contar atividades do usuário
-        grupos_prejovens = GrupoPreJovens.objects.filter(owner=owner)
-        aulas_criancas = AulaCrianca.objects.filter(owner=owner)
-        circulos_estudo = CirculoEstudo.objects.filter(owner=owner)
-        reunioes_devocionais = ReuniaoDevocional.objects.filter(owner=owner)
-        grupos_familias = GrupoFamilias.objects.filter(owner=owner)
-        
-        # Contar famílias com RD ativas
-        familias_com_rd = Familia.objects.filter(
-            owner=owner,
-            reuniao_devocional=True
-        )
-        
-        # Atualizar contadores de atividades do sistema
-        self.sistema_circulos_estudo = circulos_estudo.count()
-        self.sistema_grupos_prejovens = grupos_prejovens.count()
-        self.sistema_aulas_criancas = aulas_criancas.count()
-        self.sistema_reunioes_devocionais = (reunioes_devocionais.count() + 
-                                           familias_com_rd.count())
-        self.sistema_grupos_familias = grupos_familias.count()
-        
-        # Calcular participantes do sistema
-        self.sistema_participantes_prejovens = sum(
-            g.pre_jovens.count() for g in grupos_prejovens)
-        self.sistema_participantes_criancas = sum(
-            a.participantes.count() for a in aulas_criancas)
-        self.sistema_participantes_circulos = sum(
-            c.participantes.count() for c in circulos_estudo)
-        self.sistema_participantes_devocionais = (
-            sum(r.numero_participantes for r in reunioes_devocionais) +
-            sum(f.membros.count() for f in familias_com_rd)
-        )
-        self.sistema_participantes_familias = sum(
-            g.participantes.count() for g in grupos_familias)
-        
-        # Calcular participantes Bahá'ís do sistema
-        self.sistema_participantes_prejovens_bahais = sum(
-            g.pre_jovens.filter(is_bahai=True).count() for g in grupos_prejovens)
-        self.sistema_participantes_criancas_bahais = sum(
-            a.participantes.filter(is_bahai=True).count() for a in aulas_criancas)
-        self.sistema_participantes_circulos_bahais = sum(
-            c.participantes.filter(is_bahai=True).count() for c in circulos_estudo)
-        self.sistema_participantes_devocionais_bahais = (
-            sum(r.participantes_bahais for r in reunioes_devocionais) +
-            sum(f.membros.filter(is_bahai=True).count() for f in familias_com_rd)
-        )
-        self.sistema_participantes_familias_bahais = sum(
-            g.participantes.filter(is_bahai=True).count() for g in grupos_familias)
-        
-        # Calcular demografia do sistema
-        contatos = Contact.objects.filter(owner=owner)
-        from dateutil.relativedelta import relativedelta
-        
-        hoje = self.data_fim
-        criancas = prejovens = jovens = adultos = 0
-        
-        for contato in contatos:
-            if contato.birth_date:
-                idade = relativedelta(hoje, contato.birth_date).years
-                if idade <= 11:
-                    criancas += 1
-                elif idade <= 14:
-                    prejovens += 1
-                elif idade <= 30:
-                    jovens += 1
-                else:
-                    adultos += 1
-        
-        self.sistema_total_criancas = criancas
-        self.sistema_total_prejovens = prejovens
-        self.sistema_total_jovens = jovens
-        self.sistema_total_adultos = adultos
+        # Calcular demografia do sistema na data de fim do ciclo
+        demografia = Contact.objects.filter(owner=self.owner).contagem_por_faixa_etaria(self.data_fim)
+        self.aplicar_demografia_sistema(demografia)
         
         self.save()
 
+    def aplicar_demografia_sistema(self, demografia):
+        """Copia ``{chave_da_faixa: quantidade}`` para os campos sistema_total_*"""
+        self.sistema_total_criancas = demografia['criancas']
+        self.sistema_total_prejovens = demografia['prejovens']
+        self.sistema_total_jovens = demografia['jovens']
+        self.sistema_total_adultos = demografia['adultos']
+
 
 class DetalheLivroHistorico(models.Model):
     """Modelo para armazenar detalhes específicos de cada livro no histórico"""
@@ -1266,3 +1456,176 @@ class EstatisticasEditaveisHistorico(models.Model):
         ciclo_num = self.historico_ciclo.numero_ciclo
         return f"Estatísticas Editáveis - Ciclo {ciclo_num}"
 
+
+class EstatisticasSnapshot(models.Model):
+    """
+    Estatísticas do sistema materializadas por usuário.
+
+    Mantidas atualizadas pelos sinais em ``contact.signals``; o dashboard lê
+    uma única linha em vez de recalcular tudo a cada requisição.
+    """
+    owner = models.OneToOneField(User, on_delete=models.CASCADE, related_name='estatisticas_snapshot')
+
+    # Atividades
+    grupos_prejovens = models.IntegerField(default=0)
+    aulas_criancas = models.IntegerField(default=0)
+    circulos_estudo = models.IntegerField(default=0)
+    reunioes_devocionais = models.IntegerField(default=0)
+    total_familias = models.IntegerField(default=0)
+
+    # Participantes
+    participantes_prejovens = models.IntegerField(default=0)
+    participantes_criancas = models.IntegerField(default=0)
+    participantes_circulos = models.IntegerField(default=0)
+    participantes_devocionais = models.IntegerField(default=0)
+    participantes_prejovens_bahais = models.IntegerField(default=0)
+    participantes_criancas_bahais = models.IntegerField(default=0)
+    participantes_circulos_bahais = models.IntegerField(default=0)
+    participantes_devocionais_bahais = models.IntegerField(default=0)
+
+    # Demografia (relativa a data_referencia)
+    criancas_sistema = models.IntegerField(default=0)
+    prejovens_sistema = models.IntegerField(default=0)
+    jovens_sistema = models.IntegerField(default=0)
+    adultos_sistema = models.IntegerField(default=0)
+
+    # Estudos e livros
+    estudos_andamento = models.IntegerField(default=0)
+    estudos_pausados = models.IntegerField(default=0)
+    total_livros_iniciados = models.IntegerField(default=0)
+    total_livros_concluidos = models.IntegerField(default=0)
+    # Pares [categoria, dados] para preservar a ordem de exibição (jsonb reordena chaves)
+    livros_por_categoria = models.JSONField(default=list)
+    livros_detalhados = models.JSONField(default=list)
+
+    # Controle
+    data_referencia = models.DateField(help_text="Data usada no cálculo da demografia")
+    versao = models.IntegerField(default=0, help_text="Incrementada pelos sinais a cada alteração dos dados")
+    versao_calculada = models.IntegerField(default=0, help_text="Versão dos dados usada no último recálculo")
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    CAMPOS_CONTADORES = [
+        'grupos_prejovens', 'aulas_criancas', 'circulos_estudo', 'reunioes_devocionais',
+        'total_familias', 'participantes_prejovens', 'participantes_criancas',
+        'participantes_circulos', 'participantes_devocionais', 'participantes_prejovens_bahais',
+        'participantes_criancas_bahais', 'participantes_circulos_bahais',
+        'participantes_devocionais_bahais', 'criancas_sistema', 'prejovens_sistema',
+        'jovens_sistema', 'adultos_sistema', 'estudos_andamento', 'estudos_pausados',
+        'total_livros_iniciados', 'total_livros_concluidos', 'livros_por_categoria',
+        'livros_detalhados',
+    ]
+
+    class Meta:
+        verbose_name = "Snapshot de Estatísticas"
+        verbose_name_plural = "Snapshots de Estatísticas"
+
+    def __str__(self):
+        return f"Snapshot de {self.owner.username} ({self.data_referencia})"
+
+    @property
+    def desatualizado(self):
+        """Houve alteração depois do último recálculo"""
+        return self.versao != self.versao_calculada
+
+    def como_dicionario(self):
+        """Retorna os dados no mesmo formato de ``calcular_estatisticas_bd``"""
+        dados = {campo: getattr(self, campo) for campo in self.CAMPOS_CONTADORES}
+        dados['livros_por_categoria'] = dict(self.livros_por_categoria)
+        dados['participantes_total'] = (self.participantes_prejovens + self.participantes_criancas +
+                                        self.participantes_circulos + self.participantes_devocionais)
+        dados['participantes_total_bahais'] = (self.participantes_prejovens_bahais +
+                                               self.participantes_criancas_bahais +
+                                               self.participantes_circulos_bahais +
+                                               self.participantes_devocionais_bahais)
+        dados['total_estudos'] = self.estudos_andamento + self.estudos_pausados
+        dados['total_pessoas_sistema'] = (self.criancas_sistema + self.prejovens_sistema +
+                                          self.jovens_sistema + self.adultos_sistema)
+        dados['total_livros_geral'] = self.total_livros_iniciados + self.total_livros_concluidos
+        return dados
+
+
+class IndiceBusca(models.Model):
+    """
+    Índice de busca textual de contatos, famílias e ruas.
+
+    ``conteudo`` guarda o texto já normalizado (minúsculas, sem acentos) de
+    todos os campos pesquisáveis, inclusive os de relacionamentos (nome da
+    família e da rua do contato). No SQLite uma tabela virtual FTS5 espelha
+    esta tabela por gatilhos; no PostgreSQL há um índice GIN sobre o
+    tsvector. Mantido pelos sinais em ``contact.signals``.
+    """
+    TIPO_CHOICES = [
+        ('contato', 'Contato'),
+        ('familia', 'Família'),
+        ('rua', 'Rua'),
+    ]
+
+    tipo = models.CharField(max_length=10, choices=TIPO_CHOICES)
+    objeto_id = models.PositiveIntegerField()
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='indice_busca')
+    titulo = models.CharField(max_length=255)
+    # Título normalizado, para o autocompletar por prefixo (contact.autocompletar)
+    nome_normalizado = models.CharField(max_length=255, default='')
+    conteudo = models.TextField()
+
+    class Meta:
+        unique_together = ['tipo', 'objeto_id']
+        indexes = [
+            models.Index(fields=['owner', 'tipo']),
+            models.Index(fields=['owner', 'tipo', 'nome_normalizado'], name='indicebusca_prefixo_idx'),
+        ]
+        verbose_name = "Entrada do Índice de Busca"
+        verbose_name_plural = "Índice de Busca"
+
+    def __str__(self):
+        return f"{self.get_tipo_display()}: {self.titulo}"
+
+
+class ImportacaoContatos(models.Model):
+    """
+    Importação em lote de contatos, famílias e ruas a partir de um arquivo
+    CSV/XLSX enviado pelo usuário. Processada em segundo plano por
+    ``contact.importacao.processar_importacao``; as linhas rejeitadas ficam em
+    ``relatorio_erros`` (CSV) para download.
+    """
+    PENDENTE = 'pendente'
+    PROCESSANDO = 'processando'
+    CONCLUIDA = 'concluida'
+    FALHOU = 'falhou'
+    STATUS_CHOICES = [
+        (PENDENTE, 'Pendente'),
+        (PROCESSANDO, 'Processando'),
+        (CONCLUIDA, 'Concluída'),
+        (FALHOU, 'Falhou'),
+    ]
+
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='importacoes')
+    arquivo = models.FileField(upload_to='importacoes/%Y/%m/')
+    nome_arquivo = models.CharField(max_length=255)
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default=PENDENTE)
+
+    total_linhas = models.IntegerField(default=0)
+    contatos_criados = models.IntegerField(default=0)
+    familias_criadas = models.IntegerField(default=0)
+    ruas_criadas = models.IntegerField(default=0)
+    linhas_com_erro = models.IntegerField(default=0)
+    relatorio_erros = models.TextField(blank=True, help_text="Linhas rejeitadas, em CSV")
+    mensagem = models.TextField(blank=True, help_text="Motivo da falha, se houver")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    iniciada_em = models.DateTimeField(null=True, blank=True, help_text="Início do último processamento")
+    tentativas = models.IntegerField(default=0, help_text="Vezes que o processamento foi iniciado")
+    concluida_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['status', 'created_at'], name='importacao_status_idx')]
+        verbose_name = "Importação de Contatos"
+        verbose_name_plural = "Importações de Contatos"
+
+    def __str__(self):
+        return f"{self.nome_arquivo} ({self.get_status_display()})"
+
+    @property
+    def em_andamento(self):
+        return self.status in (self.PENDENTE, self.PROCESSANDO)
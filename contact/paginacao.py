@@ -0,0 +1,241 @@
+"""
+Paginação por chave (keyset / cursor) para as listagens.
+
+Em vez de ``OFFSET`` + ``COUNT(*)`` do ``Paginator``, cada página busca as
+linhas "depois" (ou "antes") da chave de ordenação da última linha exibida,
+o que custa o mesmo em qualquer profundidade e usa os índices
+``(owner, -id)`` / ``(owner, data_ultima_reuniao)``. O cursor vai na URL
+(``?cursor=...``) como um texto opaco (JSON em base64).
+
+A contagem é opcional e limitada: ``contagem_maxima`` linhas são contadas no
+máximo, e acima disso a página informa "mais de N".
+
+Valores nulos são tratados como os menores: vêm primeiro na ordem crescente
+e por último na decrescente, em qualquer banco.
+"""
+import base64
+import binascii
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+
+
+PARAMETRO_CURSOR = 'cursor'
+POR_PAGINA = 10
+CONTAGEM_MAXIMA = 1000
+
+# Direções do cursor
+DEPOIS = 'p'   # página seguinte: linhas depois da chave
+ANTES = 'a'    # página anterior: linhas antes da chave
+ULTIMA = 'u'   # última página
+
+
+def _campo(modelo, nome, anotacoes=None):
+    """Campo do modelo ou o ``output_field`` de uma anotação do queryset"""
+    if anotacoes and nome in anotacoes:
+        return anotacoes[nome].output_field
+    return modelo._meta.get_field(nome)
+
+
+def normalizar_ordenacao(modelo, ordenacao, anotacoes=None):
+    """``[(campo, decrescente, anulavel)]`` terminando no id, que desempata"""
+    campos = []
+    for item in ordenacao:
+        decrescente = item.startswith('-')
+        campo = item.lstrip('-')
+        campo = 'id' if campo == 'pk' else campo
+        campos.append((campo, decrescente, _campo(modelo, campo, anotacoes).null))
+    if campos[-1][0] != 'id':
+        campos.append(('id', campos[0][1], False))
+    return campos
+
+
+def ordem_de(campos, invertida=False):
+    """Argumentos de ``order_by`` para ``campos`` (ou a ordem inversa)"""
+    expressoes = []
+    for campo, decrescente, anulavel in campos:
+        decrescente = decrescente != invertida
+        if not anulavel:
+            expressoes.append(f'-{campo}' if decrescente else campo)
+        elif decrescente:
+            expressoes.append(F(campo).desc(nulls_last=True))
+        else:
+            expressoes.append(F(campo).asc(nulls_first=True))
+    return expressoes
+
+
+def _depois_de(campo, decrescente, anulavel, valor):
+    """``Q`` das linhas que vêm depois de ``valor`` num único campo"""
+    if decrescente:
+        if valor is None:
+            return None  # nada vem depois dos nulos
+        depois = Q(**{f'{campo}__lt': valor})
+        return depois | Q(**{f'{campo}__isnull': True}) if anulavel else depois
+    if valor is None:
+        return Q(**{f'{campo}__isnull': False})
+    return Q(**{f'{campo}__gt': valor})
+
+
+def _igual_a(campo, valor):
+    if valor is None:
+        return Q(**{f'{campo}__isnull': True})
+    return Q(**{campo: valor})
+
+
+def filtro_apos_chave(campos, chave, invertida=False):
+    """
+    ``Q`` das linhas depois da ``chave`` na ordem ``campos`` (antes dela, se
+    ``invertida``): (a > x) OU (a = x E b > y) OU ...
+    """
+    condicao = Q(pk__in=[])
+    anteriores_iguais = Q()
+    for (campo, decrescente, anulavel), valor in zip(campos, chave):
+        depois = _depois_de(campo, decrescente != invertida, anulavel, valor)
+        if depois is not None:
+            condicao |= anteriores_iguais & depois
+        anteriores_iguais &= _igual_a(campo, valor)
+    return condicao
+
+
+def codificar_cursor(direcao, chave):
+    dados = json.dumps([direcao, chave], cls=DjangoJSONEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(dados.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor, modelo, campos, anotacoes=None):
+    """``(direcao, chave)`` ou ``None`` se o cursor for inválido"""
+    try:
+        dados = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        direcao, chave = json.loads(dados)
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    if direcao == ULTIMA:
+        return direcao, None
+    if direcao not in (DEPOIS, ANTES) or not isinstance(chave, list) or len(chave) != len(campos):
+        return None
+    try:
+        chave = [
+            None if valor is None else _campo(modelo, campo, anotacoes).to_python(valor)
+            for (campo, _, _), valor in zip(campos, chave)
+        ]
+    except Exception:
+        return None
+    return direcao, chave
+
+
+class PaginaKeyset:
+    """
+    Página de resultados. É iterável como a ``Page`` do Django e oferece as
+    query strings dos links (``query_primeira``, ``query_anterior``,
+    ``query_proxima`` e ``query_ultima``), preservando os demais parâmetros
+    GET (busca, filtros).
+    """
+
+    keyset = True
+
+    def __init__(self, itens, campos, parametros, has_previous, has_next,
+                 contagem=None, contagem_limitada=False):
+        self.itens = itens
+        self.campos = campos
+        self.parametros = parametros
+        self.has_previous = has_previous
+        self.has_next = has_next
+        self.contagem = contagem
+        self.contagem_limitada = contagem_limitada
+
+    def __iter__(self):
+        return iter(self.itens)
+
+    def __len__(self):
+        return len(self.itens)
+
+    def __getitem__(self, indice):
+        return self.itens[indice]
+
+    def _chave(self, objeto):
+        if isinstance(objeto, dict):  # queryset.values()
+            return [objeto[campo] for campo, _, _ in self.campos]
+        return [getattr(objeto, campo) for campo, _, _ in self.campos]
+
+    def _query(self, cursor=None):
+        parametros = self.parametros.copy()
+        if cursor:
+            parametros[PARAMETRO_CURSOR] = cursor
+        return parametros.urlencode()
+
+    @cached_property
+    def query_primeira(self):
+        return self._query()
+
+    @cached_property
+    def query_anterior(self):
+        if not self.itens:
+            return self.query_primeira
+        return self._query(codificar_cursor(ANTES, self._chave(self.itens[0])))
+
+    @cached_property
+    def query_proxima(self):
+        if not self.itens:
+            return self.query_primeira
+        return self._query(codificar_cursor(DEPOIS, self._chave(self.itens[-1])))
+
+    @cached_property
+    def query_ultima(self):
+        return self._query(codificar_cursor(ULTIMA, None))
+
+
+def contar_ate(queryset, limite):
+    """``(quantidade, limitada)``: conta no máximo ``limite`` linhas"""
+    total = queryset.order_by()[:limite + 1].count()
+    return min(total, limite), total > limite
+
+
+def paginar(request, queryset, ordenacao=('-id',), por_pagina=POR_PAGINA,
+            contagem_maxima=CONTAGEM_MAXIMA):
+    """
+    Página do ``queryset`` indicada pelo cursor da requisição. ``ordenacao``
+    usa campos do próprio modelo ou anotações do ``queryset``; o id é
+    acrescentado para desempatar. ``contagem_maxima=None`` desliga a
+    contagem.
+    """
+    anotacoes = queryset.query.annotations
+    campos = normalizar_ordenacao(queryset.model, ordenacao, anotacoes)
+    parametros = request.GET.copy()
+    parametros.pop(PARAMETRO_CURSOR, None)
+    parametros.pop('page', None)
+
+    cursor = request.GET.get(PARAMETRO_CURSOR)
+    posicao = decodificar_cursor(cursor, queryset.model, campos, anotacoes) if cursor else None
+    direcao, chave = posicao or (None, None)
+
+    itens = []
+    if direcao == DEPOIS:
+        consulta = queryset.order_by(*ordem_de(campos)).filter(filtro_apos_chave(campos, chave))
+        itens = list(consulta[:por_pagina + 1])
+        tem_anterior, tem_proxima = True, len(itens) > por_pagina
+        itens = itens[:por_pagina]
+    elif direcao in (ANTES, ULTIMA):
+        # Busca na ordem invertida e desinverte
+        consulta = queryset.order_by(*ordem_de(campos, invertida=True))
+        if direcao == ANTES:
+            consulta = consulta.filter(filtro_apos_chave(campos, chave, invertida=True))
+        itens = list(consulta[:por_pagina + 1])
+        tem_anterior, tem_proxima = len(itens) > por_pagina, direcao == ANTES
+        itens = itens[:por_pagina][::-1]
+
+    if not itens:
+        # Primeira página, ou cursor que ficou sem linhas (registros excluídos)
+        itens = list(queryset.order_by(*ordem_de(campos))[:por_pagina + 1])
+        tem_anterior, tem_proxima = False, len(itens) > por_pagina
+        itens = itens[:por_pagina]
+
+    contagem = limitada = None
+    if contagem_maxima is not None:
+        if tem_anterior or tem_proxima:
+            contagem, limitada = contar_ate(queryset, contagem_maxima)
+        else:
+            contagem, limitada = len(itens), False
+
+    return PaginaKeyset(itens, campos, parametros, tem_anterior, tem_proxima, contagem, limitada)
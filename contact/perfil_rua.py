@@ -0,0 +1,133 @@
+"""
+Perfil da rua: pessoas por faixa etária, Bahá'ís, famílias e atividades.
+
+Os totais de cada rua vêm de subconsultas correlacionadas anotadas na
+própria consulta das ruas (``anotar_resumo_ruas``), então a listagem paginada
+mostra os números de todas as linhas sem uma consulta por rua. O detalhe
+(``perfil_da_rua``) junta a esses totais uma agregação dos contatos por
+faixa etária, os nomes das famílias e atividades (só dos tipos que a rua
+tem) e a página de pessoas: o número de consultas não depende do tamanho da
+rua.
+"""
+from datetime import date
+
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import (
+    FAIXAS_ETARIAS,
+    AulaCrianca,
+    CirculoEstudo,
+    Contact,
+    Familia,
+    GrupoFamilias,
+    GrupoPreJovens,
+    filtro_nascimento_por_idade,
+)
+from .paginacao import paginar
+
+
+POR_PAGINA_PESSOAS = 50
+
+# anotação: (consulta do que pertence à rua, campo que aponta para a rua)
+RESUMO_RUA = {
+    'total_familias': (Familia.objects.all(), 'rua'),
+    'total_pessoas': (Contact.objects.all(), 'rua'),
+    'total_bahais': (Contact.objects.filter(is_bahai=True), 'rua'),
+    'total_aulas_crianca': (AulaCrianca.objects.all(), 'rua'),
+    'total_grupos_pre_jovens': (GrupoPreJovens.objects.all(), 'rua'),
+    'total_circulos_estudo': (CirculoEstudo.objects.all(), 'rua'),
+    # Grupos de famílias atuam em várias ruas: conta pela tabela do vínculo
+    'total_grupos_familias': (GrupoFamilias.ruas.through.objects.all(), 'rua'),
+}
+
+# Somadas em ``total_atividades``
+ATIVIDADES_DA_RUA = (
+    'total_aulas_crianca',
+    'total_grupos_pre_jovens',
+    'total_circulos_estudo',
+    'total_grupos_familias',
+)
+
+
+def _contagem(consulta, campo_rua):
+    """Subconsulta com a quantidade de linhas de ``consulta`` da rua externa"""
+    return Coalesce(
+        Subquery(
+            consulta.filter(**{campo_rua: OuterRef('pk')})
+            .order_by()
+            .values(campo_rua)
+            .annotate(quantidade=Count('pk'))
+            .values('quantidade'),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def anotar_resumo_ruas(ruas):
+    """
+    Anota em cada rua ``total_familias``, ``total_pessoas``,
+    ``total_bahais``, os ``total_*`` de cada tipo de atividade e
+    ``total_atividades`` (a soma deles), sem multiplicar linhas.
+    """
+    contagens = {nome: _contagem(consulta, campo_rua) for nome, (consulta, campo_rua) in RESUMO_RUA.items()}
+    total_atividades = Value(0)
+    for nome in ATIVIDADES_DA_RUA:
+        total_atividades = total_atividades + contagens[nome]
+    return ruas.annotate(**contagens, total_atividades=total_atividades)
+
+
+def contar_pessoas_por_faixa(rua, data_referencia=None):
+    """
+    ``{'faixas': [{'chave', 'rotulo', 'total'}], 'sem_idade', 'pessoas',
+    'bahais'}`` dos contatos da rua, numa única agregação.
+    """
+    hoje = data_referencia or date.today()
+    contagens = Contact.objects.filter(rua=rua).aggregate(
+        pessoas=Count('id'),
+        bahais=Count('id', filter=Q(is_bahai=True)),
+        sem_idade=Count('id', filter=Q(birth_date__isnull=True)),
+        **{
+            chave: Count('id', filter=filtro_nascimento_por_idade(hoje, minima, maxima))
+            for chave, _, minima, maxima in FAIXAS_ETARIAS
+        },
+    )
+    return {
+        'faixas': [
+            {'chave': chave, 'rotulo': rotulo, 'total': contagens[chave]}
+            for chave, rotulo, _, _ in FAIXAS_ETARIAS
+        ],
+        'sem_idade': contagens['sem_idade'],
+        'pessoas': contagens['pessoas'],
+        'bahais': contagens['bahais'],
+    }
+
+
+def perfil_da_rua(request, rua, data_referencia=None):
+    """
+    Perfil de uma rua anotada por ``anotar_resumo_ruas``: contagens por
+    faixa etária, famílias e atividades da rua (só consulta os tipos que a
+    rua tem) e ``page_obj`` com a página de pessoas, cada uma anotada com
+    ``faixa_etaria``.
+    """
+    perfil = contar_pessoas_por_faixa(rua, data_referencia)
+    # Consultas pelo modelo: o gerenciador da relação leria o ``rua_id``
+    # adiado de cada linha para ligá-la à rua
+    consultas = {
+        'familias': (rua.total_familias, Familia.objects.filter(rua=rua)),
+        'aulas_crianca': (rua.total_aulas_crianca, AulaCrianca.objects.filter(rua=rua)),
+        'grupos_pre_jovens': (rua.total_grupos_pre_jovens, GrupoPreJovens.objects.filter(rua=rua)),
+        'circulos_estudo': (rua.total_circulos_estudo, CirculoEstudo.objects.filter(rua=rua)),
+        'grupos_familias': (rua.total_grupos_familias, GrupoFamilias.objects.filter(ruas=rua)),
+    }
+    for nome, (total, consulta) in consultas.items():
+        perfil[nome] = list(consulta.order_by('nome').only('id', 'nome')) if total else []
+    perfil['page_obj'] = paginar(
+        request,
+        rua.contatos.com_faixa_etaria(data_referencia),
+        ordenacao=('first_name', 'last_name'),
+        por_pagina=POR_PAGINA_PESSOAS,
+        contagem_maxima=None,
+    )
+    return perfil
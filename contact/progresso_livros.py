@@ -0,0 +1,155 @@
+"""
+Progresso dos estudos por livro e por categoria.
+
+Os contadores de estudos vêm de uma consulta agrupada por ``livro_id`` em
+cada tabela (``EstudoAtual`` e ``HistoricoEstudo``) e são juntados ao
+catálogo (livros e categorias, carregados uma vez) em Python. O número de
+consultas não depende da quantidade de livros ou categorias.
+
+Usado pelo dashboard (totais e novidades do ciclo), pelo encerramento do
+ciclo e pela lista de livros.
+"""
+from django.db.models import Count, Q
+
+from .models import CategoriaLivro, EstudoAtual, HistoricoEstudo, Livro
+
+
+CONTADORES_VAZIOS = {
+    'iniciados': 0,
+    'em_andamento': 0,
+    'pausados': 0,
+    'concluidos': 0,
+    'estudantes_ativos': 0,
+    'estudantes_pausados': 0,
+    'estudantes_concluidos': 0,
+}
+
+
+def contar_estudos_por_livro(user, periodo=None):
+    """
+    ``{livro_id: contadores}`` dos estudos do usuário (chaves de
+    ``CONTADORES_VAZIOS``), com uma consulta agrupada por tabela. ``periodo``
+    é um ``Q`` opcional aplicado às duas tabelas (ex.: ``criado_entre``).
+    Os ``estudantes_*`` contam contatos distintos.
+    """
+    atuais = EstudoAtual.objects.filter(owner=user)
+    concluidos = HistoricoEstudo.objects.filter(owner=user, status='concluido')
+    if periodo is not None:
+        atuais = atuais.filter(periodo)
+        concluidos = concluidos.filter(periodo)
+
+    contadores = {}
+    for linha in (
+        atuais.order_by().values('livro_id').annotate(
+            iniciados=Count('id'),
+            em_andamento=Count('id', filter=Q(status='em_andamento')),
+            pausados=Count('id', filter=Q(status='pausado')),
+            estudantes_ativos=Count('contato', distinct=True, filter=Q(status='em_andamento')),
+            estudantes_pausados=Count('contato', distinct=True, filter=Q(status='pausado')),
+        )
+    ):
+        contadores[linha.pop('livro_id')] = {**CONTADORES_VAZIOS, **linha}
+    for linha in (
+        concluidos.order_by().values('livro_id').annotate(
+            concluidos=Count('id'),
+            estudantes_concluidos=Count('contato', distinct=True),
+        )
+    ):
+        contadores.setdefault(linha.pop('livro_id'), dict(CONTADORES_VAZIOS)).update(linha)
+    return contadores
+
+
+def progresso_por_categoria(user, periodo=None, catalogo_completo=True):
+    """
+    Blocos por categoria na ordem do catálogo (``ordem``, ``nome``), com o
+    bloco dos livros sem categoria (``categoria`` ``None``) por último.
+
+    Cada bloco é ``{'categoria', 'nome', 'cor', 'ordem', 'iniciados',
+    'concluidos', 'livros'}``, e cada item de ``livros`` é ``{'livro',
+    **contadores}`` em ordem de número. Com ``catalogo_completo`` entram
+    também as categorias ativas e os livros ativos delas sem estudos; sem
+    ele, só os livros com estudos (e as categorias deles).
+    """
+    contadores = contar_estudos_por_livro(user, periodo)
+
+    filtro_livros = Q(pk__in=list(contadores))
+    if catalogo_completo:
+        filtro_livros |= Q(ativo=True, categoria__ativo=True)
+    livros = Livro.objects.filter(filtro_livros).select_related('categoria').order_by('numero', 'pk')
+
+    categorias = {}
+    if catalogo_completo:
+        categorias = {categoria.pk: categoria for categoria in CategoriaLivro.objects.filter(ativo=True)}
+    livros_por_categoria = {}
+    for livro in livros:
+        if livro.categoria is not None:
+            categorias.setdefault(livro.categoria_id, livro.categoria)
+        livros_por_categoria.setdefault(livro.categoria_id, []).append(
+            {'livro': livro, **contadores.get(livro.pk, CONTADORES_VAZIOS)}
+        )
+
+    ordenadas = sorted(categorias.values(), key=lambda categoria: (categoria.ordem, categoria.nome))
+    if None in livros_por_categoria:
+        ordenadas.append(None)
+
+    blocos = []
+    for categoria in ordenadas:
+        itens = livros_por_categoria.get(categoria.pk if categoria else None, [])
+        blocos.append({
+            'categoria': categoria,
+            'nome': categoria.nome if categoria else None,
+            'cor': categoria.cor if categoria else None,
+            'ordem': categoria.ordem if categoria else None,
+            'iniciados': sum(item['iniciados'] for item in itens),
+            'concluidos': sum(item['concluidos'] for item in itens),
+            'livros': itens,
+        })
+    return blocos
+
+
+def calcular_estatisticas_livros(user):
+    """Estatísticas de livros por categoria ativa e por livro individual (dashboard)"""
+    livros_por_categoria = {}
+    livros_detalhados = []
+    total_livros_iniciados = 0
+    total_livros_concluidos = 0
+
+    for bloco in progresso_por_categoria(user):
+        categoria = bloco['categoria']
+        if categoria is None or not categoria.ativo:
+            continue
+        # Livros inativos com estudos entram no total da categoria
+        total_livros_iniciados += bloco['iniciados']
+        total_livros_concluidos += bloco['concluidos']
+        livros_por_categoria[categoria.nome] = {
+            'iniciados': bloco['iniciados'],
+            'concluidos': bloco['concluidos'],
+            'total': bloco['iniciados'] + bloco['concluidos'],
+            'cor': categoria.cor,
+            'ordem': categoria.ordem,
+        }
+
+        for item in bloco['livros']:
+            livro = item['livro']
+            # Só livros ativos com algum estudo (atual ou concluído)
+            if not livro.ativo or not (item['iniciados'] or item['concluidos']):
+                continue
+            livros_detalhados.append({
+                'nome': str(livro),
+                'categoria': categoria.nome,
+                'cor_categoria': categoria.cor,
+                'iniciados': item['iniciados'],
+                'concluidos': item['concluidos'],
+                'total': item['iniciados'] + item['concluidos'],
+                'numero': livro.numero,
+                'categoria_ordem': categoria.ordem,
+            })
+    livros_detalhados.sort(key=lambda x: (x['categoria_ordem'], x['numero']))
+
+    return {
+        'livros_por_categoria': livros_por_categoria,
+        'livros_detalhados': livros_detalhados,
+        'total_livros_iniciados': total_livros_iniciados,
+        'total_livros_concluidos': total_livros_concluidos,
+        'total_livros_geral': total_livros_iniciados + total_livros_concluidos,
+    }
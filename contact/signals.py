@@ -0,0 +1,200 @@
+"""
+Sinais que mantêm atualizados o snapshot de estatísticas (EstatisticasSnapshot),
+o índice de busca textual (IndiceBusca), o cache do autocompletar e o dono
+copiado nos estudos
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+
+from .models import (
+    AulaCrianca,
+    CategoriaLivro,
+    CirculoEstudo,
+    Contact,
+    EstudoAtual,
+    Familia,
+    GrupoPreJovens,
+    HistoricoEstudo,
+    Livro,
+    ReuniaoDevocional,
+    Rua,
+)
+from .autocompletar import invalidar_autocompletar
+from .busca import reindexar, remover_do_indice
+from .snapshots import marcar_desatualizado, marcar_todos_desatualizados
+
+
+MODELOS_COM_OWNER = (GrupoPreJovens, AulaCrianca, CirculoEstudo, Familia, Contact, ReuniaoDevocional)
+MODELOS_DE_ESTUDO = (EstudoAtual, HistoricoEstudo)
+MODELOS_DO_CATALOGO = (CategoriaLivro, Livro)
+
+
+def atividade_alterada(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    marcar_desatualizado(instance.owner_id)
+
+
+def estudo_alterado(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    marcar_desatualizado(instance.owner_id)
+
+
+def catalogo_alterado(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    marcar_todos_desatualizados()
+
+
+def participantes_alterados(sender, instance, action, **kwargs):
+    # A instância pode ser a atividade ou o contato (lado reverso); ambos têm owner
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        marcar_desatualizado(instance.owner_id)
+
+
+for modelo in MODELOS_COM_OWNER:
+    post_save.connect(atividade_alterada, sender=modelo, dispatch_uid=f'snapshot_save_{modelo.__name__}')
+    post_delete.connect(atividade_alterada, sender=modelo, dispatch_uid=f'snapshot_delete_{modelo.__name__}')
+
+for modelo in MODELOS_DE_ESTUDO:
+    post_save.connect(estudo_alterado, sender=modelo, dispatch_uid=f'snapshot_save_{modelo.__name__}')
+    post_delete.connect(estudo_alterado, sender=modelo, dispatch_uid=f'snapshot_delete_{modelo.__name__}')
+
+for modelo in MODELOS_DO_CATALOGO:
+    post_save.connect(catalogo_alterado, sender=modelo, dispatch_uid=f'snapshot_save_{modelo.__name__}')
+    post_delete.connect(catalogo_alterado, sender=modelo, dispatch_uid=f'snapshot_delete_{modelo.__name__}')
+
+for through in (GrupoPreJovens.pre_jovens.through,
+                AulaCrianca.participantes.through,
+                CirculoEstudo.participantes.through):
+    m2m_changed.connect(participantes_alterados, sender=through,
+                        dispatch_uid=f'snapshot_m2m_{through.__name__}')
+
+
+# ---------------------------------------------------------------------------
+# Dono dos estudos
+# ---------------------------------------------------------------------------
+
+def contato_salvo_estudos(sender, instance, created=False, raw=False, **kwargs):
+    """Se o contato mudou de dono, os estudos dele acompanham"""
+    if raw or created:
+        return
+    for modelo in MODELOS_DE_ESTUDO:
+        modelo.objects.filter(contato=instance).exclude(owner_id=instance.owner_id).update(
+            owner_id=instance.owner_id
+        )
+
+
+post_save.connect(contato_salvo_estudos, sender=Contact, dispatch_uid='estudos_owner_Contact')
+
+
+# ---------------------------------------------------------------------------
+# Índice de busca
+# ---------------------------------------------------------------------------
+
+# Campos do próprio registro que entram na entrada dele no índice
+CAMPOS_INDEXADOS = {
+    Contact: ('first_name', 'last_name', 'description', 'familia_id', 'rua_id', 'show', 'owner_id'),
+    Familia: ('nome', 'endereco', 'description', 'rua_id', 'show', 'owner_id'),
+    Rua: ('nome', 'bairro', 'owner_id'),
+}
+
+
+def guardar_indexados_busca(sender, instance, raw=False, **kwargs):
+    # Valores gravados antes do save, para reindexar só o que mudou
+    instance._indexados_busca = None
+    if raw or instance.pk is None:
+        return
+    instance._indexados_busca = (
+        sender.objects.filter(pk=instance.pk).values(*CAMPOS_INDEXADOS[sender]).first()
+    )
+
+
+def campos_alterados_busca(sender, instance):
+    """Campos de ``CAMPOS_INDEXADOS`` alterados pelo save (todos num registro novo)"""
+    antes = getattr(instance, '_indexados_busca', None)
+    if antes is None:
+        return set(CAMPOS_INDEXADOS[sender])
+    return {campo for campo in CAMPOS_INDEXADOS[sender] if getattr(instance, campo) != antes[campo]}
+
+
+def contato_salvo_busca(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if campos_alterados_busca(sender, instance):
+        reindexar('contato', ids=[instance.pk])
+
+
+def familia_salva_busca(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    alterados = campos_alterados_busca(sender, instance)
+    if alterados:
+        reindexar('familia', ids=[instance.pk])
+    # O nome da família faz parte do texto pesquisável dos membros
+    if 'nome' in alterados:
+        reindexar('contato', ids=instance.membros.values_list('pk', flat=True))
+
+
+def rua_salva_busca(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    alterados = campos_alterados_busca(sender, instance)
+    if alterados:
+        reindexar('rua', ids=[instance.pk])
+    # Nome e bairro da rua entram no texto dos moradores; o nome, no das famílias
+    if alterados & {'nome', 'bairro'}:
+        reindexar('contato', ids=instance.contatos.values_list('pk', flat=True))
+    if 'nome' in alterados:
+        reindexar('familia', ids=instance.familias.values_list('pk', flat=True))
+
+
+def guardar_dependentes_busca(sender, instance, **kwargs):
+    # Depois da exclusão o vínculo já foi anulado (SET_NULL); guardar os ids antes
+    if isinstance(instance, Familia):
+        instance._contatos_busca = list(instance.membros.values_list('pk', flat=True))
+        instance._familias_busca = []
+    else:
+        instance._contatos_busca = list(instance.contatos.values_list('pk', flat=True))
+        instance._familias_busca = list(instance.familias.values_list('pk', flat=True))
+
+
+def registro_excluido_busca(sender, instance, **kwargs):
+    tipo = {Contact: 'contato', Familia: 'familia', Rua: 'rua'}[sender]
+    remover_do_indice(tipo, instance.pk)
+    if getattr(instance, '_contatos_busca', None):
+        reindexar('contato', ids=instance._contatos_busca)
+    if getattr(instance, '_familias_busca', None):
+        reindexar('familia', ids=instance._familias_busca)
+
+
+for modelo in (Contact, Familia, Rua):
+    pre_save.connect(guardar_indexados_busca, sender=modelo, dispatch_uid=f'busca_pre_save_{modelo.__name__}')
+
+post_save.connect(contato_salvo_busca, sender=Contact, dispatch_uid='busca_save_Contact')
+post_save.connect(familia_salva_busca, sender=Familia, dispatch_uid='busca_save_Familia')
+post_save.connect(rua_salva_busca, sender=Rua, dispatch_uid='busca_save_Rua')
+
+for modelo in (Familia, Rua):
+    pre_delete.connect(guardar_dependentes_busca, sender=modelo, dispatch_uid=f'busca_pre_delete_{modelo.__name__}')
+
+for modelo in (Contact, Familia, Rua):
+    post_delete.connect(registro_excluido_busca, sender=modelo, dispatch_uid=f'busca_delete_{modelo.__name__}')
+
+
+# ---------------------------------------------------------------------------
+# Autocompletar
+# ---------------------------------------------------------------------------
+
+def nome_alterado_autocompletar(sender, instance, raw=False, **kwargs):
+    # Livros e categorias não têm dono: invalida o catálogo
+    if raw:
+        return
+    invalidar_autocompletar(getattr(instance, 'owner_id', None))
+
+
+for modelo in (Contact, Familia, Rua, *MODELOS_DO_CATALOGO):
+    post_save.connect(nome_alterado_autocompletar, sender=modelo,
+                      dispatch_uid=f'autocompletar_save_{modelo.__name__}')
+    post_delete.connect(nome_alterado_autocompletar, sender=modelo,
+                        dispatch_uid=f'autocompletar_delete_{modelo.__name__}')
@@ -0,0 +1,275 @@
+"""
+Gerador de comunidades sintéticas para testes de carga.
+
+Cria ruas, famílias, contatos, todas as atividades (com seus participantes),
+estudos atuais e concluídos, um plano de ciclos e o histórico de ciclos de um
+usuário, sempre com ``bulk_create`` em lotes. A mesma semente e a mesma data
+de referência geram exatamente os mesmos dados.
+
+Como ``bulk_create`` não dispara sinais, o índice de busca e o snapshot de
+estatísticas são reconstruídos no final.
+"""
+import random
+from datetime import date, timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+
+from .busca import reindexar_tudo
+from .models import (
+    AulaCrianca,
+    CategoriaLivro,
+    CirculoEstudo,
+    ConfiguracaoEstatisticas,
+    Contact,
+    DetalheLivroHistorico,
+    EstudoAtual,
+    Familia,
+    GrupoFamilias,
+    GrupoPreJovens,
+    HistoricoCiclo,
+    HistoricoEstudo,
+    Livro,
+    ReuniaoDevocional,
+    Rua,
+)
+from .snapshots import atualizar_snapshot
+
+
+NOMES = [
+    'Ana', 'João', 'José', 'Maria', 'Conceição', 'Antônio', 'Luíza', 'Tânia', 'Sérgio', 'Mônica',
+    'Francisco', 'Raimunda', 'Paulo', 'Cláudia', 'Márcio', 'Fátima', 'Rafael', 'Letícia', 'Tiago', 'Júlia',
+]
+SOBRENOMES = [
+    'Silva', 'Santos', 'Araújo', 'Gonçalves', 'Pereira', 'Simões', 'Brandão', 'Lima', 'Magalhães',
+    'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Ribeiro', 'Carvalho',
+]
+BAIRROS = ['Centro', 'São José', 'Boa Esperança', 'Jardim América', 'Vila Nova', 'Santa Luzia', 'Alto da Serra']
+DIAS_SEMANA = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo']
+
+TOTAL_CICLOS_HISTORICO = 36
+
+
+def _lotes(objetos, modelo, tamanho_lote):
+    """bulk_create em lotes; retorna os objetos com pk"""
+    criados = []
+    for inicio in range(0, len(objetos), tamanho_lote):
+        criados.extend(modelo.objects.bulk_create(objetos[inicio:inicio + tamanho_lote]))
+    return criados
+
+
+def _catalogo_de_livros():
+    livros = list(Livro.objects.filter(ativo=True).order_by('numero'))
+    if livros:
+        return livros
+    categoria, _ = CategoriaLivro.objects.get_or_create(nome='Instituto Ruhi', defaults={'ordem': 1})
+    return Livro.objects.bulk_create([
+        Livro(categoria=categoria, numero=numero, titulo=f'Livro {numero}', titulo_normalizado=f'livro {numero}')
+        for numero in range(1, 8)
+    ])
+
+
+def _vincular(through, campo_atividade, atividades, contatos, por_atividade, aleatorio, tamanho_lote):
+    """Cria os vínculos M2M (atividade, contato) direto na tabela intermediária"""
+    vinculos = []
+    for atividade in atividades:
+        for contato in aleatorio.sample(contatos, min(por_atividade, len(contatos))):
+            vinculos.append(through(**{f'{campo_atividade}_id': atividade.pk, 'contact_id': contato.pk}))
+    _lotes(vinculos, through, tamanho_lote)
+    return len(vinculos)
+
+
+def gerar_comunidade(owner, total_contatos, semente=42, data_referencia=None,
+                     tamanho_lote=5000, progresso=None):
+    """
+    Gera uma comunidade sintética para ``owner`` com ``total_contatos``
+    contatos. ``progresso(etapa, quantidade)`` é chamado após cada etapa.
+    Retorna ``{etapa: quantidade}``.
+    """
+    aleatorio = random.Random(semente)
+    hoje = data_referencia or date.today()
+    totais = {}
+
+    def etapa(nome, quantidade):
+        totais[nome] = quantidade
+        if progresso:
+            progresso(nome, quantidade)
+
+    with transaction.atomic():
+        livros = _catalogo_de_livros()
+
+        # O plano começou há 36 ciclos: o histórico cobre os ciclos 1 a 36
+        plano = ConfiguracaoEstatisticas.objects.create(
+            owner=owner,
+            titulo_plano=f'Plano sintético {semente}',
+            data_inicio_plano=hoje - relativedelta(months=3 * TOTAL_CICLOS_HISTORICO),
+            duracao_ciclo_meses=3,
+            total_ciclos_plano=TOTAL_CICLOS_HISTORICO + 4,
+            principal=True,
+        )
+
+        def ciclo_aleatorio():
+            return aleatorio.randint(1, TOTAL_CICLOS_HISTORICO + 1)
+
+        ruas = _lotes([
+            Rua(nome=f'Rua {aleatorio.choice(SOBRENOMES)} {n}', bairro=aleatorio.choice(BAIRROS), owner=owner)
+            for n in range(max(total_contatos // 50, 1))
+        ], Rua, tamanho_lote)
+        etapa('ruas', len(ruas))
+
+        familias = _lotes([
+            Familia(
+                nome=f'Família {aleatorio.choice(SOBRENOMES)} {n}',
+                rua=aleatorio.choice(ruas),
+                endereco=f'Casa {aleatorio.randint(1, 999)}',
+                reuniao_devocional=aleatorio.random() < 0.1,
+                data_ultima_reuniao=hoje - timedelta(days=aleatorio.randint(0, 365)),
+                owner=owner,
+                plano_ciclo=plano,
+                numero_ciclo_criacao=ciclo_aleatorio(),
+            )
+            for n in range(max(total_contatos // 4, 1))
+        ], Familia, tamanho_lote)
+        etapa('familias', len(familias))
+
+        contatos = []
+        for inicio in range(0, total_contatos, tamanho_lote):
+            lote = []
+            for n in range(inicio, min(inicio + tamanho_lote, total_contatos)):
+                familia = aleatorio.choice(familias)
+                lote.append(Contact(
+                    first_name=aleatorio.choice(NOMES),
+                    last_name=aleatorio.choice(SOBRENOMES),
+                    birth_date=hoje - timedelta(days=aleatorio.randint(365, 365 * 85)),
+                    is_bahai=aleatorio.random() < 0.2,
+                    familia=familia,
+                    rua_id=familia.rua_id,
+                    owner=owner,
+                    description=f'Contato sintético {n}',
+                ))
+            contatos.extend(Contact.objects.bulk_create(lote))
+        etapa('contatos', len(contatos))
+
+        def atividades(modelo, quantidade, **campos):
+            return _lotes([
+                modelo(
+                    nome=f'{modelo._meta.verbose_name.title()} {n}',
+                    owner=owner,
+                    **{chave: (valor() if callable(valor) else valor) for chave, valor in campos.items()}
+                )
+                for n in range(max(quantidade, 1))
+            ], modelo, tamanho_lote)
+
+        comuns = {
+            'rua': lambda: aleatorio.choice(ruas),
+            'dia_semana': lambda: aleatorio.choice(DIAS_SEMANA),
+            'plano_ciclo': plano,
+            'numero_ciclo_criacao': ciclo_aleatorio,
+        }
+        grupos = atividades(GrupoPreJovens, total_contatos // 100,
+                            animador=lambda: aleatorio.choice(contatos), **comuns)
+        aulas = atividades(AulaCrianca, total_contatos // 80,
+                           professor=lambda: aleatorio.choice(contatos), **comuns)
+        circulos = atividades(CirculoEstudo, total_contatos // 60,
+                              tutor=lambda: aleatorio.choice(contatos),
+                              livro_ruhi=lambda: aleatorio.choice(livros), **comuns)
+        grupos_familias = atividades(GrupoFamilias, total_contatos // 200)
+        reunioes = _lotes([
+            ReuniaoDevocional(
+                nome=f'Reunião devocional {n}',
+                rua=aleatorio.choice(ruas),
+                numero_participantes=aleatorio.randint(3, 20),
+                participantes_bahais=aleatorio.randint(0, 3),
+                dia_semana=aleatorio.choice(DIAS_SEMANA),
+                plano_ciclo=plano,
+                numero_ciclo_criacao=ciclo_aleatorio(),
+                owner=owner,
+            )
+            for n in range(max(total_contatos // 150, 1))
+        ], ReuniaoDevocional, tamanho_lote)
+        etapa('atividades', len(grupos) + len(aulas) + len(circulos) + len(grupos_familias) + len(reunioes))
+
+        vinculos = (
+            _vincular(GrupoPreJovens.pre_jovens.through, 'grupoprejovens', grupos, contatos, 8, aleatorio, tamanho_lote)
+            + _vincular(AulaCrianca.participantes.through, 'aulacrianca', aulas, contatos, 10, aleatorio, tamanho_lote)
+            + _vincular(CirculoEstudo.participantes.through, 'circuloestudo', circulos, contatos, 6, aleatorio, tamanho_lote)
+            + _vincular(GrupoFamilias.participantes.through, 'grupofamilias', grupos_familias, contatos, 10, aleatorio, tamanho_lote)
+        )
+        familias_por_grupo = []
+        ruas_por_grupo = []
+        for grupo in grupos_familias:
+            for familia in aleatorio.sample(familias, min(3, len(familias))):
+                familias_por_grupo.append(GrupoFamilias.familias.through(grupofamilias_id=grupo.pk, familia_id=familia.pk))
+            ruas_por_grupo.append(GrupoFamilias.ruas.through(grupofamilias_id=grupo.pk, rua_id=aleatorio.choice(ruas).pk))
+        _lotes(familias_por_grupo, GrupoFamilias.familias.through, tamanho_lote)
+        _lotes(ruas_por_grupo, GrupoFamilias.ruas.through, tamanho_lote)
+        etapa('vinculos', vinculos + len(familias_por_grupo) + len(ruas_por_grupo))
+
+        estudos = []
+        concluidos = []
+        for contato in contatos:
+            if aleatorio.random() < 0.3:
+                estudos.append(EstudoAtual(
+                    contato=contato,
+                    owner=owner,
+                    livro=aleatorio.choice(livros),
+                    status='em_andamento' if aleatorio.random() < 0.8 else 'pausado',
+                    data_inicio=hoje - timedelta(days=aleatorio.randint(0, 700)),
+                    plano_ciclo=plano,
+                    numero_ciclo_criacao=ciclo_aleatorio(),
+                ))
+            if aleatorio.random() < 0.4:
+                for livro in aleatorio.sample(livros, aleatorio.randint(1, min(3, len(livros)))):
+                    concluidos.append(HistoricoEstudo(
+                        contato=contato,
+                        owner=owner,
+                        livro=livro,
+                        status='concluido',
+                        data_termino=hoje - timedelta(days=aleatorio.randint(0, 3000)),
+                        plano_ciclo=plano,
+                        numero_ciclo_criacao=ciclo_aleatorio(),
+                    ))
+        _lotes(estudos, EstudoAtual, tamanho_lote)
+        _lotes(concluidos, HistoricoEstudo, tamanho_lote)
+        etapa('estudos', len(estudos) + len(concluidos))
+
+        historicos = []
+        for numero in range(1, TOTAL_CICLOS_HISTORICO + 1):
+            fator = numero / TOTAL_CICLOS_HISTORICO
+            historicos.append(HistoricoCiclo(
+                configuracao=plano,
+                owner=owner,
+                numero_ciclo=numero,
+                data_inicio=plano.calcular_data_inicio_ciclo(numero),
+                data_fim=plano.calcular_data_fim_ciclo(numero),
+                total_circulos_estudo=int(len(circulos) * fator),
+                total_grupos_prejovens=int(len(grupos) * fator),
+                total_aulas_criancas=int(len(aulas) * fator),
+                total_reunioes_devocionais=int(len(reunioes) * fator),
+                total_grupos_familias=int(len(grupos_familias) * fator),
+                participantes_circulos=int(len(circulos) * 6 * fator),
+                participantes_prejovens=int(len(grupos) * 8 * fator),
+                participantes_criancas=int(len(aulas) * 10 * fator),
+                participantes_devocionais=int(len(reunioes) * 10 * fator),
+                participantes_grupos_familias=int(len(grupos_familias) * 10 * fator),
+                total_livros=int((len(estudos) + len(concluidos)) * fator),
+                livros_iniciados=int(len(estudos) * fator),
+                livros_concluidos=int(len(concluidos) * fator),
+            ))
+        historicos = _lotes(historicos, HistoricoCiclo, tamanho_lote)
+        _lotes([
+            DetalheLivroHistorico(
+                historico_ciclo=historico,
+                categoria='sequencia',
+                nome_livro=f'Livro {livro.numero}',
+                quantidade_iniciados=aleatorio.randint(0, 50),
+                quantidade_concluidos=aleatorio.randint(0, 30),
+            )
+            for historico in historicos
+            for livro in livros
+        ], DetalheLivroHistorico, tamanho_lote)
+        etapa('historicos', len(historicos))
+
+    etapa('indice_busca', sum(reindexar_tudo(owner=owner).values()))
+    atualizar_snapshot(owner)
+    return totais
@@ -0,0 +1,64 @@
+"""
+Manutenção do snapshot materializado de estatísticas por usuário.
+
+Os sinais só incrementam a ``versao`` do snapshot do dono afetado (um
+``UPDATE`` barato); quem recalcula é a próxima leitura, se a versão mudou
+desde o último cálculo (``versao_calculada``) ou se a data de referência da
+demografia mudou. Uma requisição que grava várias vezes, com ou sem
+transação, não recalcula nada.
+
+O recálculo lê a versão antes de agregar e só grava se ela não mudou: uma
+alteração feita durante o cálculo deixa o snapshot desatualizado para a
+leitura seguinte, em vez de ser encoberta por contadores velhos.
+
+``update()`` e ``bulk_create`` em lote não disparam sinais: quem os usa
+chama ``marcar_desatualizado`` (como ``FamiliaForm.atualizar_membros`` e a
+importação). ``ContactQuerySet.update`` só cuida da troca de dono.
+"""
+from datetime import date
+
+from django.db.models import F
+from django.utils import timezone
+
+from .aggregates import calcular_estatisticas_agregadas
+from .models import EstatisticasSnapshot
+
+
+def atualizar_snapshot(owner):
+    """
+    Recalcula o snapshot do usuário e o grava se nenhuma alteração chegou
+    durante o cálculo; retorna o snapshot com os valores calculados.
+    """
+    # A linha existe antes do cálculo, para que os sinais tenham o que incrementar
+    snapshot, _ = EstatisticasSnapshot.objects.get_or_create(
+        owner=owner, defaults={'data_referencia': date.today(), 'versao_calculada': -1}
+    )
+    versao_lida = snapshot.versao
+    dados = calcular_estatisticas_agregadas(owner)
+    valores = {campo: dados[campo] for campo in EstatisticasSnapshot.CAMPOS_CONTADORES}
+    valores['livros_por_categoria'] = list(dados['livros_por_categoria'].items())
+    valores.update(data_referencia=date.today(), versao_calculada=versao_lida, atualizado_em=timezone.now())
+    EstatisticasSnapshot.objects.filter(pk=snapshot.pk, versao=versao_lida).update(**valores)
+    for campo, valor in valores.items():
+        setattr(snapshot, campo, valor)
+    return snapshot
+
+
+def obter_estatisticas(owner):
+    """Lê as estatísticas do snapshot, recalculando apenas se necessário"""
+    snapshot = EstatisticasSnapshot.objects.filter(owner=owner).first()
+    if snapshot is None or snapshot.desatualizado or snapshot.data_referencia != date.today():
+        snapshot = atualizar_snapshot(owner)
+    return snapshot.como_dicionario()
+
+
+def marcar_desatualizado(owner_id):
+    """Incrementa a versão do snapshot do usuário; a próxima leitura recalcula"""
+    if owner_id is None:
+        return
+    EstatisticasSnapshot.objects.filter(owner_id=owner_id).update(versao=F('versao') + 1)
+
+
+def marcar_todos_desatualizados():
+    """Alterações no catálogo de livros afetam todos os usuários"""
+    EstatisticasSnapshot.objects.update(versao=F('versao') + 1)
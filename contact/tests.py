@@ -1,3 +1,1762 @@
-from django.test import TestCase
+import json
+from datetime import date, timedelta
+from importlib import import_module
+from io import BytesIO, StringIO
+from tempfile import TemporaryDirectory
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.signals import m2m_changed
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+
+from contact import api, encerramento
+from contact.aggregates import calcular_estatisticas_agregadas, calcular_novidades_do_ciclo, criado_entre
+from contact.atividades import ATIVIDADES, contadores_historico, contar_atividades
+from contact.autocompletar import LIMITE_AUTOCOMPLETAR
+from contact.busca import backend_de_busca, buscar, normalizar_texto, reindexar
+from contact.crescimento import recalcular_crescimento, reduzir_serie, serie_de_crescimento
+from contact.models import (
+    AulaCrianca,
+    CategoriaLivro,
+    CirculoEstudo,
+    ConfiguracaoEstatisticas,
+    Contact,
+    DetalheLivroHistorico,
+    EstatisticasEditaveis,
+    EstatisticasEditaveisHistorico,
+    EstatisticasSnapshot,
+    EstudoAtual,
+    Familia,
+    GrupoFamilias,
+    GrupoPreJovens,
+    HistoricoCiclo,
+    HistoricoEstudo,
+    ImportacaoContatos,
+    IndiceBusca,
+    Livro,
+    ReuniaoDevocional,
+    Rua,
+    VisitaFamilia,
+)
+from contact.encerramento import encerrar_ciclo
+from contact.escolhas import escolhas_do_usuario
+from contact.forms import AulaCriancaForm, CirculoEstudoForm, FamiliaForm, GrupoFamiliasForm, GrupoPreJovensForm
+from contact.historicos import recalcular_dados_sistema
+from contact.importacao import (
+    ErroImportacao, importar_linhas, ler_planilha, processar_importacao, relatorio_de_erros,
+)
+from contact.paginacao import filtro_apos_chave, normalizar_ordenacao, ordem_de, paginar
+from contact.perfil_rua import anotar_resumo_ruas
+from contact.progresso_livros import calcular_estatisticas_livros, progresso_por_categoria
+from contact.sintetico import gerar_comunidade
+from contact.snapshots import atualizar_snapshot, marcar_desatualizado, obter_estatisticas
+from contact.visitas import ORDEM_FILA, fila_de_visitas, registrar_visitas
+
+
+class DadosComunidadeMixin:
+    """Cria uma pequena comunidade para os testes de estatísticas"""
+
+    def criar_comunidade(self, owner, tamanho, livros):
+        contatos = [
+            Contact.objects.create(
+                first_name=f'Pessoa {i}',
+                owner=owner,
+                is_bahai=(i % 2 == 0),
+                birth_date=date(2015 - i * 4, 1, 1),
+            )
+            for i in range(tamanho)
+        ]
+        for i in range(tamanho):
+            grupo = GrupoPreJovens.objects.create(nome=f'Grupo {i}', owner=owner)
+            grupo.pre_jovens.set(contatos[:2])
+            aula = AulaCrianca.objects.create(nome=f'Aula {i}', owner=owner)
+            aula.participantes.set(contatos[:3])
+            circulo = CirculoEstudo.objects.create(nome=f'Círculo {i}', owner=owner)
+            circulo.participantes.set(contatos[:1])
+            familia = Familia.objects.create(
+                nome=f'Família {i}', owner=owner, reuniao_devocional=(i % 2 == 0)
+            )
+            contatos[i].familia = familia
+            contatos[i].save()
+        for contato, livro in zip(contatos, livros):
+            EstudoAtual.objects.create(contato=contato, livro=livro)
+            HistoricoEstudo.objects.create(contato=contato, livro=livro, status='concluido')
+        return contatos
+
+
+class CalcularEstatisticasAgregadasTest(DadosComunidadeMixin, TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('coordenador', password='senha')
+        self.categoria = CategoriaLivro.objects.create(nome='Sequência', ordem=1)
+
+    def criar_livros(self, quantidade, inicio=1):
+        return [
+            Livro.objects.create(categoria=self.categoria, numero=n, titulo=f'Livro {n}')
+            for n in range(inicio, inicio + quantidade)
+        ]
+
+    def test_resultado(self):
+        livros = self.criar_livros(2)
+        self.criar_comunidade(self.user, 4, livros)
+
+        estatisticas = calcular_estatisticas_agregadas(self.user)
+
+        self.assertEqual(estatisticas['grupos_prejovens'], 4)
+        self.assertEqual(estatisticas['participantes_prejovens'], 8)
+        self.assertEqual(estatisticas['participantes_prejovens_bahais'], 4)
+        self.assertEqual(estatisticas['participantes_criancas'], 12)
+        self.assertEqual(estatisticas['participantes_criancas_bahais'], 8)
+        self.assertEqual(estatisticas['participantes_circulos'], 4)
+        self.assertEqual(estatisticas['reunioes_devocionais'], 2)
+        self.assertEqual(estatisticas['participantes_devocionais'], 2)
+        self.assertEqual(estatisticas['total_familias'], 4)
+        self.assertEqual(estatisticas['estudos_andamento'], 2)
+        self.assertEqual(estatisticas['total_livros_iniciados'], 2)
+        self.assertEqual(estatisticas['total_livros_concluidos'], 2)
+        self.assertEqual(estatisticas['livros_por_categoria']['Sequência']['total'], 4)
+        self.assertEqual(len(estatisticas['livros_detalhados']), 2)
+        self.assertEqual(estatisticas['total_pessoas_sistema'], 4)
+
+    def test_numero_de_consultas_constante(self):
+        self.criar_comunidade(self.user, 2, self.criar_livros(1))
+        with CaptureQueriesContext(connection) as pequeno:
+            calcular_estatisticas_agregadas(self.user)
+
+        self.criar_comunidade(self.user, 10, self.criar_livros(6, inicio=2))
+        with CaptureQueriesContext(connection) as grande:
+            calcular_estatisticas_agregadas(self.user)
+
+        self.assertEqual(len(pequeno), len(grande))
+
+
+class EstatisticasSnapshotTest(DadosComunidadeMixin, TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('coordenador', password='senha')
+        self.categoria = CategoriaLivro.objects.create(nome='Sequência', ordem=1)
+        livro = Livro.objects.create(categoria=self.categoria, numero=1, titulo='Livro 1')
+        self.contatos = self.criar_comunidade(self.user, 3, [livro])
+
+    def test_leitura_igual_ao_calculo_ao_vivo(self):
+        self.assertEqual(obter_estatisticas(self.user), calcular_estatisticas_agregadas(self.user))
+
+    def test_sinais_marcam_snapshot_desatualizado(self):
+        atualizar_snapshot(self.user)
+        grupo = GrupoPreJovens.objects.create(nome='Novo grupo', owner=self.user)
+        self.assertTrue(EstatisticasSnapshot.objects.get(owner=self.user).desatualizado)
+
+        atualizar_snapshot(self.user)
+        grupo.pre_jovens.add(*self.contatos)
+        self.assertTrue(EstatisticasSnapshot.objects.get(owner=self.user).desatualizado)
+
+        estatisticas = obter_estatisticas(self.user)
+        self.assertEqual(estatisticas['grupos_prejovens'], 4)
+        self.assertEqual(estatisticas['participantes_prejovens'], 9)
+
+    def test_alteracao_durante_o_recalculo(self):
+        marcar_desatualizado(self.user.pk)
+        calcular = calcular_estatisticas_agregadas
+
+        def calcular_e_gravar(owner):
+            dados = calcular(owner)
+            GrupoPreJovens.objects.create(nome='Criado durante o cálculo', owner=self.user)
+            return dados
+
+        with mock.patch('contact.snapshots.calcular_estatisticas_agregadas', side_effect=calcular_e_gravar):
+            obter_estatisticas(self.user)
+
+        self.assertTrue(EstatisticasSnapshot.objects.get(owner=self.user).desatualizado)
+        self.assertEqual(obter_estatisticas(self.user)['grupos_prejovens'], 4)
+
+    def test_leitura_atualizada_e_uma_consulta(self):
+        atualizar_snapshot(self.user)
+        with self.assertNumQueries(1):
+            obter_estatisticas(self.user)
+
+    def test_comando_verificar(self):
+        call_command('reconstruir_estatisticas', stdout=StringIO())
+        call_command('reconstruir_estatisticas', '--verificar', stdout=StringIO())
+
+
+class EstatisticasSnapshotAutocommitTest(DadosComunidadeMixin, TransactionTestCase):
+    """Gravações fora de transação, como nas views (sem ATOMIC_REQUESTS)"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('coordenador', password='senha')
+        categoria = CategoriaLivro.objects.create(nome='Sequência', ordem=1)
+        livro = Livro.objects.create(categoria=categoria, numero=1, titulo='Livro 1')
+        self.contatos = self.criar_comunidade(self.user, 3, [livro])
+        atualizar_snapshot(self.user)
+
+    def test_sinais_nao_recalculam_na_gravacao(self):
+        with CaptureQueriesContext(connection) as contexto:
+            circulo = CirculoEstudo.objects.create(nome='Novo círculo', owner=self.user)
+            circulo.participantes.add(*self.contatos)
+        self.assertLess(len(contexto), 10)
+        self.assertTrue(EstatisticasSnapshot.objects.get(owner=self.user).desatualizado)
+
+        estatisticas = obter_estatisticas(self.user)
+        self.assertEqual(estatisticas, calcular_estatisticas_agregadas(self.user))
+        self.assertEqual(estatisticas['circulos_estudo'], 4)
+
+    def test_update_em_lote_depois_do_sinal(self):
+        familia = Familia.objects.create(nome='Família Nova', owner=self.user, reuniao_devocional=True)
+        Contact.objects.filter(pk__in=[c.pk for c in self.contatos]).update(familia=familia)
+
+        estatisticas = obter_estatisticas(self.user)
+        self.assertEqual(estatisticas, calcular_estatisticas_agregadas(self.user))
+
+
+class FaixaEtariaQuerySetTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('coordenador', password='senha')
+        self.referencia = date(2024, 6, 15)
+        nascimentos = [
+            date(2012, 6, 16),  # 11 anos (completa 12 no dia seguinte)
+            date(2012, 6, 15),  # 12 anos no dia
+            date(2009, 6, 16),  # 14 anos
+            date(2009, 6, 15),  # 15 anos
+            date(1993, 6, 16),  # 30 anos
+            date(1993, 6, 15),  # 31 anos
+            date(2012, 2, 29),  # bissexto
+            None,
+        ]
+        for i, nascimento in enumerate(nascimentos):
+            Contact.objects.create(first_name=f'Pessoa {i}', owner=self.user, birth_date=nascimento)
+
+    def faixa_em_python(self, contato):
+        from dateutil.relativedelta import relativedelta
+        if not contato.birth_date:
+            return 'Idade desconhecida'
+        idade = relativedelta(self.referencia, contato.birth_date).years
+        if idade <= 11:
+            return 'Criança'
+        if idade <= 14:
+            return 'Pré jovem'
+        if idade <= 30:
+            return 'Jovem'
+        return 'Adulto'
+
+    def test_anotacoes_iguais_ao_calculo_em_python(self):
+        from dateutil.relativedelta import relativedelta
+        contatos = Contact.objects.com_idade(self.referencia).com_faixa_etaria(self.referencia)
+        for contato in contatos:
+            esperado = relativedelta(self.referencia, contato.birth_date).years if contato.birth_date else None
+            self.assertEqual(contato.idade, esperado)
+            self.assertEqual(contato.faixa_etaria, self.faixa_em_python(contato))
+
+    def test_filtro_e_contagem(self):
+        contatos = Contact.objects.filter(owner=self.user)
+        self.assertEqual(contatos.da_faixa_etaria('criança', self.referencia).count(), 1)
+        self.assertEqual(contatos.da_faixa_etaria('Pré jovem', self.referencia).count(), 3)
+        self.assertEqual(contatos.da_faixa_etaria('idade desconhecida', self.referencia).count(), 1)
+        self.assertFalse(contatos.da_faixa_etaria('inexistente', self.referencia).exists())
+        self.assertEqual(
+            contatos.contagem_por_faixa_etaria(self.referencia),
+            {'criancas': 1, 'prejovens': 3, 'jovens': 2, 'adultos': 1},
+        )
+
+
+class RecalcularDadosSistemaTest(DadosComunidadeMixin, TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('coordenador', password='senha')
+        categoria = CategoriaLivro.objects.create(nome='Sequência', ordem=1)
+        livro = Livro.objects.create(categoria=categoria, numero=1, titulo='Livro 1')
+        self.criar_comunidade(self.user, 6, [livro])
+        ReuniaoDevocional.objects.create(
+            nome='RD', owner=self.user, numero_participantes=5, participantes_bahais=2
+        )
+        self.configuracao = ConfiguracaoEstatisticas.objects.create(owner=self.user)
+
+    def criar_historicos(self, quantidade):
+        return [
+            HistoricoCiclo.objects.create(
+                configuracao=self.configuracao,
+                owner=self.user,
+                numero_ciclo=n,
+                data_inicio=date(2000 + n, 1, 1),
+                data_fim=date(2000 + n, 12, 31),
+            )
+            for n in range(1, quantidade + 1)
+        ]
+
+    def valores_sistema(self):
+        campos = [f.name for f in HistoricoCiclo._meta.fields if f.name.startswith('sistema_')]
+        return list(HistoricoCiclo.objects.order_by('numero_ciclo').values(*campos))
+
+    def test_igual_ao_calculo_por_historico(self):
+        for historico in self.criar_historicos(20):
+            historico.calcular_dados_sistema()
+        esperado = self.valores_sistema()
+        HistoricoCiclo.objects.update(sistema_total_criancas=0, sistema_participantes_criancas=0)
+
+        self.assertEqual(recalcular_dados_sistema(self.user), 20)
+        self.assertEqual(self.valores_sistema(), esperado)
+        self.assertNotEqual(esperado[0]['sistema_total_criancas'], esperado[-1]['sistema_total_criancas'])
+
+    def test_numero_de_consultas_independe_dos_historicos(self):
+        self.criar_historicos(2)
+        with CaptureQueriesContext(connection) as poucos:
+            recalcular_dados_sistema(self.user)
+
+        HistoricoCiclo.objects.all().delete()
+        self.criar_historicos(36)
+        with CaptureQueriesContext(connection) as muitos:
+            recalcular_dados_sistema(self.user)
+
+        self.assertEqual(len(poucos), len(muitos))
+
+    def test_comando(self):
+        self.criar_historicos(3)
+        saida = StringIO()
+        call_command('recalcular_historicos', stdout=saida)
+        self.assertIn('3/3', saida.getvalue())
+
+
+class BuscaTextualTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('coordenador', password='senha')
+        self.outro = User.objects.create_user('outro', password='senha')
+        self.rua = Rua.objects.create(nome='Rua São João', bairro='Jardim Paraíso', owner=self.user)
+        self.familia = Familia.objects.create(nome='Família Araújo', rua=self.rua, owner=self.user)
+        self.contato = Contact.objects.create(
+            first_name='Conceição', last_name='Magalhães', familia=self.familia, rua=self.rua,
+            owner=self.user,
+        )
+        Contact.objects.create(first_name='Conceição', owner=self.outro)
+        self.client.login(username='coordenador', password='senha')
+
+    def ids(self, texto, tipos=None):
+        return [(r['tipo'], r['id']) for r in buscar(self.user, texto, tipos=tipos)]
+
+    def test_normalizacao(self):
+        self.assertEqual(normalizar_texto('  Conceição  MAGALHÃES-Júnior '), 'conceicao magalhaes junior')
+
+    def test_usa_indice_do_banco(self):
+        self.assertIn(backend_de_busca(), ('fts5', 'postgresql'))
+
+    def test_busca_sem_acentos_e_por_prefixo(self):
+        self.assertEqual(self.ids('conceicao', ['contato']), [('contato', self.contato.pk)])
+        self.assertEqual(self.ids('CONCEI magal'), [('contato', self.contato.pk)])
+        self.assertEqual(self.ids('inexistente'), [])
+
+    def test_campos_relacionados_e_sincronizacao(self):
+        self.assertIn(('contato', self.contato.pk), self.ids('paraiso'))
+
+        self.familia.nome = 'Família Brandão'
+        self.familia.save()
+        self.assertIn(('contato', self.contato.pk), self.ids('brandao'))
+        self.assertNotIn(('contato', self.contato.pk), self.ids('araujo'))
+
+        self.rua.delete()
+        self.assertEqual(self.ids('paraiso'), [])
+
+        self.contato.refresh_from_db()
+        self.contato.show = False
+        self.contato.save()
+        self.assertEqual(self.ids('conceicao'), [])
+
+    def test_reindexa_dependentes_so_quando_o_texto_muda(self):
+        tabela = IndiceBusca._meta.db_table
+
+        def escritas_no_indice(consultas):
+            return [
+                q['sql'] for q in consultas
+                if tabela in q['sql'] and not q['sql'].lstrip().upper().startswith('SELECT')
+            ]
+
+        self.rua.description = 'Perto da praça'
+        with CaptureQueriesContext(connection) as consultas:
+            self.rua.save()
+            self.familia.save()
+            self.contato.save()
+        self.assertEqual(escritas_no_indice(consultas), [])
+
+        self.rua.nome = 'Rua Santa Luzia'
+        self.rua.save()
+        self.assertIn(('contato', self.contato.pk), self.ids('luzia'))
+        self.assertIn(('familia', self.familia.pk), self.ids('luzia'))
+
+    def test_ranking(self):
+        Contact.objects.create(first_name='Pedro', description='amigo de araujo', owner=self.user)
+        resultados = buscar(self.user, 'araujo', tipos=['familia', 'contato'])
+        self.assertEqual(len(resultados), 3)
+        relevancias = [r['relevancia'] for r in resultados]
+        self.assertEqual(relevancias, sorted(relevancias, reverse=True))
+
+    def test_views_de_busca(self):
+        resposta = self.client.get(reverse('contact:search'), {'q': 'sao joao'})
+        self.assertEqual([c.pk for c in resposta.context['page_obj']], [self.contato.pk])
+
+        resposta = self.client.get(reverse('contact:search_familias'), {'q': 'sao joao'})
+        self.assertEqual([f.pk for f in resposta.context['page_obj']], [self.familia.pk])
+
+        resposta = self.client.get(reverse('contact:busca_unificada'), {'q': 'conceicao'})
+        resultados = resposta.json()['resultados']
+        self.assertEqual(len(resultados), 1)
+        self.assertEqual(resultados[0]['url'], reverse('contact:contact', args=[self.contato.pk]))
+
+    def test_comando_reindexar(self):
+        IndiceBusca.objects.all().delete()
+        call_command('reindexar_busca', stdout=StringIO())
+        self.assertEqual(self.ids('conceicao', ['contato']), [('contato', self.contato.pk)])
+
+    def test_migracao_popula_o_indice(self):
+        popular_indice = import_module('contact.migrations.0040_indicebusca').popular_indice
+        campos = ('tipo', 'objeto_id', 'owner_id', 'titulo', 'conteudo')
+        esperadas = set(IndiceBusca.objects.values_list(*campos))
+        IndiceBusca.objects.all().delete()
+
+        popular_indice(django_apps, None)
+        self.assertEqual(set(IndiceBusca.objects.values_list(*campos)), esperadas)
+
+
+class LivroListTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('coordenador', password='senha')
+        self.outro = User.objects.create_user('outro', password='senha')
+        self.categoria = CategoriaLivro.objects.create(nome='Sequência', ordem=1)
+        self.client.login(username='coordenador', password='senha')
+
+    def criar_livro(self, numero):
+        livro = Livro.objects.create(categoria=self.categoria, numero=numero, titulo=f'Livro {numero}')
+        for owner, status in ((self.user, 'em_andamento'), (self.user, 'pausado'), (self.outro, 'em_andamento')):
+            contato = Contact.objects.create(first_name=f'Pessoa {numero}', owner=owner)
+            EstudoAtual.objects.create(contato=contato, livro=livro, status=status)
+            HistoricoEstudo.objects.create(contato=contato, livro=livro, status='concluido')
+        return livro
+
+    def test_contadores_do_usuario(self):
+        livro = self.criar_livro(1)
+        resposta = self.client.get(reverse('contact:livro_list'))
+        categoria = next(c for c in resposta.context['categorias'] if c.pk == self.categoria.pk)
+        [anotado] = categoria.livros.all()
+        self.assertEqual(anotado.pk, livro.pk)
+        self.assertEqual(anotado.estudantes_ativos_count, 1)
+        self.assertEqual(anotado.estudantes_pausados_count, 1)
+        self.assertEqual(anotado.estudantes_concluidos_count, 2)
+        self.assertContains(resposta, '1 estudando')
+        self.assertContains(resposta, '2 concluídos')
+
+    def test_numero_de_consultas_constante(self):
+        self.criar_livro(1)
+        with CaptureQueriesContext(connection) as poucos:
+            self.client.get(reverse('contact:livro_list'))
+
+        for numero in range(2, 12):
+            self.criar_livro(numero)
+        with CaptureQueriesContext(connection) as muitos:
+            self.client.get(reverse('contact:livro_list'))
+
+        self.assertEqual(len(poucos), len(muitos))
+
+
+class CalendarioCiclosTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('coordenador', password='senha')
+        self.plano = ConfiguracaoEstatisticas.objects.create(
+            owner=self.user, data_inicio_plano=date(2022, 1, 31), duracao_ciclo_meses=3, total_ciclos_plano=36
+        )
+
+    def test_periodos_iguais_a_formula(self):
+        from dateutil.relativedelta import relativedelta
+        for numero in range(1, 37):
+            inicio = date(2022, 1, 31) + relativedelta(months=(numero - 1) * 3)
+            fim = inicio + relativedelta(months=3) - relativedelta(days=1)
+            ciclo = self.plano.calcular_ciclo_especifico(numero)
+            self.assertEqual((ciclo['inicio'], ciclo['fim']), (inicio, fim))
+        self.assertIsNone(self.plano.calcular_ciclo_especifico(37))
+        self.assertEqual(len(self.plano.obter_ciclos_disponiveis()), 36)
+
+    def test_cache_invalidado_no_save(self):
+        calendario = self.plano.calendario
+        self.assertIs(ConfiguracaoEstatisticas.objects.get(pk=self.plano.pk).calendario, calendario)
+
+        self.plano.duracao_ciclo_meses = 4
+        self.plano.save()
+        outro = ConfiguracaoEstatisticas.objects.get(pk=self.plano.pk)
+        self.assertIsNot(outro.calendario, calendario)
+        self.assertEqual(outro.calcular_data_inicio_ciclo(2), date(2022, 5, 31))
+
+    def test_busca_de_100k_datas(self):
+        # Só a correção; o tempo é medido pelo comando benchmark_ciclos
+        calendario = self.plano.calendario
+        primeira = date(2021, 6, 1)
+        datas = [primeira + timedelta(days=n % 4000) for n in range(100_000)]
+        numeros = [calendario.numero_do_ciclo(data) for data in datas]
+
+        def referencia(data):
+            # Dias entre o fim de um ciclo e o início do seguinte (planos que
+            # começam no dia 31) pertencem ao ciclo anterior
+            if data < calendario.inicios[0]:
+                return 0
+            if data > calendario.fins[-1]:
+                return None
+            return max(n for n, comeco in enumerate(calendario.inicios, start=1) if comeco <= data)
+
+        esperado = {data: referencia(data) for data in set(datas)}
+        divergentes = [d for d, n in zip(datas, numeros) if esperado[d] != n]
+        self.assertEqual(divergentes, [])
+
+    def test_comando_benchmark_ciclos(self):
+        saida = StringIO()
+        call_command('benchmark_ciclos', datas=2000, stdout=saida)
+        self.assertIn('2000 datas, 36 ciclos', saida.getvalue())
+
+
+# Orçamento máximo de consultas SQL por view, medido pelo
+# MedicaoConsultasMiddleware com a comunidade de OrcamentoConsultasTest.
+# Uma view que passar do orçamento falha a suíte de testes.
+ORCAMENTOS_CONSULTAS = {
+    'contact:index': 14,
+    'contact:family': 3,
+    'contact:fila_visitas': 3,
+    'contact:ruas_list': 3,
+    'contact:livro_list': 6,
+    'contact:dashboard_estatisticas': 39,
+    'contact:editar_estatisticas': 40,
+    'contact:gerenciar_historico': 9,
+    'contact:historico_ciclos': 5,
+    'contact:grupofamilias_list': 3,
+    'contact:aulacrianca_list': 14,
+    'contact:grupoprejovens_list': 14,
+    'contact:circuloestudo_list': 14,
+}
+
+
+class OrcamentoConsultasTest(DadosComunidadeMixin, TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('coordenador', password='senha')
+        categoria = CategoriaLivro.objects.create(nome='Sequência', ordem=1)
+        livros = [
+            Livro.objects.create(categoria=categoria, numero=n, titulo=f'Livro {n}')
+            for n in range(1, 4)
+        ]
+        ConfiguracaoEstatisticas.objects.create(owner=self.user)
+        self.criar_comunidade(self.user, 10, livros)
+        self.client.login(username='coordenador', password='senha')
+
+    def test_views_dentro_do_orcamento(self):
+        for nome_url, orcamento in ORCAMENTOS_CONSULTAS.items():
+            with self.subTest(view=nome_url):
+                resposta = self.client.get(reverse(nome_url))
+                self.assertEqual(resposta.status_code, 200)
+                consultas = resposta.wsgi_request.medicao_consultas.consultas
+                self.assertLessEqual(
+                    consultas, orcamento,
+                    f'{nome_url} executou {consultas} consultas (orçamento: {orcamento})'
+                )
+
+
+class MedicaoConsultasMiddlewareTest(TestCase):
+
+    def setUp(self):
+        from contact.middleware import registro_metricas
+        self.registro = registro_metricas
+        self.registro.limpar()
+        self.user = User.objects.create_user('coordenador', password='senha')
+        self.client.login(username='coordenador', password='senha')
+
+    def test_registra_amostras_por_nome_de_url(self):
+        self.client.get(reverse('contact:family'))
+        self.client.get(reverse('contact:family'))
+        resumo = self.registro.resumo()['contact:family']
+        self.assertEqual(resumo['requisicoes'], 2)
+        self.assertGreater(resumo['consultas']['max'], 0)
+
+    def test_caminhos_sem_rota_numa_unica_chave(self):
+        from contact.middleware import SEM_ROTA
+
+        for caminho in ('/nao-existe/', '/outro-caminho/', '/mais/um/'):
+            self.assertEqual(self.client.get(caminho).status_code, 404)
+        resumo = self.registro.resumo()
+        self.assertEqual(resumo[SEM_ROTA]['requisicoes'], 3)
+        self.assertFalse(any(nome.startswith('/') for nome in resumo))
+
+    def test_cadeia_assincrona_sob_asgi(self):
+        from asgiref.sync import SyncToAsync
+        from django.core.handlers.asgi import ASGIHandler
+
+        from contact.middleware import MedicaoConsultasMiddleware
+
+        elo, cadeia = ASGIHandler()._middleware_chain, []
+        while elo is not None:
+            cadeia.append(elo)
+            # convert_exception_to_response e os adaptadores guardam o elo em __wrapped__
+            elo = getattr(elo, '__wrapped__', None) or getattr(elo, 'get_response', None)
+        self.assertFalse([elo for elo in cadeia if isinstance(elo, SyncToAsync)])
+        medicao = next(elo for elo in cadeia if isinstance(elo, MedicaoConsultasMiddleware))
+        self.assertTrue(medicao.async_mode)
+
+    async def test_mede_view_assincrona(self):
+        await self.async_client.aforce_login(self.user)
+        resposta = await self.async_client.get(reverse('contact:autocompletar', args=['contatos']), {'q': 'ana'})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertGreater(resposta.asgi_request.medicao_consultas.consultas, 0)
+        self.assertEqual(self.registro.resumo()['contact:autocompletar']['requisicoes'], 1)
+
+    def test_cabecalhos_em_debug(self):
+        with self.settings(DEBUG=True):
+            resposta = self.client.get(reverse('contact:family'))
+        self.assertEqual(
+            resposta['X-Consultas-SQL'], str(resposta.wsgi_request.medicao_consultas.consultas)
+        )
+        self.assertIn('X-Tempo-Total-ms', resposta)
+
+    def test_endpoint_apenas_equipe(self):
+        resposta = self.client.get(reverse('contact:metricas_requisicoes'))
+        self.assertEqual(resposta.status_code, 302)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.client.get(reverse('contact:family'))
+        resposta = self.client.get(reverse('contact:metricas_requisicoes'))
+        self.assertIn('contact:family', resposta.json()['views'])
+
+
+class ComunidadeSinteticaTest(TestCase):
+    def gerar(self, username, semente=7):
+        owner = User.objects.create_user(username)
+        totais = gerar_comunidade(owner, 200, semente=semente, data_referencia=date(2025, 6, 15))
+        return owner, totais
+
+    def test_deterministica(self):
+        dono_a, totais_a = self.gerar('a')
+        dono_b, totais_b = self.gerar('b')
+        self.assertEqual(totais_a, totais_b)
+        self.assertEqual(
+            list(Contact.objects.filter(owner=dono_a).order_by('pk').values_list('first_name', 'birth_date')),
+            list(Contact.objects.filter(owner=dono_b).order_by('pk').values_list('first_name', 'birth_date')),
+        )
+
+    def test_volumes_e_historico(self):
+        owner, totais = self.gerar('c')
+        self.assertEqual(Contact.objects.filter(owner=owner).count(), 200)
+        self.assertEqual(totais['contatos'], 200)
+        self.assertEqual(HistoricoCiclo.objects.filter(owner=owner).count(), 36)
+        self.assertTrue(CirculoEstudo.objects.filter(owner=owner, participantes__isnull=False).exists())
+        self.assertGreater(IndiceBusca.objects.filter(owner=owner, tipo='contato').count(), 0)
+        plano = ConfiguracaoEstatisticas.objects.get(owner=owner)
+        self.assertEqual(plano.numero_ciclo_da_data(date(2025, 6, 15)), 37)
+
+    def test_comando_sem_senha_por_padrao(self):
+        call_command('gerar_comunidade', contatos=20, username='sintetico', stdout=StringIO())
+        self.assertFalse(User.objects.get(username='sintetico').has_usable_password())
+
+        call_command('gerar_comunidade', contatos=20, username='com-senha', senha='s3nh@-forte', stdout=StringIO())
+        self.assertTrue(User.objects.get(username='com-senha').check_password('s3nh@-forte'))
+
+    def test_benchmark_views_gera_relatorio(self):
+        saida = StringIO()
+        call_command('benchmark_views', tamanhos='100', repeticoes=1, stdout=saida, stderr=StringIO())
+        relatorio = json.loads(saida.getvalue())
+        views = relatorio['tamanhos']['100']['views']
+        self.assertEqual(views['index']['status'], 200)
+        self.assertEqual(views['historico_ciclo_detalhado']['status'], 200)
+        self.assertIsNotNone(views['livro_list']['consultas'])
+        self.assertFalse(User.objects.filter(username__startswith='benchmark-views').exists())
+
+
+class EncerramentoCicloTest(DadosComunidadeMixin, TestCase):
+    DATA = date(2024, 5, 10)  # ciclo 2 (abril a junho) do plano
+
+    def setUp(self):
+        self.user = User.objects.create_user('coordenador', password='senha')
+        categoria = CategoriaLivro.objects.create(nome='Sequência', ordem=1)
+        self.livros = [
+            Livro.objects.create(categoria=categoria, numero=n, titulo=f'Livro {n}') for n in range(1, 4)
+        ]
+        self.criar_comunidade(self.user, 4, self.livros)
+        self.configuracao = ConfiguracaoEstatisticas.objects.create(
+            owner=self.user, data_inicio_plano=date(2024, 1, 1), duracao_ciclo_meses=3, total_ciclos_plano=8,
+        )
+        EstatisticasEditaveis.objects.create(owner=self.user, total_circulos_estudo=3, series_criancas='1, 2')
+
+    def test_grava_historico_detalhes_e_copia(self):
+        resultado = encerrar_ciclo(self.user, self.DATA)
+
+        self.assertEqual(resultado['status'], encerramento.ENCERRADO)
+        self.assertEqual(resultado['numero_ciclo'], 2)
+        historico = HistoricoCiclo.objects.get(owner=self.user)
+        self.assertEqual((historico.data_inicio, historico.data_fim), (date(2024, 4, 1), date(2024, 6, 30)))
+        self.assertEqual(historico.total_circulos_estudo, 3)
+        self.assertEqual(historico.sistema_circulos_estudo, 4)
+        self.assertEqual(historico.livros_sequencia_iniciados, 3)
+        self.assertEqual(historico.detalhes_livros.count(), 3)
+        self.assertEqual(resultado['detalhes_livros'], 3)
+        self.assertEqual(historico.estatisticas_editaveis.series_criancas, '1, 2')
+
+    def test_idempotente(self):
+        encerrar_ciclo(self.user, self.DATA)
+        resultado = encerrar_ciclo(self.user, self.DATA)
+
+        self.assertEqual(resultado['status'], encerramento.JA_ENCERRADO)
+        self.assertEqual(HistoricoCiclo.objects.filter(owner=self.user).count(), 1)
+        self.assertEqual(DetalheLivroHistorico.objects.count(), 3)
+
+    def test_falha_nao_deixa_historico_pela_metade(self):
+        with mock.patch.object(
+            EstatisticasEditaveisHistorico.objects, 'create', side_effect=RuntimeError('falha')
+        ):
+            with self.assertRaises(RuntimeError):
+                encerrar_ciclo(self.user, self.DATA)
+        self.assertFalse(HistoricoCiclo.objects.exists())
+        self.assertFalse(DetalheLivroHistorico.objects.exists())
+
+        self.assertEqual(encerrar_ciclo(self.user, self.DATA)['status'], encerramento.ENCERRADO)
+
+    def test_preserva_historico_digitado(self):
+        manual = HistoricoCiclo.objects.create(
+            configuracao=self.configuracao, owner=self.user, numero_ciclo=2,
+            data_inicio=date(2024, 4, 1), data_fim=date(2024, 6, 30),
+            total_circulos_estudo=7, participantes_circulos=40,
+        )
+        resultado = encerrar_ciclo(self.user, self.DATA)
+
+        self.assertEqual(resultado['status'], encerramento.JA_ENCERRADO)
+        historico = HistoricoCiclo.objects.get(owner=self.user)
+        self.assertEqual(historico.pk, manual.pk)
+        self.assertEqual((historico.total_circulos_estudo, historico.participantes_circulos), (7, 40))
+        self.assertFalse(DetalheLivroHistorico.objects.exists())
+
+    def test_consultas_nao_dependem_da_quantidade_de_livros(self):
+        def consultas():
+            HistoricoCiclo.objects.all().delete()
+            obter_estatisticas(self.user)
+            with CaptureQueriesContext(connection) as contexto:
+                encerrar_ciclo(self.user, self.DATA)
+            return len(contexto)
+
+        antes = consultas()
+        contatos = list(Contact.objects.filter(owner=self.user))
+        categoria = self.livros[0].categoria
+        for n in range(4, 9):
+            livro = Livro.objects.create(categoria=categoria, numero=n, titulo=f'Livro {n}')
+            EstudoAtual.objects.create(contato=contatos[n % 4], livro=livro)
+        self.assertEqual(consultas(), antes)
+
+    def test_sem_estatisticas_e_antes_do_plano(self):
+        self.assertEqual(encerrar_ciclo(self.user, date(2023, 12, 1))['status'], encerramento.SEM_CICLO)
+        EstatisticasEditaveis.objects.all().delete()
+        self.assertEqual(encerrar_ciclo(self.user, self.DATA)['status'], encerramento.SEM_ESTATISTICAS)
+        self.assertFalse(HistoricoCiclo.objects.exists())
+
+    def test_comando_em_lote(self):
+        outro = User.objects.create_user('outro')
+        ConfiguracaoEstatisticas.objects.create(owner=outro, data_inicio_plano=date(2024, 1, 1))
+
+        saida = StringIO()
+        call_command('encerrar_ciclos', data=self.DATA, stdout=saida)
+        call_command('encerrar_ciclos', data=self.DATA, stdout=saida)
+
+        self.assertIn('coordenador: encerrado (ciclo 2), 3 livro(s)', saida.getvalue())
+        self.assertIn('coordenador: ja_encerrado (ciclo 2)', saida.getvalue())
+        self.assertIn('outro: sem_estatisticas', saida.getvalue())
+        self.assertEqual(HistoricoCiclo.objects.count(), 1)
+
+    def test_view_encerra_ciclo_atual(self):
+        self.configuracao.data_inicio_plano = date.today()
+        self.configuracao.save()
+        self.client.login(username='coordenador', password='senha')
+
+        resposta = self.client.post(reverse('contact:encerrar_ciclo_atual'))
+        self.assertRedirects(resposta, reverse('contact:dashboard_estatisticas'), fetch_redirect_response=False)
+        self.assertTrue(HistoricoCiclo.objects.filter(owner=self.user, numero_ciclo=1).exists())
+
+        resposta = self.client.post(reverse('contact:encerrar_ciclo_atual'), follow=True)
+        self.assertContains(resposta, 'já foi encerrado')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Os planos verificados são os do EXPLAIN QUERY PLAN do SQLite')
+class PlanoDeConsultaTest(TestCase):
+    """
+    Roda EXPLAIN QUERY PLAN nas consultas mais frequentes e confere que cada
+    uma usa o índice composto projetado para ela (e não uma varredura).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        # Vários usuários e alguns registros ocultos, como em produção; o
+        # ANALYZE dá ao planejador as estatísticas de seletividade
+        cls.user = User.objects.create_user('coordenador')
+        gerar_comunidade(cls.user, 300, semente=1, data_referencia=date(2025, 1, 15))
+        for n in range(4):
+            outro = User.objects.create_user(f'outro{n}')
+            gerar_comunidade(outro, 1000, semente=n + 2, data_referencia=date(2025, 1, 15))
+        for modelo in (Contact, Familia, GrupoPreJovens, AulaCrianca, CirculoEstudo, GrupoFamilias):
+            ocultos = list(modelo.objects.values_list('pk', flat=True))[::5]
+            modelo.objects.filter(pk__in=ocultos).update(show=False)
+        cls.livro = Livro.objects.create(
+            categoria=CategoriaLivro.objects.create(nome='Sem estudos', ordem=99), numero=99, titulo='Livro 99'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def consultas(self):
+        u = self.user
+        contato = Contact.objects.filter(owner=u, estudos_atuais__isnull=False).first()
+        periodo = criado_entre(date(2024, 10, 1), date(2024, 12, 31))
+        por_visita = normalizar_ordenacao(Familia, ('data_ultima_reuniao', 'id'))
+        return [
+            ('contact_contact', 'contact_owner_visivel_idx',
+             Contact.objects.filter(show=True, owner=u).order_by('-id')[:10]),
+            ('contact_familia', 'familia_owner_visivel_idx',
+             Familia.objects.filter(show=True, owner=u).order_by('-id')[:10]),
+            ('contact_familia', 'familia_owner_rd_idx',
+             Familia.objects.filter(owner=u, reuniao_devocional=True).order_by()),
+            ('contact_familia', 'familia_owner_ultima_rd_idx',
+             Familia.objects.filter(owner=u).order_by('data_ultima_reuniao')[:10]),
+            ('contact_familia', 'familia_owner_ultima_rd_idx',
+             Familia.objects.filter(owner=u)
+             .filter(filtro_apos_chave(por_visita, [date(2024, 12, 1), 50]))
+             .order_by(*ordem_de(por_visita))[:11]),
+            ('contact_familia', 'familia_owner_ultima_rd_idx',
+             Familia.objects.filter(owner=u)
+             .filter(filtro_apos_chave(por_visita, [None, 50], invertida=True))
+             .order_by(*ordem_de(por_visita, invertida=True))[:11]),
+            ('contact_grupoprejovens', 'prejovens_owner_visivel_idx',
+             GrupoPreJovens.objects.filter(show=True, owner=u).order_by('-id')[:10]),
+            ('contact_aulacrianca', 'aula_owner_visivel_idx',
+             AulaCrianca.objects.filter(show=True, owner=u).order_by('-id')[:10]),
+            ('contact_circuloestudo', 'circulo_owner_visivel_idx',
+             CirculoEstudo.objects.filter(show=True, owner=u).order_by('-id')[:10]),
+            ('contact_grupofamilias', 'grupofam_owner_visivel_idx',
+             GrupoFamilias.objects.filter(show=True, owner=u).order_by('-id')[:10]),
+            ('contact_grupoprejovens', 'prejovens_owner_ciclo_idx',
+             GrupoPreJovens.objects.filter(owner=u, numero_ciclo_criacao=3).order_by()),
+            ('contact_aulacrianca', 'aula_owner_ciclo_idx',
+             AulaCrianca.objects.filter(owner=u, numero_ciclo_criacao=3).order_by()),
+            ('contact_circuloestudo', 'circulo_owner_ciclo_idx',
+             CirculoEstudo.objects.filter(owner=u, numero_ciclo_criacao=3).order_by()),
+            ('contact_reuniaodevocional', 'reuniao_owner_ciclo_idx',
+             ReuniaoDevocional.objects.filter(owner=u, numero_ciclo_criacao=3).order_by()),
+            ('contact_familia', 'familia_owner_ciclo_idx',
+             Familia.objects.filter(owner=u, numero_ciclo_criacao=3).order_by()),
+            ('contact_estudoatual', 'estudo_contato_status_idx',
+             contato.estudos_atuais.filter(status='em_andamento')),
+            ('contact_historicoestudo', 'histestudo_contato_status_idx',
+             contato.historico_estudos.filter(status='concluido').order_by('-data_termino')),
+            ('contact_estudoatual', 'estudo_livro_status_idx',
+             EstudoAtual.objects.filter(livro=self.livro, status='pausado').order_by()),
+            ('contact_historicoestudo', 'histestudo_livro_status_idx',
+             HistoricoEstudo.objects.filter(livro=self.livro, status='concluido').order_by()),
+            ('contact_estudoatual', 'estudo_owner_status_criado_idx',
+             EstudoAtual.objects.filter(owner=u, status='pausado').order_by()),
+            ('contact_estudoatual', 'estudo_owner_status_criado_idx',
+             EstudoAtual.objects.filter(periodo, owner=u, status='em_andamento').order_by()),
+            ('contact_historicoestudo', 'histestudo_owner_st_criado_idx',
+             HistoricoEstudo.objects.filter(periodo, owner=u, status='concluido').order_by()),
+            ('contact_historicociclo', 'historico_owner_ciclo_idx',
+             HistoricoCiclo.objects.filter(owner=u).order_by('-numero_ciclo')),
+        ]
+
+    def test_consultas_usam_indices_compostos(self):
+        for tabela, indice, consulta in self.consultas():
+            with self.subTest(indice=indice):
+                plano = consulta.explain()
+                self.assertRegex(plano, rf'SEARCH {tabela} USING (COVERING )?INDEX {indice}\b')
+                self.assertNotRegex(plano, rf'SCAN {tabela}\b')
+
+    def test_listagens_nao_ordenam_em_memoria(self):
+        for tabela, indice, consulta in self.consultas():
+            if consulta.query.order_by and consulta.query.low_mark == 0 and consulta.query.high_mark:
+                with self.subTest(indice=indice):
+                    self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', consulta.explain())
+
+
+class OwnerDosEstudosTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('coordenador')
+        self.outro = User.objects.create_user('outro')
+        categoria = CategoriaLivro.objects.create(nome='Sequência', ordem=1)
+        self.livro = Livro.objects.create(categoria=categoria, numero=1, titulo='Livro 1')
+        self.contato = Contact.objects.create(first_name='Ana', owner=self.user)
+        self.estudo = EstudoAtual.objects.create(contato=self.contato, livro=self.livro)
+        self.concluido = HistoricoEstudo.objects.create(contato=self.contato, livro=self.livro)
+
+    def donos(self):
+        return (
+            EstudoAtual.objects.get(pk=self.estudo.pk).owner_id,
+            HistoricoEstudo.objects.get(pk=self.concluido.pk).owner_id,
+        )
+
+    def test_copia_o_dono_ao_criar(self):
+        self.assertEqual(self.donos(), (self.user.pk, self.user.pk))
+
+    def test_acompanha_o_contato_salvo_com_outro_dono(self):
+        self.contato.owner = self.outro
+        self.contato.save()
+        self.assertEqual(self.donos(), (self.outro.pk, self.outro.pk))
+
+    def test_acompanha_transferencia_em_lote(self):
+        Contact.objects.filter(owner=self.user).update(owner=self.outro)
+        self.assertEqual(self.donos(), (self.outro.pk, self.outro.pk))
+        self.assertEqual(Contact.objects.get(pk=self.contato.pk).owner, self.outro)
+
+    def test_transferencia_leva_o_indice_de_busca(self):
+        Contact.objects.create(first_name='Joaquim', owner=self.user)
+        obter_estatisticas(self.user)
+        obter_estatisticas(self.outro)
+
+        Contact.objects.filter(owner=self.user).update(owner=self.outro)
+
+        self.assertEqual(buscar(self.user, 'joaquim'), [])
+        self.assertEqual([r['titulo'] for r in buscar(self.outro, 'joaquim')], ['Joaquim'])
+        self.assertTrue(EstatisticasSnapshot.objects.get(owner=self.user).desatualizado)
+        self.assertTrue(EstatisticasSnapshot.objects.get(owner=self.outro).desatualizado)
+
+    def test_migracao_preenche_estudos_existentes(self):
+        preencher_owner = import_module('contact.migrations.0042_owner_dos_estudos').preencher_owner
+        EstudoAtual.objects.update(owner=None)
+        HistoricoEstudo.objects.update(owner=None)
+
+        preencher_owner(django_apps, None)
+        self.assertEqual(self.donos(), (self.user.pk, self.user.pk))
+
+    def test_estatisticas_nao_fazem_join_com_contato(self):
+        with CaptureQueriesContext(connection) as contexto:
+            calcular_novidades_do_ciclo(self.user, 1, date(2024, 1, 1), date.today())
+        sql_estudos = [q['sql'] for q in contexto.captured_queries if 'contact_estudoatual' in q['sql']]
+        self.assertTrue(sql_estudos)
+        self.assertFalse(any('contact_contact' in sql for sql in sql_estudos))
+
+
+class PaginacaoKeysetTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('coordenador', password='senha')
+        self.contatos = [
+            Contact.objects.create(first_name=f'Pessoa {i}', owner=self.user) for i in range(25)
+        ]
+        self.fabrica = RequestFactory()
+
+    def pagina(self, queryset, query='', **kwargs):
+        return paginar(self.fabrica.get(f'/?{query}'), queryset, **kwargs)
+
+    def percorrer(self, queryset, **kwargs):
+        paginas = [self.pagina(queryset, **kwargs)]
+        while paginas[-1].has_next:
+            paginas.append(self.pagina(queryset, paginas[-1].query_proxima, **kwargs))
+        return paginas
+
+    def test_percorre_todas_as_linhas_sem_repetir(self):
+        paginas = self.percorrer(Contact.objects.filter(owner=self.user))
+        self.assertEqual([len(p) for p in paginas], [10, 10, 5])
+        ids = [c.pk for p in paginas for c in p]
+        self.assertEqual(ids, sorted((c.pk for c in self.contatos), reverse=True))
+        self.assertFalse(paginas[0].has_previous)
+        self.assertTrue(paginas[-1].has_previous)
+
+    def test_volta_para_a_pagina_anterior(self):
+        contatos = Contact.objects.filter(owner=self.user)
+        primeira, segunda, terceira = self.percorrer(contatos)
+        anterior = self.pagina(contatos, terceira.query_anterior)
+        self.assertEqual(list(anterior), list(segunda))
+        self.assertTrue(anterior.has_next)
+        primeira_de_novo = self.pagina(contatos, segunda.query_anterior)
+        self.assertEqual(list(primeira_de_novo), list(primeira))
+        self.assertFalse(primeira_de_novo.has_previous)
+
+    def test_ultima_pagina(self):
+        contatos = Contact.objects.filter(owner=self.user)
+        ultima = self.pagina(contatos, self.pagina(contatos).query_ultima)
+        self.assertEqual([c.pk for c in ultima], [c.pk for c in reversed(self.contatos[:10])])
+        self.assertTrue(ultima.has_previous)
+        self.assertFalse(ultima.has_next)
+
+    def test_datas_nulas_e_repetidas(self):
+        datas = [None, date(2024, 3, 1), None, date(2024, 1, 1), date(2024, 3, 1)] * 5
+        familias = [
+            Familia.objects.create(nome=f'Família {i}', owner=self.user, data_ultima_reuniao=data)
+            for i, data in enumerate(datas)
+        ]
+        consulta = Familia.objects.filter(owner=self.user)
+        ordenacao = ('data_ultima_reuniao', 'id')
+        paginas = self.percorrer(consulta, ordenacao=ordenacao, por_pagina=4)
+        esperado = sorted(familias, key=lambda f: (f.data_ultima_reuniao is not None, f.data_ultima_reuniao or date.min, f.pk))
+        self.assertEqual([f.pk for p in paginas for f in p], [f.pk for f in esperado])
+
+        for anterior, atual in zip(paginas, paginas[1:]):
+            voltou = self.pagina(consulta, atual.query_anterior, ordenacao=ordenacao, por_pagina=4)
+            self.assertEqual(list(voltou), list(anterior))
+
+    def test_preserva_filtros_e_ignora_cursor_invalido(self):
+        contatos = Contact.objects.filter(owner=self.user)
+        pagina = self.pagina(contatos, 'q=pessoa&page=3')
+        self.assertIn('q=pessoa', pagina.query_proxima)
+        self.assertNotIn('page=', pagina.query_proxima)
+        invalida = self.pagina(contatos, 'cursor=nao-e-um-cursor')
+        self.assertEqual(list(invalida), list(pagina))
+
+    def test_contagem_limitada(self):
+        contatos = Contact.objects.filter(owner=self.user)
+        pagina = self.pagina(contatos, contagem_maxima=20)
+        self.assertEqual((pagina.contagem, pagina.contagem_limitada), (20, True))
+        pagina = self.pagina(contatos)
+        self.assertEqual((pagina.contagem, pagina.contagem_limitada), (25, False))
+
+    def test_views_navegam_pelo_cursor(self):
+        self.client.login(username='coordenador', password='senha')
+        resposta = self.client.get(reverse('contact:index'))
+        proxima = resposta.context['page_obj'].query_proxima
+        self.assertContains(resposta, f'href="?{proxima}"'.replace('&', '&amp;'))
+        resposta = self.client.get(f"{reverse('contact:index')}?{proxima}")
+        self.assertEqual(
+            [c.pk for c in resposta.context['page_obj']],
+            [c.pk for c in reversed(self.contatos[5:15])],
+        )
+
+
+class ApiLeituraTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('coordenador', password='senha')
+        outro = User.objects.create_user('outro')
+        self.contatos = [
+            Contact.objects.create(
+                first_name=f'Pessoa {i}', owner=self.user, is_bahai=(i % 2 == 0),
+                birth_date=date(date.today().year - 20 + i, 1, 1),
+            )
+            for i in range(5)
+        ]
+        Contact.objects.create(first_name='Oculta', owner=self.user, show=False)
+        Contact.objects.create(first_name='De outro', owner=outro)
+        self.client.login(username='coordenador', password='senha')
+
+    def listar(self, recurso, **parametros):
+        return self.client.get(reverse('contact:api_lista', args=[recurso]), parametros)
+
+    def test_campos_e_escopo_do_dono(self):
+        dados = self.listar('contatos', campos='id,first_name').json()
+        self.assertEqual(dados['versao'], 'v1')
+        self.assertEqual(
+            dados['resultados'],
+            [{'id': c.pk, 'first_name': c.first_name} for c in reversed(self.contatos)],
+        )
+
+    def test_paginacao_por_cursor(self):
+        resposta = self.listar('contatos', campos='first_name', limite=2)
+        nomes = []
+        while True:
+            dados = resposta.json()
+            nomes += [linha['first_name'] for linha in dados['resultados']]
+            if not dados['proxima']:
+                break
+            resposta = self.client.get(dados['proxima'])
+        self.assertEqual(nomes, [c.first_name for c in reversed(self.contatos)])
+
+    def test_filtros(self):
+        def ids(**parametros):
+            return [linha['id'] for linha in self.listar('contatos', campos='id', **parametros).json()['resultados']]
+
+        self.assertEqual(ids(is_bahai='true'), [c.pk for c in reversed(self.contatos[::2])])
+        self.assertEqual(ids(birth_date__gte=f'{date.today().year - 17}-01-01'), [c.pk for c in reversed(self.contatos[3:])])
+        self.assertEqual(ids(id__in=f'{self.contatos[0].pk},{self.contatos[1].pk}'),
+                         [self.contatos[1].pk, self.contatos[0].pk])
+        self.assertEqual(ids(faixa_etaria='jovens'), ids())
+        self.assertEqual(ids(faixa_etaria='adultos'), [])
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self.listar('contatos', campos='senha').status_code, 400)
+        self.assertEqual(self.listar('contatos', owner=1).status_code, 400)
+        self.assertEqual(self.listar('contatos', birth_date='ontem').status_code, 400)
+        self.assertEqual(self.listar('senhas').status_code, 404)
+
+    def test_exportacao_ndjson_e_csv(self):
+        url = reverse('contact:api_exportar', args=['contatos'])
+        resposta = self.client.get(url, {'campos': 'id,birth_date'})
+        self.assertTrue(resposta.streaming)
+        linhas = [json.loads(linha) for linha in b''.join(resposta.streaming_content).decode().splitlines()]
+        self.assertEqual(linhas, [{'id': c.pk, 'birth_date': c.birth_date.isoformat()} for c in self.contatos])
+
+        resposta = self.client.get(url, {'campos': 'id,first_name', 'formato': 'csv'})
+        self.assertEqual(resposta['Content-Type'], 'text/csv; charset=utf-8')
+        csv = b''.join(resposta.streaming_content).decode().splitlines()
+        self.assertEqual(csv[0], 'id,first_name')
+        self.assertEqual(csv[1:], [f'{c.pk},{c.first_name}' for c in self.contatos])
+
+    def test_exportacao_le_em_lotes(self):
+        consulta = Contact.objects.filter(owner=self.user, show=True)
+        with mock.patch.object(type(consulta), 'iterator', autospec=True, side_effect=lambda qs, chunk_size: iter(())) as iterator:
+            list(api.gerar_ndjson(consulta, ['id'], tamanho_lote=2))
+        self.assertEqual(iterator.call_args.kwargs['chunk_size'], 2)
+
+    def test_todos_os_recursos_respondem(self):
+        for recurso in api.RECURSOS:
+            with self.subTest(recurso=recurso):
+                self.assertEqual(self.listar(recurso).status_code, 200)
+
+
+
+class ImportacaoContatosTest(TestCase):
+    CSV = (
+        "Nome;Sobrenome;Nascimento;Bahá'í;Família;Rua;Bairro\n"
+        'João;Souza;05/02/1980;sim;Família Souza;Rua das Flores;Centro\n'
+        'Maria;Souza;1982-07-10;não;familia souza;RUA DAS FLORES;Centro\n'
+        'Ana;Lima;31/02/1990;;Família Lima;Rua Nova;\n'
+        ';Sem nome;;;;;\n'
+        'Pedro;Lima;;talvez;Família Lima;Rua Nova;\n'
+        'Clara;Lima;;s;Família Lima;Rua Nova;\n'
+    ).encode()
+
+    def setUp(self):
+        self.user = User.objects.create_user('coordenador', password='senha')
+        self.rua = Rua.objects.create(nome='Rua das Flores', bairro='Centro', owner=self.user)
+
+    def importar(self, conteudo=None, nome_arquivo='contatos.csv'):
+        linhas = ler_planilha(BytesIO(self.CSV if conteudo is None else conteudo), nome_arquivo)
+        return importar_linhas(self.user, linhas, tamanho_lote=2)
+
+    def test_importa_e_reaproveita_ruas_e_familias(self):
+        resultado = self.importar()
+
+        self.assertEqual(resultado['total_linhas'], 6)
+        self.assertEqual(resultado['contatos_criados'], 3)
+        self.assertEqual((resultado['familias_criadas'], resultado['ruas_criadas']), (2, 1))
+        joao = Contact.objects.get(first_name='João')
+        maria = Contact.objects.get(first_name='Maria')
+        self.assertEqual((joao.birth_date, joao.is_bahai), (date(1980, 2, 5), True))
+        self.assertEqual((maria.birth_date, maria.is_bahai), (date(1982, 7, 10), False))
+        self.assertEqual(joao.rua, self.rua)
+        self.assertEqual(joao.familia_id, maria.familia_id)
+        self.assertEqual(joao.familia.rua, self.rua)
+        self.assertEqual(Contact.objects.get(first_name='Clara').rua.nome, 'Rua Nova')
+
+    def test_relatorio_de_erros(self):
+        resultado = self.importar()
+
+        self.assertEqual([numero for numero, _, _ in resultado['erros']], [4, 5, 6])
+        relatorio = relatorio_de_erros(resultado).splitlines()
+        self.assertEqual(relatorio[0], "linha,erro,Nome,Sobrenome,Nascimento,Bahá'í,Família,Rua,Bairro")
+        self.assertIn('Data de nascimento inválida', relatorio[1])
+        self.assertIn('Nome em branco', relatorio[2])
+        self.assertTrue(relatorio[3].startswith('6,'))
+
+    def test_contatos_importados_entram_na_busca(self):
+        anterior = Contact.objects.create(first_name='Antigo', owner=self.user)
+        entradas_anteriores = set(IndiceBusca.objects.values_list('pk', flat=True))
+
+        self.importar()
+        self.assertEqual([r['titulo'] for r in buscar(self.user, 'joao flores', tipos=['contato'])], ['João Souza'])
+        self.assertEqual([r['titulo'] for r in buscar(self.user, 'lima', tipos=['familia'])], ['Família Lima'])
+        # Só os registros criados pela importação são indexados
+        self.assertLessEqual(entradas_anteriores, set(IndiceBusca.objects.values_list('pk', flat=True)))
+        self.assertEqual(IndiceBusca.objects.filter(tipo='contato', objeto_id=anterior.pk).count(), 1)
+
+    def test_cabecalho_e_formato_invalidos(self):
+        with self.assertRaises(ErroImportacao):
+            self.importar('Sobrenome\nSouza\n'.encode())
+        with self.assertRaises(ErroImportacao):
+            self.importar(b'', nome_arquivo='contatos.pdf')
+
+    def test_envio_pela_interface(self):
+        self.client.login(username='coordenador', password='senha')
+        with TemporaryDirectory() as pasta, override_settings(MEDIA_ROOT=pasta, IMPORTACAO_EM_SEGUNDO_PLANO=False):
+            resposta = self.client.post(
+                reverse('contact:importacao_nova'),
+                {'arquivo': SimpleUploadedFile('contatos.csv', self.CSV, content_type='text/csv')},
+            )
+            importacao = ImportacaoContatos.objects.get(owner=self.user)
+            self.assertRedirects(resposta, reverse('contact:importacao_detalhe', args=[importacao.pk]))
+            self.assertEqual(importacao.status, ImportacaoContatos.PENDENTE)
+
+            processar_importacao(importacao.pk)
+            self.assertIsNone(processar_importacao(importacao.pk))  # já processada
+
+        importacao.refresh_from_db()
+        self.assertEqual(importacao.status, ImportacaoContatos.CONCLUIDA)
+        self.assertEqual((importacao.contatos_criados, importacao.linhas_com_erro), (3, 3))
+        resposta = self.client.get(reverse('contact:importacao_erros', args=[importacao.pk]))
+        self.assertEqual(resposta.content.decode(), importacao.relatorio_erros)
+
+    def test_comando_recupera_importacoes_abandonadas(self):
+        with TemporaryDirectory() as pasta, override_settings(MEDIA_ROOT=pasta):
+            # Thread que morreu no meio do processamento, há duas horas
+            abandonada = ImportacaoContatos.objects.create(
+                owner=self.user, nome_arquivo='contatos.csv', status=ImportacaoContatos.PROCESSANDO,
+                iniciada_em=timezone.now() - timedelta(hours=2), tentativas=1,
+                arquivo=SimpleUploadedFile('contatos.csv', self.CSV),
+            )
+            sem_saida = ImportacaoContatos.objects.create(
+                owner=self.user, nome_arquivo='trava.csv', status=ImportacaoContatos.PROCESSANDO,
+                iniciada_em=timezone.now() - timedelta(hours=2), tentativas=2,
+            )
+            em_andamento = ImportacaoContatos.objects.create(
+                owner=self.user, nome_arquivo='atual.csv', status=ImportacaoContatos.PROCESSANDO,
+                iniciada_em=timezone.now(), tentativas=1,
+            )
+            call_command('processar_importacoes', stdout=StringIO())
+
+        abandonada.refresh_from_db()
+        self.assertEqual((abandonada.status, abandonada.tentativas), (ImportacaoContatos.CONCLUIDA, 2))
+        self.assertEqual(abandonada.contatos_criados, 3)
+        sem_saida.refresh_from_db()
+        self.assertEqual(sem_saida.status, ImportacaoContatos.FALHOU)
+        em_andamento.refresh_from_db()
+        self.assertEqual(em_andamento.status, ImportacaoContatos.PROCESSANDO)
+
+
+class VinculosPorDiferencaTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('coordenador')
+        self.rua = Rua.objects.create(nome='Rua A', owner=self.user)
+        self.contatos = [Contact.objects.create(first_name=f'Pessoa {i}', owner=self.user) for i in range(4)]
+
+    def dados_grupo(self, participantes):
+        return {'nome': 'Grupo', 'participantes': [c.pk for c in participantes]}
+
+    def test_grupo_sem_mudanca_nao_grava_vinculos(self):
+        grupo = GrupoFamilias.objects.create(nome='Grupo', owner=self.user)
+        grupo.participantes.set(self.contatos[:2])
+        form = GrupoFamiliasForm(self.dados_grupo(self.contatos[:2]), instance=grupo, user=self.user)
+        self.assertTrue(form.is_valid())
+
+        recebidos = []
+        def receptor(action, **kwargs):
+            recebidos.append(action)
+        m2m_changed.connect(receptor, sender=GrupoFamilias.participantes.through)
+        try:
+            with CaptureQueriesContext(connection) as consultas:
+                form.save()
+        finally:
+            m2m_changed.disconnect(receptor, sender=GrupoFamilias.participantes.through)
+
+        self.assertEqual(recebidos, [])
+        tabela = GrupoFamilias.participantes.through._meta.db_table
+        self.assertFalse([q for q in consultas.captured_queries if tabela in q['sql']])
+
+    def test_grupo_grava_so_a_diferenca(self):
+        grupo = GrupoFamilias.objects.create(nome='Grupo', owner=self.user)
+        grupo.participantes.set(self.contatos[:2])
+        form = GrupoFamiliasForm(self.dados_grupo(self.contatos[1:3]), instance=grupo, user=self.user)
+        self.assertTrue(form.is_valid())
+
+        conjuntos = []
+        def receptor(action, pk_set, **kwargs):
+            if action.startswith('post_'):
+                conjuntos.append((action, pk_set))
+        m2m_changed.connect(receptor, sender=GrupoFamilias.participantes.through)
+        try:
+            form.save()
+        finally:
+            m2m_changed.disconnect(receptor, sender=GrupoFamilias.participantes.through)
+
+        self.assertEqual(conjuntos, [('post_remove', {self.contatos[0].pk}), ('post_add', {self.contatos[2].pk})])
+        self.assertEqual(set(grupo.participantes.all()), set(self.contatos[1:3]))
+
+    def test_membros_da_familia_por_diferenca(self):
+        familia = Familia.objects.create(nome='Família Souza', rua=self.rua, owner=self.user)
+        Contact.objects.filter(pk__in=[c.pk for c in self.contatos[:2]]).update(familia=familia)
+        reindexar('contato', ids=[c.pk for c in self.contatos[:2]])
+        dados = {'nome': 'Família Souza', 'rua': self.rua.pk, 'membros': [c.pk for c in self.contatos[1:3]]}
+        form = FamiliaForm(dados, instance=familia, user=self.user)
+        self.assertTrue(form.is_valid(), form.errors)
+
+        with CaptureQueriesContext(connection) as consultas:
+            form.save()
+
+        self.assertEqual(set(familia.membros.all()), set(self.contatos[1:3]))
+        tabela = Contact._meta.db_table
+        atualizacoes = [q for q in consultas.captured_queries if q['sql'].startswith(f'UPDATE "{tabela}"')]
+        self.assertEqual(len(atualizacoes), 2)
+        self.assertEqual([r['id'] for r in buscar(self.user, 'souza', tipos=['contato'])],
+                         [c.pk for c in sorted(self.contatos[1:3], key=lambda c: c.first_name)])
+
+    def test_membros_da_familia_desatualizam_estatisticas(self):
+        atualizar_snapshot(self.user)
+        dados = {'nome': 'Família Souza', 'rua': self.rua.pk, 'reuniao_devocional': 'on',
+                 'membros': [c.pk for c in self.contatos[:3]]}
+        form = FamiliaForm(dados, user=self.user)
+        self.assertTrue(form.is_valid(), form.errors)
+        familia = form.save(commit=False)  # como a view de criação
+        familia.owner = self.user
+        familia.save()
+        atualizar_snapshot(self.user)
+        form.atualizar_membros(familia)
+
+        self.assertTrue(EstatisticasSnapshot.objects.get(owner=self.user).desatualizado)
+        self.assertEqual(obter_estatisticas(self.user)['participantes_devocionais'], 3)
+
+
+class EscolhasDoUsuarioTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('coordenador', password='senha')
+        outro = User.objects.create_user('outro')
+        self.rua = Rua.objects.create(nome='Rua das Flores', bairro='Centro', owner=self.user)
+        self.familia = Familia.objects.create(nome='Família Souza', rua=self.rua, owner=self.user)
+        self.contatos = [
+            Contact.objects.create(first_name=nome, last_name='Souza', familia=self.familia, owner=self.user)
+            for nome in ('Carla', 'Ana', 'Bruno')
+        ]
+        Contact.objects.create(first_name='Alheio', owner=outro)
+        self.client.login(username='coordenador', password='senha')
+
+    def test_listas_carregadas_uma_vez_por_requisicao(self):
+        formularios = (AulaCriancaForm, CirculoEstudoForm, GrupoPreJovensForm)
+        with CaptureQueriesContext(connection) as consultas:
+            for formulario in formularios:
+                for nome in ('participantes', 'pre_jovens', 'professor', 'tutor', 'animador', 'rua'):
+                    form = formulario(user=self.user)
+                    if nome in form.fields:
+                        str(form[nome])
+        tabela = Contact._meta.db_table
+        self.assertEqual(len([q for q in consultas.captured_queries if f'FROM "{tabela}"' in q['sql']]), 1)
+
+        escolhas = escolhas_do_usuario(self.user)
+        self.assertEqual(
+            escolhas.opcoes('contatos'),
+            [(c.pk, f'{c.first_name} Souza', 'Família Souza') for c in sorted(self.contatos, key=lambda c: c.first_name)],
+        )
+        self.assertFalse(escolhas.grande('contatos'))
+
+    @override_settings(LIMITE_LISTA_ESCOLHAS=2)
+    def test_lista_grande_mostra_so_selecionados_e_busca_no_servidor(self):
+        aula = AulaCrianca.objects.create(nome='Aula', owner=self.user, rua=self.rua)
+        aula.participantes.set([self.contatos[0]])
+
+        resposta = self.client.get(reverse('contact:aulacrianca_update', args=[aula.pk]))
+
+        self.assertContains(resposta, reverse('contact:escolhas_busca', args=['contatos']))
+        self.assertContains(resposta, f'name="participantes" value="{self.contatos[0].pk}" checked')
+        self.assertNotContains(resposta, f'name="participantes" value="{self.contatos[1].pk}"')
+
+    def test_escolha_unica_opcional_pode_ser_desfeita(self):
+        aula = AulaCrianca.objects.create(nome='Aula', owner=self.user, rua=self.rua, professor=self.contatos[0])
+        form = AulaCriancaForm(instance=aula, user=self.user)
+        self.assertIn('name="rua" value=""', str(form['rua']))
+        self.assertNotIn('name="participantes" value=""', str(form['participantes']))
+
+        dados = {'nome': 'Aula', 'rua': '', 'participantes': [self.contatos[1].pk]}
+        form = AulaCriancaForm(dados, instance=aula, user=self.user)
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+        aula.refresh_from_db()
+        self.assertIsNone(aula.rua)
+        # Sem nenhum radio marcado o campo também fica vazio
+        self.assertIsNone(aula.professor)
+
+    def test_busca_de_escolhas(self):
+        url = reverse('contact:escolhas_busca', args=['contatos'])
+        dados = self.client.get(url, {'q': 'bru'}).json()
+        self.assertEqual(dados['resultados'], [
+            {'id': self.contatos[2].pk, 'rotulo': 'Bruno Souza', 'detalhe': 'Família Souza'},
+        ])
+        self.assertEqual(self.client.get(url, {'q': 'alheio'}).json()['resultados'], [])
+        self.assertEqual(self.client.get(reverse('contact:escolhas_busca', args=['senhas'])).status_code, 404)
+
+    def test_formularios_renderizam(self):
+        familia_url = reverse('contact:familia_update', args=[self.familia.pk])
+        for url in (
+            reverse('contact:familia_create'), familia_url,
+            reverse('contact:aulacrianca_create'), reverse('contact:circuloestudo_create'),
+            reverse('contact:grupoprejovens_create'), reverse('contact:grupofamilias_create'),
+        ):
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'class="lista-com-busca"')
+        self.assertContains(self.client.get(familia_url), f'name="membros" value="{self.contatos[0].pk}" checked')
+
+
+class AutocompletarTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('coordenador', password='senha')
+        outro = User.objects.create_user('outro')
+        self.rua = Rua.objects.create(nome='Rua São João', owner=self.user)
+        self.familia = Familia.objects.create(nome='Família Mônaco', rua=self.rua, owner=self.user)
+        self.maria = Contact.objects.create(first_name='Mária', last_name='Souza', owner=self.user)
+        self.marcos = Contact.objects.create(first_name='Marcos', last_name='Lima', owner=self.user)
+        Contact.objects.create(first_name='Mariana', owner=outro)
+        categoria = CategoriaLivro.objects.create(nome='Instituto Ruhi', ordem=1)
+        self.livro = Livro.objects.create(categoria=categoria, numero=7, titulo='Caminhando juntos')
+        self.client.login(username='coordenador', password='senha')
+
+    def buscar(self, tipo, texto, **parametros):
+        resposta = self.client.get(reverse('contact:autocompletar', args=[tipo]), {'q': texto, **parametros})
+        self.assertEqual(resposta.status_code, 200)
+        return resposta.json()['resultados']
+
+    def test_prefixo_normalizado_em_ordem_e_do_dono(self):
+        self.assertEqual(self.buscar('contatos', 'MAR'), [
+            {'id': self.marcos.pk, 'rotulo': 'Marcos Lima'},
+            {'id': self.maria.pk, 'rotulo': 'Mária Souza'},
+        ])
+        self.assertEqual(self.buscar('contatos', 'maria s'), [{'id': self.maria.pk, 'rotulo': 'Mária Souza'}])
+        self.assertEqual(self.buscar('contatos', 'souza'), [])  # só o começo do nome
+        self.assertEqual(self.buscar('familias', 'familia mon'), [{'id': self.familia.pk, 'rotulo': 'Família Mônaco'}])
+        self.assertEqual(self.buscar('ruas', 'rua sao'), [{'id': self.rua.pk, 'rotulo': 'Rua São João'}])
+        self.assertEqual(self.buscar('contatos', ''), [])
+        self.assertEqual(
+            self.client.get(reverse('contact:autocompletar', args=['senhas']), {'q': 'a'}).status_code, 404
+        )
+
+    def test_limite_maximo(self):
+        Contact.objects.bulk_create([Contact(first_name=f'Ana {n:02}', owner=self.user) for n in range(30)])
+        reindexar('contato', owner=self.user)
+        self.assertEqual(len(self.buscar('contatos', 'ana')), LIMITE_AUTOCOMPLETAR)
+        self.assertEqual(len(self.buscar('contatos', 'ana', limite=500)), LIMITE_AUTOCOMPLETAR)
+        self.assertEqual([r['rotulo'] for r in self.buscar('contatos', 'ana', limite=3)], ['Ana 00', 'Ana 01', 'Ana 02'])
+
+    def test_cache_dos_prefixos_invalidado_quando_um_nome_muda(self):
+        self.assertEqual(len(self.buscar('contatos', 'mar')), 2)
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(len(self.buscar('contatos', 'mar')), 2)
+        tabela = IndiceBusca._meta.db_table
+        self.assertFalse([q for q in consultas.captured_queries if tabela in q['sql']])
+
+        novo = Contact.objects.create(first_name='Marta', owner=self.user)
+        self.assertIn({'id': novo.pk, 'rotulo': 'Marta'}, self.buscar('contatos', 'mar'))
+        novo.delete()
+        self.assertEqual(len(self.buscar('contatos', 'mar')), 2)
+
+    def test_livros_por_titulo_ou_numero(self):
+        esperado = [{'id': self.livro.pk, 'rotulo': 'Livro 7 - Caminhando juntos'}]
+        self.assertEqual(self.buscar('livros', 'caminh'), esperado)
+        self.assertEqual(self.buscar('livros', '7'), esperado)
+
+        self.livro.titulo = 'Andando juntos'
+        self.livro.save(update_fields=['titulo'])
+        self.assertEqual(self.buscar('livros', 'cam'), [])
+        self.assertEqual(self.buscar('livros', 'and')[0]['id'], self.livro.pk)
+
+
+class ProgressoLivrosTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('coordenador')
+        outro = User.objects.create_user('outro')
+        CategoriaLivro.objects.update(ativo=False)  # catálogo inicial das migrações
+        self.sequencia = CategoriaLivro.objects.create(nome='Sequência', ordem=1)
+        inativa = CategoriaLivro.objects.create(nome='Antiga', ordem=0, ativo=False)
+        self.livro = Livro.objects.create(categoria=self.sequencia, numero=1, titulo='Reflexões')
+        Livro.objects.create(categoria=self.sequencia, numero=2, titulo='Sem estudos')
+        self.sem_categoria = Livro.objects.create(numero=9, titulo='Avulso')
+        self.da_inativa = Livro.objects.create(categoria=inativa, numero=3, titulo='Antigo')
+
+        ana = Contact.objects.create(first_name='Ana', owner=self.user)
+        bia = Contact.objects.create(first_name='Bia', owner=self.user)
+        for contato, livro, status in (
+            (ana, self.livro, 'em_andamento'), (bia, self.livro, 'pausado'),
+            (ana, self.sem_categoria, 'em_andamento'), (bia, self.da_inativa, 'em_andamento'),
+        ):
+            EstudoAtual.objects.create(contato=contato, livro=livro, status=status)
+        HistoricoEstudo.objects.create(contato=ana, livro=self.livro, status='concluido')
+        alheio = Contact.objects.create(first_name='Alheio', owner=outro)
+        EstudoAtual.objects.create(contato=alheio, livro=self.livro, status='em_andamento')
+
+    def test_blocos_por_categoria(self):
+        blocos = progresso_por_categoria(self.user)
+        self.assertEqual([b['nome'] for b in blocos], ['Antiga', 'Sequência', None])
+        sequencia = blocos[1]
+        self.assertEqual((sequencia['iniciados'], sequencia['concluidos']), (2, 1))
+        primeiro, segundo = sequencia['livros']
+        self.assertEqual(primeiro['livro'], self.livro)
+        self.assertEqual(
+            (primeiro['em_andamento'], primeiro['pausados'], primeiro['estudantes_concluidos']), (1, 1, 1)
+        )
+        self.assertEqual(segundo['iniciados'], 0)
+
+        so_com_estudos = progresso_por_categoria(self.user, catalogo_completo=False)
+        self.assertEqual([len(b['livros']) for b in so_com_estudos], [1, 1, 1])
+
+    def test_estatisticas_do_dashboard_com_consultas_constantes(self):
+        with self.assertNumQueries(4):
+            estatisticas = calcular_estatisticas_livros(self.user)
+        self.assertEqual(list(estatisticas['livros_por_categoria']), ['Sequência'])
+        self.assertEqual(estatisticas['total_livros_geral'], 3)
+        self.assertEqual([l['numero'] for l in estatisticas['livros_detalhados']], [1])
+
+        for numero in range(10, 20):
+            livro = Livro.objects.create(categoria=self.sequencia, numero=numero, titulo=f'Livro {numero}')
+            EstudoAtual.objects.create(contato=Contact.objects.create(first_name='X', owner=self.user), livro=livro)
+        with self.assertNumQueries(4):
+            calcular_estatisticas_livros(self.user)
+
+
+class RegistroAtividadesTest(DadosComunidadeMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('coordenador')
+        self.criar_comunidade(self.user, 4, [])
+        ReuniaoDevocional.objects.create(
+            nome='RD', owner=self.user, numero_participantes=7, participantes_bahais=2, numero_ciclo_criacao=3,
+        )
+        GrupoPreJovens.objects.filter(nome='Grupo 0').update(numero_ciclo_criacao=3)
+
+    def test_todos_os_tipos_numa_consulta(self):
+        with self.assertNumQueries(1):
+            contagens = contar_atividades(self.user)
+        self.assertEqual(set(contagens), set(ATIVIDADES))
+        self.assertEqual(contagens['grupos_prejovens'], {'atividades': 4, 'participantes': 8, 'bahais': 4})
+        self.assertEqual(contagens['aulas_criancas'], {'atividades': 4, 'participantes': 12, 'bahais': 8})
+        self.assertEqual(contagens['reunioes_devocionais'], {'atividades': 1, 'participantes': 7, 'bahais': 2})
+        # Famílias 0 e 2 têm RD, com um membro cada (Pessoa 0 e Pessoa 2, Bahá'ís)
+        self.assertEqual(contagens['familias_rd'], {'atividades': 2, 'participantes': 2, 'bahais': 2})
+        self.assertEqual(contagens['grupos_familias'], {'atividades': 0, 'participantes': 0, 'bahais': 0})
+
+    def test_atividades_criadas_no_ciclo(self):
+        contagens = contar_atividades(self.user, numero_ciclo=3)
+        self.assertEqual(contagens['grupos_prejovens']['atividades'], 1)
+        self.assertEqual(contagens['reunioes_devocionais']['atividades'], 1)
+        self.assertEqual(contagens['aulas_criancas']['atividades'], 0)
+
+    def test_contadores_do_historico(self):
+        familia = Familia(nome='F', reuniao_devocional=False)
+        self.assertEqual(contadores_historico(familia), ())
+        familia.reuniao_devocional = True
+        self.assertEqual(contadores_historico(familia), ('total_reunioes_devocionais', 'novas_familias_rds'))
+        self.assertEqual(
+            contadores_historico(AulaCrianca(nome='A')), ('total_aulas_criancas', 'novas_aulas_criancas')
+        )
+        self.assertEqual(contadores_historico(EstudoAtual()), ('livros_iniciados', 'novos_livros_iniciados'))
+
+
+class PerfilRuaTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('coordenador', password='senha')
+        self.rua = Rua.objects.create(nome='Rua das Flores', owner=self.user)
+        hoje = date.today()
+        for i, (ano, bahai) in enumerate(((hoje.year - 8, True), (hoje.year - 13, False), (hoje.year - 40, True))):
+            Contact.objects.create(
+                first_name=f'Pessoa {i}', owner=self.user, rua=self.rua,
+                birth_date=date(ano, 1, 1), is_bahai=bahai,
+            )
+        Contact.objects.create(first_name='Sem idade', owner=self.user, rua=self.rua)
+        Familia.objects.create(nome='Família A', owner=self.user, rua=self.rua)
+        AulaCrianca.objects.create(nome='Aula', owner=self.user, rua=self.rua)
+        grupo = GrupoFamilias.objects.create(nome='Grupo', owner=self.user)
+        grupo.ruas.add(self.rua, Rua.objects.create(nome='Outra', owner=self.user))
+        self.client.login(username='coordenador', password='senha')
+
+    def test_resumo_anotado(self):
+        resumo = anotar_resumo_ruas(Rua.objects.all()).get(pk=self.rua.pk)
+        self.assertEqual(
+            (resumo.total_familias, resumo.total_pessoas, resumo.total_bahais), (1, 4, 2)
+        )
+        self.assertEqual((resumo.total_aulas_crianca, resumo.total_grupos_familias), (1, 1))
+        self.assertEqual(resumo.total_atividades, 2)
+
+    def test_detalhe_com_contagens_por_faixa(self):
+        resposta = self.client.get(reverse('contact:rua_detail', args=[self.rua.pk]))
+        self.assertEqual(resposta.status_code, 200)
+        contexto = resposta.context
+        self.assertEqual(
+            {faixa['chave']: faixa['total'] for faixa in contexto['faixas']},
+            {'criancas': 1, 'prejovens': 1, 'jovens': 0, 'adultos': 1},
+        )
+        self.assertEqual((contexto['pessoas'], contexto['bahais'], contexto['sem_idade']), (4, 2, 1))
+        self.assertEqual([aula.nome for aula in contexto['aulas_crianca']], ['Aula'])
+        self.assertEqual(contexto['circulos_estudo'], [])
+        self.assertEqual(len(contexto['page_obj']), 4)
+
+    def test_consultas_nao_crescem_com_a_rua(self):
+        def consultas(nome_url, *args):
+            resposta = self.client.get(reverse(nome_url, args=args))
+            self.assertEqual(resposta.status_code, 200)
+            return resposta.wsgi_request.medicao_consultas.consultas
+
+        antes = (consultas('contact:ruas_list'), consultas('contact:rua_detail', self.rua.pk))
+        for i in range(5):
+            rua = Rua.objects.create(nome=f'Rua {i}', owner=self.user)
+            Familia.objects.create(nome=f'Família {i}', owner=self.user, rua=self.rua)
+            Contact.objects.create(first_name=f'Nova {i}', owner=self.user, rua=rua)
+            Contact.objects.create(first_name=f'Vizinha {i}', owner=self.user, rua=self.rua)
+        depois = (consultas('contact:ruas_list'), consultas('contact:rua_detail', self.rua.pk))
+        self.assertEqual(antes, depois)
+
+
+class VisitasFamiliaTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('coordenador', password='senha')
+        self.hoje = date(2026, 3, 31)
+        dias = lambda n: date.fromordinal(self.hoje.toordinal() - n)
+        self.em_dia = Familia.objects.create(nome='Em dia', owner=self.user, data_ultima_reuniao=dias(3))
+        self.alerta = Familia.objects.create(nome='Alerta', owner=self.user, data_ultima_reuniao=dias(16))
+        self.atrasada = Familia.objects.create(
+            nome='Atrasada', owner=self.user, data_ultima_reuniao=dias(40), nivel_envolvimento='Alto',
+        )
+        self.atrasada_rd = Familia.objects.create(
+            nome='Atrasada com RD', owner=self.user, data_ultima_reuniao=dias(25), reuniao_devocional=True,
+        )
+        self.nunca = Familia.objects.create(nome='Nunca visitada', owner=self.user)
+        self.alheia = Familia.objects.create(nome='Alheia', owner=User.objects.create_user('outro'))
+        self.client.login(username='coordenador', password='senha')
+
+    def test_fila_ordenada_no_banco(self):
+        fila = list(fila_de_visitas(self.user, self.hoje).order_by(*ORDEM_FILA))
+        self.assertEqual(
+            fila, [self.nunca, self.atrasada_rd, self.atrasada, self.alerta, self.em_dia]
+        )
+        self.assertIsNone(fila[0].tempo_sem_visita)
+        self.assertEqual(fila[2].tempo_sem_visita.days, 40)
+
+    def test_fila_paginada_pelas_anotacoes(self):
+        request = RequestFactory().get('/')
+        primeira = paginar(request, fila_de_visitas(self.user, self.hoje), ORDEM_FILA, por_pagina=2)
+        request = RequestFactory().get('/?' + primeira.query_proxima)
+        segunda = paginar(request, fila_de_visitas(self.user, self.hoje), ORDEM_FILA, por_pagina=2)
+        self.assertEqual(list(primeira) + list(segunda), [self.nunca, self.atrasada_rd, self.atrasada, self.alerta])
+
+    def test_registro_em_lote_guarda_o_historico(self):
+        with CaptureQueriesContext(connection) as consultas:
+            registradas = registrar_visitas(
+                self.user, [self.nunca.pk, self.em_dia.pk, self.alheia.pk], data=date.fromordinal(self.hoje.toordinal() - 5)
+            )
+        self.assertEqual(registradas, 2)
+        insercoes = [c for c in consultas.captured_queries if c['sql'].startswith('INSERT')]
+        self.assertEqual(len(insercoes), 1)
+
+        self.nunca.refresh_from_db()
+        self.em_dia.refresh_from_db()
+        self.assertEqual((self.hoje - self.nunca.data_ultima_reuniao).days, 5)
+        # Visita mais antiga que a última não volta a data
+        self.assertEqual((self.hoje - self.em_dia.data_ultima_reuniao).days, 3)
+        self.assertEqual(self.em_dia.visitas.count(), 1)
+        self.assertFalse(VisitaFamilia.objects.filter(familia=self.alheia).exists())
+
+        visita = self.nunca.visitas.get()
+        with self.assertRaises(ValueError):
+            visita.save()
+
+    def test_marcar_selecionadas_pela_fila(self):
+        resposta = self.client.get(reverse('contact:fila_visitas'))
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.context['page_obj'][0], self.nunca)
+
+        resposta = self.client.post(
+            reverse('contact:registrar_visitas'), {'familias': [self.nunca.pk, self.alerta.pk, 'x']}
+        )
+        self.assertRedirects(resposta, reverse('contact:fila_visitas'))
+        self.assertEqual(VisitaFamilia.objects.filter(owner=self.user).count(), 2)
+        self.client.post(reverse('contact:marcar_visitado', args=[self.alerta.pk]))
+        self.assertEqual(self.alerta.visitas.count(), 2)
+
+    def test_formulario_nao_altera_a_ultima_visita(self):
+        rua = Rua.objects.create(nome='Rua das Flores', owner=self.user)
+        dados = {'nome': 'Em dia', 'rua': rua.pk, 'data_ultima_reuniao': '2020-01-01'}
+        form = FamiliaForm(dados, instance=self.em_dia, user=self.user)
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+
+        self.em_dia.refresh_from_db()
+        self.assertEqual((self.hoje - self.em_dia.data_ultima_reuniao).days, 3)
+        self.assertNotIn('data_ultima_reuniao', form.fields)
+
+
+class GerenciarHistoricoTest(TestCase):
+    def setUp(self):
+        from dateutil.relativedelta import relativedelta
+
+        self.user = User.objects.create_user('coordenador', password='senha')
+        self.plano = ConfiguracaoEstatisticas.objects.create(
+            owner=self.user, data_inicio_plano=date.today() - relativedelta(years=2),
+            duracao_ciclo_meses=3, total_ciclos_plano=36,
+        )
+        self.atual = self.plano.calcular_ciclo_atual()['numero']
+        self.client.login(username='coordenador', password='senha')
+
+    def criar_historico(self, numero_ciclo):
+        inicio, fim = self.plano.calendario.periodo(numero_ciclo)
+        historico = HistoricoCiclo.objects.create(
+            owner=self.user, configuracao=self.plano, numero_ciclo=numero_ciclo, data_inicio=inicio, data_fim=fim,
+        )
+        for categoria in ('sequencia', 'abc'):
+            DetalheLivroHistorico.objects.create(historico_ciclo=historico, categoria=categoria, nome_livro='Livro 1')
+
+    def test_consultas_constantes_e_sugestoes_do_calendario(self):
+        self.criar_historico(self.atual - 2)
+        with CaptureQueriesContext(connection) as poucos:
+            resposta = self.client.get(reverse('contact:gerenciar_historico'))
+        self.assertEqual(
+            [ciclo['numero'] for ciclo in resposta.context['ciclos_sugeridos']],
+            [self.atual - 1, self.atual - 3, self.atual - 4, self.atual - 5],
+        )
+        sugerido = resposta.context['ciclos_sugeridos'][0]
+        self.assertEqual((sugerido['inicio'], sugerido['fim']), self.plano.calendario.periodo(self.atual - 1))
+        self.assertEqual(len(resposta.context['historicos'][0].livros_detalhados), 2)
+
+        for numero_ciclo in range(1, self.atual - 2):
+            self.criar_historico(numero_ciclo)
+        with CaptureQueriesContext(connection) as muitos:
+            resposta = self.client.get(reverse('contact:gerenciar_historico'))
+        self.assertEqual(len(muitos), len(poucos))
+        self.assertEqual([ciclo['numero'] for ciclo in resposta.context['ciclos_sugeridos']], [self.atual - 1])
+
+
+class SerieCrescimentoTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('coordenador', password='senha')
+        self.plano = ConfiguracaoEstatisticas.objects.create(owner=self.user, total_ciclos_plano=36)
+        antigo = ConfiguracaoEstatisticas.objects.create(owner=self.user, titulo_plano='Antigo', ativo=False)
+        # (círculos, participantes dos círculos, livros) por ciclo
+        for numero, (circulos, participantes, livros) in enumerate(((2, 10, 0), (4, 5, 3), (3, 5, 6), (3, 0, 6)), start=1):
+            self.criar(self.plano, numero, circulos, participantes, livros)
+        self.criar(antigo, 9, 50, 50, 50)
+        self.client.login(username='coordenador', password='senha')
+
+    def criar(self, plano, numero, circulos, participantes, livros):
+        HistoricoCiclo.objects.create(
+            owner=self.user, configuracao=plano, numero_ciclo=numero,
+            data_inicio=date(2024, numero, 1), data_fim=date(2024, numero, 28),
+            total_circulos_estudo=circulos, participantes_circulos=participantes, total_livros=livros,
+        )
+
+    def test_serie_em_uma_consulta(self):
+        with self.assertNumQueries(1):
+            serie = serie_de_crescimento(self.plano)
+        self.assertEqual([p['numero_ciclo'] for p in serie], [1, 2, 3, 4])
+        self.assertEqual([p['atividades'] for p in serie], [2, 4, 3, 3])
+        self.assertEqual([p['delta_atividades'] for p in serie], [None, 2, -1, 0])
+        self.assertEqual([p['crescimento_atividades'] for p in serie], [0.0, 100.0, -25.0, 0.0])
+        self.assertEqual([p['crescimento_participantes'] for p in serie], [0.0, -50.0, 0.0, -100.0])
+        # Anterior zerado: 100% quando cresce
+        self.assertEqual(serie[1]['crescimento_livros'], 100.0)
+
+    def test_reducao_mantem_primeiro_e_ultimo(self):
+        pontos = list(range(36))
+        self.assertEqual(reduzir_serie(pontos, 4), [0, 12, 23, 35])
+        self.assertEqual(reduzir_serie(pontos, None), pontos)
+        self.assertEqual([p['numero_ciclo'] for p in serie_de_crescimento(self.plano, 2)], [1, 4])
+
+    def test_endpoint_json_e_historico(self):
+        resposta = self.client.get(reverse('contact:serie_crescimento'), {'pontos': '3'})
+        self.assertEqual(resposta.status_code, 200)
+        dados = resposta.json()
+        self.assertEqual(dados['plano']['id'], self.plano.pk)
+        self.assertEqual([p['numero_ciclo'] for p in dados['ciclos']], [1, 3, 4])
+        self.assertEqual(self.client.get(reverse('contact:serie_crescimento'), {'plano': '999'}).status_code, 404)
+
+        resposta = self.client.get(reverse('contact:historico_ciclos'))
+        ultimo = resposta.context['ciclos_historicos'][0]
+        self.assertEqual((ultimo.numero_ciclo, ultimo.variacao_participantes), (4, -100.0))
+        self.assertEqual(resposta.context['crescimento_total']['atividades'], 75.0 / 4)
+        self.assertEqual(len(resposta.context['serie_crescimento']), 4)
+
+    def test_recalculo_em_cascata(self):
+        HistoricoCiclo.objects.filter(configuracao=self.plano, numero_ciclo=2).update(total_circulos_estudo=1)
+        with self.assertNumQueries(2):
+            alterados = recalcular_crescimento(self.plano, 2)
+        self.assertEqual(alterados, 3)
+        gravados = dict(
+            HistoricoCiclo.objects.filter(configuracao=self.plano).values_list('numero_ciclo', 'crescimento_atividades')
+        )
+        self.assertEqual(gravados, {p['numero_ciclo']: p['crescimento_atividades'] for p in serie_de_crescimento(self.plano)})
+        self.assertEqual((gravados[2], gravados[3]), (-50.0, 200.0))
+        with self.assertNumQueries(1):
+            self.assertEqual(recalcular_crescimento(self.plano, 2), 0)
+
+        # Excluído o ciclo 3, o 4 passa a comparar com o 2
+        historico = HistoricoCiclo.objects.get(configuracao=self.plano, numero_ciclo=3)
+        self.client.post(reverse('contact:excluir_historico', args=[historico.pk]))
+        quarto = HistoricoCiclo.objects.get(configuracao=self.plano, numero_ciclo=4)
+        self.assertEqual((quarto.crescimento_atividades, quarto.crescimento_livros), (200.0, 100.0))
@@ -1,7 +1,7 @@
 from django.urls import path
 from django.shortcuts import render
 from contact import views
-from contact.views import family_views, abc_views, junior_youth_views, study_circle_views, family_group_views, livro_views, statistics_views, historico_views, cycle_views
+from contact.views import family_views, abc_views, junior_youth_views, study_circle_views, family_group_views, livro_views, statistics_views, historico_views, cycle_views, busca_views, metricas_views, api_views, importacao_views
 
 from contact.views.abc_views import abc_update
 
@@ -36,6 +36,9 @@ urlpatterns = [
     path("search/", views.search, name="search"),
     path('search/familias/', views.search_familias, name='search_familias'),
     path('search/ruas/', views.search_ruas, name='search_ruas'),
+    path('search/tudo/', busca_views.busca_unificada, name='busca_unificada'),
+    path('search/escolhas/<str:tipo>/', busca_views.escolhas_busca, name='escolhas_busca'),
+    path('search/autocompletar/<str:tipo>/', busca_views.autocompletar_busca, name='autocompletar'),
 
     # Index URL
     path("", views.index, name="index"),
@@ -46,6 +49,8 @@ urlpatterns = [
 
     # Marcar Visitado
     path('familia/<int:familia_id>/marcar_visitado/', family_views.marcar_visitado, name='marcar_visitado'),
+    path('familia/visitas/', family_views.fila_visitas, name='fila_visitas'),
+    path('familia/visitas/registrar/', family_views.registrar_visitas_view, name='registrar_visitas'),
 
     #Grupos de Famílias URLs
     path('grupos-familias/', family_group_views.family_group_list, name='grupofamilias_list'),
@@ -97,11 +102,24 @@ urlpatterns = [
     path('estatisticas/', statistics_views.dashboard_estatisticas, name='dashboard_estatisticas'),
     path('estatisticas/configuracao/', statistics_views.editar_configuracao, name='editar_configuracao'),
     path('estatisticas/historico/', statistics_views.historico_ciclos, name='historico_ciclos'),
+    path('estatisticas/crescimento/', statistics_views.serie_crescimento, name='serie_crescimento'),
     path('estatisticas/historico/<int:numero_ciclo>/', statistics_views.historico_ciclo_detalhado, name='historico_ciclo_detalhado'),
     path('estatisticas/editar/', statistics_views.editar_estatisticas, name='editar_estatisticas'),
     path('estatisticas/salvar-inline/', statistics_views.salvar_atividades_inline, name='salvar_atividades_inline'),
     path('estatisticas/encerrar-ciclo/', statistics_views.encerrar_ciclo_atual, name='encerrar_ciclo_atual'),
 
+    # Importação em lote de contatos (CSV/XLSX)
+    path('importacao/', importacao_views.importacao_nova, name='importacao_nova'),
+    path('importacao/<int:pk>/', importacao_views.importacao_detalhe, name='importacao_detalhe'),
+    path('importacao/<int:pk>/erros/', importacao_views.importacao_erros, name='importacao_erros'),
+
+    # API de leitura (JSON) e exportação em streaming (NDJSON/CSV)
+    path('api/v1/<str:recurso>/', api_views.api_lista, name='api_lista'),
+    path('api/v1/<str:recurso>/exportar/', api_views.api_exportar, name='api_exportar'),
+
+    # Métricas de consultas/latência por view (apenas equipe)
+    path('metricas/', metricas_views.metricas_requisicoes, name='metricas_requisicoes'),
+
     # Histórico de Ciclos URLs
     path('historico/', historico_views.gerenciar_historico, name='gerenciar_historico'),
     path('historico/criar/<int:numero_ciclo>/', historico_views.criar_historico, name='criar_historico'),
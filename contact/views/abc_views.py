@@ -1,5 +1,5 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator
+from contact.paginacao import paginar
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from contact.models import AulaCrianca
@@ -14,9 +14,7 @@ class ABCHistoricoMixin(HistoricoAutomaticoMixin):
 @login_required(login_url="contact:login")
 def abc_list(request):
     abcs = AulaCrianca.objects.filter(show=True, owner=request.user).order_by("-id")
-    paginator = Paginator(abcs, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginar(request, abcs)
     context = {
         "page_obj": page_obj,
         "site_title": "Aulas Bahá'í de Crianças - "
@@ -61,16 +59,8 @@ def abc_create(request):
             return redirect("contact:aulacrianca_detail", abc.id)
     else:
         form = AulaCriancaForm(user=request.user)
-    # Passe os participantes e ruas para o template
-    participantes = form.fields['participantes'].queryset
-    ruas = form.fields['rua'].queryset
-    # Exemplo para abc_create e abc_update
-    professores = form.fields['professor'].queryset
     context = {
         "form": form,
-        "participantes": participantes,
-        "ruas": ruas,
-        "professores": professores,
         "site_title": "Criar ABC"
     }
     return render(request, "contact/partials/_abc-form.html", context)
@@ -94,15 +84,9 @@ def abc_update(request, pk):
             print(form.errors)
     else:
         form = AulaCriancaForm(instance=abc, user=request.user)
-    participantes = form.fields['participantes'].queryset
-    ruas = form.fields['rua'].queryset
-    professores = form.fields['professor'].queryset
     context = {
         "form": form,
         "abc": abc,
-        "participantes": participantes,
-        "ruas": ruas,
-        "professores": professores,
         "site_title": f"Editar ABC: {abc.nome}"
     }
     return render(request, "contact/partials/_abc-form.html", context)
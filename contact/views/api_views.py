@@ -0,0 +1,69 @@
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+
+from contact import api
+from contact.paginacao import paginar
+
+
+def _recurso_ou_404(recurso):
+    if recurso not in api.RECURSOS:
+        raise Http404(f'Recurso desconhecido: {recurso}')
+
+
+def _url(request, query):
+    return f'{request.path}?{query}' if query else request.path
+
+
+@login_required(login_url="contact:login")
+def api_lista(request, recurso):
+    """
+    Listagem JSON de um recurso da API (v1), paginada por cursor.
+
+    Resposta: ``versao``, ``recurso``, ``campos``, ``resultados``,
+    ``proxima`` e ``anterior`` (URLs das páginas vizinhas, ou ``null``).
+    """
+    _recurso_ou_404(recurso)
+    try:
+        modelo = api.modelo_do_recurso(recurso)
+        campos = api.campos_pedidos(modelo, request.GET)
+        limite = api.limite_pedido(request.GET)
+        consulta = api.consulta_do_recurso(recurso, request.user, request.GET)
+    except api.ErroParametro as erro:
+        return JsonResponse({'versao': api.VERSAO_API, 'erro': str(erro)}, status=400)
+
+    ordenacao = api.RECURSOS[recurso]['ordenacao']
+    chaves = [campo.lstrip('-') for campo in ordenacao]
+    consulta = consulta.values(*dict.fromkeys([*campos, *chaves]))
+    pagina = paginar(request, consulta, ordenacao=ordenacao, por_pagina=limite, contagem_maxima=None)
+
+    return JsonResponse({
+        'versao': api.VERSAO_API,
+        'recurso': recurso,
+        'campos': campos,
+        'resultados': api.serializar(pagina, campos),
+        'proxima': _url(request, pagina.query_proxima) if pagina.has_next else None,
+        'anterior': _url(request, pagina.query_anterior) if pagina.has_previous else None,
+    })
+
+
+@login_required(login_url="contact:login")
+def api_exportar(request, recurso):
+    """
+    Exportação completa de um recurso em ``formato`` ``ndjson`` (padrão) ou
+    ``csv``, gerada em streaming e em memória constante.
+    """
+    _recurso_ou_404(recurso)
+    formato = request.GET.get('formato', 'ndjson')
+    try:
+        if formato not in api.FORMATOS_EXPORTACAO:
+            raise api.ErroParametro(f'Formato desconhecido: {formato}')
+        modelo = api.modelo_do_recurso(recurso)
+        campos = api.campos_pedidos(modelo, request.GET)
+        consulta = api.consulta_do_recurso(recurso, request.user, request.GET)
+    except api.ErroParametro as erro:
+        return JsonResponse({'versao': api.VERSAO_API, 'erro': str(erro)}, status=400)
+
+    tipo, gerar = api.FORMATOS_EXPORTACAO[formato]
+    response = StreamingHttpResponse(gerar(consulta, campos), content_type=tipo)
+    response['Content-Disposition'] = f'attachment; filename="{recurso}.{formato}"'
+    return response
@@ -0,0 +1,79 @@
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, JsonResponse
+from django.urls import reverse
+
+from contact.autocompletar import FONTES_AUTOCOMPLETAR, LIMITE_AUTOCOMPLETAR, autocompletar
+from contact.busca import FONTES, buscar
+from contact.escolhas import FONTES_ESCOLHAS, escolhas_do_usuario
+
+
+URL_POR_TIPO = {
+    'contato': ('contact:contact', 'contact_id'),
+    'familia': ('contact:familia_detail', 'familia_id'),
+    'rua': ('contact:rua_detail', 'rua_id'),
+}
+
+
+@login_required(login_url="contact:login")
+def busca_unificada(request):
+    """
+    Busca ranqueada em contatos, famílias e ruas do usuário (JSON).
+
+    Parâmetros: ``q`` (texto), ``tipo`` (pode repetir; padrão: todos) e
+    ``limite`` (padrão 20, máximo 100).
+    """
+    texto = request.GET.get("q", "").strip()
+    tipos = [t for t in request.GET.getlist("tipo") if t in FONTES] or None
+    try:
+        limite = min(max(int(request.GET.get("limite", 20)), 1), 100)
+    except ValueError:
+        limite = 20
+
+    resultados = buscar(request.user, texto, tipos=tipos, limite=limite)
+    for resultado in resultados:
+        nome_url, parametro = URL_POR_TIPO[resultado['tipo']]
+        resultado['url'] = reverse(nome_url, kwargs={parametro: resultado['id']})
+
+    return JsonResponse({"q": texto, "resultados": resultados})
+
+
+@login_required(login_url="contact:login")
+def escolhas_busca(request, tipo):
+    """
+    Opções de uma lista de escolha longa (``contatos``, ``ruas`` ou
+    ``familias``) que casam com ``q``, para o ``ListaComBuscaWidget``.
+    """
+    if tipo not in FONTES_ESCOLHAS:
+        raise Http404(f'Lista desconhecida: {tipo}')
+    texto = request.GET.get("q", "").strip()
+    resultados = escolhas_do_usuario(request.user).buscar(tipo, texto)
+    return JsonResponse({
+        "q": texto,
+        "resultados": [
+            {"id": pk, "rotulo": rotulo, "detalhe": detalhe}
+            for pk, rotulo, detalhe in resultados
+        ],
+    })
+
+
+@login_required(login_url="contact:login")
+async def autocompletar_busca(request, tipo):
+    """
+    Nomes que começam com ``q`` (``contatos``, ``familias``, ``ruas`` ou
+    ``livros``), em JSON. View assíncrona: sob ASGI, com toda a pilha de
+    middlewares assíncrona, a requisição fica no laço de eventos; só as
+    consultas do ORM passam pela thread do ``sync_to_async``.
+
+    Parâmetros: ``q`` (prefixo) e ``limite`` (padrão e máximo 20).
+    """
+    if tipo not in FONTES_AUTOCOMPLETAR:
+        raise Http404(f'Autocompletar desconhecido: {tipo}')
+    texto = request.GET.get("q", "").strip()
+    try:
+        limite = int(request.GET.get("limite", LIMITE_AUTOCOMPLETAR))
+    except ValueError:
+        limite = LIMITE_AUTOCOMPLETAR
+
+    usuario = await request.auser()
+    resultados = await autocompletar(usuario, tipo, texto, limite=limite)
+    return JsonResponse({"q": texto, "resultados": resultados})
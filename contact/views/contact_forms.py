@@ -3,9 +3,9 @@ from django.shortcuts import render, redirect, get_object_or_404
 from contact.forms import ContactForm
 from django.urls import reverse
 from contact.models import Contact
+from contact.busca import filtro_de_busca
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
-from django.core.paginator import Paginator
+from contact.paginacao import paginar
 
 @login_required(login_url="contact:login")
 def create(request):
@@ -103,24 +103,19 @@ def delete(request, contact_id):
 @login_required(login_url="contact:login")
 def search(request):
     search_value = request.GET.get("q", "").strip()
-    if not search_value:
+    age_group = request.GET.get("age_group", "").strip()
+    if not search_value and not age_group:
         return redirect("contact:index")
 
-    contatos = (
-        Contact.objects
-        .filter(show=True, owner=request.user)
-        .filter(
-            Q(first_name__icontains=search_value) |
-            Q(last_name__icontains=search_value) |
-            Q(description__icontains=search_value) |
-            Q(familia__nome__icontains=search_value) |
-            Q(rua__nome__icontains=search_value)  # <-- busca pelo nome da rua
-        )
-        .order_by("-id")
-    )
-    paginator = Paginator(contatos, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    contatos = Contact.objects.filter(show=True, owner=request.user)
+    if search_value:
+        # Nome, descrição, família, rua e bairro via índice de busca textual
+        contatos = contatos.filter(pk__in=filtro_de_busca('contato', request.user, search_value))
+    if age_group:
+        contatos = contatos.da_faixa_etaria(age_group)
+
+    contatos = contatos.order_by("-id")
+    page_obj = paginar(request, contatos)
 
     context = {
         "page_obj": page_obj,
@@ -1,7 +1,7 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from contact.models import Contact
-from django.db.models import Q
-from django.core.paginator import Paginator
+from contact.busca import filtro_de_busca
+from contact.paginacao import paginar
 from django.contrib.auth.decorators import login_required
 @login_required(login_url="contact:login")
 def index(request):
@@ -13,13 +13,11 @@ def index(request):
     age_group = request.GET.get("age_group", "").strip()
     contatos = Contact.objects.filter(show=True, owner=request.user).order_by("-id")
 
-    # Filtro por faixa etária em Python
+    # Filtro por faixa etária no banco (intervalo de datas de nascimento)
     if age_group:
-        contatos = [c for c in contatos if c.age_group.lower() == age_group.lower()]
+        contatos = contatos.da_faixa_etaria(age_group)
 
-    paginator = Paginator(contatos, 10)  # Show 10 contacts per page
-    page_number = request.GET.get('page')  # Get the page number from the request
-    page_obj = paginator.get_page(page_number)  # Get the contacts for the requested page
+    page_obj = paginar(request, contatos)
 
     context = {
         "page_obj": page_obj,
@@ -40,21 +38,13 @@ def search(request):
 
     contatos = Contact.objects.filter(show=True, owner=request.user)
     if search_value:
-        contatos = contatos.filter(
-            Q(first_name__icontains=search_value) |
-            Q(last_name__icontains=search_value) |
-            Q(description__icontains=search_value) |
-            Q(familia__nome__icontains=search_value) |
-            Q(rua__nome__icontains=search_value) |
-            Q(rua__bairro__icontains=search_value)  # <-- Adicionado para buscar pelo bairro
-        )
+        # Nome, descrição, família, rua e bairro via índice de busca textual
+        contatos = contatos.filter(pk__in=filtro_de_busca('contato', request.user, search_value))
     if age_group:
-        contatos = contatos.filter(age_group__iexact=age_group)
+        contatos = contatos.da_faixa_etaria(age_group)
 
     contatos = contatos.order_by("-id")
-    paginator = Paginator(contatos, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginar(request, contatos)
 
     context = {
         "page_obj": page_obj,
@@ -133,12 +133,12 @@ def obter_ciclos_plano(request, plano_id):
         
         # Formatar ciclos para o frontend
         ciclos_data = []
-        for numero, periodo in ciclos:
+        for ciclo in ciclos:
             ciclos_data.append({
-                'numero': numero,
-                'inicio': periodo['inicio'].strftime('%d/%m/%Y'),
-                'fim': periodo['fim'].strftime('%d/%m/%Y'),
-                'label': f'Ciclo {numero} ({periodo["inicio"].strftime("%m/%Y")} - {periodo["fim"].strftime("%m/%Y")})'
+                'numero': ciclo['numero'],
+                'inicio': ciclo['inicio'].strftime('%d/%m/%Y'),
+                'fim': ciclo['fim'].strftime('%d/%m/%Y'),
+                'label': f'Ciclo {ciclo["numero"]} ({ciclo["inicio"].strftime("%m/%Y")} - {ciclo["fim"].strftime("%m/%Y")})'
             })
         
         return JsonResponse({
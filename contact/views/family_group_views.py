@@ -1,15 +1,13 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from contact.paginacao import paginar
 from contact.models import GrupoFamilias, Contact, Familia, Rua
 from contact.forms import GrupoFamiliasForm, GrupoPreJovensForm
 
 @login_required(login_url="contact:login")
 def family_group_list(request):
     grupos = GrupoFamilias.objects.filter(show=True, owner=request.user).order_by("-id")
-    paginator = Paginator(grupos, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginar(request, grupos)
     context = {
         "page_obj": page_obj,
         "site_title": "Grupos de Famílias"
@@ -37,14 +35,8 @@ def family_group_create(request):
             return redirect("contact:grupofamilias_detail", grupo.id)
     else:
         form = GrupoFamiliasForm(user=request.user)
-    participantes = form.fields['participantes'].queryset
-    familias = form.fields['familias'].queryset
-    ruas = form.fields['ruas'].queryset
     context = {
         "form": form,
-        "participantes": participantes,
-        "familias": familias,
-        "ruas": ruas,
         "site_title": "Criar Grupo de Famílias"
     }
     return render(request, "contact/partials/family_group-form.html", context)
@@ -67,15 +59,9 @@ def family_group_update(request, pk):
             return redirect("contact:grupofamilias_detail", grupo.id)
     else:
         form = GrupoFamiliasForm(instance=grupo, user=request.user)
-    participantes = form.fields['participantes'].queryset
-    familias = form.fields['familias'].queryset
-    ruas = form.fields['ruas'].queryset
     context = {
         "form": form,
         "grupo": grupo,
-        "participantes": participantes,
-        "familias": familias,
-        "ruas": ruas,
         "site_title": f"Editar Grupo: {grupo.nome}"
         
     }
@@ -109,9 +95,6 @@ def prejovens_group_create(request):
         form = GrupoPreJovensForm(user=request.user)
     context = {
         'form': form,
-        'prejovens': form.fields['pre_jovens'].queryset,
-        'ruas': form.fields['rua'].queryset,
-        'animadores': form.fields['animador'].queryset,
         "site_title": "Criar Grupo de Pré-Jovens"
     }
     return render(request, "contact/partials/prejovens_group-form.html", context)
\ No newline at end of file
@@ -1,11 +1,12 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator
-from django.db.models import Q
+from contact.paginacao import paginar
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.utils import timezone
+from django.views.decorators.http import require_http_methods
 from contact.models import Familia, Contact, Rua
 from contact.forms import FamiliaForm
-from datetime import date
+from contact.busca import filtro_de_busca
+from contact.visitas import ORDEM_FILA, anotar_visitas, fila_de_visitas, registrar_visitas
 
 @login_required(login_url="contact:login")
 def familia_create(request):
@@ -24,9 +25,6 @@ def familia_create(request):
             form.save()  # Salva os membros
             return redirect("contact:family")
         
-        # Passar contatos e ruas para o template em caso de erro
-        contatos = Contact.objects.filter(owner=request.user)
-        ruas = Rua.objects.filter(owner=request.user)
         return render(
             request,
             "contact/partials/_familia-form.html",
@@ -34,8 +32,6 @@ def familia_create(request):
                 "form": form, 
                 "site_title": site_title, 
                 "form_title": site_title,
-                "contatos": contatos,
-                "ruas": ruas
             }
         )
     else:
@@ -46,6 +42,7 @@ def familia_create(request):
             try:
                 new_contact = Contact.objects.get(id=new_contact_id, owner=request.user)
                 form.fields['membros'].initial = [new_contact]
+                form.fields['membros'].widget.destacado = new_contact.pk
             except Contact.DoesNotExist:
                 pass
         
@@ -54,11 +51,10 @@ def familia_create(request):
             try:
                 new_rua = Rua.objects.get(id=new_rua_id, owner=request.user)
                 form.fields['rua'].initial = new_rua
+                form.fields['rua'].widget.destacado = new_rua.pk
             except Rua.DoesNotExist:
                 pass
     
-    contatos = Contact.objects.filter(owner=request.user)
-    ruas = Rua.objects.filter(owner=request.user)
     return render(
         request,
         "contact/partials/_familia-form.html",
@@ -66,17 +62,14 @@ def familia_create(request):
             "form": form, 
             "site_title": site_title, 
             "form_title": site_title,
-            "contatos": contatos,
-            "ruas": ruas,
-            "new_contact_id": new_contact_id,  # Para destacar o novo contato
-            "new_rua_id": new_rua_id  # Para destacar a nova rua
         }
     )
 
 @login_required(login_url="contact:login")
 def familia_detail(request, familia_id):
     familia = get_object_or_404(Familia, pk=familia_id, owner=request.user)
-    return render(request, "contact/family.html", {"familia": familia})
+    visitas = familia.visitas.order_by('-data', '-id')[:10]
+    return render(request, "contact/family.html", {"familia": familia, "visitas": visitas})
 
 @login_required(login_url="contact:login")
 def familia_update(request, familia_id):
@@ -87,26 +80,9 @@ def familia_update(request, familia_id):
         if form.is_valid():
             form.save()
             return redirect("contact:familia_detail", familia_id=familia.id)
-        
-        # Passar contatos e ruas para o template em caso de erro
-        contatos = Contact.objects.filter(owner=request.user)
-        ruas = Rua.objects.filter(owner=request.user)
-        return render(
-            request,
-            "contact/partials/_familia-form.html",
-            {
-                "form": form,
-                "site_title": "Atualizar Família - ",
-                "form_title": "Atualizar Família",
-                "contatos": contatos,
-                "ruas": ruas
-            }
-        )
     else:
         form = FamiliaForm(instance=familia, user=request.user)
 
-    contatos = Contact.objects.filter(owner=request.user)
-    ruas = Rua.objects.filter(owner=request.user)
     return render(
         request,
         "contact/partials/_familia-form.html",
@@ -114,8 +90,6 @@ def familia_update(request, familia_id):
             "form": form,
             "site_title": "Atualizar Família - ",
             "form_title": "Atualizar Família",
-            "contatos": contatos,
-            "ruas": ruas
         }
     )
 
@@ -142,16 +116,14 @@ def family(request):
     Recupera todos os contatos marcados como 'show=True'
     e ordena do mais recente para o mais antigo.
     """
-    familias = Familia.objects.filter(owner=request.user).order_by('data_ultima_reuniao')
-    today = date.today()
-    for familia in familias:
-        if familia.data_ultima_reuniao:
-            familia.dias_sem_visita = (today - familia.data_ultima_reuniao).days
-        else:
-            familia.dias_sem_visita = None
+    # Sem visita primeiro, depois as visitas mais antigas
+    familias = paginar(
+        request,
+        anotar_visitas(Familia.objects.filter(owner=request.user)),
+        ordenacao=('data_ultima_reuniao', 'id'),
+    )
     context = {
         "page_obj": familias,
-        "today": today,
     }
     return render(request, "contact/family_page.html", context)
 
@@ -164,17 +136,10 @@ def search_familias(request):
     familias = (
         Familia.objects
         .filter(show=True, owner=request.user)
-        .filter(
-            Q(nome__icontains=search_value) |
-            Q(endereco__icontains=search_value) |
-            Q(description__icontains=search_value) |
-            Q(rua__nome__icontains=search_value)  # <-- busca pelo nome da rua
-        )
+        .filter(pk__in=filtro_de_busca('familia', request.user, search_value))
         .order_by("-id")
     )
-    paginator = Paginator(familias, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginar(request, familias)
 
     context = {
         "page_obj": page_obj,
@@ -191,6 +156,27 @@ def search_familias(request):
 def marcar_visitado(request, familia_id):
     familia = get_object_or_404(Familia, pk=familia_id, owner=request.user)
     if request.method == "POST":
-        familia.data_ultima_reuniao = timezone.now().date()
-        familia.save()
-    return redirect("contact:family")
\ No newline at end of file
+        registrar_visitas(request.user, [familia.pk])
+    return redirect("contact:family")
+
+@login_required(login_url="contact:login")
+def fila_visitas(request):
+    """Famílias a visitar, das mais atrasadas (e com RD, mais envolvidas) para as em dia"""
+    page_obj = paginar(request, fila_de_visitas(request.user), ordenacao=ORDEM_FILA)
+    return render(
+        request,
+        "contact/fila_visitas.html",
+        {"page_obj": page_obj, "site_title": "Fila de Visitas - "}
+    )
+
+@login_required(login_url="contact:login")
+@require_http_methods(["POST"])
+def registrar_visitas_view(request):
+    """Marca como visitadas hoje as famílias selecionadas na fila"""
+    ids = [valor for valor in request.POST.getlist('familias') if valor.isdigit()]
+    registradas = registrar_visitas(request.user, [int(valor) for valor in ids])
+    if registradas:
+        messages.success(request, f'{registradas} visita(s) registrada(s).')
+    else:
+        messages.error(request, 'Selecione ao menos uma família.')
+    return redirect("contact:fila_visitas")
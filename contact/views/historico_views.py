@@ -1,9 +1,31 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.db.models import Prefetch
 from django.http import JsonResponse
 from ..models import ConfiguracaoEstatisticas, HistoricoCiclo, DetalheLivroHistorico
-from datetime import date, timedelta
+from ..crescimento import anotar_crescimento, recalcular_crescimento
+from ..historicos import recalcular_dados_sistema
+from datetime import date
+
+
+# Quantos ciclos anteriores ao atual são sugeridos para criar histórico
+CICLOS_SUGERIDOS = 5
+
+
+def sugerir_ciclos(configuracao, numero_atual, ciclos_existentes):
+    """
+    Ciclos anteriores ao atual (até ``CICLOS_SUGERIDOS``) ainda sem
+    histórico, com as datas do calendário pré-calculado do plano
+    """
+    if not numero_atual:
+        return []
+    sugeridos = []
+    for numero_ciclo in range(numero_atual - 1, max(numero_atual - CICLOS_SUGERIDOS, 1) - 1, -1):
+        periodo = configuracao.calendario.periodo(numero_ciclo)
+        if periodo and numero_ciclo not in ciclos_existentes:
+            sugeridos.append({'numero': numero_ciclo, 'inicio': periodo[0], 'fim': periodo[1]})
+    return sugeridos
 
 
 @login_required
@@ -15,34 +37,24 @@ def gerenciar_historico(request):
         messages.error(request, "Configure primeiro o sistema de ciclos nas Configurações.")
         return redirect('contact:editar_configuracao')
     
-    # Buscar todos os históricos existentes com seus livros detalhados
-    historicos = HistoricoCiclo.objects.filter(owner=request.user).order_by('-numero_ciclo')
-    
-    # Adicionar livros específicos para cada histórico
-    for historico in historicos:
-        historico.livros_detalhados = DetalheLivroHistorico.objects.filter(
-            historico_ciclo=historico
-        ).order_by('categoria', 'nome_livro')
+    # Históricos com o crescimento da série e os livros detalhados de todos em uma consulta extra
+    historicos = list(
+        anotar_crescimento(HistoricoCiclo.objects.filter(owner=request.user))
+        .order_by('-numero_ciclo')
+        .prefetch_related(Prefetch(
+            'detalhes_livros',
+            queryset=DetalheLivroHistorico.objects.order_by('categoria', 'nome_livro'),
+            to_attr='livros_detalhados',
+        ))
+    )
     
     # Calcular ciclo atual
     ciclo_atual = configuracao.calcular_ciclo_atual()
     
-    # Sugerir ciclos que podem ser criados (últimos 5 ciclos antes do atual)
-    ciclos_sugeridos = []
-    for i in range(1, 6):  # Últimos 5 ciclos
-        numero_ciclo = ciclo_atual['numero'] - i
-        if numero_ciclo > 0 and not historicos.filter(numero_ciclo=numero_ciclo).exists():
-            # Calcular datas do ciclo sugerido usando duração em meses
-            from dateutil.relativedelta import relativedelta
-            meses_para_tras = i * configuracao.duracao_ciclo_meses
-            inicio_sugerido = configuracao.data_inicio_plano + relativedelta(months=(numero_ciclo - 1) * configuracao.duracao_ciclo_meses)
-            fim_sugerido = inicio_sugerido + relativedelta(months=configuracao.duracao_ciclo_meses) - timedelta(days=1)
-            
-            ciclos_sugeridos.append({
-                'numero': numero_ciclo,
-                'inicio': inicio_sugerido,
-                'fim': fim_sugerido
-            })
+    # Sugerir ciclos que podem ser criados (últimos ciclos antes do atual)
+    ciclos_sugeridos = sugerir_ciclos(
+        configuracao, ciclo_atual['numero'], {historico.numero_ciclo for historico in historicos}
+    )
     
     context = {
         'configuracao': configuracao,
@@ -71,10 +83,9 @@ def criar_historico(request, numero_ciclo):
         messages.error(request, "Não é possível criar dados para o ciclo atual ou futuro.")
         return redirect('contact:gerenciar_historico')
     
-    # Calcular datas do ciclo específico usando duração em meses
-    from dateutil.relativedelta import relativedelta
-    inicio_ciclo = configuracao.data_inicio_plano + relativedelta(months=(numero_ciclo - 1) * configuracao.duracao_ciclo_meses)
-    fim_ciclo = inicio_ciclo + relativedelta(months=configuracao.duracao_ciclo_meses) - timedelta(days=1)
+    # Datas do ciclo específico a partir do calendário do plano
+    inicio_ciclo = configuracao.calcular_data_inicio_ciclo(numero_ciclo)
+    fim_ciclo = configuracao.calcular_data_fim_ciclo(numero_ciclo)
     
     # Buscar ou criar histórico
     historico, created = HistoricoCiclo.objects.get_or_create(
@@ -132,11 +143,11 @@ def criar_historico(request, numero_ciclo):
             historico.livros_outros_iniciados = int(request.POST.get('livros_outros_iniciados', 0))
             historico.livros_outros_concluidos = int(request.POST.get('livros_outros_concluidos', 0))
             
-            # Calcular crescimento em relação ao ciclo anterior
-            calcular_crescimento(historico)
-            
             historico.save()
             
+            # Crescimento deste ciclo e dos seguintes, que comparam com ele
+            recalcular_crescimento(historico.configuracao_id, numero_ciclo)
+            
             # Limpar livros existentes se estiver editando
             if not created:
                 DetalheLivroHistorico.objects.filter(historico_ciclo=historico).delete()
@@ -213,6 +224,8 @@ def excluir_historico(request, historico_id):
     if request.method == 'POST':
         numero_ciclo = historico.numero_ciclo
         historico.delete()
+        # O ciclo seguinte passa a comparar com o anterior ao excluído
+        recalcular_crescimento(historico.configuracao_id, numero_ciclo)
         messages.success(request, f"Histórico do Ciclo {numero_ciclo} excluído com sucesso!")
         return redirect('contact:gerenciar_historico')
     
@@ -299,79 +312,9 @@ def atualizar_todos_dados_sistema(request):
     """Atualizar dados do sistema de todos os históricos do usuário"""
     if request.method == 'POST':
         try:
-            historicos = HistoricoCiclo.objects.filter(owner=request.user)
-            count = 0
-            
-            for historico in historicos:
-                historico.calcular_dados_sistema()
-                count += 1
-            
+            count = recalcular_dados_sistema(request.user)
             messages.success(request, f"Dados do sistema atualizados para {count} histórico(s)!")
         except Exception as e:
             messages.error(request, f"Erro ao atualizar dados do sistema: {e}")
     
     return redirect('contact:gerenciar_historico')
-
-
-def calcular_crescimento(historico):
-    """Calcular crescimento em relação ao ciclo anterior"""
-    try:
-        ciclo_anterior = HistoricoCiclo.objects.filter(
-            owner=historico.owner,
-            numero_ciclo=historico.numero_ciclo - 1
-        ).first()
-        
-        if ciclo_anterior:
-            # Calcular totais do ciclo atual
-            total_atividades_atual = (historico.total_circulos_estudo + 
-                                    historico.total_grupos_prejovens + 
-                                    historico.total_aulas_criancas + 
-                                    historico.total_reunioes_devocionais + 
-                                    historico.total_grupos_familias)
-            
-            total_participantes_atual = (historico.participantes_circulos + 
-                                       historico.participantes_prejovens + 
-                                       historico.participantes_criancas + 
-                                       historico.participantes_devocionais + 
-                                       historico.participantes_grupos_familias)
-            
-            # Calcular totais do ciclo anterior
-            total_atividades_anterior = (ciclo_anterior.total_circulos_estudo + 
-                                       ciclo_anterior.total_grupos_prejovens + 
-                                       ciclo_anterior.total_aulas_criancas + 
-                                       ciclo_anterior.total_reunioes_devocionais + 
-                                       ciclo_anterior.total_grupos_familias)
-            
-            total_participantes_anterior = (ciclo_anterior.participantes_circulos + 
-                                          ciclo_anterior.participantes_prejovens + 
-                                          ciclo_anterior.participantes_criancas + 
-                                          ciclo_anterior.participantes_devocionais + 
-                                          ciclo_anterior.participantes_grupos_familias)
-            
-            # Calcular percentuais de crescimento
-            if total_atividades_anterior > 0:
-                historico.crescimento_atividades = ((total_atividades_atual - total_atividades_anterior) / total_atividades_anterior) * 100
-            else:
-                historico.crescimento_atividades = 100.0 if total_atividades_atual > 0 else 0.0
-            
-            if total_participantes_anterior > 0:
-                historico.crescimento_participantes = ((total_participantes_atual - total_participantes_anterior) / total_participantes_anterior) * 100
-            else:
-                historico.crescimento_participantes = 100.0 if total_participantes_atual > 0 else 0.0
-            
-            if ciclo_anterior.total_livros > 0:
-                historico.crescimento_livros = ((historico.total_livros - ciclo_anterior.total_livros) / ciclo_anterior.total_livros) * 100
-            else:
-                historico.crescimento_livros = 100.0 if historico.total_livros > 0 else 0.0
-        
-        else:
-            # Primeiro ciclo, sem crescimento a calcular
-            historico.crescimento_atividades = 0.0
-            historico.crescimento_participantes = 0.0
-            historico.crescimento_livros = 0.0
-    
-    except Exception:
-        # Em caso de erro, zerar os crescimentos
-        historico.crescimento_atividades = 0.0
-        historico.crescimento_participantes = 0.0
-        historico.crescimento_livros = 0.0
\ No newline at end of file
@@ -0,0 +1,49 @@
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
+
+from contact.forms import ImportacaoContatosForm
+from contact.importacao import agendar_importacao
+from contact.models import ImportacaoContatos
+
+
+@login_required(login_url="contact:login")
+def importacao_nova(request):
+    """Envio de um CSV/XLSX de contatos; o processamento roda em segundo plano"""
+    form = ImportacaoContatosForm(request.POST or None, request.FILES or None)
+    if request.method == 'POST' and form.is_valid():
+        arquivo = form.cleaned_data['arquivo']
+        importacao = ImportacaoContatos.objects.create(
+            owner=request.user,
+            arquivo=arquivo,
+            nome_arquivo=arquivo.name[:255],
+        )
+        agendar_importacao(importacao)
+        messages.success(request, 'Arquivo recebido; a importação está em andamento.')
+        return redirect('contact:importacao_detalhe', pk=importacao.pk)
+
+    context = {
+        'form': form,
+        'importacoes': ImportacaoContatos.objects.filter(owner=request.user)[:10],
+        'site_title': 'Importar Contatos - ',
+    }
+    return render(request, 'contact/importacao.html', context)
+
+
+@login_required(login_url="contact:login")
+def importacao_detalhe(request, pk):
+    importacao = get_object_or_404(ImportacaoContatos, pk=pk, owner=request.user)
+    return render(request, 'contact/importacao_detalhe.html', {
+        'importacao': importacao,
+        'site_title': 'Importação - ',
+    })
+
+
+@login_required(login_url="contact:login")
+def importacao_erros(request, pk):
+    """Download do relatório de linhas rejeitadas (CSV)"""
+    importacao = get_object_or_404(ImportacaoContatos, pk=pk, owner=request.user)
+    response = HttpResponse(importacao.relatorio_erros, content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="erros-importacao-{importacao.pk}.csv"'
+    return response
@@ -1,5 +1,5 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator
+from contact.paginacao import paginar
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from contact.models import GrupoPreJovens
@@ -14,9 +14,7 @@ class JuniorYouthHistoricoMixin(HistoricoAutomaticoMixin):
 @login_required(login_url="contact:login")
 def junior_youth_list(request):
     grupos = GrupoPreJovens.objects.filter(show=True, owner=request.user).order_by("-id")
-    paginator = Paginator(grupos, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginar(request, grupos)
     context = {
         "page_obj": page_obj,
         "site_title": "Grupos de Pré-Jovens - "
@@ -63,9 +61,6 @@ def junior_youth_create(request):
         form = GrupoPreJovensForm(user=request.user)
     context = {
         "form": form,
-        "prejovens": form.fields['pre_jovens'].queryset,
-        "ruas": form.fields['rua'].queryset,
-        "animadores": form.fields['animador'].queryset,
         "site_title": "Criar Grupo de Pré-Jovens"
     }
     return render(request, "contact/partials/_junior_youth_group-form.html", context)
@@ -83,9 +78,6 @@ def junior_youth_update(request, pk):
     context = {
         "form": form,
         "grupo": grupo,
-        "prejovens": form.fields['pre_jovens'].queryset,
-        "ruas": form.fields['rua'].queryset,
-        "animadores": form.fields['animador'].queryset,
         "site_title": f"Editar Grupo: {grupo.nome}"
     }
     return render(request, "contact/partials/_junior_youth_group-form.html", context)
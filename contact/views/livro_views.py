@@ -5,33 +5,28 @@ from django.core.paginator import Paginator
 from django.http import JsonResponse
 from contact.models import Livro, Contact, EstudoAtual, CategoriaLivro
 from contact.forms import LivroForm, ContactForm, CategoriaLivroForm
-from django.db.models import Q
+from django.db.models import Prefetch
+from contact.progresso_livros import CONTADORES_VAZIOS, contar_estudos_por_livro
 
 
 @login_required
 def livro_list(request):
     """Lista todos os livros organizados por categoria"""
-    categorias = CategoriaLivro.objects.filter(ativo=True).prefetch_related(
-        'livros__estudos_atuais__contato',
-        'livros__historico_estudos__contato'
-    ).order_by('ordem', 'nome')
-    
-    # Adicionar informações de estudos para cada livro do usuário atual
+    categorias = (
+        CategoriaLivro.objects
+        .filter(ativo=True)
+        .prefetch_related(Prefetch('livros', queryset=Livro.objects.order_by('numero')))
+        .order_by('ordem', 'nome')
+    )
+
+    # Contadores do usuário: uma consulta agrupada por tabela, sem consultas por livro
+    contadores = contar_estudos_por_livro(request.user)
     for categoria in categorias:
-        for livro in categoria.livros_ordenados:
-            # Estudantes do usuário atual
-            livro.meus_estudantes = Contact.objects.filter(
-                estudos_atuais__livro=livro, 
-                owner=request.user
-            ).distinct()
-            
-            # Contadores
-            livro.estudantes_ativos_count = livro.meus_estudantes.filter(estudos_atuais__status='em_andamento').count()
-            livro.estudantes_concluidos_count = Contact.objects.filter(
-                historico_estudos__livro=livro,
-                historico_estudos__status='concluido',
-                owner=request.user
-            ).distinct().count()
+        for livro in categoria.livros.all():
+            do_livro = contadores.get(livro.pk, CONTADORES_VAZIOS)
+            livro.estudantes_ativos_count = do_livro['estudantes_ativos']
+            livro.estudantes_pausados_count = do_livro['estudantes_pausados']
+            livro.estudantes_concluidos_count = do_livro['estudantes_concluidos']
     
     return render(request, 'contact/livro_list.html', {
         'categorias': categorias,
@@ -58,7 +53,6 @@ def livro_detail(request, pk):
     ).order_by('first_name')
     
     # Estudantes que concluíram usando o histórico
-    from django.db.models import Prefetch
     estudantes_concluidos = Contact.objects.filter(
         historico_estudos__livro=livro,
         historico_estudos__status='concluido',
@@ -0,0 +1,15 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from contact.middleware import registro_metricas
+
+
+@staff_member_required
+def metricas_requisicoes(request):
+    """Resumo das consultas SQL e latência por view (apenas equipe)"""
+    if request.method == 'POST' and request.POST.get('limpar'):
+        registro_metricas.limpar()
+    return JsonResponse({
+        'amostras_por_view': registro_metricas.amostras_por_view,
+        'views': registro_metricas.resumo(),
+    })
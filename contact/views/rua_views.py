@@ -1,10 +1,11 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator
-from django.db.models import Q
+from contact.paginacao import paginar
 from django.contrib.auth.decorators import login_required
 from django.urls import reverse
-from contact.models import Rua, GrupoFamilias
+from contact.models import Rua
 from contact.forms import RuaForm
+from contact.busca import filtro_de_busca
+from contact.perfil_rua import anotar_resumo_ruas, perfil_da_rua
 
 @login_required(login_url="contact:login")
 def rua_create(request):
@@ -72,7 +73,7 @@ def rua_update(request, rua_id):
 
 @login_required(login_url="contact:login")
 def rua_delete(request, rua_id):
-    rua = get_object_or_404(Rua, pk=rua_id, owner=request.user)
+    rua = get_object_or_404(anotar_resumo_ruas(Rua.objects.filter(owner=request.user)), pk=rua_id)
     confirmation = request.POST.get('confirmation', 'no')
     if confirmation == 'yes':
         rua.delete()
@@ -83,37 +84,14 @@ def rua_delete(request, rua_id):
         {
             'rua': rua,
             'confirmation': confirmation,
+            **perfil_da_rua(request, rua),
         }
     )
 
 @login_required(login_url="contact:login")
 def rua_detail(request, rua_id):
-    rua = get_object_or_404(Rua, pk=rua_id, owner=request.user)
-    familias_conectadas = rua.familias.all()
-    pessoas_conectadas = rua.contatos.all()
-    aulas_crianca = rua.aulas_crianca.all()
-    grupos_pre_jovens = rua.grupos_pre_jovens.all()
-    circulos_estudo = rua.circulos_estudo.all()
-    grupos_familias = GrupoFamilias.objects.filter(ruas=rua)
-
-    criancas = [p for p in pessoas_conectadas if p.age_group.lower() == "criança"]
-    pre_jovens = [p for p in pessoas_conectadas if p.age_group == "Pré jovem"]
-    jovens = [p for p in pessoas_conectadas if p.age_group.lower() == "jovem"]
-    adultos = [p for p in pessoas_conectadas if p.age_group.lower() == "adulto"]
-
-    context = {
-        "rua": rua,
-        "familias_conectadas": familias_conectadas,
-        "pessoas_conectadas": pessoas_conectadas,
-        "aulas_crianca": aulas_crianca,
-        "grupos_pre_jovens": grupos_pre_jovens,
-        "circulos_estudo": circulos_estudo,
-        "grupos_familias": grupos_familias,
-        "criancas": criancas,
-        "pre_jovens": pre_jovens,
-        "jovens": jovens,
-        "adultos": adultos,
-    }
+    rua = get_object_or_404(anotar_resumo_ruas(Rua.objects.filter(owner=request.user)), pk=rua_id)
+    context = {"rua": rua, **perfil_da_rua(request, rua)}
 
     return render(
         request,
@@ -123,8 +101,7 @@ def rua_detail(request, rua_id):
 
 @login_required(login_url="contact:login")
 def ruas_list(request):
-    ruas = Rua.objects.filter(owner=request.user)
-    # Adapte para paginação se quiser
+    ruas = paginar(request, anotar_resumo_ruas(Rua.objects.filter(owner=request.user)))
     return render(request, "contact/rua_page.html", {"page_obj": ruas})
 
 @login_required()
@@ -134,17 +111,11 @@ def search_ruas(request):
         return redirect("contact:ruas_list")
 
     ruas = (
-        Rua.objects
-        .filter(owner=request.user)
-        .filter(
-            Q(nome__icontains=search_value) |
-            Q(bairro__icontains=search_value)
-        )
+        anotar_resumo_ruas(Rua.objects.filter(owner=request.user))
+        .filter(pk__in=filtro_de_busca('rua', request.user, search_value))
         .order_by("-id")
     )
-    paginator = Paginator(ruas, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginar(request, ruas)
 
     context = {
         "page_obj": page_obj,
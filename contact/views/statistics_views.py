@@ -1,7 +1,7 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Count, Q
+from django.db.models import Count, Prefetch, Q
 from django.utils import timezone
 from django.http import JsonResponse
 from datetime import datetime, timedelta
@@ -13,14 +13,18 @@ from contact.models import (
     AulaCrianca, 
     CirculoEstudo,
     ReuniaoDevocional,
-    GrupoFamilias,
     Rua,
-    Familia,
-    Contact,
     EstudoAtual,
-    CategoriaLivro,
+    DetalheLivroHistorico,
     HistoricoEstudo
 )
+from contact import encerramento
+from contact.aggregates import calcular_estatisticas_agregadas, contar_atividades_novas, criado_entre
+from contact.atividades import contar_atividades
+from contact.crescimento import CICLOS_RESUMO, anotar_crescimento, crescimento_medio, serie_de_crescimento
+from contact.encerramento import encerrar_ciclo
+from contact.progresso_livros import progresso_por_categoria
+from contact.snapshots import obter_estatisticas
 
 
 @login_required
@@ -44,8 +48,8 @@ def dashboard_estatisticas(request):
         owner=request.user
     )
     
-    # Calcular estatísticas do banco de dados
-    estatisticas_bd = calcular_estatisticas_bd(request.user)
+    # Estatísticas do banco de dados (snapshot materializado)
+    estatisticas_bd = obter_estatisticas(request.user)
     
     # Calcular ciclo atual usando o novo método
     ciclo_atual = configuracao.calcular_ciclo_atual()
@@ -237,12 +241,14 @@ def editar_configuracao(request):
 def historico_ciclos(request):
     """Página para visualizar histórico de ciclos anteriores"""
     dados_crescimento = obter_dados_crescimento(request.user)
+    configuracao = dados_crescimento.get('configuracao')
     
     context = {
         'ciclos_historicos': dados_crescimento['ciclos_historicos'],
         'crescimento_total': dados_crescimento['crescimento_total'],
         'ciclo_atual': dados_crescimento['ciclo_atual'],
-        'configuracao': dados_crescimento['configuracao']
+        'configuracao': configuracao,
+        'serie_crescimento': serie_de_crescimento(configuracao) if configuracao else [],
     }
     
     return render(request, 'contact/historico_ciclos.html', context)
@@ -649,7 +655,7 @@ def editar_estatisticas(request):
         'grupos_prejovens': grupos_prejovens,
         'aulas_criancas': aulas_criancas,
         'reunioes_devocionais': reunioes_devocionais,
-        'estatisticas_bd': calcular_estatisticas_bd(request.user),
+        'estatisticas_bd': obter_estatisticas(request.user),
     }
     
     return render(request, 'contact/editar_estatisticas.html', context)
@@ -657,187 +663,34 @@ def editar_estatisticas(request):
 
 def calcular_estatisticas_bd(user):
     """Calcula estatísticas baseadas nos dados do banco"""
-    
-    # Filtrar por usuário
-    grupos_prejovens = GrupoPreJovens.objects.filter(owner=user)
-    aulas_criancas = AulaCrianca.objects.filter(owner=user)
-    circulos_estudo = CirculoEstudo.objects.filter(owner=user)
-    reunioes_devocionais = ReuniaoDevocional.objects.filter(owner=user)
-    familias = Familia.objects.filter(owner=user)
-    estudos_atuais = EstudoAtual.objects.filter(contato__owner=user)
-    
-    # Contar atividades
-    total_grupos_prejovens = grupos_prejovens.count()
-    total_aulas_criancas = aulas_criancas.count()
-    total_circulos_estudo = circulos_estudo.count()
-    
-    # NOVO: Contar reuniões devocionais baseado nas famílias que têm reunião_devocional=True
-    familias_com_reuniao = familias.filter(reuniao_devocional=True)
-    total_reunioes_devocionais = familias_com_reuniao.count()
-    
-    # Contar participantes usando os relacionamentos Many-to-Many
-    participantes_prejovens = sum(grupo.pre_jovens.count() for grupo in grupos_prejovens)
-    participantes_criancas = sum(aula.participantes.count() for aula in aulas_criancas)
-    participantes_circulos = sum(circulo.participantes.count() for circulo in circulos_estudo)
-    
-    # Contar participantes Bahá'ís usando o campo is_bahai dos contatos
-    participantes_prejovens_bahais = sum(grupo.pre_jovens.filter(is_bahai=True).count() for grupo in grupos_prejovens)
-    participantes_criancas_bahais = sum(aula.participantes.filter(is_bahai=True).count() for aula in aulas_criancas)
-    participantes_circulos_bahais = sum(circulo.participantes.filter(is_bahai=True).count() for circulo in circulos_estudo)
-    
-    # Apenas para reuniões devocionais usar o campo real do modelo (quando existir)
-    participantes_devocionais_bahais = sum(reuniao.participantes_bahais for reuniao in reunioes_devocionais)
-    
-    # NOVO: Contar participantes das reuniões devocionais baseado nos membros das famílias
-    participantes_devocionais = 0
-    participantes_devocionais_bahais_familias = 0
-    for familia in familias_com_reuniao:
-        # Contar membros da família como participantes da reunião devocional
-        membros_familia = familia.membros.count()
-        participantes_devocionais += membros_familia
-        
-        # Contar quantos dos membros da família são Bahá'ís
-        membros_bahais = familia.membros.filter(is_bahai=True).count()
-        participantes_devocionais_bahais_familias += membros_bahais
-    
-    # Usar o maior valor entre os dados das reuniões devocionais e os das famílias
-    participantes_devocionais_bahais = max(participantes_devocionais_bahais, participantes_devocionais_bahais_familias)
-    
-    # Contar famílias e estudos
-    total_familias = familias.count()
-    total_estudos_andamento = estudos_atuais.filter(status='em_andamento').count()
-    total_estudos_pausados = estudos_atuais.filter(status='pausado').count()
-    
-    # Calcular estatísticas detalhadas dos livros por categoria
-    
-    # Buscar todas as categorias ativas
-    categorias = CategoriaLivro.objects.filter(ativo=True).order_by('ordem', 'nome')
-    
-    # Preparar estatísticas por categoria
-    livros_por_categoria = {}
-    total_livros_iniciados = 0
-    total_livros_concluidos = 0
-    
-    # Preparar estatísticas detalhadas por livro individual
-    livros_detalhados = []
-    
-    for categoria in categorias:
-        # Estudos atuais desta categoria
-        estudos_categoria_atual = estudos_atuais.filter(livro__categoria=categoria)
-        iniciados_categoria = estudos_categoria_atual.count()
-        
-        # Estudos concluídos desta categoria
-        historicos_categoria = HistoricoEstudo.objects.filter(
-            contato__owner=user,
-            livro__categoria=categoria,
-            status='concluido'
-        )
-        concluidos_categoria = historicos_categoria.count()
-        
-        # Somar aos totais
-        total_livros_iniciados += iniciados_categoria
-        total_livros_concluidos += concluidos_categoria
-        
-        livros_por_categoria[categoria.nome] = {
-            'iniciados': iniciados_categoria,
-            'concluidos': concluidos_categoria,
-            'total': iniciados_categoria + concluidos_categoria,
-            'cor': categoria.cor,
-            'ordem': categoria.ordem
-        }
-        
-        # Buscar livros individuais desta categoria
-        livros_categoria = categoria.livros.filter(ativo=True).order_by('numero')
-        
-        for livro in livros_categoria:
-            # Contar estudos atuais deste livro
-            iniciados_livro = estudos_atuais.filter(livro=livro).count()
-            
-            # Contar estudos concluídos deste livro
-            concluidos_livro = HistoricoEstudo.objects.filter(
-                contato__owner=user,
-                livro=livro,
-                status='concluido'
-            ).count()
-            
-            # Só adicionar se houver algum estudo (atual ou concluído)
-            if iniciados_livro > 0 or concluidos_livro > 0:
-                livros_detalhados.append({
-                    'nome': str(livro),
-                    'categoria': categoria.nome,
-                    'cor_categoria': categoria.cor,
-                    'iniciados': iniciados_livro,
-                    'concluidos': concluidos_livro,
-                    'total': iniciados_livro + concluidos_livro,
-                    'numero': livro.numero,
-                    'categoria_ordem': categoria.ordem
-                })
-    
-    # Ordenar livros detalhados por categoria e depois por número
-    livros_detalhados.sort(key=lambda x: (x['categoria_ordem'], x['numero']))
-    
-    # Estudos totais (geral)
-    total_livros_geral = total_livros_iniciados + total_livros_concluidos
-    
-    # Calcular dados demográficos do sistema baseado nos contatos cadastrados
-    from datetime import date
-    from dateutil.relativedelta import relativedelta
-    
-    contatos = Contact.objects.filter(owner=user)
-    hoje = date.today()
-    
-    # Contar por faixa etária
-    criancas_sistema = 0
-    prejovens_sistema = 0
-    jovens_sistema = 0
-    adultos_sistema = 0
-    
-    for contato in contatos:
-        if contato.birth_date:
-            idade = relativedelta(hoje, contato.birth_date).years
-            if idade <= 11:
-                criancas_sistema += 1
-            elif idade <= 14:
-                prejovens_sistema += 1
-            elif idade <= 30:
-                jovens_sistema += 1
-            else:
-                adultos_sistema += 1
-    
-    total_pessoas_sistema = criancas_sistema + prejovens_sistema + jovens_sistema + adultos_sistema
-    
-    return {
-        'grupos_prejovens': total_grupos_prejovens,
-        'aulas_criancas': total_aulas_criancas,
-        'circulos_estudo': total_circulos_estudo,
-        'reunioes_devocionais': total_reunioes_devocionais,
-        'participantes_prejovens': participantes_prejovens,
-        'participantes_criancas': participantes_criancas,
-        'participantes_circulos': participantes_circulos,
-        'participantes_devocionais': participantes_devocionais,
-        'participantes_prejovens_bahais': participantes_prejovens_bahais,
-        'participantes_criancas_bahais': participantes_criancas_bahais,
-        'participantes_circulos_bahais': participantes_circulos_bahais,
-        'participantes_devocionais_bahais': participantes_devocionais_bahais,
-        'participantes_total': participantes_prejovens + participantes_criancas + participantes_circulos + participantes_devocionais,
-        'participantes_total_bahais': participantes_prejovens_bahais + participantes_criancas_bahais + participantes_circulos_bahais + participantes_devocionais_bahais,
-        'total_familias': total_familias,
-        'estudos_andamento': total_estudos_andamento,
-        'estudos_pausados': total_estudos_pausados,
-        'total_estudos': total_estudos_andamento + total_estudos_pausados,
-        # Dados demográficos do sistema
-        'criancas_sistema': criancas_sistema,
-        'prejovens_sistema': prejovens_sistema,
-        'jovens_sistema': jovens_sistema,
-        'adultos_sistema': adultos_sistema,
-        'total_pessoas_sistema': total_pessoas_sistema,
-        # Estatísticas detalhadas dos livros
-        'livros_por_categoria': livros_por_categoria,
-        'livros_detalhados': livros_detalhados,
-        'total_livros_iniciados': total_livros_iniciados,
-        'total_livros_concluidos': total_livros_concluidos,
-        'total_livros_geral': total_livros_geral,
-    }
+    return calcular_estatisticas_agregadas(user)
+
+def _nome_livro_no_ciclo(livro):
+    """Nome curto do livro no resumo do ciclo"""
+    if livro.categoria and livro.categoria.nome == 'Sequência':
+        return f"Livro {livro.numero}"
+    if livro.categoria and livro.categoria.nome == 'ABC':
+        return f"Aulas de Crianças - Série {livro.numero}"
+    return str(livro)
+
+
+def _estudos_do_ciclo_por_categoria(blocos, contador):
+    """``{categoria: {'count', 'cor', 'livros': {nome: quantidade}}}`` de um contador"""
+    por_categoria = {}
+    for bloco in blocos:
+        livros = {}
+        for item in bloco['livros']:
+            if item[contador]:
+                nome = _nome_livro_no_ciclo(item['livro'])
+                livros[nome] = livros.get(nome, 0) + item[contador]
+        if livros:
+            por_categoria[bloco['nome'] or 'Sem Categoria'] = {
+                'count': bloco[contador],
+                'cor': bloco['cor'] or '#6c757d',
+                'livros': livros,
+            }
+    return por_categoria
+
 
 def calcular_atividades_novas_ciclo(user, configuracao):
     """Calcula quantas atividades e livros novos foram iniciados no ciclo atual"""
@@ -866,117 +719,17 @@ def calcular_atividades_novas_ciclo(user, configuracao):
             'numero_ciclo': ciclo_info['numero'],
         }
     
-    # Contar livros iniciados no ciclo atual
-    livros_novos = EstudoAtual.objects.filter(
-        contato__owner=user,
-        created_at__date__gte=data_inicio_ciclo,
-        created_at__date__lte=data_fim_ciclo
-    ).count()
-    
-    # Contar estudos concluídos no ciclo atual
-    livros_concluidos_ciclo = HistoricoEstudo.objects.filter(
-        contato__owner=user,
-        created_at__date__gte=data_inicio_ciclo,
-        created_at__date__lte=data_fim_ciclo,
-        status='concluido'
-    ).count()
-    
-    # Separar livros iniciados por categoria
-    from django.db.models import Count
-    from collections import defaultdict
-    livros_iniciados_por_categoria = {}
-    estudos_novos = EstudoAtual.objects.filter(
-        contato__owner=user,
-        created_at__date__gte=data_inicio_ciclo,
-        created_at__date__lte=data_fim_ciclo
-    ).select_related('livro__categoria')
-    
-    for estudo in estudos_novos:
-        livro = estudo.livro
-        categoria_nome = livro.categoria.nome if livro.categoria else 'Sem Categoria'
-        categoria_cor = livro.categoria.cor if livro.categoria else '#6c757d'
-        
-        # Determinar nome do livro baseado na categoria
-        if livro.categoria and livro.categoria.nome == 'Sequência':
-            nome_livro = f"Livro {livro.numero}"
-        elif livro.categoria and livro.categoria.nome == 'ABC':
-            nome_livro = f"Aulas de Crianças - Série {livro.numero}"
-        else:
-            nome_livro = str(livro)
-        
-        if categoria_nome not in livros_iniciados_por_categoria:
-            livros_iniciados_por_categoria[categoria_nome] = {
-                'count': 0,
-                'cor': categoria_cor,
-                'livros': defaultdict(int)
-            }
-        
-        livros_iniciados_por_categoria[categoria_nome]['count'] += 1
-        livros_iniciados_por_categoria[categoria_nome]['livros'][nome_livro] += 1
-    
-    # Converter defaultdict para dict normal para o template
-    for categoria in livros_iniciados_por_categoria:
-        livros_iniciados_por_categoria[categoria]['livros'] = dict(livros_iniciados_por_categoria[categoria]['livros'])
-    
-    # Separar livros concluídos por categoria
-    livros_concluidos_por_categoria = {}
-    estudos_concluidos = HistoricoEstudo.objects.filter(
-        contato__owner=user,
-        created_at__date__gte=data_inicio_ciclo,
-        created_at__date__lte=data_fim_ciclo,
-        status='concluido'
-    ).select_related('livro__categoria')
-    
-    for historico in estudos_concluidos:
-        livro = historico.livro
-        categoria_nome = livro.categoria.nome if livro.categoria else 'Sem Categoria'
-        categoria_cor = livro.categoria.cor if livro.categoria else '#6c757d'
-        
-        # Determinar nome do livro baseado na categoria
-        if livro.categoria and livro.categoria.nome == 'Sequência':
-            nome_livro = f"Livro {livro.numero}"
-        elif livro.categoria and livro.categoria.nome == 'ABC':
-            nome_livro = f"Aulas de Crianças - Série {livro.numero}"
-        else:
-            nome_livro = str(livro)
-        
-        if categoria_nome not in livros_concluidos_por_categoria:
-            livros_concluidos_por_categoria[categoria_nome] = {
-                'count': 0,
-                'cor': categoria_cor,
-                'livros': defaultdict(int)
-            }
-        
-        livros_concluidos_por_categoria[categoria_nome]['count'] += 1
-        livros_concluidos_por_categoria[categoria_nome]['livros'][nome_livro] += 1
-    
-    # Converter defaultdict para dict normal para o template
-    for categoria in livros_concluidos_por_categoria:
-        livros_concluidos_por_categoria[categoria]['livros'] = dict(livros_concluidos_por_categoria[categoria]['livros'])
-    
-    # Contar atividades criadas especificamente para este ciclo
-    numero_ciclo_atual = ciclo_info['numero']
-    
-    # Contar atividades novas baseado no campo numero_ciclo_criacao
-    grupos_prejovens_novos = GrupoPreJovens.objects.filter(
-        owner=user,
-        numero_ciclo_criacao=numero_ciclo_atual
-    ).count()
-    
-    aulas_criancas_novas = AulaCrianca.objects.filter(
-        owner=user,
-        numero_ciclo_criacao=numero_ciclo_atual
-    ).count()
-    
-    circulos_estudo_novos = CirculoEstudo.objects.filter(
-        owner=user,
-        numero_ciclo_criacao=numero_ciclo_atual
-    ).count()
+    # Estudos iniciados e concluídos no ciclo, agrupados por livro
+    blocos = progresso_por_categoria(
+        user, criado_entre(data_inicio_ciclo, data_fim_ciclo), catalogo_completo=False
+    )
+    livros_iniciados_por_categoria = _estudos_do_ciclo_por_categoria(blocos, 'iniciados')
+    livros_concluidos_por_categoria = _estudos_do_ciclo_por_categoria(blocos, 'concluidos')
+    livros_novos = sum(bloco['iniciados'] for bloco in blocos)
+    livros_concluidos_ciclo = sum(bloco['concluidos'] for bloco in blocos)
     
-    reunioes_devocionais_novas = ReuniaoDevocional.objects.filter(
-        owner=user,
-        numero_ciclo_criacao=numero_ciclo_atual
-    ).count()
+    # Atividades criadas especificamente para este ciclo (numero_ciclo_criacao)
+    novas = contar_atividades_novas(user, ciclo_info['numero'])
     
     # Calcular taxa de conclusão
     if livros_novos > 0:
@@ -990,11 +743,8 @@ def calcular_atividades_novas_ciclo(user, configuracao):
         'livros_iniciados_por_categoria': livros_iniciados_por_categoria,
         'livros_concluidos_por_categoria': livros_concluidos_por_categoria,
         'taxa_conclusao': taxa_conclusao,
-        'grupos_prejovens_novos': grupos_prejovens_novos,
-        'aulas_criancas_novas': aulas_criancas_novas,
-        'circulos_estudo_novos': circulos_estudo_novos,
-        'reunioes_devocionais_novas': reunioes_devocionais_novas,
-        'total_atividades_novas': grupos_prejovens_novos + aulas_criancas_novas + circulos_estudo_novos + reunioes_devocionais_novas,
+        **novas,
+        'total_atividades_novas': sum(novas.values()),
         'data_inicio_ciclo': data_inicio_ciclo,
         'data_fim_ciclo': data_fim_ciclo,
         'numero_ciclo': ciclo_info['numero'],
@@ -1041,66 +791,39 @@ def salvar_atividades_inline(request):
 def calcular_dados_ciclo(user, data_inicio, data_fim, numero_ciclo=None):
     """Calcula dados de atividades, participantes e livros para um período específico ou ciclo"""
     
+    # Atividades criadas no ciclo (numero_ciclo_criacao; grupos de famílias
+    # pela data da última reunião) ou, sem ciclo, todas as do usuário
     if numero_ciclo:
-        # Filtrar por número do ciclo de criação (método preferido)
-        circulos = CirculoEstudo.objects.filter(
-            owner=user,
-            numero_ciclo_criacao=numero_ciclo
-        )
-        
-        grupos_prejovens = GrupoPreJovens.objects.filter(
-            owner=user,
-            numero_ciclo_criacao=numero_ciclo
-        )
-        
-        aulas_criancas = AulaCrianca.objects.filter(
-            owner=user,
-            numero_ciclo_criacao=numero_ciclo
-        )
-        
-        reunioes_devocionais = ReuniaoDevocional.objects.filter(
-            owner=user,
-            numero_ciclo_criacao=numero_ciclo
-        )
-        
-        # Para grupos de famílias, usar datas como fallback
-        grupos_familias = GrupoFamilias.objects.filter(
-            owner=user,
-            data_ultima_reuniao_reflexao__range=[data_inicio, data_fim]
-        )
+        atividades = contar_atividades(user, numero_ciclo=numero_ciclo, intervalo=(data_inicio, data_fim))
     else:
-        # Fallback: filtrar por data quando não temos numero_ciclo_criacao
-        circulos = CirculoEstudo.objects.filter(owner=user)
-        grupos_prejovens = GrupoPreJovens.objects.filter(owner=user)
-        aulas_criancas = AulaCrianca.objects.filter(owner=user)
-        reunioes_devocionais = ReuniaoDevocional.objects.filter(owner=user)
-        grupos_familias = GrupoFamilias.objects.filter(owner=user)
+        atividades = contar_atividades(user)
+    devocionais = atividades['reunioes_devocionais']
     
     # Contar estudos de livros iniciados e concluídos no período
     estudos_iniciados = EstudoAtual.objects.filter(
-        contato__owner=user,
+        owner=user,
         data_inicio__range=[data_inicio, data_fim]
     ).count()
     
     estudos_concluidos = HistoricoEstudo.objects.filter(
-        contato__owner=user,
-        data_conclusao__range=[data_inicio, data_fim],
-        concluido=True
+        owner=user,
+        data_termino__range=[data_inicio, data_fim],
+        status='concluido'
     ).count()
     
-    total_livros = EstudoAtual.objects.filter(contato__owner=user).count()
+    total_livros = EstudoAtual.objects.filter(owner=user).count()
     
     return {
-        'total_circulos_estudo': circulos.count(),
-        'total_grupos_prejovens': grupos_prejovens.count(),
-        'total_aulas_criancas': aulas_criancas.count(),
-        'total_reunioes_devocionais': reunioes_devocionais.count(),
-        'total_grupos_familias': grupos_familias.count(),
-        'participantes_circulos': sum(c.participantes.count() for c in circulos),
-        'participantes_prejovens': sum(g.participantes.count() for g in grupos_prejovens),
-        'participantes_criancas': sum(a.participantes.count() for a in aulas_criancas),
-        'participantes_devocionais': sum(r.participantes.count() for r in reunioes_devocionais),
-        'participantes_grupos_familias': sum(f.membros.count() for f in grupos_familias),
+        'total_circulos_estudo': atividades['circulos_estudo']['atividades'],
+        'total_grupos_prejovens': atividades['grupos_prejovens']['atividades'],
+        'total_aulas_criancas': atividades['aulas_criancas']['atividades'],
+        'total_reunioes_devocionais': devocionais['atividades'],
+        'total_grupos_familias': atividades['grupos_familias']['atividades'],
+        'participantes_circulos': atividades['circulos_estudo']['participantes'],
+        'participantes_prejovens': atividades['grupos_prejovens']['participantes'],
+        'participantes_criancas': atividades['aulas_criancas']['participantes'],
+        'participantes_devocionais': devocionais['participantes'],
+        'participantes_grupos_familias': atividades['grupos_familias']['participantes'],
         'total_livros': total_livros,
         'livros_iniciados': estudos_iniciados,
         'livros_concluidos': estudos_concluidos,
@@ -1167,187 +890,27 @@ def encerrar_ciclo_atual(request):
         messages.error(request, "Método não permitido.")
         return redirect('contact:dashboard_estatisticas')
     
-    configuracao = ConfiguracaoEstatisticas.objects.filter(owner=request.user, ativo=True).first()
+    resultado = encerrar_ciclo(request.user)
+    status = resultado['status']
+    numero_ciclo = resultado['numero_ciclo']
     
-    if not configuracao:
+    if status == encerramento.SEM_PLANO:
         messages.error(request, "Configure primeiro o sistema de ciclos.")
         return redirect('contact:editar_configuracao')
     
-    # Calcular ciclo atual
-    ciclo_atual = configuracao.calcular_ciclo_atual()
-    
-    if not ciclo_atual.get('numero'):
+    if status == encerramento.SEM_CICLO:
         messages.error(request, "Não há ciclo ativo para encerrar.")
         return redirect('contact:dashboard_estatisticas')
     
-    # Verificar se já existe histórico para este ciclo
-    historico_existente = HistoricoCiclo.objects.filter(
-        configuracao=configuracao,
-        numero_ciclo=ciclo_atual['numero']
-    ).first()
-    
-    if historico_existente:
-        messages.warning(request, f"O Ciclo {ciclo_atual['numero']} já foi encerrado anteriormente.")
+    if status == encerramento.JA_ENCERRADO:
+        messages.warning(request, f"O Ciclo {numero_ciclo} já foi encerrado anteriormente.")
         return redirect('contact:dashboard_estatisticas')
     
-    # Coletar estatísticas atuais automaticamente
-    estatisticas_editaveis = EstatisticasEditaveis.objects.filter(owner=request.user).first()
-    estatisticas_bd = calcular_estatisticas_bd(request.user)
-    
-    # NOVO: Calcular atividades novas criadas especificamente neste ciclo
-    atividades_novas_ciclo = calcular_atividades_novas_ciclo(request.user, configuracao)
-    
-    if not estatisticas_editaveis:
+    if status == encerramento.SEM_ESTATISTICAS:
         messages.error(request, "Não há estatísticas para registrar. Configure primeiro suas atividades.")
         return redirect('contact:editar_estatisticas')
     
-    # Criar histórico do ciclo salvando AMBOS os dados editáveis E os dados do sistema
-    # para reproduzir fielmente o que era exibido no dashboard
-    historico = HistoricoCiclo.objects.create(
-        configuracao=configuracao,
-        numero_ciclo=ciclo_atual['numero'],
-        data_inicio=ciclo_atual['inicio'],
-        data_fim=ciclo_atual['fim'],
-        
-        # DADOS EDITÁVEIS (seção "Completo" do dashboard)
-        total_circulos_estudo=estatisticas_editaveis.total_circulos_estudo,
-        total_grupos_prejovens=estatisticas_editaveis.total_grupos_prejovens,
-        total_aulas_criancas=estatisticas_editaveis.total_aulas_criancas,
-        total_reunioes_devocionais=estatisticas_editaveis.total_reunioes_devocionais,
-        total_grupos_familias=0,  # Não há campo editável para isso
-        
-        participantes_circulos=estatisticas_editaveis.participantes_circulos,
-        participantes_prejovens=estatisticas_editaveis.participantes_prejovens,
-        participantes_criancas=estatisticas_editaveis.participantes_criancas,
-        participantes_devocionais=estatisticas_editaveis.participantes_devocionais,
-        participantes_grupos_familias=0,  # Não há campo editável
-        
-        participantes_circulos_bahais=estatisticas_editaveis.participantes_circulos_bahais,
-        participantes_prejovens_bahais=estatisticas_editaveis.participantes_prejovens_bahais,
-        participantes_criancas_bahais=estatisticas_editaveis.participantes_criancas_bahais,
-        participantes_devocionais_bahais=estatisticas_editaveis.participantes_devocionais_bahais,
-        participantes_grupos_familias_bahais=0,
-        
-        # DADOS DO SISTEMA (seção "Sistema" do dashboard)
-        sistema_circulos_estudo=estatisticas_bd['circulos_estudo'],
-        sistema_grupos_prejovens=estatisticas_bd['grupos_prejovens'],
-        sistema_aulas_criancas=estatisticas_bd['aulas_criancas'],
-        sistema_reunioes_devocionais=estatisticas_bd['reunioes_devocionais'],
-        sistema_grupos_familias=estatisticas_bd['total_familias'],
-        
-        sistema_participantes_circulos=estatisticas_bd['participantes_circulos'],
-        sistema_participantes_prejovens=estatisticas_bd['participantes_prejovens'],
-        sistema_participantes_criancas=estatisticas_bd['participantes_criancas'],
-        sistema_participantes_devocionais=estatisticas_bd['participantes_devocionais'],
-        sistema_participantes_familias=0,  # Pode ser calculado se necessário
-        
-        sistema_participantes_circulos_bahais=estatisticas_bd['participantes_circulos_bahais'],
-        sistema_participantes_prejovens_bahais=estatisticas_bd['participantes_prejovens_bahais'],
-        sistema_participantes_criancas_bahais=estatisticas_bd['participantes_criancas_bahais'],
-        sistema_participantes_devocionais_bahais=estatisticas_bd['participantes_devocionais_bahais'],
-        sistema_participantes_familias_bahais=0,
-        
-        # DEMOGRAFIA DO SISTEMA
-        sistema_total_criancas=estatisticas_bd['criancas_sistema'],
-        sistema_total_prejovens=estatisticas_bd['prejovens_sistema'],
-        sistema_total_jovens=estatisticas_bd['jovens_sistema'],
-        sistema_total_adultos=estatisticas_bd['adultos_sistema'],
-        
-        # LIVROS (dados do sistema como estavam sendo exibidos)
-        total_livros=estatisticas_bd['total_livros_geral'],
-        livros_iniciados=estatisticas_bd['total_livros_iniciados'],
-        livros_concluidos=estatisticas_bd['total_livros_concluidos'],
-        
-        # LIVROS POR CATEGORIA (dados do sistema)
-        livros_sequencia_iniciados=estatisticas_bd['livros_por_categoria'].get('Sequência', {}).get('iniciados', 0),
-        livros_sequencia_concluidos=estatisticas_bd['livros_por_categoria'].get('Sequência', {}).get('concluidos', 0),
-        livros_abc_iniciados=estatisticas_bd['livros_por_categoria'].get('ABC', {}).get('iniciados', 0),
-        livros_abc_concluidos=estatisticas_bd['livros_por_categoria'].get('ABC', {}).get('concluidos', 0),
-        livros_prejovens_iniciados=estatisticas_bd['livros_por_categoria'].get('Pré-jovens', {}).get('iniciados', 0),
-        livros_prejovens_concluidos=estatisticas_bd['livros_por_categoria'].get('Pré-jovens', {}).get('concluidos', 0),
-        livros_outros_iniciados=sum(stats.get('iniciados', 0) for nome, stats in estatisticas_bd['livros_por_categoria'].items() if nome not in ['Sequência', 'ABC', 'Pré-jovens']),
-        livros_outros_concluidos=sum(stats.get('concluidos', 0) for nome, stats in estatisticas_bd['livros_por_categoria'].items() if nome not in ['Sequência', 'ABC', 'Pré-jovens']),
-        
-        # NOVO: Atividades criadas especificamente neste ciclo
-        novas_circulos_estudo=atividades_novas_ciclo['circulos_estudo_novos'],
-        novas_grupos_prejovens=atividades_novas_ciclo['grupos_prejovens_novos'],
-        novas_aulas_criancas=atividades_novas_ciclo['aulas_criancas_novas'],
-        novas_reunioes_devocionais=atividades_novas_ciclo['reunioes_devocionais_novas'],
-        
-        # NOVO: Livros iniciados especificamente neste ciclo
-        novos_livros_iniciados=atividades_novas_ciclo['livros_novos'],
-        novos_livros_concluidos=atividades_novas_ciclo['livros_concluidos_ciclo'],
-        
-        # NOVO: Detalhamento de livros novos por categoria
-        novos_livros_sequencia=atividades_novas_ciclo['livros_iniciados_por_categoria'].get('Sequência', {}).get('count', 0),
-        novos_livros_abc=atividades_novas_ciclo['livros_iniciados_por_categoria'].get('ABC', {}).get('count', 0),
-        novos_livros_prejovens=atividades_novas_ciclo['livros_iniciados_por_categoria'].get('Pré-jovens', {}).get('count', 0),
-        novos_livros_outros=sum(cat.get('count', 0) for nome, cat in atividades_novas_ciclo['livros_iniciados_por_categoria'].items() if nome not in ['Sequência', 'ABC', 'Pré-jovens']),
-        
-        owner=request.user
-    )
-    
-    # Salvar detalhes específicos de cada livro
-    from ..models import DetalheLivroHistorico, EstatisticasEditaveisHistorico
-    for livro in estatisticas_bd['livros_detalhados']:
-        # Mapear categoria para o formato do modelo
-        categoria_map = {
-            'Sequência': 'sequencia',
-            'ABC': 'abc',
-            'Pré-jovens': 'prejovens'
-        }
-        categoria = categoria_map.get(livro['categoria'], 'outros')
-        
-        DetalheLivroHistorico.objects.create(
-            historico_ciclo=historico,
-            categoria=categoria,
-            nome_livro=livro['nome'],
-            quantidade_iniciados=livro['iniciados'],
-            quantidade_concluidos=livro['concluidos']
-        )
-    
-    # Salvar cópia completa das estatísticas editáveis
-    EstatisticasEditaveisHistorico.objects.create(
-        historico_ciclo=historico,
-        # Atividades
-        total_grupos_prejovens=estatisticas_editaveis.total_grupos_prejovens,
-        participantes_prejovens=estatisticas_editaveis.participantes_prejovens,
-        participantes_prejovens_bahais=estatisticas_editaveis.participantes_prejovens_bahais,
-        
-        total_aulas_criancas=estatisticas_editaveis.total_aulas_criancas,
-        participantes_criancas=estatisticas_editaveis.participantes_criancas,
-        participantes_criancas_bahais=estatisticas_editaveis.participantes_criancas_bahais,
-        
-        total_circulos_estudo=estatisticas_editaveis.total_circulos_estudo,
-        participantes_circulos=estatisticas_editaveis.participantes_circulos,
-        participantes_circulos_bahais=estatisticas_editaveis.participantes_circulos_bahais,
-        
-        total_reunioes_devocionais=estatisticas_editaveis.total_reunioes_devocionais,
-        participantes_devocionais=estatisticas_editaveis.participantes_devocionais,
-        participantes_devocionais_bahais=estatisticas_editaveis.participantes_devocionais_bahais,
-        
-        # Detalhamentos
-        animadores_prejovens=estatisticas_editaveis.animadores_prejovens,
-        locais_prejovens=estatisticas_editaveis.locais_prejovens,
-        professores_criancas=estatisticas_editaveis.professores_criancas,
-        series_criancas=estatisticas_editaveis.series_criancas,
-        tutores_circulos=estatisticas_editaveis.tutores_circulos,
-        livros_circulos=estatisticas_editaveis.livros_circulos,
-        circulos_concluidos=estatisticas_editaveis.circulos_concluidos,
-        facilitadores_devocionais=estatisticas_editaveis.facilitadores_devocionais,
-        
-        # Demografia
-        total_criancas=estatisticas_editaveis.total_criancas,
-        total_prejovens=estatisticas_editaveis.total_prejovens,
-        total_jovens=estatisticas_editaveis.total_jovens,
-        total_adultos=estatisticas_editaveis.total_adultos,
-    )
-    
-    # Calcular crescimento
-    from .historico_views import calcular_crescimento
-    calcular_crescimento(historico)
-    
-    messages.success(request, f"🎉 Ciclo {ciclo_atual['numero']} encerrado com sucesso! Todas as informações foram salvas no histórico. Bem-vindo ao Ciclo {ciclo_atual['numero'] + 1}!")
+    messages.success(request, f"🎉 Ciclo {numero_ciclo} encerrado com sucesso! Todas as informações foram salvas no histórico. Bem-vindo ao Ciclo {numero_ciclo + 1}!")
     return redirect('contact:dashboard_estatisticas')
 
 
@@ -1362,31 +925,47 @@ def obter_dados_crescimento(user):
             'ciclo_atual': None
         }
     
-    # Buscar históricos dos últimos 5 ciclos
-    historicos = HistoricoCiclo.objects.filter(
-        configuracao=configuracao
-    ).order_by('-numero_ciclo')[:5]
-    
-    # Adicionar livros detalhados para cada histórico
-    from ..models import DetalheLivroHistorico
-    for historico in historicos:
-        historico.livros_detalhados = DetalheLivroHistorico.objects.filter(
-            historico_ciclo=historico
-        ).order_by('categoria', 'nome_livro')
-    
-    # Calcular crescimento total
-    crescimento_total = {
-        'atividades': sum(h.crescimento_atividades for h in historicos) / len(historicos) if historicos else 0,
-        'participantes': sum(h.crescimento_participantes for h in historicos) / len(historicos) if historicos else 0,
-        'livros': sum(h.crescimento_livros for h in historicos) / len(historicos) if historicos else 0,
-    }
+    # Últimos ciclos com o crescimento calculado na mesma consulta e os livros detalhados
+    historicos = list(
+        anotar_crescimento(HistoricoCiclo.objects.filter(configuracao=configuracao))
+        .order_by('-numero_ciclo')
+        .prefetch_related(Prefetch(
+            'detalhes_livros',
+            queryset=DetalheLivroHistorico.objects.order_by('categoria', 'nome_livro'),
+            to_attr='livros_detalhados',
+        ))[:CICLOS_RESUMO]
+    )
     
     # Dados do ciclo atual
     ciclo_atual_info = configuracao.calcular_ciclo_atual()
     
     return {
-        'ciclos_historicos': list(historicos),
-        'crescimento_total': crescimento_total,
+        'ciclos_historicos': historicos,
+        'crescimento_total': crescimento_medio(historicos),
         'ciclo_atual': ciclo_atual_info,
         'configuracao': configuracao
-    }
\ No newline at end of file
+    }
+
+
+@login_required
+def serie_crescimento(request):
+    """
+    JSON com a série de crescimento de todos os ciclos de um plano do
+    usuário (``?plano=<id>``, padrão: o plano ativo) para gráficos;
+    ``?pontos=N`` reduz planos longos a N pontos.
+    """
+    planos = ConfiguracaoEstatisticas.objects.filter(owner=request.user)
+    plano_id = request.GET.get('plano')
+    if plano_id:
+        configuracao = planos.filter(pk=plano_id).first() if plano_id.isdigit() else None
+    else:
+        configuracao = planos.filter(ativo=True).first()
+    if configuracao is None:
+        return JsonResponse({'error': 'Plano não encontrado'}, status=404)
+
+    pontos = request.GET.get('pontos', '')
+    max_pontos = int(pontos) if pontos.isdigit() and int(pontos) > 0 else None
+    return JsonResponse({
+        'plano': {'id': configuracao.pk, 'titulo': configuracao.titulo_plano},
+        'ciclos': serie_de_crescimento(configuracao, max_pontos),
+    })
@@ -1,5 +1,5 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator
+from contact.paginacao import paginar
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from contact.models import CirculoEstudo
@@ -14,9 +14,7 @@ class StudyCircleHistoricoMixin(HistoricoAutomaticoMixin):
 @login_required(login_url="contact:login")
 def study_circle_list(request):
     circulos = CirculoEstudo.objects.filter(show=True, owner=request.user).order_by("-id")
-    paginator = Paginator(circulos, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginar(request, circulos)
     context = {
         "page_obj": page_obj,
         "site_title": "Círculos de Estudo - "
@@ -66,9 +64,6 @@ def study_circle_create(request):
         form = CirculoEstudoForm(user=request.user)
     context = {
         "form": form,
-        "participantes": form.fields['participantes'].queryset,
-        "professores": form.fields['tutor'].queryset,
-        "ruas": form.fields['rua'].queryset,
         "site_title": "Criar Círculo de Estudo"
     }
     return render(request, "contact/partials/study_circle-form.html", context)
@@ -89,9 +84,6 @@ def study_circle_update(request, pk):
     context = {
         "form": form,
         "circulo": circulo,
-        "participantes": form.fields['participantes'].queryset,
-        "professores": form.fields['tutor'].queryset,
-        "ruas": form.fields['rua'].queryset,
         "site_title": f"Editar Círculo: {circulo.nome}"
     }
     return render(request, "contact/partials/study_circle-form.html", context)
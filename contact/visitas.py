@@ -0,0 +1,97 @@
+"""
+Visitas às famílias: registro das visitas e fila de quem visitar primeiro.
+
+Cada visita é uma linha de ``VisitaFamilia`` (o registro só cresce) e
+``Familia.data_ultima_reuniao`` acompanha a mais recente, para que a fila
+ordene pelo índice ``(owner, data_ultima_reuniao)`` sem agregar o
+histórico.
+
+A fila é ordenada no banco: primeiro pelo atraso (sem visita, depois de
+``DIAS_VISITA_ATRASADA`` e de ``DIAS_VISITA_ALERTA`` dias), depois as
+famílias com reunião devocional, o nível de envolvimento e a visita mais
+antiga. Os limites de atraso viram datas em Python, então as comparações
+usam o índice em qualquer banco.
+"""
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Case, DateField, DurationField, F, IntegerField, Q, Value, When
+
+from .models import Familia, VisitaFamilia
+
+
+DIAS_VISITA_ALERTA = 15
+DIAS_VISITA_ATRASADA = 20
+
+# Atraso da visita (maior primeiro na fila)
+SEM_VISITA = 3
+ATRASADA = 2
+EM_ALERTA = 1
+EM_DIA = 0
+
+# Nível de envolvimento (texto livre na família): peso na fila
+PESOS_ENVOLVIMENTO = {
+    'alto': 2,
+    'médio': 1,
+    'medio': 1,
+    'baixo': 0,
+}
+
+ORDEM_FILA = ('-atraso', '-reuniao_devocional', '-envolvimento', 'data_ultima_reuniao')
+
+
+def anotar_visitas(familias, data_referencia=None):
+    """
+    Anota ``atraso`` (``SEM_VISITA``, ``ATRASADA``, ``EM_ALERTA`` ou
+    ``EM_DIA``), ``envolvimento`` (peso de ``PESOS_ENVOLVIMENTO``, -1 se
+    não informado) e ``tempo_sem_visita`` (``timedelta``, nulo sem visita).
+    """
+    hoje = data_referencia or date.today()
+    return familias.annotate(
+        atraso=Case(
+            When(data_ultima_reuniao__isnull=True, then=Value(SEM_VISITA)),
+            When(data_ultima_reuniao__lte=hoje - timedelta(days=DIAS_VISITA_ATRASADA), then=Value(ATRASADA)),
+            When(data_ultima_reuniao__lte=hoje - timedelta(days=DIAS_VISITA_ALERTA), then=Value(EM_ALERTA)),
+            default=Value(EM_DIA),
+            output_field=IntegerField(),
+        ),
+        envolvimento=Case(
+            *[
+                When(nivel_envolvimento__iexact=nivel, then=Value(peso))
+                for nivel, peso in PESOS_ENVOLVIMENTO.items()
+            ],
+            default=Value(-1),
+            output_field=IntegerField(),
+        ),
+        tempo_sem_visita=Case(
+            When(
+                data_ultima_reuniao__isnull=False,
+                then=Value(hoje, output_field=DateField()) - F('data_ultima_reuniao'),
+            ),
+            output_field=DurationField(),
+        ),
+    )
+
+
+def fila_de_visitas(owner, data_referencia=None):
+    """Famílias visíveis do usuário anotadas por ``anotar_visitas``; ordene por ``ORDEM_FILA``"""
+    return anotar_visitas(Familia.objects.filter(owner=owner, show=True), data_referencia)
+
+
+def registrar_visitas(owner, familia_ids, data=None):
+    """
+    Registra uma visita em ``data`` (padrão: hoje) para cada família do
+    usuário em ``familia_ids``, com um único ``INSERT``, e adianta a
+    ``data_ultima_reuniao`` das que tinham uma visita mais antiga. Retorna
+    quantas visitas foram registradas (ids alheios são ignorados).
+    """
+    data = data or date.today()
+    with transaction.atomic():
+        ids = list(Familia.objects.filter(owner=owner, pk__in=set(familia_ids)).values_list('pk', flat=True))
+        VisitaFamilia.objects.bulk_create(
+            [VisitaFamilia(familia_id=pk, owner=owner, data=data) for pk in ids]
+        )
+        Familia.objects.filter(pk__in=ids).filter(
+            Q(data_ultima_reuniao__isnull=True) | Q(data_ultima_reuniao__lt=data)
+        ).update(data_ultima_reuniao=data)
+    return len(ids)
@@ -1,17 +1,65 @@
 # filepath: c:\Users\lefaz\Documents\GitHub\AgendaTelefonica\contact\widgets.py
-from django_select2.forms import ModelSelect2MultipleWidget
-from .models import Contact
+from django import forms
+from django.urls import reverse
 
-class ParticipanteWidget(ModelSelect2MultipleWidget):
-    model = Contact
-    search_fields = [
-        "first_name__icontains",
-        "last_name__icontains",
-    ]
 
-    def get_queryset(self):
-        qs = super().get_queryset()
-        user = getattr(self.request, "user", None)
-        if user and user.is_authenticated:
-            return qs.filter(owner=user)
-        return qs.none()
\ No newline at end of file
+class ListaComBuscaWidget(forms.Widget):
+    """
+    Lista de radios (``multipla=False``) ou checkboxes com campo de busca,
+    alimentada por ``EscolhasDoUsuario`` em vez de iterar o queryset do
+    campo. Listas pequenas vêm inteiras e são filtradas no navegador; acima
+    do limite só os selecionados são renderizados e a busca vai ao servidor.
+    Campos de escolha única opcionais ganham o radio "Nenhum" (valor vazio),
+    para que o vínculo possa ser desfeito.
+    """
+    template_name = 'contact/widgets/lista_com_busca.html'
+
+    def __init__(self, tipo, escolhas, multipla=True, destacado=None, attrs=None):
+        super().__init__(attrs)
+        self.tipo = tipo
+        self.escolhas = escolhas
+        self.multipla = multipla
+        self.destacado = destacado
+
+    def format_value(self, value):
+        if value is None or value == '':
+            return []
+        if not isinstance(value, (list, tuple, set)):
+            value = [value]
+        return [str(getattr(v, 'pk', v)) for v in value if v not in (None, '')]
+
+    def value_from_datadict(self, data, files, name):
+        if self.multipla:
+            return data.getlist(name) if hasattr(data, 'getlist') else data.get(name)
+        return data.get(name)
+
+    def value_omitted_from_data(self, data, files, name):
+        # Checkboxes desmarcados não vão no POST; sem nenhum radio marcado,
+        # o campo também fica vazio em vez de manter o valor anterior
+        return False
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        selecionados = set(context['widget']['value'])
+        grande = self.escolhas.grande(self.tipo)
+        opcoes = (
+            self.escolhas.selecionadas(self.tipo, selecionados) if grande
+            else self.escolhas.opcoes(self.tipo)
+        )
+        context['widget'].update({
+            'tipo_input': 'checkbox' if self.multipla else 'radio',
+            'busca_url': reverse('contact:escolhas_busca', args=[self.tipo]) if grande else '',
+            'permite_nenhum': not self.multipla and not self.is_required,
+            'nenhum_selecionado': not selecionados,
+            'opcoes': [
+                {
+                    'valor': pk,
+                    'rotulo': rotulo,
+                    'detalhe': detalhe,
+                    'selecionada': str(pk) in selecionados,
+                    'destacada': self.destacado is not None and str(pk) == str(self.destacado),
+                }
+                for pk, rotulo, detalhe in opcoes
+            ],
+        })
+        return context